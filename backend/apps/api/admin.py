@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from .models import APIKey, APILog
+from .models import APIKey, APILog, APILogRollup
+from .sketch import LatencyHistogram
 
 @admin.register(APIKey)
 class APIKeyAdmin(admin.ModelAdmin):
@@ -61,3 +62,20 @@ class APILogAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         return False  # لاگ‌ها قابل ویرایش نیستند
+
+
+@admin.register(APILogRollup)
+class APILogRollupAdmin(admin.ModelAdmin):
+    list_display = ('bucket_start', 'granularity', 'method', 'path', 'response_code', 'request_count', 'p95_ms')
+    list_filter = ('granularity', 'method', 'response_code')
+    search_fields = ('path',)
+    date_hierarchy = 'bucket_start'
+    readonly_fields = [field.name for field in APILogRollup._meta.fields]
+
+    @admin.display(description=_('صدک ۹۵ (میلی‌ثانیه)'))
+    def p95_ms(self, obj):
+        value = LatencyHistogram(obj.histogram).quantile(0.95)
+        return round(value, 2) if value is not None else '-'
+
+    def has_add_permission(self, request):
+        return False  # تجمیع‌ها فقط با دستور rollup_api_logs ایجاد می‌شوند
@@ -0,0 +1,146 @@
+"""
+کش درون‌فرایندی کلیدهای API
+
+APIKeyMiddleware برای هر درخواست دارای X-API-Key به‌جای کوئری APIKey و کاربر آن، نسخه
+کش‌شده کلید را می‌خواند: شناسه، کاربر، تاریخ انقضا، محدودیت درخواست و لیست شبکه‌های
+مجاز که یک بار با ipaddress پارس شده است (هر خط allowed_ips یک IP یا یک بازه CIDR).
+کلیدهای نامعتبر هم کش می‌شوند تا درخواست‌های تکراری با کلید اشتباه به پایگاه داده نرسند.
+
+سیگنال‌های ذخیره و حذف APIKey و کاربر ورودی‌های مربوط را باطل می‌کنند. چون کش در
+حافظه هر فرایند است، تغییرات انجام‌شده در فرایندهای دیگر حداکثر پس از API_KEY_CACHE_TTL
+اعمال می‌شوند.
+
+زمان آخرین استفاده حداکثر یک بار در هر API_KEY_LAST_USED_INTERVAL ثانیه به شمارنده‌های
+write-behind (apps.core.counters) سپرده می‌شود و بدون ارسال سیگنال نوشته می‌شود.
+
+تنظیمات:
+    API_KEY_CACHE_TTL: مدت اعتبار ورودی‌ها به ثانیه (پیش‌فرض ۶۰؛ صفر برای غیرفعال کردن کش)
+    API_KEY_CACHE_SIZE: حداکثر تعداد ورودی‌ها (پیش‌فرض ۱۰۰۰۰)
+    API_KEY_LAST_USED_INTERVAL: فاصله ثبت زمان آخرین استفاده به ثانیه (پیش‌فرض ۶۰)
+"""
+import copy
+import ipaddress
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.core import counters, instrumentation
+from apps.core.utils import log_error
+from .models import APIKey
+
+
+class ResolvedKey:
+    """اطلاعات لازم برای احراز هویت با یک کلید API"""
+
+    __slots__ = ('id', 'user_id', 'user', 'expires_at', 'rate_limit', 'networks', 'last_used_at')
+
+    def __init__(self, api_key):
+        self.id = api_key.id
+        self.user_id = api_key.user_id
+        self.user = api_key.user
+        self.expires_at = api_key.expires_at
+        self.rate_limit = api_key.rate_limit
+        self.networks = parse_networks(api_key.allowed_ips)
+        self.last_used_at = api_key.last_used_at
+
+    @property
+    def is_expired(self):
+        return self.expires_at is not None and timezone.now() > self.expires_at
+
+    def allows_ip(self, ip):
+        """بدون لیست شبکه همه IPها مجازند"""
+        if not self.networks:
+            return True
+        try:
+            address = ipaddress.ip_address(ip)
+        except (TypeError, ValueError):
+            return False
+        return any(address in network for network in self.networks)
+
+    def get_user(self):
+        """نسخه جداگانه کاربر برای هر درخواست (نمونه کش‌شده تغییر نمی‌کند)"""
+        return copy.copy(self.user)
+
+
+def parse_networks(allowed_ips):
+    """تبدیل خطوط allowed_ips به شبکه‌های ipaddress (خطوط نامعتبر نادیده گرفته می‌شوند)"""
+    networks = []
+    for line in (allowed_ips or '').splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(line, strict=False))
+        except ValueError:
+            log_error(f"IP نامعتبر در لیست IPهای مجاز کلید API: {line}")
+    return tuple(networks)
+
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+_MISSING = object()
+
+
+def _ttl():
+    return getattr(settings, 'API_KEY_CACHE_TTL', 60)
+
+
+def _load(raw_key):
+    api_key = APIKey.objects.select_related('user').filter(key=raw_key, is_active=True).first()
+    return ResolvedKey(api_key) if api_key else None
+
+
+def resolve(raw_key):
+    """کلید فعال متناظر با مقدار هدر یا None"""
+    ttl = _ttl()
+    if ttl <= 0:
+        return _load(raw_key)
+
+    now = time.monotonic()
+    with _lock:
+        cached = _entries.get(raw_key, _MISSING)
+        if cached is not _MISSING and cached[0] > now:
+            _entries.move_to_end(raw_key)
+            instrumentation.record_cache(True)
+            return cached[1]
+
+    instrumentation.record_cache(False)
+    resolved = _load(raw_key)
+    with _lock:
+        _entries[raw_key] = (now + ttl, resolved)
+        _entries.move_to_end(raw_key)
+        while len(_entries) > getattr(settings, 'API_KEY_CACHE_SIZE', 10000):
+            _entries.popitem(last=False)
+    return resolved
+
+
+def invalidate(key=None, key_id=None, user_id=None):
+    """حذف ورودی‌های یک کلید (با مقدار یا شناسه) یا همه کلیدهای یک کاربر"""
+    with _lock:
+        if key is not None:
+            _entries.pop(key, None)
+        if key_id is None and user_id is None:
+            return
+        for raw_key, (_, resolved) in list(_entries.items()):
+            if resolved is not None and (resolved.id == key_id or resolved.user_id == user_id):
+                del _entries[raw_key]
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def touch(resolved):
+    """ثبت زمان آخرین استفاده در صورت گذشتن API_KEY_LAST_USED_INTERVAL از ثبت قبلی"""
+    now = timezone.now()
+    interval = timedelta(seconds=getattr(settings, 'API_KEY_LAST_USED_INTERVAL', 60))
+    if resolved.last_used_at is not None and now - resolved.last_used_at < interval:
+        return False
+    resolved.last_used_at = now
+    counters.add(APIKey, resolved.id, touched={'last_used_at': now})
+    return True
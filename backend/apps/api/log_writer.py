@@ -0,0 +1,181 @@
+"""
+ثبت بافرشده لاگ‌های API
+
+APIKeyMiddleware به‌جای یک INSERT در هر درخواست، لاگ را در یک صف محدود در حافظه
+قرار می‌دهد و یک thread پس‌زمینه ردیف‌ها را دسته‌ای با bulk_create می‌نویسد. اگر صف پر
+باشد لاگ دور ریخته و در شمارنده dropped ثبت می‌شود تا ثبت لاگ هیچ‌وقت درخواست را
+کند نکند. هنگام خروج فرایند صف تخلیه می‌شود.
+
+بدنه‌ها فقط برای محتوای متنی ذخیره و تا API_LOG_MAX_BODY_CHARS کوتاه می‌شوند؛ بدنه
+پاسخ‌های جریانی، باینری یا بزرگ‌تر از API_LOG_SKIP_BODY_BYTES ذخیره نمی‌شود.
+
+تنظیمات:
+    API_LOG_ENABLED: فعال بودن ثبت لاگ (پیش‌فرض True)
+    API_LOG_SAMPLE_RATE: نسبت نمونه‌برداری پاسخ‌های موفق بین ۰ و ۱ (خطاها همیشه ثبت می‌شوند)
+    API_LOG_QUEUE_SIZE: ظرفیت صف (پیش‌فرض ۱۰۰۰۰)
+    API_LOG_BATCH_SIZE: حداکثر تعداد ردیف هر bulk_create (پیش‌فرض ۵۰۰)
+    API_LOG_FLUSH_INTERVAL: حداکثر فاصله نوشتن دسته‌ها به ثانیه (پیش‌فرض ۱)
+    API_LOG_MAX_BODY_CHARS: حداکثر طول بدنه ذخیره‌شده (پیش‌فرض ۴۰۹۶)
+    API_LOG_SKIP_BODY_BYTES: بدنه‌های بزرگ‌تر از این اندازه ذخیره نمی‌شوند (پیش‌فرض ۶۴KB)
+    API_LOG_EAGER: نوشتن همزمان هر لاگ در همان درخواست (پیش‌فرض تنظیمات: فقط هنگام اجرای تست‌ها)
+"""
+import atexit
+import queue
+import random
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from apps.core.utils import log_error
+from .models import APILog
+
+TEXT_CONTENT_TYPES = ('application/json', 'text/', 'application/xml', 'application/x-www-form-urlencoded')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def should_log(status_code):
+    """نمونه‌برداری؛ پاسخ‌های خطا همیشه ثبت می‌شوند"""
+    if not _setting('API_LOG_ENABLED', True):
+        return False
+    if status_code >= 400:
+        return True
+    rate = _setting('API_LOG_SAMPLE_RATE', 1.0)
+    return rate >= 1 or random.random() < rate
+
+
+def capture_body(content, content_type, streaming=False):
+    """متن قابل ذخیره یک بدنه؛ برای محتوای جریانی، باینری یا بزرگ فقط یک توضیح کوتاه"""
+    if streaming:
+        return '[streaming body not captured]'
+    if not content:
+        return ''
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type and not content_type.startswith(TEXT_CONTENT_TYPES):
+        return f'[{content_type} body not captured: {len(content)} bytes]'
+    if len(content) > _setting('API_LOG_SKIP_BODY_BYTES', 64 * 1024):
+        return f'[body not captured: {len(content)} bytes]'
+
+    max_chars = _setting('API_LOG_MAX_BODY_CHARS', 4096)
+    if isinstance(content, bytes):
+        content = content[:max_chars * 4].decode('utf-8', errors='replace')
+    if len(content) > max_chars:
+        return content[:max_chars] + '…[truncated]'
+    return content
+
+
+class APILogWriter:
+    """صف محدود لاگ‌ها و thread نویسنده دسته‌ای"""
+
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._metrics = {'enqueued': 0, 'written': 0, 'dropped': 0, 'sampled_out': 0, 'failed': 0}
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._metrics[name] += value
+
+    def metrics(self):
+        """شمارنده‌های صف؛ dropped تعداد لاگ‌های دورریخته‌شده به علت پر بودن صف است"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics['queued'] = self._queue.qsize() if self._queue else 0
+        return metrics
+
+    def _ensure_queue(self):
+        if self._queue is None:
+            with self._lock:
+                if self._queue is None:
+                    self._queue = queue.Queue(maxsize=_setting('API_LOG_QUEUE_SIZE', 10000))
+                    atexit.register(self.shutdown)
+        return self._queue
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='api-log-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, status_code, **fields):
+        """قرار دادن یک لاگ در صف (بدون بلاک شدن)"""
+        if not should_log(status_code):
+            self._count('sampled_out')
+            return False
+        log_queue = self._ensure_queue()
+        try:
+            log_queue.put_nowait(APILog(response_code=status_code, **fields))
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('enqueued')
+
+        if _setting('API_LOG_EAGER', False):
+            self.flush()
+        else:
+            self._ensure_thread()
+        return True
+
+    def _drain(self, limit, timeout=None):
+        batch = []
+        log_queue = self._ensure_queue()
+        try:
+            batch.append(log_queue.get(timeout=timeout) if timeout else log_queue.get_nowait())
+            while len(batch) < limit:
+                batch.append(log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        try:
+            APILog.objects.bulk_create(batch, batch_size=len(batch))
+            self._count('written', len(batch))
+        except Exception as e:
+            self._count('failed', len(batch))
+            log_error(f"خطا در ثبت دسته‌ای {len(batch)} لاگ API", e)
+
+    def flush(self):
+        """نوشتن همه لاگ‌های صف در thread فعلی"""
+        batch_size = _setting('API_LOG_BATCH_SIZE', 500)
+        with self._flush_lock:
+            while True:
+                batch = self._drain(batch_size)
+                if not batch:
+                    return
+                self._write(batch)
+
+    def _run(self):
+        batch_size = _setting('API_LOG_BATCH_SIZE', 500)
+        interval = _setting('API_LOG_FLUSH_INTERVAL', 1.0)
+        while not self._stop.is_set():
+            batch = self._drain(batch_size, timeout=interval)
+            if not batch:
+                continue
+            try:
+                # اتصال این thread طبق CONN_MAX_AGE بین دسته‌ها باز می‌ماند
+                close_old_connections()
+                with self._flush_lock:
+                    self._write(batch)
+            except Exception as e:
+                log_error("خطا در thread ثبت لاگ‌های API", e)
+
+    def shutdown(self, timeout=5):
+        """توقف thread و تخلیه صف (هنگام خروج فرایند)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._queue is not None:
+            self.flush()
+
+
+writer = APILogWriter()
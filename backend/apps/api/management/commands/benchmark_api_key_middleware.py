@@ -0,0 +1,74 @@
+import secrets
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.api import key_cache
+from apps.api.middleware import APIKeyMiddleware
+from apps.api.models import APIKey
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    اندازه‌گیری سربار APIKeyMiddleware برای هر درخواست با و بدون کش کلیدها
+
+    view خالی است و ثبت لاگ غیرفعال می‌شود تا فقط هزینه احراز هویت با کلید اندازه‌گیری شود.
+    داده‌های آزمایشی داخل یک تراکنش ایجاد و در پایان rollback می‌شوند.
+    """
+    help = 'Benchmark per-request APIKeyMiddleware overhead with and without the key cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help='تعداد درخواست در هر حالت')
+        parser.add_argument('--networks', type=int, default=50, help='تعداد بازه‌های CIDR مجاز کلید')
+
+    def _seed(self, networks):
+        User = get_user_model()
+        suffix = uuid.uuid4().hex[:8]
+        user = User.objects.create(username=f'benchmark_{suffix}')
+        allowed = [f'10.{i // 256}.{i % 256}.0/24' for i in range(networks - 1)] + ['127.0.0.0/8']
+        return APIKey.objects.create(
+            name=f'benchmark {suffix}', key=secrets.token_hex(32), user=user,
+            allowed_ips='\n'.join(allowed), rate_limit=10 ** 9
+        )
+
+    def _measure(self, middleware, request, count):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(count):
+                middleware(request)
+            elapsed = time.perf_counter() - started
+        return elapsed / count, len(queries) / count
+
+    def _report(self, name, per_request, queries):
+        self.stdout.write(f'{name:<10} {per_request * 1_000_000:10.1f}us/request  queries/request={queries:.2f}')
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        middleware = APIKeyMiddleware(lambda request: HttpResponse('{}', content_type='application/json'))
+
+        try:
+            with transaction.atomic(), override_settings(API_LOG_ENABLED=False):
+                api_key = self._seed(options['networks'])
+                request = RequestFactory().get('/api/benchmark/', HTTP_X_API_KEY=api_key.key)
+
+                with override_settings(API_KEY_CACHE_TTL=0, API_KEY_LAST_USED_INTERVAL=0):
+                    self._report('uncached', *self._measure(middleware, request, count))
+
+                key_cache.clear()
+                middleware(request)  # پر کردن کش
+                self._report('cached', *self._measure(middleware, request, count))
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            key_cache.clear()
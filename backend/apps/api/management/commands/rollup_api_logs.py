@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.api import rollups
+
+
+class Command(BaseCommand):
+    """تجمیع لاگ‌های API و حذف لاگ‌های قدیمی (مناسب اجرای دوره‌ای با cron، مثلاً هر ۵ دقیقه)"""
+    help = 'Roll up raw API logs into per-minute/per-hour aggregates and purge expired rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-purge', action='store_true', help='بدون حذف لاگ‌ها و تجمیع‌های قدیمی')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='اندازه دسته خواندن و حذف')
+
+    def handle(self, *args, **options):
+        processed = rollups.rollup(chunk_size=options['chunk_size'])
+        self.stdout.write(f"rolled_up={processed} watermark={rollups.get_watermark()}")
+        if not options['skip_purge']:
+            deleted = rollups.purge(chunk_size=options['chunk_size'])
+            self.stdout.write(' '.join(f'deleted_{name}={count}' for name, count in deleted.items()))
+        self.stdout.write(self.style.SUCCESS('done'))
@@ -1,13 +1,10 @@
 import time
 from django.utils import timezone
-from django.core.cache import cache
-from rest_framework.response import Response
+from django.http import JsonResponse
 from rest_framework import status
-from .models import APIKey, APILog
-from django.contrib.auth import get_user_model
-import json
-
-User = get_user_model()
+from apps.core import ratelimit
+from . import key_cache
+from .log_writer import capture_body, writer as log_writer
 
 class APIKeyMiddleware:
     """میان‌افزار برای احراز هویت و لاگینگ درخواست‌های API"""
@@ -27,85 +24,73 @@ class APIKeyMiddleware:
         # ذخیره request.body قبل از هر پردازشی
         if request.method in ['POST', 'PUT', 'PATCH']:
             try:
-                request_body = request.body.decode('utf-8')
+                request_body = request.body
             except Exception:
-                request_body = str(request.body)
+                request_body = None
         
-        try:
-            # بررسی کلید API در هدر
-            api_key_header = request.headers.get('X-API-Key')
-            if api_key_header:
-                api_key = APIKey.objects.select_related('user').get(
-                    key=api_key_header,
-                    is_active=True
-                )
-                
+        # بررسی کلید API در هدر (از کش درون‌فرایندی کلیدها)
+        api_key_header = request.headers.get('X-API-Key')
+        if api_key_header:
+            api_key = key_cache.resolve(api_key_header)
+            if api_key is None:
+                if not request.path.startswith('/api/auth/'):  # اگر مسیر احراز هویت نیست
+                    return JsonResponse(
+                        {'error': 'کلید API نامعتبر است'},
+                        status=status.HTTP_401_UNAUTHORIZED
+                    )
+            else:
                 # بررسی انقضای کلید
                 if api_key.is_expired:
-                    return Response(
+                    return JsonResponse(
                         {'error': 'کلید API منقضی شده است'},
                         status=status.HTTP_401_UNAUTHORIZED
                     )
-                
-                # بررسی محدودیت IP
-                if api_key.allowed_ips:
-                    allowed_ips = [ip.strip() for ip in api_key.allowed_ips.split('\n')]
-                    if request.META.get('REMOTE_ADDR') not in allowed_ips:
-                        return Response(
-                            {'error': 'دسترسی از این IP مجاز نیست'},
-                            status=status.HTTP_403_FORBIDDEN
-                        )
-                
-                # بررسی محدودیت تعداد درخواست
-                cache_key = f'api_rate_limit_{api_key.id}'
-                request_count = cache.get(cache_key, 0)
-                if request_count >= api_key.rate_limit:
-                    return Response(
+
+                # بررسی محدودیت IP (IP یا بازه CIDR)
+                if not api_key.allows_ip(request.META.get('REMOTE_ADDR')):
+                    return JsonResponse(
+                        {'error': 'دسترسی از این IP مجاز نیست'},
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+
+                # بررسی محدودیت تعداد درخواست روزانه کلید (پنجره لغزان با شمارنده اتمیک)
+                result = ratelimit.check(f'apikey:{api_key.id}', (api_key.rate_limit, 86400))
+                ratelimit.record(request, result)
+                if not result.allowed:
+                    return ratelimit.set_headers(JsonResponse(
                         {'error': 'محدودیت تعداد درخواست روزانه'},
                         status=status.HTTP_429_TOO_MANY_REQUESTS
-                    )
-                
-                # افزایش شمارنده درخواست
-                cache.set(cache_key, request_count + 1, timeout=86400)  # 24 ساعت
-                
-                # به‌روزرسانی زمان آخرین استفاده
-                api_key.update_last_used()
-                
+                    ), result)
+
+                # به‌روزرسانی زمان آخرین استفاده (حداکثر یک بار در هر بازه)
+                key_cache.touch(api_key)
+
                 # تنظیم کاربر برای درخواست
-                request.user = api_key.user
-        
-        except APIKey.DoesNotExist:
-            if not request.path.startswith('/api/auth/'):  # اگر مسیر احراز هویت نیست
-                return Response(
-                    {'error': 'کلید API نامعتبر است'},
-                    status=status.HTTP_401_UNAUTHORIZED
-                )
-        
+                request.user = api_key.get_user()
+
         # اجرای درخواست
         response = self.get_response(request)
         
-        # ثبت لاگ
+        # ثبت لاگ در صف نویسنده دسته‌ای (بدون کوئری در مسیر درخواست)
         execution_time = time.time() - start_time
-        
-        # تبدیل SimpleLazyObject به نمونه User
-        user = None
+        user_id = None
         if hasattr(request, 'user') and request.user.is_authenticated:
-            try:
-                user = User.objects.get(pk=request.user.pk)
-            except User.DoesNotExist:
-                user = None
-        
-        APILog.objects.create(
-            api_key=api_key,
-            user=user,
+            user_id = request.user.pk
+
+        streaming = getattr(response, 'streaming', False)
+        log_writer.submit(
+            response.status_code,
+            api_key_id=api_key.id if api_key else None,
+            user_id=user_id,
             method=request.method,
             path=request.path,
             query_params=str(request.GET),
-            request_body=request_body or '',
-            response_code=response.status_code,
-            response_body=str(getattr(response, 'content', '')),
+            request_body=capture_body(request_body, request.content_type),
+            response_body=capture_body(
+                None if streaming else response.content, response.get('Content-Type'), streaming
+            ),
             ip_address=request.META.get('REMOTE_ADDR'),
             execution_time=execution_time
         )
         
-        return response 
\ No newline at end of file
+        return ratelimit.set_headers(response, getattr(request, 'ratelimit', None)) 
\ No newline at end of file
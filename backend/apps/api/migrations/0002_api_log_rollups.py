@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-17 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APILogRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('minute', 'دقیقه\u200cای'), ('hour', 'ساعتی')], max_length=10, verbose_name='دانه\u200cبندی')),
+                ('bucket_start', models.DateTimeField(verbose_name='شروع بازه')),
+                ('path', models.CharField(max_length=255, verbose_name='الگوی مسیر')),
+                ('method', models.CharField(max_length=10, verbose_name='متد')),
+                ('response_code', models.PositiveIntegerField(verbose_name='کد پاسخ')),
+                ('request_count', models.PositiveIntegerField(default=0, verbose_name='تعداد درخواست')),
+                ('total_time', models.FloatField(default=0, verbose_name='مجموع زمان اجرا (ثانیه)')),
+                ('max_time', models.FloatField(default=0, verbose_name='بیشترین زمان اجرا (ثانیه)')),
+                ('histogram', models.JSONField(default=dict, verbose_name='هیستوگرام زمان پاسخ (میلی\u200cثانیه)')),
+            ],
+            options={
+                'verbose_name': 'تجمیع لاگ API',
+                'verbose_name_plural': 'تجمیع\u200cهای لاگ API',
+                'ordering': ['-bucket_start'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='apilog',
+            index=models.Index(fields=['created_at'], name='api_log_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apilog',
+            index=models.Index(fields=['path', 'created_at'], name='api_log_path_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apilogrollup',
+            index=models.Index(fields=['granularity', 'bucket_start'], name='api_log_rollup_bucket_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='apilogrollup',
+            constraint=models.UniqueConstraint(fields=('granularity', 'bucket_start', 'path', 'method', 'response_code'), name='unique_api_log_rollup'),
+        ),
+    ]
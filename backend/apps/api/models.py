@@ -37,10 +37,11 @@ class APIKey(BaseModel):
         return timezone.now() > self.expires_at
 
     def update_last_used(self):
-        """به‌روزرسانی زمان آخرین استفاده"""
+        """به‌روزرسانی زمان آخرین استفاده (نوشتن دسته‌ای با apps.core.counters)"""
         from django.utils import timezone
+        from apps.core import counters
         self.last_used_at = timezone.now()
-        self.save(update_fields=['last_used_at'])
+        counters.touch(self, 'last_used_at', self.last_used_at)
 
 class APILog(BaseModel):
     """مدل لاگ درخواست‌های API"""
@@ -67,6 +68,47 @@ class APILog(BaseModel):
         verbose_name = _("لاگ API")
         verbose_name_plural = _("لاگ‌های API")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='api_log_created_idx'),
+            models.Index(fields=['path', 'created_at'], name='api_log_path_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.method} {self.path} - {self.response_code}"
+
+
+class APILogRollup(models.Model):
+    """تجمیع دقیقه‌ای یا ساعتی لاگ‌های API به تفکیک الگوی مسیر، متد و کد پاسخ"""
+    GRANULARITY_MINUTE = 'minute'
+    GRANULARITY_HOUR = 'hour'
+    GRANULARITY_CHOICES = (
+        (GRANULARITY_MINUTE, _('دقیقه‌ای')),
+        (GRANULARITY_HOUR, _('ساعتی')),
+    )
+
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES, verbose_name=_("دانه‌بندی"))
+    bucket_start = models.DateTimeField(verbose_name=_("شروع بازه"))
+    path = models.CharField(max_length=255, verbose_name=_("الگوی مسیر"))
+    method = models.CharField(max_length=10, verbose_name=_("متد"))
+    response_code = models.PositiveIntegerField(verbose_name=_("کد پاسخ"))
+    request_count = models.PositiveIntegerField(default=0, verbose_name=_("تعداد درخواست"))
+    total_time = models.FloatField(default=0, verbose_name=_("مجموع زمان اجرا (ثانیه)"))
+    max_time = models.FloatField(default=0, verbose_name=_("بیشترین زمان اجرا (ثانیه)"))
+    histogram = models.JSONField(default=dict, verbose_name=_("هیستوگرام زمان پاسخ (میلی‌ثانیه)"))
+
+    class Meta:
+        verbose_name = _("تجمیع لاگ API")
+        verbose_name_plural = _("تجمیع‌های لاگ API")
+        ordering = ['-bucket_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'bucket_start', 'path', 'method', 'response_code'],
+                name='unique_api_log_rollup'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start'], name='api_log_rollup_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.granularity} {self.bucket_start} {self.method} {self.path} {self.response_code}: {self.request_count}"
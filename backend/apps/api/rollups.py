@@ -0,0 +1,227 @@
+"""
+تجمیع زمانی لاگ‌های API، صدک‌های زمان پاسخ و حذف لاگ‌های قدیمی
+
+rollup لاگ‌های خام دقیقه‌های کامل را به APILogRollup دقیقه‌ای و ساعتی (به تفکیک الگوی
+مسیر، متد و کد پاسخ) تبدیل می‌کند. هر ردیف تجمیع یک هیستوگرام لگاریتمی زمان پاسخ دارد
+(apps.api.sketch) که قابل ادغام است؛ بنابراین ساعت‌هایی که در چند اجرا پردازش می‌شوند
+و صدک‌های بازه‌های دلخواه با ادغام هیستوگرام‌ها به دست می‌آیند.
+
+نقطه پایان آخرین پردازش (watermark) در SystemSetting نگهداری می‌شود و هر ساعت در یک
+تراکنش جداگانه پردازش و watermark جلو برده می‌شود. ردیف‌ها فقط تا
+API_LOG_ROLLUP_LAG_SECONDS قبل پردازش می‌شوند تا لاگ‌های در صف نویسنده دسته‌ای
+(که created_at زمان درخواست را دارند) جا نمانند.
+
+purge لاگ‌های خام قدیمی‌تر از API_LOG_RETENTION_DAYS را (فقط اگر تجمیع شده باشند) در
+دسته‌های API_LOG_PURGE_CHUNK_SIZE تایی و تجمیع‌های دقیقه‌ای و ساعتی را پس از دوره نگهداری
+خودشان حذف می‌کند.
+"""
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.models import SystemSetting
+from .models import APILog, APILogRollup
+from .sketch import LatencyHistogram
+
+WATERMARK_KEY = 'api_log_rollup_watermark'
+MINUTE = APILogRollup.GRANULARITY_MINUTE
+HOUR = APILogRollup.GRANULARITY_HOUR
+PERCENTILES = (50, 95, 99)
+
+_ID_SEGMENT = re.compile(
+    r'^(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{24,})$', re.IGNORECASE
+)
+
+
+def path_template(path):
+    """جایگزینی بخش‌های شناسه (عدد، UUID، توکن hex) مسیر با {id}"""
+    return '/'.join('{id}' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/'))
+
+
+def _floor(value, granularity):
+    value = value.replace(second=0, microsecond=0)
+    return value.replace(minute=0) if granularity == HOUR else value
+
+
+class _Bucket:
+    __slots__ = ('count', 'total_time', 'max_time', 'histogram')
+
+    def __init__(self, count=0, total_time=0.0, max_time=0.0, histogram=None):
+        self.count = count
+        self.total_time = total_time
+        self.max_time = max_time
+        self.histogram = histogram or LatencyHistogram()
+
+    def add(self, execution_time):
+        self.count += 1
+        self.total_time += execution_time
+        self.max_time = max(self.max_time, execution_time)
+        self.histogram.add(execution_time * 1000)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total_time += other.total_time
+        self.max_time = max(self.max_time, other.max_time)
+        self.histogram.merge(other.histogram)
+
+
+def _aggregate(start, end, chunk_size):
+    buckets = defaultdict(_Bucket)
+    rows = APILog.objects.filter(created_at__gte=start, created_at__lt=end).order_by().values_list(
+        'created_at', 'path', 'method', 'response_code', 'execution_time'
+    )
+    processed = 0
+    for created_at, path, method, response_code, execution_time in rows.iterator(chunk_size=chunk_size):
+        template = path_template(path)
+        for granularity in (MINUTE, HOUR):
+            buckets[(granularity, _floor(created_at, granularity), template, method, response_code)].add(
+                execution_time or 0
+            )
+        processed += 1
+    return buckets, processed
+
+
+def _store(buckets, start, end):
+    """ادغام تجمیع‌های جدید با ردیف‌های موجود همان بازه‌ها"""
+    existing = {
+        (row.granularity, row.bucket_start, row.path, row.method, row.response_code): row
+        for row in APILogRollup.objects.select_for_update().filter(
+            bucket_start__gte=_floor(start, HOUR), bucket_start__lt=end
+        )
+    }
+    to_create, to_update = [], []
+    for key, bucket in buckets.items():
+        row = existing.get(key)
+        if row is None:
+            granularity, bucket_start, path, method, response_code = key
+            row = APILogRollup(
+                granularity=granularity, bucket_start=bucket_start, path=path, method=method,
+                response_code=response_code
+            )
+            to_create.append(row)
+        else:
+            bucket.merge(_Bucket(row.request_count, row.total_time, row.max_time, LatencyHistogram(row.histogram)))
+            to_update.append(row)
+        row.request_count = bucket.count
+        row.total_time = bucket.total_time
+        row.max_time = bucket.max_time
+        row.histogram = bucket.histogram.to_dict()
+
+    APILogRollup.objects.bulk_create(to_create, batch_size=1000)
+    APILogRollup.objects.bulk_update(
+        to_update, ['request_count', 'total_time', 'max_time', 'histogram'], batch_size=1000
+    )
+
+
+def get_watermark():
+    value = SystemSetting.objects.filter(key=WATERMARK_KEY).values_list('value', flat=True).first()
+    return datetime.fromisoformat(value) if value else None
+
+
+def rollup(now=None, chunk_size=5000):
+    """
+    تجمیع لاگ‌های خام از watermark تا API_LOG_ROLLUP_LAG_SECONDS قبل
+
+    خروجی: تعداد لاگ‌های پردازش‌شده
+    """
+    now = now or timezone.now()
+    lag = getattr(settings, 'API_LOG_ROLLUP_LAG_SECONDS', 120)
+    upper = _floor(now - timedelta(seconds=lag), MINUTE)
+    processed = 0
+
+    while True:
+        with transaction.atomic():
+            state, _ = SystemSetting.objects.select_for_update().get_or_create(
+                key=WATERMARK_KEY, defaults={'value': '', 'description': 'آخرین زمان تجمیع لاگ‌های API'}
+            )
+            if state.value:
+                start = datetime.fromisoformat(state.value)
+            else:
+                first = APILog.objects.order_by('created_at').values_list('created_at', flat=True).first()
+                if first is None:
+                    return processed
+                start = _floor(first, MINUTE)
+            if start >= upper:
+                return processed
+
+            # هر بار حداکثر تا پایان ساعت جاری تا حافظه و طول تراکنش محدود بماند
+            end = min(_floor(start, HOUR) + timedelta(hours=1), upper)
+            buckets, count = _aggregate(start, end, chunk_size)
+            _store(buckets, start, end)
+            state.value = end.isoformat()
+            state.save(update_fields=['value'])
+            processed += count
+
+
+def _delete_in_chunks(queryset, chunk_size):
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by().values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return deleted
+        deleted += queryset.model.objects.filter(pk__in=pks).delete()[0]
+
+
+def purge(now=None, chunk_size=None):
+    """حذف لاگ‌های خام و تجمیع‌های قدیمی‌تر از دوره نگهداری؛ خروجی: تعداد حذف‌شده‌ها"""
+    now = now or timezone.now()
+    chunk_size = chunk_size or getattr(settings, 'API_LOG_PURGE_CHUNK_SIZE', 5000)
+    raw_cutoff = now - timedelta(days=getattr(settings, 'API_LOG_RETENTION_DAYS', 30))
+    # لاگ‌هایی که هنوز تجمیع نشده‌اند حذف نمی‌شوند
+    watermark = get_watermark()
+    raw_cutoff = min(raw_cutoff, watermark) if watermark else None
+
+    deleted = {'raw': 0, MINUTE: 0, HOUR: 0}
+    if raw_cutoff:
+        deleted['raw'] = _delete_in_chunks(APILog.objects.filter(created_at__lt=raw_cutoff), chunk_size)
+    for granularity, setting, default in (
+        (MINUTE, 'API_LOG_MINUTE_ROLLUP_RETENTION_DAYS', 7),
+        (HOUR, 'API_LOG_HOUR_ROLLUP_RETENTION_DAYS', 365),
+    ):
+        cutoff = now - timedelta(days=getattr(settings, setting, default))
+        deleted[granularity] = _delete_in_chunks(
+            APILogRollup.objects.filter(granularity=granularity, bucket_start__lt=cutoff), chunk_size
+        )
+    return deleted
+
+
+def latency_summary(since, until=None, granularity=HOUR, path=None, method=None):
+    """تعداد، خطاها و صدک‌های زمان پاسخ (میلی‌ثانیه) هر endpoint از تجمیع‌ها"""
+    rows = APILogRollup.objects.filter(granularity=granularity, bucket_start__gte=_floor(since, granularity))
+    if until:
+        rows = rows.filter(bucket_start__lt=until)
+    if path:
+        rows = rows.filter(path__icontains=path)
+    if method:
+        rows = rows.filter(method=method.upper())
+
+    endpoints = {}
+    for row in rows.order_by().iterator():
+        endpoint = endpoints.setdefault((row.path, row.method), {'errors': 0, 'bucket': _Bucket()})
+        endpoint['bucket'].merge(
+            _Bucket(row.request_count, row.total_time, row.max_time, LatencyHistogram(row.histogram))
+        )
+        if row.response_code >= 500:
+            endpoint['errors'] += row.request_count
+
+    summary = []
+    for (path, method), endpoint in endpoints.items():
+        bucket = endpoint['bucket']
+        item = {
+            'path': path,
+            'method': method,
+            'count': bucket.count,
+            'error_count': endpoint['errors'],
+            'avg_ms': round(bucket.total_time * 1000 / bucket.count, 2) if bucket.count else None,
+            'max_ms': round(bucket.max_time * 1000, 2),
+        }
+        for percentile in PERCENTILES:
+            value = bucket.histogram.quantile(percentile / 100)
+            item[f'p{percentile}_ms'] = round(value, 2) if value is not None else None
+        summary.append(item)
+    summary.sort(key=lambda item: -item['count'])
+    return summary
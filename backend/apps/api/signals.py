@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import key_cache
+from .models import APIKey
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=APIKey)
+def invalidate_api_key_cache(sender, instance, **kwargs):
+    """ابطال نسخه کش‌شده کلید پس از commit (شامل ورودی منفی مقدار جدید کلید)"""
+    transaction.on_commit(lambda: key_cache.invalidate(key=instance.key, key_id=instance.pk))
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_api_keys(sender, instance, **kwargs):
+    """تغییر کاربر (مثلاً غیرفعال شدن یا تغییر دسترسی) روی کلیدهای کش‌شده او اثر می‌گذارد"""
+    transaction.on_commit(lambda: key_cache.invalidate(user_id=instance.pk))
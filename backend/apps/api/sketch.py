@@ -0,0 +1,57 @@
+"""
+هیستوگرام لگاریتمی زمان پاسخ برای محاسبه صدک‌ها
+
+مقادیر (میلی‌ثانیه) در سطل‌هایی با مرز هندسی (ضریب GAMMA) شمرده می‌شوند؛ بنابراین خطای
+نسبی هر صدک حداکثر RELATIVE_ACCURACY است (روش DDSketch). دو هیستوگرام با جمع تعداد
+سطل‌های هم‌شماره ادغام می‌شوند، پس صدک‌های یک ساعت از ادغام دقیقه‌ها و صدک‌های چند
+endpoint از ادغام آن‌ها به همان دقت به دست می‌آید.
+"""
+import math
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+# مقادیر کوچک‌تر از این (میلی‌ثانیه) در سطل صفر شمرده می‌شوند
+MIN_VALUE = 0.01
+ZERO_BUCKET = 'z'
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=None):
+        self.buckets = {}
+        for key, count in (buckets or {}).items():
+            key = key if key == ZERO_BUCKET else int(key)
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    @property
+    def count(self):
+        return sum(self.buckets.values())
+
+    def add(self, value, count=1):
+        key = ZERO_BUCKET if value < MIN_VALUE else math.ceil(math.log(value) / _LOG_GAMMA)
+        self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def merge(self, other):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        return self
+
+    def quantile(self, q):
+        """مقدار صدک q (بین ۰ و ۱) یا None برای هیستوگرام خالی"""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.buckets.get(ZERO_BUCKET, 0)
+        if seen > rank:
+            return 0.0
+        for key in sorted(key for key in self.buckets if key != ZERO_BUCKET):
+            seen += self.buckets[key]
+            if seen > rank:
+                # نقطه میانی سطل (GAMMA^(k-1), GAMMA^k] با خطای نسبی حداکثر RELATIVE_ACCURACY
+                return 2 * GAMMA ** key / (GAMMA + 1)
+        return None
+
+    def to_dict(self):
+        """شکل قابل ذخیره در JSONField (کلیدهای متنی)"""
+        return {str(key): count for key, count in self.buckets.items()}
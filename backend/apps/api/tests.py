@@ -1,3 +1,246 @@
-from django.test import TestCase
+import ipaddress
+import secrets
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import key_cache
+from .log_writer import APILogWriter, capture_body
+from .models import APIKey, APILog, APILogRollup
+from .rollups import path_template, purge, rollup
+from .sketch import RELATIVE_ACCURACY, LatencyHistogram
+
+User = get_user_model()
+
+
+def _log_fields(**extra):
+    fields = {
+        'method': 'GET', 'path': '/api/test/', 'query_params': '', 'request_body': '',
+        'response_body': '', 'ip_address': '127.0.0.1', 'execution_time': 0.01,
+    }
+    fields.update(extra)
+    return fields
+
+
+class CaptureBodyTests(TestCase):
+    @override_settings(API_LOG_MAX_BODY_CHARS=10)
+    def test_truncates_text_bodies(self):
+        self.assertEqual(capture_body(b'{"a": 1}', 'application/json'), '{"a": 1}')
+        self.assertEqual(capture_body('x' * 20, 'text/plain'), 'x' * 10 + '…[truncated]')
+
+    @override_settings(API_LOG_SKIP_BODY_BYTES=100)
+    def test_skips_binary_large_and_streaming_bodies(self):
+        self.assertEqual(capture_body(b'\x89PNG', 'image/png'), '[image/png body not captured: 4 bytes]')
+        self.assertEqual(capture_body(b'a' * 200, 'application/json'), '[body not captured: 200 bytes]')
+        self.assertEqual(capture_body(None, 'text/csv', streaming=True), '[streaming body not captured]')
+        self.assertEqual(capture_body(b'', 'application/json'), '')
+
+
+@override_settings(API_LOG_EAGER=True)
+class APILogWriterTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='pass1234', email='admin@example.com', is_staff=True
+        )
+
+    def test_middleware_logs_without_user_query(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('api:api_log_metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        log = APILog.objects.get(path=reverse('api:api_log_metrics'))
+        self.assertEqual(log.user_id, self.admin.pk)
+        self.assertEqual(log.response_code, 200)
+        self.assertIn('enqueued', log.response_body)
+
+    @override_settings(API_LOG_SAMPLE_RATE=0)
+    def test_sampling_keeps_errors(self):
+        log_writer = APILogWriter()
+        self.assertFalse(log_writer.submit(200, **_log_fields()))
+        self.assertTrue(log_writer.submit(500, **_log_fields()))
+
+        self.assertEqual(list(APILog.objects.values_list('response_code', flat=True)), [500])
+        metrics = log_writer.metrics()
+        self.assertEqual(metrics['sampled_out'], 1)
+        self.assertEqual(metrics['written'], 1)
+
+    @override_settings(API_LOG_EAGER=False, API_LOG_QUEUE_SIZE=2)
+    def test_full_queue_drops_entries(self):
+        log_writer = APILogWriter()
+        with mock.patch.object(APILogWriter, '_ensure_thread'):
+            results = [log_writer.submit(200, **_log_fields()) for _ in range(3)]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(log_writer.metrics()['dropped'], 1)
+        self.assertEqual(log_writer.metrics()['queued'], 2)
+
+        log_writer.flush()
+        self.assertEqual(APILog.objects.count(), 2)
+        self.assertEqual(log_writer.metrics()['queued'], 0)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        user = User.objects.create_user(username='user', password='pass1234', email='user@example.com')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('api:api_log_metrics')).status_code, 403)
+
+        self.client.force_login(self.admin)
+        self.assertEqual(
+            set(self.client.get(reverse('api:api_log_metrics')).json()),
+            {'enqueued', 'written', 'dropped', 'sampled_out', 'failed', 'queued'}
+        )
+
+
+@override_settings(API_LOG_EAGER=False, API_LOG_FLUSH_INTERVAL=0.05, API_LOG_BATCH_SIZE=2)
+class APILogBackgroundWriterTests(TransactionTestCase):
+    def test_background_thread_writes_batches_and_flushes_on_shutdown(self):
+        log_writer = APILogWriter()
+        for _ in range(5):
+            log_writer.submit(200, **_log_fields())
+        log_writer.shutdown()
+
+        self.assertEqual(APILog.objects.count(), 5)
+        self.assertEqual(log_writer.metrics()['written'], 5)
+        self.assertFalse(log_writer._thread.is_alive())
+
+
+@override_settings(API_LOG_ENABLED=False, API_KEY_LAST_USED_INTERVAL=3600, COUNTERS_EAGER=True)
+class APIKeyCacheTests(TestCase):
+    def setUp(self):
+        key_cache.clear()
+        self.user = User.objects.create_user(username='keyuser', password='pass1234', email='key@example.com')
+        self.api_key = APIKey.objects.create(
+            name='test', key=secrets.token_hex(32), user=self.user, allowed_ips='10.0.0.0/24\n192.168.1.5'
+        )
+        self.url = reverse('api:api_key_list')
+
+    def tearDown(self):
+        key_cache.clear()
+
+    def _get(self, ip='10.0.0.7', key=None):
+        return self.client.get(self.url, HTTP_X_API_KEY=key or self.api_key.key, REMOTE_ADDR=ip)
+
+    def test_cidr_allowlist(self):
+        self.assertEqual(self._get('10.0.0.200').status_code, 200)
+        self.assertEqual(self._get('192.168.1.5').status_code, 200)
+        self.assertEqual(self._get('10.0.1.1').status_code, 403)
+        self.assertEqual(key_cache.parse_networks('10.0.0.1/24\nnot-an-ip\n\n::1'), (
+            ipaddress.ip_network('10.0.0.0/24'), ipaddress.ip_network('::1/128')
+        ))
+
+    def test_known_key_resolves_without_queries(self):
+        resolved = key_cache.resolve(self.api_key.key)
+        key_cache.touch(resolved)
+        with self.assertNumQueries(0):
+            self.assertIs(key_cache.resolve(self.api_key.key), resolved)
+            self.assertFalse(key_cache.touch(resolved))
+        self.assertEqual(resolved.get_user(), self.user)
+        self.assertIsNot(resolved.get_user(), resolved.user)
+
+    def test_invalid_key_is_rejected_and_cached(self):
+        self.assertEqual(self._get(key='missing').status_code, 401)
+        with self.assertNumQueries(0):
+            self.assertIsNone(key_cache.resolve('missing'))
+
+    def test_signals_invalidate_cached_key(self):
+        self.assertEqual(self._get().status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api_key.allowed_ips = '172.16.0.0/12'
+            self.api_key.save()
+        self.assertEqual(self._get().status_code, 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api_key.delete()
+        self.assertEqual(self._get().status_code, 401)
+
+    def test_daily_rate_limit_is_enforced_with_headers(self):
+        cache.clear()
+        APIKey.objects.filter(pk=self.api_key.pk).update(rate_limit=2)
+
+        responses = [self._get() for _ in range(3)]
+        self.assertEqual([response.status_code for response in responses], [200, 200, 429])
+        self.assertEqual(responses[0]['RateLimit-Remaining'], '1')
+        self.assertEqual(responses[2]['RateLimit-Policy'], '2;w=86400')
+        self.assertIn('Retry-After', responses[2])
+
+
+class LatencyHistogramTests(TestCase):
+    def test_quantiles_within_relative_accuracy_and_mergeable(self):
+        low, high = LatencyHistogram(), LatencyHistogram()
+        for value in range(1, 1001):
+            (low if value <= 500 else high).add(value)
+        merged = LatencyHistogram(low.to_dict()).merge(LatencyHistogram(high.to_dict()))
+
+        self.assertEqual(merged.count, 1000)
+        for q, expected in ((0.5, 500), (0.95, 950), (0.99, 990)):
+            self.assertAlmostEqual(merged.quantile(q), expected, delta=expected * RELATIVE_ACCURACY + 1)
+        self.assertIsNone(LatencyHistogram().quantile(0.5))
+
+
+class APILogRollupTests(TestCase):
+    def setUp(self):
+        self.base = timezone.now().replace(minute=10, second=0, microsecond=0) - timedelta(days=40)
+
+    def _logs(self, *rows):
+        APILog.objects.bulk_create([
+            APILog(**_log_fields(path=path, response_code=code, execution_time=seconds, created_at=created_at))
+            for path, code, seconds, created_at in rows
+        ])
+
+    def test_path_template(self):
+        self.assertEqual(
+            path_template('/api/orders/3f2b6a8e-1c2d-4e5f-8a9b-0c1d2e3f4a5b/items/12/'), '/api/orders/{id}/items/{id}/'
+        )
+
+    def test_rollup_merges_runs_and_purge_respects_watermark(self):
+        order_path = '/api/orders/3f2b6a8e-1c2d-4e5f-8a9b-0c1d2e3f4a5b/'
+        self._logs(
+            (order_path, 200, 0.010, self.base),
+            (order_path, 200, 0.030, self.base + timedelta(seconds=30)),
+            (order_path, 500, 0.200, self.base + timedelta(minutes=1)),
+        )
+        self.assertEqual(rollup(now=self.base + timedelta(minutes=5)), 3)
+
+        self._logs((order_path, 200, 0.020, self.base + timedelta(minutes=6)))
+        self.assertEqual(rollup(now=self.base + timedelta(minutes=10)), 1)
+        self.assertEqual(rollup(now=self.base + timedelta(minutes=10)), 0)
+
+        minutes = APILogRollup.objects.filter(granularity='minute', response_code=200).order_by('bucket_start')
+        self.assertEqual([row.request_count for row in minutes], [2, 1])
+        hour = APILogRollup.objects.get(granularity='hour', response_code=200)
+        self.assertEqual(hour.path, '/api/orders/{id}/')
+        self.assertEqual(hour.request_count, 3)
+        self.assertAlmostEqual(hour.total_time, 0.060)
+
+        # لاگ تجمیع‌نشده پس از watermark حذف نمی‌شود
+        self._logs((order_path, 200, 0.020, self.base + timedelta(minutes=20)))
+        deleted = purge(chunk_size=2)
+        self.assertEqual(deleted['raw'], 4)
+        self.assertEqual(APILog.objects.count(), 1)
+        self.assertEqual(deleted['minute'], 3)
+        self.assertEqual(APILogRollup.objects.filter(granularity='hour').count(), 2)
+
+    def test_latency_endpoint(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 101):
+            histogram.add(value)
+        APILogRollup.objects.create(
+            granularity='hour', bucket_start=timezone.now().replace(minute=0, second=0, microsecond=0),
+            path='/api/orders/{id}/', method='GET', response_code=200, request_count=100, total_time=2.0,
+            max_time=0.1, histogram=histogram.to_dict()
+        )
+        admin = User.objects.create_user(username='admin', password='pass1234', email='admin@example.com', is_staff=True)
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse('api:api_log_latency'), {'hours': 12})
+        self.assertEqual(response.status_code, 200)
+        endpoint = response.json()['endpoints'][0]
+        self.assertEqual(endpoint['count'], 100)
+        self.assertAlmostEqual(endpoint['p95_ms'], 95, delta=2)
+        self.assertEqual(endpoint['avg_ms'], 20.0)
+        self.assertEqual(self.client.get(reverse('api:api_log_latency'), {'hours': 'x'}).status_code, 400)
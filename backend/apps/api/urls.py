@@ -1,5 +1,5 @@
 from django.urls import path, include
-from .views import APIKeyListCreateView, APIKeyDetailView, APILogListView
+from .views import APIKeyListCreateView, APIKeyDetailView, APILogListView, APILogMetricsView, APILatencyView
 
 app_name = 'api'
 
@@ -8,6 +8,8 @@ urlpatterns = [
     path('keys/', APIKeyListCreateView.as_view(), name='api_key_list'),
     path('keys/<uuid:key_id>/', APIKeyDetailView.as_view(), name='api_key_detail'),
     path('logs/', APILogListView.as_view(), name='api_log_list'),
+    path('logs/metrics/', APILogMetricsView.as_view(), name='api_log_metrics'),
+    path('logs/latency/', APILatencyView.as_view(), name='api_log_latency'),
     
     # مسیرهای API سایر اپ‌ها
     path('auth/', include('apps.authentication.urls')),
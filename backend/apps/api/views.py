@@ -8,8 +8,11 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.db.models import Q
 from drf_spectacular.utils import extend_schema
 from django.utils import timezone
+from datetime import timedelta
 from .models import APIKey, APILog
 from .serializers import APIKeySerializer, APILogSerializer
+from . import rollups
+from .log_writer import writer as log_writer
 from apps.core.utils import log_error
 
 
@@ -218,3 +221,46 @@ class APILogListView(APIView):
                 {'error': 'خطا در دریافت لیست لاگ‌های API'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class APILogMetricsView(APIView):
+    """API برای نمایش وضعیت صف ثبت لاگ‌های API"""
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(summary="وضعیت صف ثبت لاگ‌های API")
+    def get(self, request):
+        return Response(log_writer.metrics())
+
+
+class APILatencyView(APIView):
+    """API برای نمایش صدک‌های زمان پاسخ هر endpoint از تجمیع لاگ‌ها"""
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(summary="صدک‌های زمان پاسخ endpointها")
+    def get(self, request):
+        try:
+            hours = int(request.query_params.get('hours', 24))
+        except ValueError:
+            return Response({'error': 'پارامتر hours نامعتبر است'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= hours <= 24 * 365:
+            return Response({'error': 'پارامتر hours نامعتبر است'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # بازه‌های کوتاه از تجمیع دقیقه‌ای و بقیه از تجمیع ساعتی خوانده می‌شوند
+        granularity = rollups.MINUTE if hours <= 6 else rollups.HOUR
+        try:
+            endpoints = rollups.latency_summary(
+                timezone.now() - timedelta(hours=hours), granularity=granularity,
+                path=request.query_params.get('path'), method=request.query_params.get('method')
+            )
+            return Response({
+                'hours': hours,
+                'granularity': granularity,
+                'rolled_up_until': rollups.get_watermark(),
+                'endpoints': endpoints,
+            })
+        except Exception as e:
+            log_error("Error retrieving API latency percentiles", e)
+            return Response(
+                {'error': 'خطا در دریافت آمار زمان پاسخ'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-17 22:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0002_remove_business_type_business_business_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='capacity_date',
+            field=models.DateField(blank=True, null=True, verbose_name='روز ظرفیت مصرف\u200cشده'),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='daily_capacity',
+            field=models.PositiveIntegerField(default=0, verbose_name='ظرفیت روزانه (سفارش)'),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='fabric_types',
+            field=models.JSONField(blank=True, default=list, help_text='خالی یعنی همه انواع', verbose_name='انواع پارچه قابل چاپ'),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='print_options',
+            field=models.JSONField(blank=True, default=list, help_text='خالی یعنی همه گزینه\u200cها', verbose_name='گزینه\u200cهای چاپ قابل انجام'),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='used_capacity',
+            field=models.PositiveIntegerField(default=0, verbose_name='ظرفیت مصرف\u200cشده روز'),
+        ),
+    ]
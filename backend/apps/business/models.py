@@ -32,6 +32,14 @@ class Business(models.Model):
                                        verbose_name=_("کارمندان"))
     allow_customer_info = models.BooleanField(default=False,
                                               verbose_name=_("اجازه دسترسی به اطلاعات مشتری"))
+    # ظرفیت و قابلیت‌ها برای تخصیص خودکار سفارش (apps.orders.assignment)؛ ظرفیت ۰ یعنی بدون تخصیص خودکار
+    daily_capacity = models.PositiveIntegerField(default=0, verbose_name=_("ظرفیت روزانه (سفارش)"))
+    used_capacity = models.PositiveIntegerField(default=0, verbose_name=_("ظرفیت مصرف‌شده روز"))
+    capacity_date = models.DateField(null=True, blank=True, verbose_name=_("روز ظرفیت مصرف‌شده"))
+    print_options = models.JSONField(default=list, blank=True, verbose_name=_("گزینه‌های چاپ قابل انجام"),
+                                     help_text=_("خالی یعنی همه گزینه‌ها"))
+    fabric_types = models.JSONField(default=list, blank=True, verbose_name=_("انواع پارچه قابل چاپ"),
+                                    help_text=_("خالی یعنی همه انواع"))
 
     class Meta:
         verbose_name = _("کسب‌وکار")
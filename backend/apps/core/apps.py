@@ -11,3 +11,6 @@ class CoreConfig(AppConfig):
         """اجرای کدهای لازم هنگام بارگذاری اپلیکیشن"""
         # بارگذاری signals
         from . import signals
+        # زمان‌سنجی سریال‌سازی DRF برای هدر Server-Timing
+        from . import instrumentation
+        instrumentation.install()
@@ -0,0 +1,174 @@
+"""
+شمارنده‌های write-behind برای آمار پرتکرار (بازدید، استفاده، آخرین استفاده)
+
+به‌جای read-modify-save روی ردیف‌های پربازدید، افزایش شمارنده‌ها و آخرین زمان استفاده
+در حافظه فرایند جمع می‌شود و یک thread پس‌زمینه هر COUNTER_FLUSH_INTERVAL ثانیه آن‌ها را
+با UPDATE دسته‌ای می‌نویسد: برای هر مدل یک کوئری با F() + CASE WHEN روی همه ردیف‌ها.
+چون افزایش در پایگاه داده انجام می‌شود هیچ افزایشی در درخواست‌های همزمان گم نمی‌شود و
+زمان‌های آخرین استفاده فقط به جلو حرکت می‌کنند.
+
+مقادیر در انتظار تا نوشته شدن در پایگاه داده دیده نمی‌شوند؛ apply_pending آن‌ها را به
+نمونه خوانده‌شده اضافه می‌کند. هنگام خروج فرایند صف تخلیه می‌شود؛ در صورت توقف ناگهانی
+حداکثر افزایش‌های یک بازه از دست می‌رود.
+
+تنظیمات:
+    COUNTER_FLUSH_INTERVAL: فاصله نوشتن به ثانیه (پیش‌فرض ۵)
+    COUNTER_MAX_PENDING: با رسیدن تعداد ردیف‌های در انتظار به این مقدار بلافاصله نوشته می‌شود (پیش‌فرض ۱۰۰۰۰)
+    COUNTERS_EAGER: نوشتن همزمان هر افزایش (پیش‌فرض تنظیمات: فقط هنگام اجرای تست‌ها)
+"""
+import atexit
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .utils import log_error
+
+BATCH_SIZE = 500
+
+
+class WriteBehindCounters:
+    """بافر افزایش شمارنده‌ها و زمان‌های آخرین استفاده به تفکیک (مدل، شناسه)"""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._atexit_registered = False
+
+    def add(self, model, pk, deltas=None, touched=None):
+        """افزودن افزایش فیلدها (deltas) و زمان‌های آخرین استفاده (touched) یک ردیف"""
+        size = self._merge(model, pk, deltas, touched)
+
+        if getattr(settings, 'COUNTERS_EAGER', False):
+            self.flush()
+        elif size >= getattr(settings, 'COUNTER_MAX_PENDING', 10000):
+            self._wakeup.set()
+        self._ensure_thread()
+
+    def _merge(self, model, pk, deltas=None, touched=None):
+        with self._lock:
+            entry = self._pending.setdefault((model, pk), ({}, {}))
+            for field, delta in (deltas or {}).items():
+                entry[0][field] = entry[0].get(field, 0) + delta
+            for field, when in (touched or {}).items():
+                if entry[1].get(field) is None or when > entry[1][field]:
+                    entry[1][field] = when
+            return len(self._pending)
+
+    def pending(self, model, pk):
+        """افزایش‌ها و زمان‌های در انتظار یک ردیف"""
+        with self._lock:
+            deltas, touched = self._pending.get((model, pk), ({}, {}))
+            return dict(deltas), dict(touched)
+
+    def apply_pending(self, instance):
+        """اضافه کردن مقادیر در انتظار به نمونه خوانده‌شده از پایگاه داده"""
+        deltas, touched = self.pending(type(instance), instance.pk)
+        for field, delta in deltas.items():
+            setattr(instance, field, (getattr(instance, field) or 0) + delta)
+        for field, when in touched.items():
+            current = getattr(instance, field)
+            if current is None or when > current:
+                setattr(instance, field, when)
+        return instance
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if not self._atexit_registered:
+                atexit.register(self.flush)
+                self._atexit_registered = True
+            if getattr(settings, 'COUNTERS_EAGER', False):
+                return
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='write-behind-counters', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(getattr(settings, 'COUNTER_FLUSH_INTERVAL', 5))
+            self._wakeup.clear()
+            if not self._pending:
+                continue
+            try:
+                # اتصال این thread طبق CONN_MAX_AGE بین نوشتن‌ها باز می‌ماند
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                log_error("خطا در thread نوشتن شمارنده‌ها", e)
+
+    def flush(self):
+        """نوشتن همه مقادیر در انتظار؛ خروجی: تعداد ردیف‌های به‌روزشده"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            # ردیف‌هایی که فیلدهای یکسانی تغییر داده‌اند با یک UPDATE نوشته می‌شوند
+            groups = defaultdict(list)
+            for (model, pk), (deltas, touched) in batch.items():
+                groups[(model, frozenset(deltas), frozenset(touched))].append((pk, deltas, touched))
+
+            updated = 0
+            for (model, delta_fields, touched_fields), rows in groups.items():
+                for start in range(0, len(rows), BATCH_SIZE):
+                    chunk = rows[start:start + BATCH_SIZE]
+                    try:
+                        updated += self._write(model, delta_fields, touched_fields, chunk)
+                    except Exception as e:
+                        # مقادیر برای تلاش در نوبت بعد به بافر برمی‌گردند
+                        log_error(f"خطا در نوشتن شمارنده‌های {model.__name__}", e)
+                        for pk, deltas, touched in chunk:
+                            self._merge(model, pk, deltas, touched)
+            return updated
+
+    def _write(self, model, delta_fields, touched_fields, rows):
+        updates = {}
+        for field_name in delta_fields:
+            field = model._meta.get_field(field_name)
+            updates[field_name] = F(field_name) + Case(
+                *[When(pk=pk, then=Value(deltas[field_name])) for pk, deltas, _ in rows],
+                default=Value(0), output_field=type(field)()
+            )
+        for field_name in touched_fields:
+            field = model._meta.get_field(field_name)
+            when = Case(
+                *[When(pk=pk, then=Value(touched[field_name])) for pk, _, touched in rows],
+                output_field=type(field)()
+            )
+            updates[field_name] = Greatest(Coalesce(F(field_name), when), when)
+        return model._default_manager.filter(pk__in=[pk for pk, _, _ in rows]).update(**updates)
+
+
+counters = WriteBehindCounters()
+
+
+def add(model, pk, deltas=None, touched=None):
+    counters.add(model, pk, deltas, touched)
+
+
+def increment(instance, field, delta=1, touch=None):
+    """افزایش شمارنده field نمونه؛ touch نام فیلد زمان آخرین استفاده است"""
+    counters.add(type(instance), instance.pk, {field: delta}, {touch: timezone.now()} if touch else None)
+
+
+def touch(instance, field, when=None):
+    """ثبت زمان آخرین استفاده (فقط اگر از مقدار فعلی جدیدتر باشد)"""
+    counters.add(type(instance), instance.pk, touched={field: when or timezone.now()})
+
+
+def apply_pending(instance):
+    return counters.apply_pending(instance)
+
+
+def flush():
+    return counters.flush()
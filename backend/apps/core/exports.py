@@ -0,0 +1,216 @@
+"""
+خروجی جریانی (streaming) CSV و XLSX
+
+ردیف‌ها به‌صورت دسته‌ای از QuerySet.iterator خوانده و بلافاصله به پاسخ نوشته می‌شوند؛
+بنابراین مصرف حافظه به تعداد ردیف‌ها بستگی ندارد. فایل XLSX بدون وابستگی خارجی و با
+نوشتن مستقیم SpreadsheetML در یک zip جریانی ساخته می‌شود.
+
+پارامترهای query string:
+    file_format: csv (پیش‌فرض) یا xlsx  (پارامتر format توسط DRF رزرو شده است)
+    jalali: true برای نمایش تاریخ‌ها به شمسی
+"""
+import csv
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+
+from . import jalali
+
+CSV = 'csv'
+XLSX = 'xlsx'
+FORMATS = (CSV, XLSX)
+DEFAULT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    CSV: 'text/csv; charset=utf-8',
+    XLSX: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def export_options(request):
+    """قالب فایل و نمایش شمسی تاریخ‌ها از query string (برای درخواست نامعتبر None)"""
+    file_format = request.query_params.get('file_format', CSV).lower()
+    if file_format not in FORMATS:
+        return None, False
+    use_jalali = request.query_params.get('jalali', '').lower() in ('1', 'true')
+    return file_format, use_jalali
+
+
+def iter_chunks(iterable, size=DEFAULT_CHUNK_SIZE):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def queryset_rows(queryset, row_builder, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ردیف‌های خروجی یک QuerySet؛ prefetch_related در هر دسته جداگانه اجرا می‌شود"""
+    for chunk in iter_chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        for instance in chunk:
+            yield row_builder(instance)
+
+
+def format_dates(rows, use_jalali, chunk_size=DEFAULT_CHUNK_SIZE):
+    """تبدیل ستون‌های تاریخ هر دسته از ردیف‌ها (شمسی به‌صورت دسته‌ای)"""
+    for chunk in iter_chunks(rows, chunk_size):
+        date_columns = {
+            index for row in chunk for index, value in enumerate(row)
+            if isinstance(value, (date, datetime))
+        }
+        for index in date_columns:
+            values = [row[index] if isinstance(row[index], (date, datetime)) else None for row in chunk]
+            if use_jalali:
+                converted = jalali.to_jalali_many(values)
+            else:
+                converted = [value.isoformat() if value else '' for value in values]
+            for row, value, original in zip(chunk, converted, values):
+                if original is not None:
+                    row[index] = value
+        yield from chunk
+
+
+def _cell_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+class _Echo:
+    """شبه‌فایل برای csv.writer که خط نوشته‌شده را برمی‌گرداند"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(_Echo())
+    # BOM برای نمایش درست حروف فارسی در Excel
+    yield '﻿' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_cell_value(value) for value in row])
+
+
+class _StreamBuffer:
+    """مقصد غیرقابل seek برای zipfile که بایت‌های نوشته‌شده را تا خوانده شدن نگه می‌دارد"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _column_name(index):
+    name = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+
+def _xlsx_row(row_number, values):
+    cells = []
+    for index, value in enumerate(values):
+        ref = f'{_column_name(index)}{row_number}'
+        value = _cell_value(value)
+        if isinstance(value, (int, float, Decimal)):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+
+_XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def stream_xlsx(header, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.pop()
+
+        with archive.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(1, header).encode())
+            row_number = 1
+            for chunk in iter_chunks(rows, chunk_size):
+                parts = []
+                for row in chunk:
+                    row_number += 1
+                    parts.append(_xlsx_row(row_number, row))
+                sheet.write(''.join(parts).encode())
+                yield buffer.pop()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.pop()
+
+
+def streaming_export(filename, header, rows, file_format=CSV, use_jalali=False):
+    """پاسخ جریانی فایل خروجی؛ rows یک iterable از لیست مقادیر ستون‌هاست"""
+    rows = format_dates(rows, use_jalali)
+    if file_format == XLSX:
+        content = stream_xlsx(header, rows)
+    else:
+        content = stream_csv(header, rows)
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
@@ -0,0 +1,197 @@
+"""
+اندازه‌گیری کارایی هر درخواست
+
+برای هر درخواست یک RequestStats در contextvar نگهداری می‌شود و این مقادیر در آن جمع می‌شوند:
+
+    db      تعداد و زمان کوئری‌های SQL (با connection.execute_wrapper، بدون نیاز به DEBUG)
+    ser     زمان سریال‌سازی DRF (ساخت serializer.data و render پاسخ)
+    cache   تعداد hit و miss لایه‌های کش برنامه (کش داشبورد و کش کلیدهای API با record_cache)
+    view    زمان اجرای view و میان‌افزارهای داخلی
+    total   زمان کل درخواست در PerformanceMiddleware
+
+PerformanceMiddleware (apps.core.middleware) این مقادیر را در هدر Server-Timing برمی‌گرداند،
+در صورت فعال بودن یک خط لاگ JSON در logger با نام performance ثبت می‌کند و آمار تجمیعی را
+به تفکیک کلاس view در حافظه فرایند نگه می‌دارد (view_stats).
+
+تنظیمات:
+    PERFORMANCE_INSTRUMENTATION: فعال بودن اندازه‌گیری (پیش‌فرض True)
+    SERVER_TIMING_HEADER: افزودن هدر Server-Timing به پاسخ‌ها (پیش‌فرض True)
+    PERFORMANCE_LOG_REQUESTS: ثبت خط لاگ ساخت‌یافته برای هر درخواست (پیش‌فرض False)
+    PERFORMANCE_SLOW_REQUEST_MS: فقط درخواست‌های کندتر از این مقدار لاگ می‌شوند (پیش‌فرض ۰)
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = (
+        'view_name', 'started', 'view_started', 'view_time', 'total_time', 'sql_count', 'sql_time',
+        'serialize_time', 'serialize_depth', 'cache_hits', 'cache_misses'
+    )
+
+    def __init__(self):
+        self.view_name = None
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_time = 0.0
+        self.total_time = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serialize_time = 0.0
+        self.serialize_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def as_dict(self):
+        return {
+            'view': self.view_name,
+            'total_ms': round(self.total_time * 1000, 2),
+            'view_ms': round(self.view_time * 1000, 2),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'serialize_ms': round(self.serialize_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+    def server_timing(self):
+        """مقدار هدر Server-Timing"""
+        return ', '.join([
+            f'db;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"',
+            f'ser;dur={self.serialize_time * 1000:.2f}',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+            f'view;dur={self.view_time * 1000:.2f}',
+            f'total;dur={self.total_time * 1000:.2f}',
+        ])
+
+
+def current():
+    """آمار درخواست جاری یا None خارج از درخواست"""
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """جمع‌آوری آمار کدهای داخل بلوک (در میان‌افزار و تست‌ها)"""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        stats.total_time = time.perf_counter() - stats.started
+        _current.reset(token)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """execute_wrapper اتصال پایگاه داده برای شمارش و زمان‌سنجی کوئری‌ها"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_count += 1
+        stats.sql_time += time.perf_counter() - started
+
+
+def record_cache(hit):
+    stats = _current.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+
+def _timed_property(prop):
+    """زمان‌سنجی یک property سریال‌سازی؛ فراخوانی‌های تودرتو فقط یک بار شمرده می‌شوند"""
+    def getter(instance):
+        stats = _current.get()
+        if stats is None or stats.serialize_depth:
+            return prop.fget(instance)
+        stats.serialize_depth += 1
+        started = time.perf_counter()
+        try:
+            return prop.fget(instance)
+        finally:
+            stats.serialize_depth -= 1
+            stats.serialize_time += time.perf_counter() - started
+    getter.__wrapped__ = prop.fget
+    return property(getter, prop.fset, prop.fdel, prop.__doc__)
+
+
+_installed = False
+
+
+def install():
+    """افزودن زمان‌سنجی به BaseSerializer.data و Response.rendered_content (یک بار در ready)"""
+    global _installed
+    if _installed:
+        return
+    from rest_framework.response import Response
+    from rest_framework.serializers import BaseSerializer
+
+    BaseSerializer.data = _timed_property(BaseSerializer.data)
+    Response.rendered_content = _timed_property(Response.rendered_content)
+    _installed = True
+
+
+class ViewStats:
+    """آمار تجمیعی درخواست‌ها به تفکیک view در حافظه فرایند"""
+
+    FIELDS = ('total_time', 'view_time', 'sql_count', 'sql_time', 'serialize_time', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, stats):
+        with self._lock:
+            entry = self._views.setdefault(
+                stats.view_name, dict({field: 0 for field in self.FIELDS}, requests=0, max_total_time=0.0)
+            )
+            entry['requests'] += 1
+            for field in self.FIELDS:
+                entry[field] += getattr(stats, field)
+            entry['max_total_time'] = max(entry['max_total_time'], stats.total_time)
+
+    def snapshot(self):
+        """میانگین مقادیر هر view (زمان‌ها به میلی‌ثانیه)، مرتب بر اساس زمان کل"""
+        with self._lock:
+            views = {name: dict(entry) for name, entry in self._views.items()}
+        result = []
+        for name, entry in views.items():
+            requests = entry['requests']
+            result.append({
+                'view': name,
+                'requests': requests,
+                'avg_total_ms': round(entry['total_time'] * 1000 / requests, 2),
+                'max_total_ms': round(entry['max_total_time'] * 1000, 2),
+                'avg_view_ms': round(entry['view_time'] * 1000 / requests, 2),
+                'avg_sql_count': round(entry['sql_count'] / requests, 2),
+                'avg_sql_ms': round(entry['sql_time'] * 1000 / requests, 2),
+                'avg_serialize_ms': round(entry['serialize_time'] * 1000 / requests, 2),
+                'cache_hits': entry['cache_hits'],
+                'cache_misses': entry['cache_misses'],
+                'total_ms': round(entry['total_time'] * 1000, 2),
+            })
+        result.sort(key=lambda item: -item['total_ms'])
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+view_stats = ViewStats()
+
+
+def enabled():
+    return getattr(settings, 'PERFORMANCE_INSTRUMENTATION', True)
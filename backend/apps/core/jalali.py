@@ -0,0 +1,159 @@
+"""
+تبدیل سریع تاریخ میلادی به شمسی
+
+تبدیل تقویم فقط به روز وابسته است؛ به همین دلیل برای بازه پرکاربرد سال‌ها یک جدول
+از پیش محاسبه‌شده (اندیس‌گذاری‌شده با ordinal روز میلادی) ساخته می‌شود و روزهای خارج
+از جدول با یک کش LRU روزانه تبدیل می‌شوند. ساعت و دقیقه مستقل از تقویم‌اند و فقط
+به برچسب روز اضافه می‌شوند.
+
+خروجی to_jalali دقیقاً همان خروجی قبلی jdatetime.strftime است (مقادیر ساعت از همان
+datetime ورودی خوانده می‌شوند و تبدیل منطقه زمانی انجام نمی‌شود).
+"""
+import logging
+from datetime import date, datetime
+from functools import lru_cache
+
+import jdatetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DATETIME_FORMAT = '%Y/%m/%d %H:%M'
+DATE_FORMAT = '%Y/%m/%d'
+
+# بازه جدول از پیش محاسبه‌شده (حدود ۲۲ هزار روز)
+TABLE_START = date(1990, 1, 1)
+TABLE_END = date(2050, 12, 31)
+_TABLE_START_ORDINAL = TABLE_START.toordinal()
+
+
+def _month_length(year, month):
+    if month < 12:
+        return jdatetime.j_days_in_month[month - 1]
+    return 30 if jdatetime.date(year, 1, 1).isleap() else 29
+
+
+@lru_cache(maxsize=None)
+def _calendar_table():
+    """جدول تبدیل روز به روز: سال، ماه، روز شمسی و برچسب YYYY/MM/DD"""
+    size = (TABLE_END - TABLE_START).days + 1
+    years = np.empty(size, dtype=np.int16)
+    months = np.empty(size, dtype=np.int8)
+    days = np.empty(size, dtype=np.int8)
+    labels = np.empty(size, dtype=object)
+
+    jalali = jdatetime.date.fromgregorian(date=TABLE_START)
+    year, month, day = jalali.year, jalali.month, jalali.day
+    for index in range(size):
+        years[index], months[index], days[index] = year, month, day
+        labels[index] = f'{year:04d}/{month:02d}/{day:02d}'
+        day += 1
+        if day > _month_length(year, month):
+            day, month = 1, month + 1
+            if month > 12:
+                month, year = 1, year + 1
+    return years, months, days, labels
+
+
+@lru_cache(maxsize=4096)
+def _day_label(ordinal):
+    """برچسب شمسی روزهای خارج از جدول"""
+    jalali = jdatetime.date.fromgregorian(date=date.fromordinal(ordinal))
+    return f'{jalali.year:04d}/{jalali.month:02d}/{jalali.day:02d}'
+
+
+def day_label(value):
+    """برچسب شمسی YYYY/MM/DD برای یک date یا datetime"""
+    offset = value.toordinal() - _TABLE_START_ORDINAL
+    labels = _calendar_table()[3]
+    if 0 <= offset < len(labels):
+        return labels[offset]
+    return _day_label(value.toordinal())
+
+
+def jalali_ymd(value):
+    """سال، ماه و روز شمسی یک date یا datetime"""
+    offset = value.toordinal() - _TABLE_START_ORDINAL
+    years, months, days, _ = _calendar_table()
+    if 0 <= offset < len(years):
+        return int(years[offset]), int(months[offset]), int(days[offset])
+    jalali = jdatetime.date.fromgregorian(date=date.fromordinal(value.toordinal()))
+    return jalali.year, jalali.month, jalali.day
+
+
+def _parse(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value
+
+
+def _format(value, fmt):
+    label = day_label(value)
+    if fmt == DATE_FORMAT:
+        return label
+    if isinstance(value, datetime):
+        return f'{label} {value.hour:02d}:{value.minute:02d}'
+    return f'{label} 00:00'
+
+
+def to_jalali(value, fmt=DATETIME_FORMAT):
+    """تبدیل تاریخ میلادی (date، datetime یا رشته ISO) به رشته شمسی"""
+    if not value:
+        return ''
+    try:
+        value = _parse(value)
+        if fmt in (DATETIME_FORMAT, DATE_FORMAT):
+            return _format(value, fmt)
+        if isinstance(value, datetime):
+            return jdatetime.datetime.fromgregorian(datetime=value).strftime(fmt)
+        return jdatetime.date.fromgregorian(date=value).strftime(fmt)
+    except Exception as e:
+        logger.error(f"Error converting to Jalali: {str(e)}")
+        return str(value)
+
+
+def to_jalali_many(values, fmt=DATETIME_FORMAT):
+    """
+    تبدیل دسته‌ای یک ستون یا لیست تاریخ به رشته‌های شمسی
+
+    values: هر iterable از date/datetime/رشته ISO (از جمله ستون pandas)
+    خروجی: لیستی هم‌طول با ورودی؛ مقادیر خالی به '' تبدیل می‌شوند
+    """
+    values = list(values)
+    if fmt not in (DATETIME_FORMAT, DATE_FORMAT):
+        return [to_jalali(value, fmt) for value in values]
+
+    result = [''] * len(values)
+    positions, parsed = [], []
+    for position, value in enumerate(values):
+        # value != value مقدار NaT/NaN ستون‌های pandas را تشخیص می‌دهد
+        if value is None or value != value or value == '':
+            continue
+        try:
+            parsed.append(_parse(value))
+            positions.append(position)
+        except Exception as e:
+            logger.error(f"Error converting to Jalali: {str(e)}")
+            result[position] = str(value)
+    if not parsed:
+        return result
+
+    labels = _calendar_table()[3]
+    offsets = np.fromiter((value.toordinal() for value in parsed), dtype=np.int64, count=len(parsed))
+    offsets -= _TABLE_START_ORDINAL
+    in_table = (offsets >= 0) & (offsets < len(labels))
+    day_labels = np.empty(len(parsed), dtype=object)
+    day_labels[in_table] = labels[offsets[in_table]]
+    for index in np.flatnonzero(~in_table):
+        day_labels[index] = _day_label(int(offsets[index]) + _TABLE_START_ORDINAL)
+
+    if fmt == DATE_FORMAT:
+        for position, label in zip(positions, day_labels):
+            result[position] = label
+    else:
+        for position, value, label in zip(positions, parsed, day_labels):
+            if isinstance(value, datetime):
+                result[position] = f'{label} {value.hour:02d}:{value.minute:02d}'
+            else:
+                result[position] = f'{label} 00:00'
+    return result
@@ -54,6 +54,112 @@ class ThumbnailMixin(models.Model):
                 log_error("Error optimizing thumbnail", e)
         super().save(*args, **kwargs)
 
+class FieldTrackerMixin(models.Model):
+    """
+    میکسین ردیابی تغییر فیلدها بدون خواندن دوباره ردیف از پایگاه داده
+
+    مقدار فیلدهای tracked_fields هنگام بارگذاری نمونه (from_db) نگهداری می‌شود. در طول
+    save (شامل سیگنال‌های pre_save و post_save) has_changed و previous تغییرات همان ذخیره
+    را نشان می‌دهند (در post_save شامل مقادیری که گیرنده‌های pre_save تعیین کرده‌اند) و پس
+    از آن مقادیر ذخیره‌شده مبنای مقایسه بعدی می‌شوند. با update_fields فقط تغییر فیلدهای
+    ذخیره‌شده در نظر گرفته می‌شود؛ بنابراین save تودرتو در یک گیرنده post_save تغییرات
+    ذخیره بیرونی را دوباره گزارش نمی‌کند.
+    """
+    tracked_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._store_tracked_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._store_tracked_values(fields)
+
+    def _tracked_attnames(self):
+        return {name: self._meta.get_field(name).attname for name in self.tracked_fields}
+
+    def _store_tracked_values(self, fields=None):
+        """ذخیره مقدار فعلی فیلدهای ردیابی‌شده (فیلدهای deferred نادیده گرفته می‌شوند)"""
+        tracked = self.__dict__.setdefault('_tracked_values', {})
+        for name, attname in self._tracked_attnames().items():
+            if fields is not None and name not in fields and attname not in fields:
+                continue
+            if attname in self.__dict__:
+                tracked[name] = self.__dict__[attname]
+
+    def _pending_changes(self, update_fields=None):
+        """فیلدهای تغییرکرده و مقدار قبلی آن‌ها نسبت به آخرین مقدار بارگذاری یا ذخیره‌شده"""
+        tracked = self.__dict__.get('_tracked_values', {})
+        attnames = self._tracked_attnames()
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            attnames = {
+                name: attname for name, attname in attnames.items()
+                if name in update_fields or attname in update_fields
+            }
+        if self._state.adding:
+            return {name: None for name in attnames}
+
+        # فیلدهایی که بارگذاری نشده‌اند (defer/only) یک بار از پایگاه داده خوانده می‌شوند
+        attnames = {name: attname for name, attname in attnames.items() if attname in self.__dict__}
+        missing = [name for name in attnames if name not in tracked]
+        if missing and self.pk is not None:
+            row = type(self)._base_manager.filter(pk=self.pk).values(*[attnames[name] for name in missing]).first()
+            for name in missing:
+                tracked[name] = row[attnames[name]] if row else None
+
+        return {
+            name: tracked.get(name) for name, attname in attnames.items()
+            if getattr(self, attname) != tracked.get(name)
+        }
+
+    def save_base(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        outer_changes = self.__dict__.get('_save_changes')
+        stored = dict(self.__dict__.get('_tracked_values', {}))
+        # تغییرات تا پیش از pre_save؛ پس از اجرای گیرنده‌های pre_save در _save_table بازمحاسبه می‌شود
+        self._save_changes = self._pending_changes(update_fields)
+        try:
+            super().save_base(*args, **kwargs)
+        except Exception:
+            self._tracked_values = stored
+            raise
+        finally:
+            self._save_changes = outer_changes
+
+    def _save_table(self, raw=False, cls=None, force_insert=False, force_update=False, using=None, update_fields=None):
+        if cls is self._meta.concrete_model:
+            # مقادیر تعیین‌شده در pre_save هم در تغییرات دیده می‌شوند؛ مبنای مقایسه پیش از
+            # ارسال post_save به‌روز می‌شود تا save تودرتو تغییری نبیند
+            self._save_changes = self._pending_changes(update_fields)
+            self._store_tracked_values(update_fields)
+        return super()._save_table(raw, cls, force_insert, force_update, using, update_fields)
+
+    def _changes(self):
+        changes = self.__dict__.get('_save_changes')
+        return self._pending_changes() if changes is None else changes
+
+    def has_changed(self, field):
+        """آیا field در ذخیره جاری (یا از آخرین بارگذاری/ذخیره) تغییر کرده است"""
+        return field in self._changes()
+
+    def previous(self, field):
+        """مقدار قبلی field (برای نمونه‌های جدید None)"""
+        changes = self._changes()
+        if field in changes:
+            return changes[field]
+        return getattr(self, self._meta.get_field(field).attname)
+
+    @property
+    def changed_fields(self):
+        return set(self._changes())
+
+
 class SystemSetting(models.Model):
     """مدل برای ذخیره و مدیریت تنظیمات سیستمی"""
     key = models.CharField(max_length=100, unique=True, verbose_name=_("کلید"))
@@ -0,0 +1,107 @@
+"""
+صفحه‌بندی keyset (cursor) روی (created_at, id)
+
+به‌جای OFFSET، هر صفحه با شرط «بعد از آخرین ردیف صفحه قبل» روی ایندکس (created_at, id)
+خوانده می‌شود؛ بنابراین هزینه صفحه‌های عمیق با صفحه اول برابر است و درج ردیف‌های جدید
+باعث تکرار یا جا افتادن ردیف‌ها نمی‌شود. prefetch_related فقط برای ردیف‌های همان صفحه
+اجرا می‌شود.
+
+cursor مقدار رمزشده (created_at, id) آخرین ردیف است و در لینک next برگردانده می‌شود.
+ترتیب پیش‌فرض نزولی است و با ordering=created_at صعودی می‌شود؛ سایر مقادیر ordering در
+این صفحه‌بندی نادیده گرفته می‌شوند.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    ordering_field = 'created_at'
+    invalid_cursor_message = 'cursor نامعتبر است'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, instance):
+        value = getattr(instance, self.ordering_field)
+        payload = json.dumps([value.isoformat(), str(instance.pk)])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode())
+            value = parse_datetime(value)
+            pk = model._meta.pk.to_python(pk)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.descending = request.query_params.get(self.ordering_query_param) != self.ordering_field
+        page_size = self.get_page_size(request)
+        field = self.ordering_field
+
+        if self.descending:
+            queryset = queryset.order_by(f'-{field}', '-pk')
+        else:
+            queryset = queryset.order_by(field, 'pk')
+        cursor = self.decode_cursor(request, queryset.model)
+        if cursor is not None:
+            value, pk = cursor
+            lookup = 'lt' if self.descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'pk__{lookup}': pk})
+            )
+
+        # یک ردیف اضافه برای تشخیص وجود صفحه بعد
+        rows = list(queryset[:page_size + 1])
+        self.next_cursor = self.encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('first', self.get_first_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,197 @@
+"""
+محدودسازی نرخ درخواست روی backend کش جنگو
+
+دو الگوریتم پشتیبانی می‌شود:
+
+- sliding_window: شمارش تقریبی پنجره لغزان با دو شمارنده پنجره ثابت (فعلی و قبلی).
+  هر درخواست فقط یک incr اتمیک روی کش انجام می‌دهد؛ زمان انقضای شمارنده با هر درخواست
+  تمدید نمی‌شود و درخواست‌های ردشده از شمارنده کم می‌شوند.
+- token_bucket: سطلی با ظرفیت burst که با نرخ limit/period پر می‌شود و اجازه انفجار
+  کوتاه درخواست را می‌دهد. چون API کش compare-and-set ندارد، خواندن و نوشتن وضعیت سطل
+  با یک قفل کوتاه مبتنی بر cache.add (اتمیک در همه backendها) انجام می‌شود.
+
+نتیجه هر بررسی با set_headers به هدرهای استاندارد RateLimit-Limit، RateLimit-Remaining،
+RateLimit-Reset و RateLimit-Policy تبدیل می‌شود. RateLimitThrottle همین موتور را برای
+viewهای DRF فراهم می‌کند و نرخ هر scope از تنظیم RATE_LIMITS خوانده می‌شود، مثلاً:
+
+    RATE_LIMITS = {'user': '2000/hour', 'reports.generate': '20/hour'}
+"""
+import math
+import re
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+SLIDING_WINDOW = 'sliding_window'
+TOKEN_BUCKET = 'token_bucket'
+KEY_PREFIX = 'ratelimit'
+LOCK_TIMEOUT = 1
+LOCK_WAIT = 0.05
+
+PERIODS = {
+    's': 1, 'sec': 1, 'second': 1,
+    'm': 60, 'min': 60, 'minute': 60,
+    'h': 3600, 'hour': 3600,
+    'd': 86400, 'day': 86400,
+}
+_RATE_PATTERN = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([a-z]+)\s*$')
+
+# reset: ثانیه تا پر شدن دوباره سهمیه، retry_after: ثانیه تا مجاز شدن درخواست بعدی (برای درخواست ردشده)
+RateLimitResult = namedtuple('RateLimitResult', ['allowed', 'limit', 'remaining', 'reset', 'retry_after', 'period'])
+
+
+def parse_rate(rate):
+    """تبدیل نرخ متنی مثل '100/hour' یا '10/5m' به (limit, period به ثانیه)"""
+    match = _RATE_PATTERN.match(rate or '')
+    if not match or match.group(3) not in PERIODS:
+        raise ValueError(f'نرخ نامعتبر: {rate}')
+    limit, multiplier, unit = match.groups()
+    return int(limit), int(multiplier or 1) * PERIODS[unit]
+
+
+def _incr(key, delta, timeout):
+    """افزایش اتمیک شمارنده؛ انقضای کلید فقط هنگام ایجاد تعیین می‌شود"""
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, delta, timeout=timeout):
+            return delta
+        return cache.incr(key, delta)
+
+
+def sliding_window(key, limit, period, cost=1, now=None):
+    now = time.time() if now is None else now
+    window = int(now // period)
+    elapsed = now - window * period
+    current_key = f'{KEY_PREFIX}:sw:{key}:{window}'
+
+    count = _incr(current_key, cost, timeout=period * 2 + 1)
+    previous = cache.get(f'{KEY_PREFIX}:sw:{key}:{window - 1}', 0)
+    weight = 1 - elapsed / period
+    estimated = previous * weight + count
+    reset = math.ceil(period - elapsed)
+
+    if estimated <= limit:
+        return RateLimitResult(True, limit, int(limit - estimated), reset, 0, period)
+
+    cache.decr(current_key, cost)
+    count -= cost
+    if count + cost > limit or not previous:
+        retry_after = reset
+    else:
+        # زمانی که سهم پنجره قبلی به اندازه کافی کاهش یابد
+        retry_after = math.ceil(period * (1 - (limit - count - cost) / previous) - elapsed)
+    return RateLimitResult(False, limit, 0, reset, max(retry_after, 1), period)
+
+
+class _CacheLock:
+    """قفل کوتاه بین فرایندها با cache.add"""
+
+    def __init__(self, key):
+        self.key = f'{KEY_PREFIX}:lock:{key}'
+        self.acquired = False
+
+    def __enter__(self):
+        deadline = time.monotonic() + LOCK_WAIT
+        while True:
+            self.acquired = cache.add(self.key, 1, timeout=LOCK_TIMEOUT)
+            if self.acquired or time.monotonic() >= deadline:
+                return self
+            time.sleep(0.001)
+
+    def __exit__(self, *exc_info):
+        if self.acquired:
+            cache.delete(self.key)
+
+
+def token_bucket(key, limit, period, burst=None, cost=1, now=None):
+    capacity = burst or limit
+    refill_rate = limit / period
+    state_key = f'{KEY_PREFIX}:tb:{key}'
+
+    with _CacheLock(key) as lock:
+        now = time.time() if now is None else now
+        if not lock.acquired:
+            # رقابت شدید روی یک سطل؛ درخواست رد می‌شود تا سهمیه دوبار مصرف نشود
+            return RateLimitResult(False, capacity, 0, math.ceil(1 / refill_rate), 1, period)
+
+        tokens, updated = cache.get(state_key, (capacity, now))
+        tokens = min(capacity, tokens + max(now - updated, 0) * refill_rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        cache.set(state_key, (tokens, now), timeout=math.ceil(capacity / refill_rate) + 1)
+
+    reset = math.ceil((capacity - tokens) / refill_rate)
+    retry_after = 0 if allowed else max(math.ceil((cost - tokens) / refill_rate), 1)
+    return RateLimitResult(allowed, capacity, int(tokens), reset, retry_after, period)
+
+
+def check(key, rate, algorithm=SLIDING_WINDOW, burst=None, cost=1):
+    """بررسی و مصرف سهمیه؛ rate متنی ('100/hour') یا زوج (limit, period)"""
+    limit, period = parse_rate(rate) if isinstance(rate, str) else rate
+    if algorithm == TOKEN_BUCKET:
+        return token_bucket(key, limit, period, burst=burst, cost=cost)
+    if algorithm != SLIDING_WINDOW:
+        raise ValueError(f'الگوریتم نامعتبر: {algorithm}')
+    return sliding_window(key, limit, period, cost=cost)
+
+
+def record(request, result):
+    """نگهداری محدودکننده‌ترین نتیجه درخواست برای هدرهای پاسخ"""
+    current = getattr(request, 'ratelimit', None)
+    if current is None or (result.remaining, -result.reset) < (current.remaining, -current.reset):
+        request.ratelimit = result
+
+
+def set_headers(response, result):
+    if result is None:
+        return response
+    response['RateLimit-Limit'] = str(result.limit)
+    response['RateLimit-Remaining'] = str(result.remaining)
+    response['RateLimit-Reset'] = str(result.reset)
+    response['RateLimit-Policy'] = f'{result.limit};w={result.period}'
+    if not result.allowed:
+        response['Retry-After'] = str(result.retry_after)
+    return response
+
+
+class RateLimitThrottle(BaseThrottle):
+    """
+    throttle عمومی DRF بر پایه موتور محدودسازی
+
+    scope نام نرخ در RATE_LIMITS است. کلید محدودیت کاربر احراز هویت‌شده (یا IP کاربر
+    ناشناس) در همان scope است؛ برای محدودیت جداگانه یک endpoint زیرکلاسی با scope
+    مخصوص آن تعریف می‌شود.
+    """
+    scope = None
+    algorithm = SLIDING_WINDOW
+    burst = None
+
+    def get_rate(self):
+        return getattr(settings, 'RATE_LIMITS', {}).get(self.scope)
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{super().get_ident(request)}'
+
+    def allow_request(self, request, view):
+        rate = self.get_rate()
+        if not rate:
+            return True
+        self.result = check(f'{self.scope}:{self.get_ident(request)}', rate, self.algorithm, self.burst)
+        # هدرها توسط APIKeyMiddleware روی HttpRequest اصلی خوانده می‌شوند
+        record(request._request, self.result)
+        return self.result.allowed
+
+    def wait(self):
+        return self.result.retry_after
+
+
+class UserRateThrottle(RateLimitThrottle):
+    """سهمیه کلی هر کاربر در همه endpointها"""
+    scope = 'user'
@@ -1,4 +1,7 @@
+from django.db import models
 from rest_framework import serializers
+
+from . import jalali
 from .models import (
     SystemSetting, SiteSetting, HomeBlock,
     Tender, Bid, Award, Business,
@@ -6,6 +9,53 @@ from .models import (
     Order, OrderStage, Transaction, SetDesign
 )
 
+class JalaliDateTimeField(serializers.ReadOnlyField):
+    """
+    فیلد فقط‌خواندنی تاریخ شمسی
+
+    در سریالایزرهایی که list_serializer_class آن‌ها JalaliListSerializer است، مقادیر
+    کل صفحه یک‌جا با to_jalali_many تبدیل می‌شوند و هر ردیف فقط از نتیجه می‌خواند.
+    """
+
+    def __init__(self, fmt=jalali.DATETIME_FORMAT, **kwargs):
+        self.fmt = fmt
+        self._converted = {}
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        value = super().get_attribute(instance)
+        # مانند to_jalali مقدار خالی به رشته خالی تبدیل می‌شود
+        return '' if value is None else value
+
+    def prime(self, instances):
+        """تبدیل دسته‌ای مقادیر این فیلد برای همه نمونه‌های یک لیست"""
+        try:
+            values = [value for value in (self.get_attribute(instance) for instance in instances) if value]
+        except Exception:
+            # در صورت خطا هر ردیف جداگانه تبدیل می‌شود
+            self._converted = {}
+            return
+        self._converted = dict(zip(values, jalali.to_jalali_many(values, self.fmt)))
+
+    def to_representation(self, value):
+        converted = self._converted.get(value)
+        if converted is not None:
+            return converted
+        return jalali.to_jalali(value, self.fmt)
+
+
+class JalaliListSerializer(serializers.ListSerializer):
+    """ListSerializer که تاریخ‌های شمسی همه ردیف‌ها را یک‌جا تبدیل می‌کند"""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        instances = list(iterable)
+        for field in self.child.fields.values():
+            if isinstance(field, JalaliDateTimeField):
+                field.prime(instances)
+        return super().to_representation(instances)
+
+
 class SystemSettingSerializer(serializers.ModelSerializer):
     """سریالایزر برای تنظیمات سیستم"""
     class Meta:
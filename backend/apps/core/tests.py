@@ -5,7 +5,9 @@ from .models import SystemSetting
 from .utils import to_jalali, validate_file_size, validate_file_format, get_system_setting
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.exceptions import ValidationError
-from datetime import datetime
+from datetime import date, datetime, timedelta
+import jdatetime
+from . import jalali
 
 @pytest.mark.django_db
 def test_system_setting_create():
@@ -48,6 +50,33 @@ def test_to_jalali():
     jalali_date = to_jalali(date)
     assert '1402/02/05' in jalali_date
 
+def test_to_jalali_many_matches_jdatetime():
+    """تبدیل دسته‌ای با jdatetime یکسان است و مقادیر خالی و خارج از جدول را پشتیبانی می‌کند"""
+    values = [
+        datetime(2023, 4, 25, 12, 5),
+        None,
+        date(2024, 3, 20),
+        datetime(1950, 7, 1, 8, 30),
+        '2024-03-19T23:59:00Z',
+    ]
+    expected = [
+        jdatetime.datetime.fromgregorian(datetime=datetime(2023, 4, 25, 12, 5)).strftime('%Y/%m/%d %H:%M'),
+        '',
+        '1403/01/01 00:00',
+        jdatetime.datetime.fromgregorian(datetime=datetime(1950, 7, 1, 8, 30)).strftime('%Y/%m/%d %H:%M'),
+        '1402/12/29 23:59',
+    ]
+    assert jalali.to_jalali_many(values) == expected
+    assert [to_jalali(value) for value in values] == expected
+    assert jalali.to_jalali_many(values, jalali.DATE_FORMAT)[0] == '1402/02/05'
+
+def test_jalali_calendar_table_matches_jdatetime():
+    """جدول از پیش محاسبه‌شده با تبدیل jdatetime در مرز سال‌ها یکسان است"""
+    day = date(2024, 3, 10)
+    for _ in range(30):
+        assert jalali.day_label(day) == jdatetime.date.fromgregorian(date=day).strftime('%Y/%m/%d')
+        day += timedelta(days=1)
+
 @pytest.mark.django_db
 def test_validate_file_size():
     """تست اعتبارسنجی حجم فایل"""
@@ -79,3 +108,190 @@ def test_get_system_setting():
     assert value == 5
     default_value = get_system_setting('non_existent_key', 10)
     assert default_value == 10
+
+
+def _export_content(response):
+    return b''.join(response.streaming_content)
+
+def test_csv_export_streams_rows_with_jalali_dates():
+    """خروجی CSV با BOM شروع می‌شود و تاریخ‌ها در صورت درخواست شمسی می‌شوند"""
+    from . import exports
+    rows = ([i, datetime(2024, 3, 20, 10, 30), None] for i in range(3))
+    response = exports.streaming_export('test', ['id', 'date', 'empty'], rows, exports.CSV, use_jalali=True)
+    assert response['Content-Disposition'] == 'attachment; filename="test.csv"'
+    lines = _export_content(response).decode('utf-8-sig').splitlines()
+    assert lines[0] == 'id,date,empty'
+    assert lines[1] == '0,1403/01/01 10:30,'
+    assert len(lines) == 4
+
+def test_xlsx_export_is_valid_workbook():
+    """خروجی XLSX یک فایل zip معتبر با همه ردیف‌هاست"""
+    import io
+    import zipfile
+    from . import exports
+    rows = ([i, f'ردیف <{i}>', date(2024, 3, 20)] for i in range(2500))
+    response = exports.streaming_export('test', ['id', 'name', 'day'], rows, exports.XLSX)
+    archive = zipfile.ZipFile(io.BytesIO(_export_content(response)))
+    assert archive.testzip() is None
+    sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+    assert sheet.count('<row ') == 2501
+    assert '<t>ردیف &lt;2499&gt;</t>' in sheet
+    assert '<t>2024-03-20</t>' in sheet
+
+
+def test_parse_rate():
+    """نرخ متنی به تعداد و طول بازه به ثانیه تبدیل می‌شود"""
+    from .ratelimit import parse_rate
+    assert parse_rate('100/hour') == (100, 3600)
+    assert parse_rate('10/5m') == (10, 300)
+    with pytest.raises(ValueError):
+        parse_rate('10/fortnight')
+
+def test_sliding_window_counts_previous_window():
+    """پنجره لغزان سهم پنجره قبلی را به نسبت زمان باقی‌مانده حساب می‌کند و درخواست ردشده را نمی‌شمارد"""
+    import uuid
+    from .ratelimit import sliding_window
+    key = uuid.uuid4().hex
+    results = [sliding_window(key, 4, 60, now=1000 * 60 + 50) for _ in range(5)]
+    assert [result.allowed for result in results] == [True, True, True, True, False]
+    assert results[3].remaining == 0 and results[4].retry_after == 10
+
+    # ۱۵ ثانیه پس از شروع پنجره بعد، ۳ از ۴ درخواست قبلی هنوز حساب می‌شوند
+    result = sliding_window(key, 4, 60, now=1001 * 60 + 15)
+    assert result.allowed and result.remaining == 0
+    denied = sliding_window(key, 4, 60, now=1001 * 60 + 15)
+    assert not denied.allowed and denied.retry_after == 15
+
+def test_token_bucket_allows_burst_then_refills():
+    """سطل توکن تا ظرفیت burst اجازه می‌دهد و با نرخ ثابت پر می‌شود"""
+    import uuid
+    from .ratelimit import token_bucket
+    key = uuid.uuid4().hex
+    results = [token_bucket(key, 60, 3600, burst=3, now=1000) for _ in range(4)]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert results[3].retry_after == 60
+    assert not token_bucket(key, 60, 3600, burst=3, now=1030).allowed
+    assert token_bucket(key, 60, 3600, burst=3, now=1061).allowed
+
+@pytest.mark.django_db
+def test_throttle_sets_ratelimit_headers(settings):
+    """throttle ها هدرهای RateLimit محدودکننده‌ترین سهمیه را برمی‌گردانند"""
+    from django.core.cache import cache
+    cache.clear()
+    settings.RATE_LIMITS = {'user': '100/hour', 'reports.generate': '2/hour'}
+    from django.contrib.auth import get_user_model
+    user = get_user_model().objects.create_user(username='limited', password='pass1234', email='limited@example.com')
+    client = APIClient()
+    client.force_authenticate(user)
+
+    # ظرفیت سطل تولید گزارش ۵ است و با نرخ ۲ در ساعت پر می‌شود
+    responses = [client.post('/api/reports/generate/', {}, format='json') for _ in range(6)]
+    assert [response.status_code for response in responses] == [400] * 5 + [429]
+    assert responses[0]['RateLimit-Limit'] == '5'
+    assert responses[1]['RateLimit-Remaining'] == '3'
+    assert responses[5]['Retry-After'] == '1800'
+
+    response = client.get('/api/keys/')
+    assert response.status_code == 200
+    assert response['RateLimit-Limit'] == '100'
+    assert response['RateLimit-Policy'] == '100;w=3600'
+
+@pytest.mark.django_db
+def test_write_behind_counters_flush_in_one_update(settings):
+    """افزایش‌ها در حافظه جمع و با یک UPDATE برای همه ردیف‌ها نوشته می‌شوند"""
+    from unittest import mock
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from apps.templates_app.models import Template
+    from .counters import counters
+
+    settings.COUNTERS_EAGER = False
+    counters.flush()
+    first = Template.objects.create(name='counter-1', title='t1', price=0)
+    second = Template.objects.create(name='counter-2', title='t2', price=0)
+    with mock.patch.object(counters, '_ensure_thread'):
+        for _ in range(3):
+            first.increment_view_count()
+        second.increment_view_count()
+        second.increment_usage_count()
+
+    assert first.view_count == 3
+    assert Template.objects.get(pk=first.pk).view_count == 0
+    assert counters.apply_pending(Template.objects.get(pk=first.pk)).view_count == 3
+
+    with CaptureQueriesContext(connection) as queries:
+        assert counters.flush() == 2
+    assert len(queries) == 2  # یک UPDATE برای هر ترکیب فیلدها
+    assert list(Template.objects.order_by('name').values_list('view_count', 'usage_count')) == [(3, 0), (1, 1)]
+    assert counters.flush() == 0
+
+@pytest.mark.django_db
+def test_write_behind_touch_only_moves_forward(settings):
+    """زمان آخرین استفاده با مقدار قدیمی‌تر عقب نمی‌رود"""
+    from unittest import mock
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from apps.api.models import APIKey
+    from .counters import counters
+
+    settings.COUNTERS_EAGER = False
+    counters.flush()
+    user = get_user_model().objects.create_user(username='touch', password='pass1234', email='touch@example.com')
+    api_key = APIKey.objects.create(name='touch', key='touch-key', user=user)
+    now = timezone.now()
+    with mock.patch.object(counters, '_ensure_thread'):
+        counters.add(APIKey, api_key.pk, touched={'last_used_at': now})
+        counters.flush()
+        counters.add(APIKey, api_key.pk, touched={'last_used_at': now - timedelta(hours=1)})
+        counters.flush()
+    assert APIKey.objects.get(pk=api_key.pk).last_used_at == now
+
+@pytest.mark.django_db
+def test_server_timing_header_and_view_stats(settings):
+    """هدر Server-Timing و آمار تجمیعی هر view بدون نیاز به DEBUG"""
+    from django.contrib.auth import get_user_model
+    from .instrumentation import view_stats
+
+    settings.API_LOG_EAGER = True
+    view_stats.reset()
+    user = get_user_model().objects.create_superuser(username='perf', password='pass1234', email='perf@example.com')
+    client = APIClient()
+    client.force_authenticate(user)
+    SystemSetting.objects.create(key='perf_setting', value=1)
+
+    response = client.get('/api/core/system-settings/')
+    header = response['Server-Timing']
+    for metric in ('db;dur=', 'ser;dur=', 'cache;desc=', 'view;dur=', 'total;dur='):
+        assert metric in header
+    assert 'desc="0 queries"' not in header
+
+    response = client.get('/api/core/performance/')
+    views = {item['view']: item for item in response.json()['views']}
+    stats = views['apps.core.views.SystemSettingViewSet.list']
+    assert stats['requests'] == 1
+    assert stats['avg_sql_count'] >= 1
+
+    assert client.delete('/api/core/performance/').status_code == 204
+    # فقط خود درخواست DELETE پس از پاک شدن ثبت شده است
+    assert [item['view'] for item in view_stats.snapshot()] == ['apps.core.views.PerformanceStatsView']
+
+def test_instrumentation_collects_serialization_and_cache():
+    """زمان سریال‌سازی فقط برای بیرونی‌ترین فراخوانی و شمارش hit/miss کش"""
+    from rest_framework import serializers
+    from . import instrumentation
+
+    class ItemSerializer(serializers.Serializer):
+        name = serializers.CharField()
+
+    with instrumentation.collect() as stats:
+        data = ItemSerializer([{'name': 'a'}, {'name': 'b'}], many=True).data
+        instrumentation.record_cache(True)
+        instrumentation.record_cache(False)
+        instrumentation.record_cache(False)
+    assert len(data) == 2
+    assert stats.serialize_time > 0
+    assert stats.serialize_depth == 0
+    assert (stats.cache_hits, stats.cache_misses) == (1, 2)
+    # خارج از درخواست چیزی ثبت نمی‌شود
+    instrumentation.record_cache(True)
+    assert instrumentation.current() is None
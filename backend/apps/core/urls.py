@@ -5,7 +5,7 @@ from .views import (
     TenderViewSet, BidViewSet, AwardViewSet, BusinessViewSet,
     WorkshopViewSet, WorkshopTaskViewSet, WorkshopReportViewSet,
     OrderViewSet, OrderStageViewSet, TransactionViewSet,
-    SetDesignViewSet
+    SetDesignViewSet, PerformanceStatsView
 )
 
 router = DefaultRouter()
@@ -25,5 +25,6 @@ router.register(r'transactions', TransactionViewSet)
 router.register(r'set-design', SetDesignViewSet)
 
 urlpatterns = [
+    path('performance/', PerformanceStatsView.as_view(), name='performance_stats'),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
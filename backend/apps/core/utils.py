@@ -1,26 +1,17 @@
 from django.utils import timezone
-from jdatetime import datetime as jdatetime
-from datetime import datetime
+from django.utils.http import parse_etags
 from django.core.exceptions import ValidationError
+import hashlib
 import logging
 from django.conf import settings
 
+from . import jalali
+
 logger = logging.getLogger(__name__)
 
 def to_jalali(date):
-    """تبدیل تاریخ میلادی به شمسی"""
-    if not date:
-        return ''
-    try:
-        # اگر date یک string است، آن را به datetime تبدیل کن
-        if isinstance(date, str):
-            date = datetime.fromisoformat(date.replace('Z', '+00:00'))
-        
-        jalali_date = jdatetime.fromgregorian(datetime=date)
-        return jalali_date.strftime('%Y/%m/%d %H:%M')
-    except Exception as e:
-        logger.error(f"Error converting to Jalali: {str(e)}")
-        return str(date)
+    """تبدیل تاریخ میلادی به شمسی (برای تبدیل دسته‌ای از apps.core.jalali.to_jalali_many استفاده کنید)"""
+    return jalali.to_jalali(date)
 
 def validate_file_size(file, max_size_mb=None):
     """اعتبارسنجی حجم فایل (به مگابایت)"""
@@ -43,6 +34,22 @@ def log_error(message, exception=None):
     """ثبت خطا با لاگ"""
     logger.error(f"{message}: {str(exception)}" if exception else message)
 
+def make_etag(*parts):
+    """ETag ضعیف از مقادیر تعیین‌کننده نسخه پاسخ (مثلاً آخرین زمان تغییر و تعداد ردیف‌ها)"""
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(request, etag):
+    """تطبیق ضعیف ETag با هدر If-None-Match درخواست"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    tags = parse_etags(header)
+    if '*' in tags:
+        return True
+    strip = lambda tag: tag[2:] if tag.startswith('W/') else tag
+    return strip(etag) in {strip(tag) for tag in tags}
+
 def get_system_setting(key, default=None):
     """دریافت تنظیمات سیستمی"""
     # این import اینجا انجام شده تا از وابستگی دایره‌ای جلوگیری شود
@@ -231,3 +231,18 @@ class SetDesignViewSet(viewsets.ModelViewSet):
         instance.save()
         
         return Response(SetDesignSerializer(instance).data)
+
+
+class PerformanceStatsView(APIView):
+    """آمار کارایی درخواست‌ها به تفکیک view در این فرایند (فقط ادمین)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        from . import instrumentation
+        return Response({'views': instrumentation.view_stats.snapshot()})
+
+    def delete(self, request):
+        """پاک کردن آمار تجمیعی"""
+        from . import instrumentation
+        instrumentation.view_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
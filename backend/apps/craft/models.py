@@ -1,5 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from django.utils import timezone
+from apps.core import counters
 from apps.core.models import BaseModel
 from django.contrib.auth import get_user_model
 from apps.business.models import Business
@@ -43,6 +45,12 @@ class PhysicalStamp(BaseModel):
     def __str__(self):
         return f"{self.name} ({self.get_stamp_type_display()})"
 
+    def record_usage(self):
+        """ثبت یک بار استفاده از مهر (نوشتن دسته‌ای با apps.core.counters)"""
+        counters.increment(self, 'usage_count', touch='last_used')
+        self.usage_count += 1
+        self.last_used = timezone.now()
+
 class RequestPhysicalStamp(BaseModel):
     """مدل درخواست ساخت مهر فیزیکی"""
     STATUS_CHOICES = (
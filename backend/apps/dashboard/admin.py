@@ -1,3 +1,31 @@
 from django.contrib import admin
+from .models import DailyOrderRollup, DailyPaymentRollup, LeaderboardEntry
 
-# این اپ شامل مدل‌های پایگاه داده نیست و فقط APIهایی برای جمع‌آوری و نمایش داده‌ها ارائه می‌دهد
+# جداول تجمیع توسط سیگنال‌ها و دستور rebuild_dashboard_rollups نگهداری می‌شوند و فقط برای مشاهده ثبت شده‌اند
+
+@admin.register(DailyOrderRollup)
+class DailyOrderRollupAdmin(admin.ModelAdmin):
+    """پنل ادمین برای مشاهده تجمیع روزانه سفارش‌ها"""
+    list_display = ('date', 'business', 'status', 'order_count', 'total_sales')
+    list_filter = ('status', 'date')
+    search_fields = ('business__name',)
+    readonly_fields = ('date', 'business', 'status', 'order_count', 'total_sales')
+    list_per_page = 50
+
+@admin.register(DailyPaymentRollup)
+class DailyPaymentRollupAdmin(admin.ModelAdmin):
+    """پنل ادمین برای مشاهده تجمیع روزانه پرداخت‌ها"""
+    list_display = ('date', 'business', 'payment_count', 'total_amount')
+    list_filter = ('date',)
+    search_fields = ('business__name',)
+    readonly_fields = ('date', 'business', 'payment_count', 'total_amount')
+    list_per_page = 50
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    """پنل ادمین برای مشاهده جدول‌های رتبه‌بندی (نگهداری با دستور refresh_leaderboards)"""
+    list_display = ('board', 'window_days', 'business', 'rank', 'label', 'score', 'amount', 'refreshed_at')
+    list_filter = ('board', 'window_days')
+    search_fields = ('label', 'business__name')
+    readonly_fields = ('board', 'window_days', 'business', 'subject_key', 'label', 'score', 'amount', 'rank', 'refreshed_at')
+    list_per_page = 50
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):  
     default_auto_field = 'django.db.models.BigAutoField'  
     name = 'apps.dashboard' 
+
+    def ready(self):
+        """اتصال سیگنال‌های نگهداری جداول تجمیع"""
+        from . import signals  # noqa
@@ -0,0 +1,188 @@
+"""
+کش پاسخ endpointهای داشبورد به تفکیک کاربر
+
+کلید کش از نام view، کاربر، نقش (ادمین یا عادی)، پارامترهای URL و query string و
+نسخه دامنه‌های داده‌ای که کاربر می‌بیند ساخته می‌شود:
+
+    user:<id>        داده‌های شخصی کاربر
+    business:<id>    داده‌های کسب‌وکارهایی که کاربر مالک یا عضو آن است
+    global           داده‌های کل سیستم (در کلید ادمین‌ها و viewهایی که آمار کلی را به همه نشان می‌دهند)
+    broadcast        داده‌های مشترک همه کاربران (مثل اعلان‌های همگانی)
+
+سیگنال‌ها با تغییر مدل‌ها فقط نسخه دامنه‌های متأثر را افزایش می‌دهند؛ کلیدهای قدیمی
+دیگر خوانده نمی‌شوند و با پایان timeout حذف می‌شوند. مقدار اولیه نسخه‌ها از زمان
+گرفته می‌شود تا حذف کلید نسخه از کش (eviction) باعث برگشت به نسخه قدیمی نشود.
+
+تنظیمات:
+    DASHBOARD_CACHE_TIMEOUT: مدت اعتبار پاسخ‌ها به ثانیه (پیش‌فرض ۳۰۰)
+"""
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.core import instrumentation
+
+KEY_PREFIX = 'dashcache'
+GLOBAL_SCOPE = 'global'
+BROADCAST_SCOPE = 'broadcast'
+HIT = 'hit'
+MISS = 'miss'
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def business_scope(business_id):
+    return f'business:{business_id}'
+
+
+def _version_key(scope):
+    return f'{KEY_PREFIX}:version:{scope}'
+
+
+def _stats_key(view_name, outcome):
+    return f'{KEY_PREFIX}:stats:{view_name}:{outcome}'
+
+
+def _stats_index_key():
+    return f'{KEY_PREFIX}:stats:views'
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def get_versions(scopes):
+    """نسخه فعلی دامنه‌ها (ایجاد نسخه اولیه برای دامنه‌های جدید)"""
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, time.time_ns(), timeout=None)
+        found[key] = cache.get(key)
+    return {scope: found[key] for key, scope in keys.items()}
+
+
+def bump(*scopes):
+    """افزایش نسخه دامنه‌ها؛ پاسخ‌های کش‌شده وابسته به آن‌ها دیگر استفاده نمی‌شوند"""
+    for scope in set(scopes):
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate(user_ids=(), business_ids=()):
+    """ابطال پاسخ‌های کاربران و کسب‌وکارهای متأثر و پاسخ‌های ادمین"""
+    bump(
+        GLOBAL_SCOPE,
+        *(user_scope(user_id) for user_id in user_ids if user_id is not None),
+        *(business_scope(business_id) for business_id in business_ids if business_id is not None),
+    )
+
+
+def scopes_for(user, global_data=False):
+    """دامنه‌های داده‌ای که کاربر در داشبورد می‌بیند"""
+    from apps.business.models import Business
+
+    scopes = [BROADCAST_SCOPE, user_scope(user.pk)]
+    if user.is_staff or global_data:
+        scopes.append(GLOBAL_SCOPE)
+    business_ids = Business.objects.filter(
+        Q(owner=user) | Q(business_users__user=user) | Q(employees=user)
+    ).values_list('id', flat=True).distinct()
+    scopes.extend(business_scope(business_id) for business_id in sorted(business_ids))
+    return scopes
+
+
+def build_key(view_name, request, view_kwargs, global_data=False):
+    user = request.user
+    scopes = scopes_for(user, global_data)
+    versions = get_versions(scopes)
+    payload = json.dumps({
+        'user': str(user.pk),
+        'role': 'staff' if user.is_staff else 'user',
+        'kwargs': {name: str(value) for name, value in view_kwargs.items()},
+        'params': sorted(request.query_params.lists()),
+        'versions': [versions[scope] for scope in scopes],
+    }, sort_keys=True)
+    return f'{KEY_PREFIX}:response:{view_name}:{hashlib.sha256(payload.encode()).hexdigest()}'
+
+
+def record(view_name, outcome):
+    """افزایش شمارنده hit یا miss یک view"""
+    instrumentation.record_cache(outcome == HIT)
+    if _incr(_stats_key(view_name, outcome)) == 1:
+        names = cache.get(_stats_index_key()) or []
+        if view_name not in names:
+            cache.set(_stats_index_key(), names + [view_name], timeout=None)
+
+
+def get_stats():
+    """شمارنده‌های hit/miss هر view"""
+    names = cache.get(_stats_index_key()) or []
+    counters = cache.get_many([_stats_key(name, outcome) for name in names for outcome in (HIT, MISS)])
+    stats = {}
+    for name in names:
+        hits = counters.get(_stats_key(name, HIT), 0)
+        misses = counters.get(_stats_key(name, MISS), 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else 0,
+        }
+    return stats
+
+
+def has_error(data):
+    """آیا پاسخ یا یکی از بخش‌های آن (مثلاً dashboard و main داشبورد ترکیبی) کلید error دارد"""
+    if not isinstance(data, dict):
+        return False
+    return 'error' in data or any(isinstance(value, dict) and 'error' in value for value in data.values())
+
+
+def cached_response(view_name, timeout=None, global_data=False):
+    """
+    دکوراتور متد get یک APIView (یا action یک ViewSet) برای کش پاسخ به تفکیک کاربر
+
+    global_data برای viewهایی است که آمار کل سیستم را به کاربران عادی هم نشان می‌دهند.
+    فقط پاسخ‌های ۲۰۰ کاربران احراز هویت‌شده و بدون خطای داخلی (has_error) کش می‌شوند.
+    وضعیت کش در هدر X-Cache برگردانده می‌شود.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return method(self, request, *args, **kwargs)
+
+            key = build_key(view_name, request, kwargs, global_data)
+            data = cache.get(key)
+            if data is not None:
+                record(view_name, HIT)
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            record(view_name, MISS)
+            response = method(self, request, *args, **kwargs)
+            if (isinstance(response, Response) and response.status_code == status.HTTP_200_OK
+                    and not has_error(response.data)):
+                cache.set(key, response.data, timeout=timeout or getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300))
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
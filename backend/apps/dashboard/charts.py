@@ -0,0 +1,146 @@
+"""
+موتور ساخت داده‌های نمودار داشبورد
+
+گروه‌بندی در پایگاه داده انجام می‌شود و برای هر بازه (روز، هفته یا ماه شمسی) فقط یک
+ردیف برمی‌گردد؛ سپس مقادیر در یک آرایه NumPy به طول تعداد بازه‌ها قرار می‌گیرند تا
+بازه‌های بدون داده با صفر پر شوند. خروجی همان ساختار JSON نمودارهای قبلی است:
+{'labels', 'values', 'type', 'title'}.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+import jdatetime
+import numpy as np
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+
+from apps.core import jalali
+from .rollups import day_bounds
+
+DAY = 'day'
+WEEK = 'week'
+JALALI_MONTH = 'jalali_month'
+GRANULARITIES = (DAY, WEEK, JALALI_MONTH)
+
+GRANULARITY_TITLES = {
+    DAY: 'روزانه',
+    WEEK: 'هفتگی',
+    JALALI_MONTH: 'ماهانه',
+}
+
+# منبع داده نمودار: ردیف‌های خام (فیلد datetime) یا ردیف‌های تجمیع روزانه (فیلد date)
+ChartSource = namedtuple('ChartSource', ['queryset', 'date_field', 'amount_field', 'is_datetime'])
+
+# شنبه در datetime.weekday برابر ۵ است؛ هفته‌ها مطابق تقویم شمسی از شنبه شروع می‌شوند
+WEEK_START_WEEKDAY = 5
+
+
+def granularity_for_days(days):
+    """انتخاب پیش‌فرض مقیاس زمانی بر اساس طول بازه (مطابق رفتار قبلی داشبورد)"""
+    if days <= 7:
+        return DAY
+    if days <= 30:
+        return WEEK
+    return JALALI_MONTH
+
+
+def parse_granularity(value, default):
+    """مقیاس زمانی درخواست‌شده در query string یا مقدار پیش‌فرض"""
+    return value if value in GRANULARITIES else default
+
+
+def _jalali_month_start(day):
+    year, month, _ = jalali.jalali_ymd(day)
+    return jdatetime.date(year, month, 1)
+
+
+def _next_jalali_month(month_start):
+    if month_start.month == 12:
+        return jdatetime.date(month_start.year + 1, 1, 1)
+    return jdatetime.date(month_start.year, month_start.month + 1, 1)
+
+
+def bucket_starts(start_day, end_day, granularity):
+    """تاریخ میلادی شروع هر بازه که با بازه [start_day, end_day] هم‌پوشانی دارد"""
+    if granularity == DAY:
+        return [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+    if granularity == WEEK:
+        first = start_day - timedelta(days=(start_day.weekday() - WEEK_START_WEEKDAY) % 7)
+        return [first + timedelta(weeks=i) for i in range((end_day - first).days // 7 + 1)]
+    if granularity == JALALI_MONTH:
+        starts = []
+        month = _jalali_month_start(start_day)
+        while month.togregorian() <= end_day:
+            starts.append(month.togregorian())
+            month = _next_jalali_month(month)
+        return starts
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def bucket_label(day, granularity):
+    """برچسب شمسی یک بازه"""
+    if granularity == JALALI_MONTH:
+        year, month, _ = jalali.jalali_ymd(day)
+        return f'{year:04d}/{month:02d}'
+    return jalali.day_label(day)
+
+
+def _bucket_expression(field, boundaries):
+    """عبارت CASE که اندیس بازه هر ردیف را محاسبه می‌کند (بزرگ‌ترین مرز کوچک‌تر یا مساوی مقدار)"""
+    whens = [
+        When(**{f'{field}__gte': boundary}, then=Value(index))
+        for index, boundary in reversed(list(enumerate(boundaries)))
+    ]
+    return Case(*whens, default=Value(0), output_field=IntegerField())
+
+
+def bucket_totals(source, start_day, end_day, granularity):
+    """
+    جمع مبلغ منبع داده در هر بازه زمانی
+
+    خروجی: (لیست تاریخ شروع بازه‌ها، آرایه NumPy جمع هر بازه)
+    """
+    queryset, date_field, amount_field, is_datetime = source
+    starts = bucket_starts(start_day, end_day, granularity)
+    values = np.zeros(len(starts), dtype=np.float64)
+
+    if is_datetime:
+        range_start, range_end = day_bounds(start_day, end_day)
+        rows = queryset.filter(**{f'{date_field}__gte': range_start, f'{date_field}__lt': range_end})
+    else:
+        rows = queryset.filter(**{f'{date_field}__range': (start_day, end_day)})
+
+    if granularity == DAY:
+        day_expr = TruncDate(date_field) if is_datetime else F(date_field)
+        grouped = rows.annotate(bucket_day=day_expr).values('bucket_day').annotate(total=Sum(amount_field)).order_by()
+        pairs = [(row['bucket_day'], row['total']) for row in grouped]
+        if pairs:
+            offsets = np.fromiter(((day - start_day).days for day, _ in pairs), dtype=np.int64, count=len(pairs))
+            totals = np.fromiter((float(total or 0) for _, total in pairs), dtype=np.float64, count=len(pairs))
+            values[offsets] = totals
+        return starts, values
+
+    if is_datetime:
+        boundaries = [day_bounds(day, day)[0] for day in starts]
+    else:
+        boundaries = starts
+    grouped = rows.annotate(
+        bucket=_bucket_expression(date_field, boundaries)
+    ).values('bucket').annotate(total=Sum(amount_field)).order_by()
+    pairs = [(row['bucket'], row['total']) for row in grouped]
+    if pairs:
+        indexes = np.fromiter((index for index, _ in pairs), dtype=np.int64, count=len(pairs))
+        totals = np.fromiter((float(total or 0) for _, total in pairs), dtype=np.float64, count=len(pairs))
+        np.add.at(values, indexes, totals)
+    return starts, values
+
+
+def build_chart(source, start_day, end_day, granularity, chart_type, title):
+    """ساخت دیکشنری نمودار با ساختار {'labels', 'values', 'type', 'title'}"""
+    starts, values = bucket_totals(source, start_day, end_day, granularity)
+    return {
+        'labels': [bucket_label(day, granularity) for day in starts],
+        'values': values.tolist(),
+        'type': chart_type,
+        'title': title,
+    }
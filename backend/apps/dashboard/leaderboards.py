@@ -0,0 +1,284 @@
+"""
+جداول رتبه‌بندی داشبورد (طرح‌های پرفروش، کسب‌وکارهای برتر، کاربران فعال)
+
+برای هر جدول و هر بازه زمانی (۷، ۳۰ و ۹۰ روز اخیر) N مورد برتر در LeaderboardEntry
+نگهداری می‌شود؛ به‌صورت کلی و برای جدول‌هایی که کسب‌وکار دارند به تفکیک هر کسب‌وکار.
+viewهای داشبورد به‌جای GROUP BY و ORDER BY روی همه سفارش‌ها این جداول را می‌خوانند؛
+برای بازه‌ای غیر از بازه‌های ذخیره‌شده top همان رتبه‌بندی را با GROUP BY زنده می‌سازد تا
+رتبه‌بندی با سایر آمارهای همان بازه هم‌خوان باشد.
+
+- refresh: بازسازی کامل از جداول خام (دستور refresh_leaderboards برای اجرای دوره‌ای)؛
+  خروج سفارش‌های قدیمی از بازه‌ها فقط با همین بازسازی اعمال می‌شود.
+- apply_order / apply_order_item: به‌روزرسانی تدریجی پس از ذخیره یا حذف سفارش و آیتم
+  سفارش؛ امتیاز موردهای درگیر با یک کوئری (برای همه بازه‌ها) دوباره شمرده می‌شود و
+  در صورت قرار گرفتن در N مورد برتر در جدول درج می‌شود.
+
+تنظیمات:
+    LEADERBOARD_SIZE: تعداد ردیف‌های هر جدول (پیش‌فرض ۱۰)
+"""
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.business.models import Business
+from apps.designs.models import Design
+from apps.orders.models import Order, OrderItem
+from .models import LeaderboardEntry
+
+User = get_user_model()
+
+WINDOWS = (7, 30, 90)
+PRODUCTS = LeaderboardEntry.BOARD_PRODUCTS
+BUSINESSES = LeaderboardEntry.BOARD_BUSINESSES
+USERS = LeaderboardEntry.BOARD_USERS
+
+# queryset: کوئری ردیف‌های خام، score: (تابع تجمیع، فیلد)، business_field: برای جدول‌های به تفکیک کسب‌وکار
+Board = namedtuple('Board', [
+    'queryset', 'date_field', 'subject_field', 'label_field', 'score', 'amount_field', 'business_field'
+])
+
+BOARDS = {
+    PRODUCTS: Board(
+        lambda: OrderItem.objects.filter(design__isnull=False, order__isnull=False),
+        'order__created_at', 'design_id', 'design__title', (Sum, 'quantity'), 'total_price', 'order__business_id'
+    ),
+    BUSINESSES: Board(
+        lambda: Order.objects.all(),
+        'created_at', 'business_id', 'business__name', (Count, 'id'), 'total_price', None
+    ),
+    USERS: Board(
+        lambda: Order.objects.all(),
+        'created_at', 'customer_id', 'customer__username', (Count, 'id'), 'total_price', 'business_id'
+    ),
+}
+
+
+def board_size():
+    return getattr(settings, 'LEADERBOARD_SIZE', 10)
+
+
+def _since(window, now):
+    return now - timedelta(days=window)
+
+
+def _sort_key(entry):
+    return (-entry.score, -entry.amount, entry.subject_key)
+
+
+def top(board, days=30, business=None, limit=5):
+    """N مورد برتر یک جدول در days روز اخیر (از جدول ذخیره‌شده یا با GROUP BY زنده)"""
+    if days not in WINDOWS:
+        return _live_top(board, days, business, limit)
+    entries = LeaderboardEntry.objects.filter(
+        board=board, window_days=days, business=business
+    ).order_by('rank')[:limit]
+    return [
+        {'id': entry.subject_key, 'name': entry.label, 'count': entry.score, 'amount': entry.amount}
+        for entry in entries
+    ]
+
+
+def _live_top(board, days, business, limit):
+    """رتبه‌بندی مستقیم از جداول خام برای بازه‌ای که جدول ذخیره‌شده ندارد"""
+    spec = BOARDS[board]
+    aggregate, field = spec.score
+    rows = spec.queryset().filter(**{
+        f'{spec.date_field}__gte': _since(days, timezone.now()),
+        f'{spec.subject_field}__isnull': False,
+    })
+    if business is not None:
+        rows = rows.filter(**{spec.business_field: getattr(business, 'pk', business)})
+    rows = rows.values(spec.subject_field, spec.label_field).annotate(
+        score=aggregate(field), amount=Sum(spec.amount_field)
+    ).order_by('-score', '-amount', spec.subject_field)[:limit]
+    return [
+        {
+            'id': str(row[spec.subject_field]), 'name': row[spec.label_field] or '',
+            'count': row['score'] or 0, 'amount': row['amount'] or Decimal(0),
+        }
+        for row in rows
+    ]
+
+
+def _window_rows(spec, window, now):
+    """ردیف‌های گروه‌بندی‌شده یک بازه؛ برای جدول‌های کسب‌وکاری به تفکیک کسب‌وکار"""
+    aggregate, field = spec.score
+    group_fields = [spec.subject_field, spec.label_field]
+    if spec.business_field:
+        group_fields.append(spec.business_field)
+    return spec.queryset().filter(**{f'{spec.date_field}__gte': _since(window, now)}).values(
+        *group_fields
+    ).annotate(
+        score=aggregate(field), amount=Sum(spec.amount_field)
+    ).order_by().iterator()
+
+
+def refresh(boards=None, windows=WINDOWS):
+    """
+    بازسازی کامل جدول‌ها از جداول خام
+
+    خروجی: تعداد ردیف‌های نوشته‌شده برای هر جدول
+    """
+    now = timezone.now()
+    size = board_size()
+    written = {}
+    for name in boards or BOARDS:
+        spec = BOARDS[name]
+        entries = []
+        for window in windows:
+            scoped = defaultdict(list)
+            for row in _window_rows(spec, window, now):
+                subject = row[spec.subject_field]
+                if subject is None:
+                    continue
+                entry = LeaderboardEntry(
+                    board=name, window_days=window, subject_key=str(subject),
+                    label=row[spec.label_field] or '', score=row['score'] or 0,
+                    amount=row['amount'] or Decimal(0), refreshed_at=now
+                )
+                scoped[None].append(entry)
+                if spec.business_field and row[spec.business_field] is not None:
+                    scoped[row[spec.business_field]].append(
+                        LeaderboardEntry(
+                            board=name, window_days=window, business_id=row[spec.business_field],
+                            subject_key=entry.subject_key, label=entry.label, score=entry.score,
+                            amount=entry.amount, refreshed_at=now
+                        )
+                    )
+            if spec.business_field:
+                # ردیف کلی هر مورد از جمع ردیف‌های کسب‌وکارهای آن ساخته می‌شود
+                scoped[None] = _merge_subjects(scoped[None])
+            for scope_entries in scoped.values():
+                entries.extend(_ranked(scope_entries)[:size])
+
+        with transaction.atomic():
+            LeaderboardEntry.objects.filter(board=name, window_days__in=windows).delete()
+            LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+        written[name] = len(entries)
+    return written
+
+
+def _merge_subjects(entries):
+    merged = {}
+    for entry in entries:
+        current = merged.get(entry.subject_key)
+        if current is None:
+            merged[entry.subject_key] = entry
+        else:
+            current.score += entry.score
+            current.amount += entry.amount
+    return list(merged.values())
+
+
+def _ranked(entries):
+    entries = sorted(entries, key=_sort_key)
+    for rank, entry in enumerate(entries, start=1):
+        entry.rank = rank
+    return entries
+
+
+def _subject_totals(spec, subject, business_id, now):
+    """امتیاز و مبلغ یک مورد در همه بازه‌ها با یک کوئری"""
+    aggregate, field = spec.score
+    rows = spec.queryset().filter(**{
+        spec.subject_field: subject,
+        f'{spec.date_field}__gte': _since(max(WINDOWS), now),
+    })
+    if business_id is not None:
+        rows = rows.filter(**{spec.business_field: business_id})
+    aggregates = {}
+    for window in WINDOWS:
+        in_window = Q(**{f'{spec.date_field}__gte': _since(window, now)})
+        aggregates[f'score_{window}'] = aggregate(field, filter=in_window)
+        aggregates[f'amount_{window}'] = Sum(spec.amount_field, filter=in_window)
+    totals = rows.aggregate(**aggregates)
+    return {
+        window: (totals[f'score_{window}'] or 0, totals[f'amount_{window}'] or Decimal(0))
+        for window in WINDOWS
+    }
+
+
+def _label(board, subject):
+    if board == PRODUCTS:
+        return Design.objects.filter(pk=subject).values_list('title', flat=True).first() or ''
+    if board == BUSINESSES:
+        return Business.objects.filter(pk=subject).values_list('name', flat=True).first() or ''
+    return User.objects.filter(pk=subject).values_list('username', flat=True).first() or ''
+
+
+def _apply_subject(board, subject, business_id, now):
+    """اعمال امتیاز جدید یک مورد روی جدول کلی یا جدول یک کسب‌وکار"""
+    spec = BOARDS[board]
+    totals = _subject_totals(spec, subject, business_id, now)
+    size = board_size()
+    subject_key = str(subject)
+    label = None
+
+    with transaction.atomic():
+        current = defaultdict(list)
+        for entry in LeaderboardEntry.objects.select_for_update().filter(board=board, business_id=business_id):
+            current[entry.window_days].append(entry)
+
+        to_create, to_update, to_delete = [], [], []
+        for window, (score, amount) in totals.items():
+            entries = current[window]
+            existing = next((entry for entry in entries if entry.subject_key == subject_key), None)
+            if existing is not None:
+                if score:
+                    existing.score, existing.amount, existing.refreshed_at = score, amount, now
+                else:
+                    entries.remove(existing)
+                    to_delete.append(existing.pk)
+            elif score:
+                candidate = LeaderboardEntry(
+                    board=board, window_days=window, business_id=business_id, subject_key=subject_key,
+                    score=score, amount=amount, refreshed_at=now
+                )
+                if len(entries) >= size and _sort_key(candidate) > max(_sort_key(entry) for entry in entries):
+                    continue
+                if label is None:
+                    label = _label(board, subject)
+                candidate.label = label
+                entries.append(candidate)
+
+            ranked = _ranked(entries)
+            to_delete.extend(entry.pk for entry in ranked[size:] if entry.pk)
+            for entry in ranked[:size]:
+                (to_update if entry.pk else to_create).append(entry)
+
+        if to_delete:
+            LeaderboardEntry.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            LeaderboardEntry.objects.bulk_update(to_update, ['score', 'amount', 'rank', 'refreshed_at'])
+        if to_create:
+            LeaderboardEntry.objects.bulk_create(to_create)
+
+
+def _apply(board, subject, business_ids):
+    if subject is None:
+        return
+    now = timezone.now()
+    _apply_subject(board, subject, None, now)
+    if BOARDS[board].business_field:
+        for business_id in {business_id for business_id in business_ids if business_id is not None}:
+            _apply_subject(board, subject, business_id, now)
+
+
+def apply_order(customer_ids, business_ids):
+    """به‌روزرسانی تدریجی جدول‌های کسب‌وکارها و کاربران پس از تغییر سفارش"""
+    for business_id in {business_id for business_id in business_ids if business_id is not None}:
+        _apply(BUSINESSES, business_id, ())
+    for customer_id in set(customer_ids):
+        _apply(USERS, customer_id, business_ids)
+
+
+def apply_order_item(design_ids, business_ids):
+    """به‌روزرسانی تدریجی جدول طرح‌های پرفروش پس از تغییر آیتم سفارش"""
+    for design_id in set(design_ids):
+        _apply(PRODUCTS, design_id, business_ids)
@@ -0,0 +1,122 @@
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+import jdatetime
+import numpy as np
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.business.models import Business
+from apps.orders.models import Order
+from apps.dashboard import charts
+from apps.dashboard.rollups import day_bounds
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    مقایسه زمان و حافظه ساخت نمودار فروش با روش قدیمی (DataFrame در حافظه) و موتور جدید charts
+
+    داده‌های آزمایشی داخل یک تراکنش ایجاد و در پایان rollback می‌شوند.
+    """
+    help = 'Benchmark legacy pandas chart building against SQL-side bucketing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000, help='تعداد سفارش آزمایشی')
+        parser.add_argument('--days', type=int, default=90, help='طول بازه نمودار به روز')
+        parser.add_argument('--batch-size', type=int, default=5000, help='اندازه دسته در bulk_create')
+        parser.add_argument('--granularity', choices=charts.GRANULARITIES, default=charts.DAY)
+
+    def _seed(self, count, days, batch_size):
+        User = get_user_model()
+        suffix = uuid.uuid4().hex[:8]
+        owner = User.objects.create(username=f'benchmark_{suffix}')
+        business = Business.objects.create(owner=owner, name=f'benchmark {suffix}')
+
+        rng = np.random.default_rng(0)
+        prices = rng.integers(10_000, 5_000_000, size=count)
+        day_offsets = rng.integers(0, days, size=count)
+        ids_by_day = {}
+        for start in range(0, count, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, count)):
+                order_id = uuid.uuid4()
+                ids_by_day.setdefault(int(day_offsets[i]), []).append(order_id)
+                batch.append(Order(
+                    id=order_id, customer=owner, business=business,
+                    status='completed', total_price=Decimal(int(prices[i]))
+                ))
+            Order.objects.bulk_create(batch)
+
+        # created_at با auto_now_add مقدار فعلی می‌گیرد؛ سفارش‌ها روی روزهای بازه پخش می‌شوند
+        now = timezone.now()
+        for offset, ids in ids_by_day.items():
+            created_at = now - timedelta(days=offset)
+            for start in range(0, len(ids), batch_size):
+                Order.objects.filter(id__in=ids[start:start + batch_size]).update(created_at=created_at)
+        return business
+
+    def _legacy_chart(self, queryset, start_day, end_day):
+        """پیاده‌سازی قبلی: بارگذاری همه ردیف‌ها در DataFrame و گروه‌بندی در پایتون"""
+        start, end = day_bounds(start_day, end_day)
+        rows = queryset.filter(created_at__gte=start, created_at__lt=end)
+        df = pd.DataFrame(list(rows.values('created_at', 'total_price')))
+        df['date'] = pd.to_datetime(df['created_at']).dt.tz_convert(timezone.get_current_timezone()).dt.date
+        daily = df.groupby('date')['total_price'].sum().reset_index()
+        days = pd.date_range(start=start_day, end=end_day, freq='D').date
+        daily = pd.DataFrame({'date': days}).merge(daily, on='date', how='left').fillna(0)
+        return {
+            'labels': [jdatetime.date.fromgregorian(date=day).strftime('%Y/%m/%d') for day in daily['date']],
+            'values': [float(value) for value in daily['total_price']],
+            'type': 'bar',
+            'title': 'فروش روزانه',
+        }
+
+    def _measure(self, func):
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, elapsed, peak
+
+    def _report(self, name, elapsed, peak):
+        self.stdout.write(f'{name:<8} time={elapsed:8.3f}s  peak_memory={peak / (1024 * 1024):8.2f}MB')
+
+    def handle(self, *args, **options):
+        end_day = timezone.localdate()
+        start_day = end_day - timedelta(days=options['days'] - 1)
+        granularity = options['granularity']
+
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"ایجاد {options['orders']} سفارش آزمایشی ...")
+                business = self._seed(options['orders'], options['days'], options['batch_size'])
+                queryset = Order.objects.filter(business=business)
+
+                if granularity == charts.DAY:
+                    legacy, elapsed, peak = self._measure(lambda: self._legacy_chart(queryset, start_day, end_day))
+                    self._report('legacy', elapsed, peak)
+
+                source = charts.ChartSource(queryset, 'created_at', 'total_price', True)
+                chart, elapsed, peak = self._measure(
+                    lambda: charts.build_chart(source, start_day, end_day, granularity, 'bar', 'فروش روزانه')
+                )
+                self._report('charts', elapsed, peak)
+
+                if granularity == charts.DAY:
+                    same = legacy['labels'] == chart['labels'] and np.allclose(legacy['values'], chart['values'])
+                    self.stdout.write(f'identical output: {same}')
+                raise _Rollback
+        except _Rollback:
+            pass
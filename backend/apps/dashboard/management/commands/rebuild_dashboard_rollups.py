@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.payment.models import Payment
+from apps.dashboard.rollups import local_day, reconcile
+
+
+class Command(BaseCommand):
+    """پرکردن اولیه و تطبیق جداول تجمیع روزانه داشبورد با جداول سفارش و پرداخت"""
+    help = 'Backfill and reconcile dashboard daily rollups against orders and payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='تاریخ شروع (YYYY-MM-DD)؛ پیش‌فرض: قدیمی‌ترین سفارش یا پرداخت')
+        parser.add_argument('--end', help='تاریخ پایان (YYYY-MM-DD)؛ پیش‌فرض: امروز')
+        parser.add_argument('--days', type=int, help='فقط N روز اخیر (جایگزین --start)')
+        parser.add_argument('--chunk-days', type=int, default=31, help='تعداد روز پردازش‌شده در هر تراکنش')
+        parser.add_argument('--dry-run', action='store_true', help='فقط گزارش اختلاف‌ها بدون اعمال تغییر')
+
+    def _parse_day(self, value, name):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'فرمت {name} نامعتبر است. از قالب YYYY-MM-DD استفاده کنید')
+
+    def _earliest_day(self):
+        earliest = [
+            value for value in (
+                Order.objects.aggregate(first=Min('created_at'))['first'],
+                Payment.objects.aggregate(first=Min('created_at'))['first'],
+            ) if value
+        ]
+        return local_day(min(earliest)) if earliest else None
+
+    def handle(self, *args, **options):
+        end_day = self._parse_day(options['end'], '--end') if options['end'] else timezone.localdate()
+        if options['days']:
+            start_day = end_day - timedelta(days=options['days'] - 1)
+        elif options['start']:
+            start_day = self._parse_day(options['start'], '--start')
+        else:
+            start_day = self._earliest_day()
+            if start_day is None:
+                self.stdout.write('هیچ سفارش یا پرداختی برای تجمیع وجود ندارد.')
+                return
+
+        if start_day > end_day:
+            raise CommandError('تاریخ شروع نباید بعد از تاریخ پایان باشد')
+
+        stats = reconcile(start_day, end_day, dry_run=options['dry_run'], chunk_days=options['chunk_days'])
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{start_day} .. {end_day}: "
+            f"created={stats['created']} updated={stats['updated']} deleted={stats['deleted']}"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.dashboard.leaderboards import BOARDS, WINDOWS, refresh
+
+
+class Command(BaseCommand):
+    """بازسازی جدول‌های رتبه‌بندی داشبورد (مناسب اجرای دوره‌ای با cron)"""
+    help = 'Rebuild dashboard leaderboards (top products, businesses and users) for each time window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', action='append', choices=sorted(BOARDS), help='فقط این جدول (قابل تکرار)')
+        parser.add_argument('--window', action='append', type=int, choices=WINDOWS, help='فقط این بازه به روز (قابل تکرار)')
+
+    def handle(self, *args, **options):
+        written = refresh(options['board'], options['window'] or WINDOWS)
+        self.stdout.write(self.style.SUCCESS(
+            ' '.join(f"{board}={count}" for board, count in written.items())
+        ))
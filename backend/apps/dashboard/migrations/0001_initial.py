@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-17 20:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('business', '0002_remove_business_type_business_business_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPaymentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='تاریخ')),
+                ('payment_count', models.IntegerField(default=0, verbose_name='تعداد پرداخت')),
+                ('total_amount', models.DecimalField(decimal_places=0, default=0, max_digits=16, verbose_name='جمع پرداخت\u200cها (تومان)')),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_payment_rollups', to='business.business', verbose_name='کسب\u200cوکار')),
+            ],
+            options={
+                'verbose_name': 'تجمیع روزانه پرداخت',
+                'verbose_name_plural': 'تجمیع\u200cهای روزانه پرداخت',
+                'ordering': ['date'],
+                'unique_together': {('date', 'business')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyOrderRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='تاریخ')),
+                ('status', models.CharField(max_length=20, verbose_name='وضعیت')),
+                ('order_count', models.IntegerField(default=0, verbose_name='تعداد سفارش')),
+                ('total_sales', models.DecimalField(decimal_places=0, default=0, max_digits=16, verbose_name='جمع فروش (ریال)')),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_order_rollups', to='business.business', verbose_name='کسب\u200cوکار')),
+            ],
+            options={
+                'verbose_name': 'تجمیع روزانه سفارش',
+                'verbose_name_plural': 'تجمیع\u200cهای روزانه سفارش',
+                'ordering': ['date'],
+                'unique_together': {('date', 'business', 'status')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-17 21:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0002_remove_business_type_business_business_type'),
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('products', 'طرح\u200cهای پرفروش'), ('businesses', 'کسب\u200cوکارهای برتر'), ('users', 'کاربران فعال')], max_length=20, verbose_name='جدول رتبه\u200cبندی')),
+                ('window_days', models.PositiveSmallIntegerField(verbose_name='بازه (روز)')),
+                ('subject_key', models.CharField(max_length=64, verbose_name='شناسه مورد')),
+                ('label', models.CharField(blank=True, max_length=255, verbose_name='عنوان')),
+                ('score', models.IntegerField(default=0, verbose_name='امتیاز')),
+                ('amount', models.DecimalField(decimal_places=0, default=0, max_digits=16, verbose_name='مبلغ (ریال)')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='رتبه')),
+                ('refreshed_at', models.DateTimeField(verbose_name='زمان به\u200cروزرسانی')),
+                ('business', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='business.business', verbose_name='کسب\u200cوکار')),
+            ],
+            options={
+                'verbose_name': 'ردیف رتبه\u200cبندی',
+                'verbose_name_plural': 'ردیف\u200cهای رتبه\u200cبندی',
+                'ordering': ['board', 'window_days', 'rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['board', 'window_days', 'business', 'rank'], name='leaderboard_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'window_days', 'business', 'subject_key'), name='unique_business_leaderboard_entry'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('business__isnull', True)), fields=('board', 'window_days', 'subject_key'), name='unique_global_leaderboard_entry'),
+        ),
+    ]
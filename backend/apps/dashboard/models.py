@@ -1,3 +1,85 @@
 from django.db import models
+from django.utils.translation import gettext_lazy as _
+from apps.business.models import Business
 
-# Create your models here.
+
+class DailyOrderRollup(models.Model):
+    """تجمیع روزانه سفارش‌ها به تفکیک کسب‌وکار و وضعیت برای نمودارهای داشبورد"""
+    date = models.DateField(verbose_name=_("تاریخ"))
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='daily_order_rollups', verbose_name=_("کسب‌وکار"))
+    status = models.CharField(max_length=20, verbose_name=_("وضعیت"))
+    order_count = models.IntegerField(default=0, verbose_name=_("تعداد سفارش"))
+    total_sales = models.DecimalField(max_digits=16, decimal_places=0, default=0, verbose_name=_("جمع فروش (ریال)"))
+
+    def __str__(self):
+        return f"{self.date} - {self.business_id} - {self.status}: {self.order_count}"
+
+    class Meta:
+        verbose_name = _("تجمیع روزانه سفارش")
+        verbose_name_plural = _("تجمیع‌های روزانه سفارش")
+        ordering = ['date']
+        unique_together = ('date', 'business', 'status')
+
+
+class DailyPaymentRollup(models.Model):
+    """تجمیع روزانه پرداخت‌های موفق به تفکیک کسب‌وکار"""
+    date = models.DateField(verbose_name=_("تاریخ"))
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='daily_payment_rollups', verbose_name=_("کسب‌وکار"))
+    payment_count = models.IntegerField(default=0, verbose_name=_("تعداد پرداخت"))
+    total_amount = models.DecimalField(max_digits=16, decimal_places=0, default=0, verbose_name=_("جمع پرداخت‌ها (تومان)"))
+
+    def __str__(self):
+        return f"{self.date} - {self.business_id}: {self.payment_count}"
+
+    class Meta:
+        verbose_name = _("تجمیع روزانه پرداخت")
+        verbose_name_plural = _("تجمیع‌های روزانه پرداخت")
+        ordering = ['date']
+        unique_together = ('date', 'business')
+
+
+class LeaderboardEntry(models.Model):
+    """ردیف جدول رتبه‌بندی (N مورد برتر) برای یک بازه زمانی، به‌صورت کلی یا برای یک کسب‌وکار"""
+    BOARD_PRODUCTS = 'products'
+    BOARD_BUSINESSES = 'businesses'
+    BOARD_USERS = 'users'
+    BOARD_CHOICES = (
+        (BOARD_PRODUCTS, _('طرح‌های پرفروش')),
+        (BOARD_BUSINESSES, _('کسب‌وکارهای برتر')),
+        (BOARD_USERS, _('کاربران فعال')),
+    )
+
+    board = models.CharField(max_length=20, choices=BOARD_CHOICES, verbose_name=_("جدول رتبه‌بندی"))
+    window_days = models.PositiveSmallIntegerField(verbose_name=_("بازه (روز)"))
+    business = models.ForeignKey(
+        Business, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='leaderboard_entries', verbose_name=_("کسب‌وکار")
+    )
+    subject_key = models.CharField(max_length=64, verbose_name=_("شناسه مورد"))
+    label = models.CharField(max_length=255, blank=True, verbose_name=_("عنوان"))
+    score = models.IntegerField(default=0, verbose_name=_("امتیاز"))
+    amount = models.DecimalField(max_digits=16, decimal_places=0, default=0, verbose_name=_("مبلغ (ریال)"))
+    rank = models.PositiveSmallIntegerField(verbose_name=_("رتبه"))
+    refreshed_at = models.DateTimeField(verbose_name=_("زمان به‌روزرسانی"))
+
+    def __str__(self):
+        return f"{self.board}/{self.window_days} #{self.rank}: {self.label} ({self.score})"
+
+    class Meta:
+        verbose_name = _("ردیف رتبه‌بندی")
+        verbose_name_plural = _("ردیف‌های رتبه‌بندی")
+        ordering = ['board', 'window_days', 'rank']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'window_days', 'business', 'subject_key'],
+                name='unique_business_leaderboard_entry'
+            ),
+            models.UniqueConstraint(
+                fields=['board', 'window_days', 'subject_key'],
+                condition=models.Q(business__isnull=True),
+                name='unique_global_leaderboard_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['board', 'window_days', 'business', 'rank'], name='leaderboard_lookup_idx'),
+        ]
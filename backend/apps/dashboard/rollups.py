@@ -0,0 +1,296 @@
+"""
+نگهداری و خواندن جداول تجمیع روزانه داشبورد
+
+سیگنال‌های این اپ تغییر هر سفارش یا پرداخت را به شکل دلتا (پس از commit تراکنش)
+روی ردیف‌های DailyOrderRollup و DailyPaymentRollup اعمال می‌کنند. تابع reconcile
+همان ردیف‌ها را از جداول خام بازسازی و اختلاف‌ها را اصلاح می‌کند و دستور مدیریتی
+rebuild_dashboard_rollups از آن برای پرکردن اولیه و تطبیق دوره‌ای استفاده می‌کند.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.core.utils import log_error
+from apps.orders.models import Order
+from apps.payment.models import Payment
+from .models import DailyOrderRollup, DailyPaymentRollup
+
+PAYMENT_SUCCESS_STATUS = 'successful'
+
+# فیلدهای مؤثر در تجمیع؛ مقدار قبلی سفارش و پرداخت از tracked_fields مدل‌ها (FieldTrackerMixin) خوانده می‌شود
+ORDER_TRACKED_FIELDS = ('created_at', 'business_id', 'status', 'total_price')
+PAYMENT_TRACKED_FIELDS = ('created_at', 'order_id', 'status', 'amount')
+
+
+def local_day(value):
+    """روز تقویمی یک datetime در منطقه زمانی پروژه"""
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def day_bounds(start_day, end_day):
+    """بازه نیمه‌باز datetime متناظر با روزهای start_day تا end_day"""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_day, time.min), tz)
+    end = timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def snapshot(instance, fields):
+    """مقادیر فعلی فیلدها بدون بارگذاری فیلدهای deferred؛ در صورت نقص None"""
+    values = instance.__dict__
+    if any(field not in values for field in fields):
+        return None
+    return tuple(values[field] for field in fields)
+
+
+# ---------------------------------------------------------------------------
+# محاسبه و اعمال دلتا
+# ---------------------------------------------------------------------------
+
+def _merge_changes(old, new):
+    """تبدیل سهم قبلی و جدید یک ردیف به لیست دلتاهای (کلید، تعداد، مبلغ)"""
+    if old == new:
+        return []
+    if old and new and old[0] == new[0]:
+        return [(new[0], 0, new[1] - old[1])]
+    changes = []
+    if old:
+        changes.append((old[0], -1, -old[1]))
+    if new:
+        changes.append((new[0], 1, new[1]))
+    return changes
+
+
+def _order_contribution(state):
+    if not state:
+        return None
+    created_at, business_id, status, total_price = state
+    if created_at is None or business_id is None:
+        return None
+    return (local_day(created_at), business_id, status), total_price or Decimal(0)
+
+
+def order_changes(previous, current):
+    """دلتاهای تجمیع سفارش بین دو snapshot (None یعنی ردیف وجود ندارد)"""
+    return _merge_changes(_order_contribution(previous), _order_contribution(current))
+
+
+def _payment_contribution(state, business_id):
+    if not state:
+        return None
+    created_at, order_id, status, amount = state
+    if status != PAYMENT_SUCCESS_STATUS or created_at is None or order_id is None:
+        return None
+    return (local_day(created_at), business_id), amount or Decimal(0)
+
+
+def payment_changes(previous, current, business_ids):
+    """
+    دلتاهای تجمیع پرداخت بین دو snapshot
+
+    business_ids: نگاشت order_id به business_id برای سفارش‌های درگیر
+    """
+    old = _payment_contribution(previous, business_ids.get(previous[1]) if previous else None)
+    new = _payment_contribution(current, business_ids.get(current[1]) if current else None)
+    return _merge_changes(old, new)
+
+
+def _bump(model, lookup, count_field, amount_field, count, amount):
+    """افزایش اتمیک شمارنده‌های یک ردیف تجمیع و ایجاد آن در صورت نبود"""
+    updates = {
+        count_field: F(count_field) + count,
+        amount_field: F(amount_field) + amount,
+    }
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    if count <= 0:
+        # ردیف قبلاً حذف شده (مثلاً با حذف کسب‌وکار)؛ اختلاف احتمالی در reconcile اصلاح می‌شود
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **{count_field: count, amount_field: amount})
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**updates)
+
+
+def apply_order_changes(changes):
+    """اعمال دلتاهای سفارش روی DailyOrderRollup"""
+    try:
+        for (day, business_id, status), count, amount in changes:
+            _bump(
+                DailyOrderRollup,
+                {'date': day, 'business_id': business_id, 'status': status},
+                'order_count', 'total_sales', count, amount
+            )
+    except Exception as e:
+        log_error("خطا در به‌روزرسانی تجمیع روزانه سفارش‌ها", e)
+
+
+def apply_payment_changes(changes):
+    """اعمال دلتاهای پرداخت روی DailyPaymentRollup"""
+    try:
+        for (day, business_id), count, amount in changes:
+            if business_id is None:
+                continue
+            _bump(
+                DailyPaymentRollup,
+                {'date': day, 'business_id': business_id},
+                'payment_count', 'total_amount', count, amount
+            )
+    except Exception as e:
+        log_error("خطا در به‌روزرسانی تجمیع روزانه پرداخت‌ها", e)
+
+
+# ---------------------------------------------------------------------------
+# بازسازی و تطبیق با جداول خام
+# ---------------------------------------------------------------------------
+
+def _expected_order_rows(start_day, end_day):
+    start, end = day_bounds(start_day, end_day)
+    rows = Order.objects.filter(
+        created_at__gte=start, created_at__lt=end
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values('day', 'business_id', 'status').annotate(
+        order_count=Count('id'),
+        total_sales=Sum('total_price')
+    ).order_by()
+    return {
+        (row['day'], row['business_id'], row['status']): (row['order_count'], row['total_sales'] or Decimal(0))
+        for row in rows
+    }
+
+
+def _expected_payment_rows(start_day, end_day):
+    start, end = day_bounds(start_day, end_day)
+    rows = Payment.objects.filter(
+        created_at__gte=start, created_at__lt=end, status=PAYMENT_SUCCESS_STATUS
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values('day', 'order__business_id').annotate(
+        payment_count=Count('id'),
+        total_amount=Sum('amount')
+    ).order_by()
+    return {
+        (row['day'], row['order__business_id']): (row['payment_count'], row['total_amount'] or Decimal(0))
+        for row in rows
+    }
+
+
+def _sync_rows(model, existing, expected, key_fields, count_field, amount_field, dry_run, stats):
+    """هم‌سان‌سازی ردیف‌های موجود با مقادیر مورد انتظار"""
+    to_create, to_update, to_delete = [], [], []
+    for key, (count, amount) in expected.items():
+        row = existing.pop(key, None)
+        if row is None:
+            to_create.append(model(**dict(zip(key_fields, key)), **{count_field: count, amount_field: amount}))
+        elif getattr(row, count_field) != count or getattr(row, amount_field) != amount:
+            setattr(row, count_field, count)
+            setattr(row, amount_field, amount)
+            to_update.append(row)
+    to_delete = [row.pk for row in existing.values()]
+
+    stats['created'] += len(to_create)
+    stats['updated'] += len(to_update)
+    stats['deleted'] += len(to_delete)
+    if dry_run:
+        return
+
+    model.objects.bulk_create(to_create, batch_size=500)
+    model.objects.bulk_update(to_update, [count_field, amount_field], batch_size=500)
+    if to_delete:
+        model.objects.filter(pk__in=to_delete).delete()
+
+
+def reconcile(start_day, end_day, dry_run=False, chunk_days=31):
+    """
+    بازسازی تجمیع‌های روزانه از جداول خام در بازه داده‌شده
+
+    ردیف‌های جاافتاده ایجاد، ردیف‌های نادرست اصلاح و ردیف‌های اضافه حذف می‌شوند.
+    خروجی: تعداد ردیف‌های ایجاد/اصلاح/حذف‌شده (در حالت dry_run فقط شمارش می‌شود)
+    """
+    stats = {'created': 0, 'updated': 0, 'deleted': 0}
+    chunk_start = start_day
+    while chunk_start <= end_day:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_day)
+        with transaction.atomic():
+            existing_orders = {
+                (row.date, row.business_id, row.status): row
+                for row in DailyOrderRollup.objects.select_for_update().filter(date__range=(chunk_start, chunk_end))
+            }
+            _sync_rows(
+                DailyOrderRollup, existing_orders, _expected_order_rows(chunk_start, chunk_end),
+                ('date', 'business_id', 'status'), 'order_count', 'total_sales', dry_run, stats
+            )
+            existing_payments = {
+                (row.date, row.business_id): row
+                for row in DailyPaymentRollup.objects.select_for_update().filter(date__range=(chunk_start, chunk_end))
+            }
+            _sync_rows(
+                DailyPaymentRollup, existing_payments, _expected_payment_rows(chunk_start, chunk_end),
+                ('date', 'business_id'), 'payment_count', 'total_amount', dry_run, stats
+            )
+        chunk_start = chunk_end + timedelta(days=1)
+    return stats
+
+
+def reconcile_day(day):
+    """بازسازی تجمیع یک روز (برای زمانی که وضعیت قبلی ردیف در دسترس نیست)"""
+    try:
+        reconcile(day, day)
+    except Exception as e:
+        log_error(f"خطا در بازسازی تجمیع روز {day}", e)
+
+
+# ---------------------------------------------------------------------------
+# خواندن داده‌ها برای داشبورد
+# ---------------------------------------------------------------------------
+
+def order_rollups(start_day, end_day, business_ids=None, statuses=None):
+    """ردیف‌های تجمیع سفارش در بازه روزها با فیلترهای اختیاری"""
+    rows = DailyOrderRollup.objects.filter(date__range=(start_day, end_day))
+    if business_ids is not None:
+        rows = rows.filter(business_id__in=business_ids)
+    if statuses is not None:
+        rows = rows.filter(status__in=statuses)
+    return rows
+
+
+def payment_rollups(start_day, end_day, business_ids=None):
+    """ردیف‌های تجمیع پرداخت‌های موفق در بازه روزها"""
+    rows = DailyPaymentRollup.objects.filter(date__range=(start_day, end_day))
+    if business_ids is not None:
+        rows = rows.filter(business_id__in=business_ids)
+    return rows
+
+
+def order_summary(start_day, end_day, business_ids=None):
+    """تعداد و جمع فروش سفارش‌ها به همراه تعداد به تفکیک وضعیت"""
+    by_status = {
+        row['status']: row
+        for row in order_rollups(start_day, end_day, business_ids).values('status').annotate(
+            count=Sum('order_count'), total=Sum('total_sales')
+        ).order_by()
+    }
+    return {
+        'order_count': sum(row['count'] or 0 for row in by_status.values()),
+        'total_sales': sum((row['total'] or Decimal(0) for row in by_status.values()), Decimal(0)),
+        'by_status': {status: row['count'] or 0 for status, row in by_status.items()},
+    }
+
+
+def payment_summary(start_day, end_day, business_ids=None):
+    """تعداد و جمع پرداخت‌های موفق"""
+    totals = payment_rollups(start_day, end_day, business_ids).aggregate(
+        count=Sum('payment_count'), total=Sum('total_amount')
+    )
+    return {
+        'payment_count': totals['count'] or 0,
+        'total_payments': totals['total'] or Decimal(0),
+    }
@@ -0,0 +1,191 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.business.models import Business
+from apps.core.utils import log_error
+from apps.notification.models import Notification
+from apps.orders.models import Order, OrderItem
+from apps.orders.bulk_import import orders_imported
+from apps.orders.pricing import totals_repriced
+from apps.orders.state_machine import orders_transitioned
+from apps.payment.models import Payment
+from apps.reports.models import Report
+from . import cache, leaderboards, rollups
+
+
+def _invalidate_on_commit(user_ids=(), business_ids=(), broadcast=False):
+    """ابطال کش پاسخ‌های داشبورد پس از commit تا داده قدیمی با نسخه جدید کش نشود"""
+    def invalidate():
+        cache.invalidate(user_ids, business_ids)
+        if broadcast:
+            cache.bump(cache.BROADCAST_SCOPE)
+    transaction.on_commit(invalidate)
+
+
+def _update_leaderboards_on_commit(function, *args):
+    """به‌روزرسانی تدریجی جدول‌های رتبه‌بندی پس از commit؛ خطا فقط ثبت می‌شود"""
+    def update():
+        try:
+            function(*args)
+        except Exception as e:
+            # بازسازی دوره‌ای refresh_leaderboards اختلاف را اصلاح می‌کند
+            log_error("خطا در به‌روزرسانی جدول رتبه‌بندی", e)
+    transaction.on_commit(update)
+
+
+def _previous_order_state(instance):
+    """مقادیر قبلی فیلدهای تجمیع سفارش در ذخیره یا حذف جاری (FieldTrackerMixin)"""
+    return tuple(instance.previous(field) for field in rollups.ORDER_TRACKED_FIELDS)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_order_cache(sender, instance, **kwargs):
+    """ابطال کش مشتری و کسب‌وکار سفارش (و کسب‌وکار قبلی در صورت تغییر)"""
+    _invalidate_on_commit([instance.customer_id], {instance.business_id, instance.previous('business_id')})
+
+
+# فیلدهایی از ORDER_TRACKED_FIELDS که در جدول‌های رتبه‌بندی اثر دارند (وضعیت اثری ندارد)
+LEADERBOARD_ORDER_FIELDS = ('created_at', 'business_id', 'total_price')
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def update_order_leaderboards(sender, instance, created=False, **kwargs):
+    """به‌روزرسانی رتبه کسب‌وکار و مشتری سفارش (و کسب‌وکار قبلی در صورت تغییر)"""
+    if kwargs.get('signal') is post_save and not created and not any(
+        instance.has_changed(field) for field in LEADERBOARD_ORDER_FIELDS
+    ):
+        return
+    business_ids = {instance.business_id, instance.previous('business_id')}
+    _update_leaderboards_on_commit(leaderboards.apply_order, [instance.customer_id], business_ids)
+
+
+@receiver(post_save, sender=Order)
+def update_order_rollups(sender, instance, created, **kwargs):
+    """اعمال تغییر سفارش روی تجمیع روزانه پس از commit تراکنش"""
+    current = rollups.snapshot(instance, rollups.ORDER_TRACKED_FIELDS)
+    if current is None:
+        # فیلدهای تجمیع بارگذاری نشده‌اند (مثلاً نمونه با only())؛ کل روز بازسازی می‌شود
+        day = rollups.local_day(instance.created_at)
+        transaction.on_commit(lambda: rollups.reconcile_day(day))
+        return
+
+    changes = rollups.order_changes(None if created else _previous_order_state(instance), current)
+    if changes:
+        transaction.on_commit(lambda: rollups.apply_order_changes(changes))
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_from_rollups(sender, instance, **kwargs):
+    """کسر سفارش حذف‌شده از تجمیع روزانه"""
+    changes = rollups.order_changes(_previous_order_state(instance), None)
+    if changes:
+        transaction.on_commit(lambda: rollups.apply_order_changes(changes))
+
+
+@receiver(totals_repriced)
+@receiver(orders_imported)
+@receiver(orders_transitioned)
+def update_bulk_changed_orders(sender, orders, user_ids=(), design_ids=(), **kwargs):
+    """بازسازی تجمیع روزها، رتبه‌بندی‌ها و کش سفارش‌هایی که بدون save ایجاد یا به‌روز شده‌اند"""
+    days = {rollups.local_day(order.created_at) for order in orders}
+    customer_ids = {order.customer_id for order in orders}
+    business_ids = {order.business_id for order in orders}
+
+    def reconcile():
+        for day in days:
+            rollups.reconcile_day(day)
+    transaction.on_commit(reconcile)
+    _update_leaderboards_on_commit(leaderboards.apply_order, customer_ids, business_ids)
+    if design_ids:
+        _update_leaderboards_on_commit(leaderboards.apply_order_item, design_ids, business_ids)
+    _invalidate_on_commit(customer_ids | set(user_ids), business_ids)
+
+
+def _payment_business_ids(instance, order_ids):
+    """یافتن کسب‌وکار سفارش‌های پرداخت؛ در صورت بارگذاری بودن سفارش بدون کوئری"""
+    order_ids = {order_id for order_id in order_ids if order_id is not None}
+    if Payment.order.is_cached(instance) and instance.order.pk in order_ids:
+        order_ids.discard(instance.order.pk)
+        known = {instance.order.pk: instance.order.business_id}
+    else:
+        known = {}
+    if order_ids:
+        known.update(Order.objects.filter(pk__in=order_ids).values_list('pk', 'business_id'))
+    return known
+
+
+def _schedule_payment_changes(instance, previous, current):
+    contributes = [
+        state for state in (previous, current)
+        if state and state[2] == rollups.PAYMENT_SUCCESS_STATUS
+    ]
+    if not contributes or previous == current:
+        return
+    business_ids = _payment_business_ids(instance, [state[1] for state in contributes])
+    changes = rollups.payment_changes(previous, current, business_ids)
+    if changes:
+        transaction.on_commit(lambda: rollups.apply_payment_changes(changes))
+
+
+def _previous_payment_state(instance):
+    """مقادیر قبلی فیلدهای تجمیع پرداخت در ذخیره یا حذف جاری (FieldTrackerMixin)"""
+    return tuple(instance.previous(field) for field in rollups.PAYMENT_TRACKED_FIELDS)
+
+
+@receiver(post_save, sender=Payment)
+def update_payment_rollups(sender, instance, created, **kwargs):
+    """اعمال تغییر پرداخت موفق روی تجمیع روزانه"""
+    current = tuple(getattr(instance, field) for field in rollups.PAYMENT_TRACKED_FIELDS)
+    _schedule_payment_changes(instance, None if created else _previous_payment_state(instance), current)
+
+
+@receiver(post_delete, sender=Payment)
+def remove_payment_from_rollups(sender, instance, **kwargs):
+    """کسر پرداخت حذف‌شده از تجمیع روزانه"""
+    _schedule_payment_changes(instance, _previous_payment_state(instance), None)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def invalidate_payment_cache(sender, instance, **kwargs):
+    """ابطال کش پرداخت‌کننده و کسب‌وکار سفارش پرداخت"""
+    business_ids = _payment_business_ids(instance, [instance.order_id]).values()
+    _invalidate_on_commit([instance.user_id], business_ids)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_notification_cache(sender, instance, **kwargs):
+    """ابطال کش گیرنده اعلان؛ اعلان همگانی کش همه کاربران را باطل می‌کند"""
+    _invalidate_on_commit([instance.user_id], [instance.business_id], broadcast=instance.all_users)
+
+
+@receiver(post_save, sender=Report)
+@receiver(post_delete, sender=Report)
+def invalidate_report_cache(sender, instance, **kwargs):
+    """ابطال کش صاحب گزارش و کسب‌وکار آن"""
+    _invalidate_on_commit([instance.user_id], [instance.business_id], broadcast=instance.is_public)
+
+
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+def invalidate_business_cache(sender, instance, **kwargs):
+    """ابطال کش مالک و اعضای کسب‌وکار"""
+    _invalidate_on_commit([instance.owner_id], [instance.pk])
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def update_order_item_leaderboards(sender, instance, **kwargs):
+    """به‌روزرسانی رتبه طرح آیتم سفارش"""
+    if instance.design_id is None or instance.order_id is None:
+        return
+    if OrderItem.order.is_cached(instance):
+        business_ids = [instance.order.business_id]
+    else:
+        business_ids = list(Order.objects.filter(pk=instance.order_id).values_list('business_id', flat=True))
+    _update_leaderboards_on_commit(leaderboards.apply_order_item, [instance.design_id], business_ids)
+
@@ -1,16 +1,21 @@
-from django.test import TestCase
+from django.core.cache import cache as django_cache
+from django.test import TestCase, override_settings
 import pytest
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 from django.contrib.auth import get_user_model
-from apps.orders.models import Order
+from apps.orders.models import Order, OrderItem
 from apps.payment.models import Payment
 from apps.notification.models import Notification
 from apps.reports.models import Report
 from apps.business.models import Business
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from django.utils import timezone
 from apps.business.models import BusinessActivity
+from apps.dashboard import charts, leaderboards, rollups
+from apps.dashboard.models import DailyOrderRollup, DailyPaymentRollup, LeaderboardEntry
+from apps.dashboard.views import DashboardStatsView
 
 User = get_user_model()
 
@@ -128,3 +133,360 @@ class TestDashboardSummary:
         self.assertGreaterEqual(response.data['total_businesses'], 1)
         self.assertGreaterEqual(response.data['active_businesses'], 1)
         self.assertEqual(len(response.data['recent_activities']), 1)
+
+
+class DailyRollupTests(TestCase):
+    """تست‌های نگهداری جداول تجمیع روزانه داشبورد"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='rollup_user', password='test123')
+        self.business = Business.objects.create(name='کسب‌وکار تجمیع', owner=self.user)
+
+    def _create_order(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Order.objects.create(customer=self.user, business=self.business, **kwargs)
+
+    def test_order_create_and_status_change_update_rollup(self):
+        """ثبت سفارش و تغییر وضعیت آن، ردیف تجمیع درست را به‌روزرسانی می‌کند"""
+        order = self._create_order(status='pending')
+        rollup = DailyOrderRollup.objects.get(business=self.business, status='pending')
+        self.assertEqual(rollup.order_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderItem.objects.create(order=order, quantity=2, unit_price=5000)
+            order.status = 'completed'
+            order.save()
+
+        summary = rollups.order_summary(rollups.local_day(order.created_at), rollups.local_day(order.created_at))
+        self.assertEqual(summary['order_count'], 1)
+        self.assertEqual(summary['total_sales'], 10000)
+        self.assertEqual(summary['by_status'], {'pending': 0, 'completed': 1})
+
+    def test_business_change_of_loaded_order_moves_rollup(self):
+        """تغییر کسب‌وکار سفارش بارگذاری‌شده از پایگاه داده، سهم آن را بین ردیف‌های تجمیع جابه‌جا می‌کند"""
+        other = Business.objects.create(name='کسب‌وکار دوم', owner=self.user)
+        order = Order.objects.get(pk=self._create_order(status='pending', total_price=3000).pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.business = other
+            order.save()
+
+        counts = dict(DailyOrderRollup.objects.values_list('business', 'order_count'))
+        self.assertEqual(counts, {self.business.pk: 0, other.pk: 1})
+
+    def test_successful_payment_updates_rollup(self):
+        """فقط پرداخت‌های موفق در تجمیع پرداخت شمرده می‌شوند"""
+        order = self._create_order()
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.create(user=self.user, order=order, amount=7000)
+        self.assertFalse(DailyPaymentRollup.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.status = 'successful'
+            payment.save()
+        rollup = DailyPaymentRollup.objects.get(business=self.business)
+        self.assertEqual((rollup.payment_count, rollup.total_amount), (1, 7000))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.delete()
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.payment_count, rollup.total_amount), (0, 0))
+
+    def test_loaded_payment_change_applies_delta(self):
+        """تغییر پرداخت بارگذاری‌شده با مقادیر قبلی FieldTrackerMixin و بدون بازسازی روز اعمال می‌شود"""
+        from unittest import mock
+        order = self._create_order()
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(user=self.user, order=order, amount=7000, status='successful')
+
+        payment = Payment.objects.get(order=order)
+        with mock.patch.object(rollups, 'reconcile_day') as reconcile_day:
+            with self.captureOnCommitCallbacks(execute=True):
+                payment.amount = 9000
+                payment.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                Payment.objects.get(pk=payment.pk).delete()
+        reconcile_day.assert_not_called()
+        rollup = DailyPaymentRollup.objects.get(business=self.business)
+        self.assertEqual((rollup.payment_count, rollup.total_amount), (0, 0))
+
+    def test_reconcile_repairs_drift(self):
+        """reconcile اختلاف جداول تجمیع با جداول خام را اصلاح می‌کند"""
+        order = self._create_order(status='pending')
+        day = rollups.local_day(order.created_at)
+        DailyOrderRollup.objects.all().delete()
+        DailyOrderRollup.objects.create(date=day, business=self.business, status='cancelled', order_count=3)
+
+        stats = rollups.reconcile(day, day)
+
+        self.assertEqual(stats, {'created': 1, 'updated': 0, 'deleted': 1})
+        rows = list(DailyOrderRollup.objects.values_list('status', 'order_count'))
+        self.assertEqual(rows, [('pending', 1)])
+        self.assertEqual(rollups.reconcile(day, day), {'created': 0, 'updated': 0, 'deleted': 0})
+
+
+class ChartEngineTests(TestCase):
+    """تست‌های موتور ساخت نمودار داشبورد"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='chart_user', password='test123')
+        self.business = Business.objects.create(name='کسب‌وکار نمودار', owner=self.user)
+
+    def test_daily_buckets_fill_empty_days(self):
+        """روزهای بدون سفارش با صفر پر می‌شوند و ساختار خروجی حفظ می‌شود"""
+        order = Order.objects.create(customer=self.user, business=self.business)
+        Order.objects.filter(pk=order.pk).update(total_price=2500)
+        today = rollups.local_day(order.created_at)
+        source = charts.ChartSource(Order.objects.all(), 'created_at', 'total_price', True)
+
+        chart = charts.build_chart(source, today - timedelta(days=2), today, charts.DAY, 'bar', 'فروش روزانه')
+
+        self.assertEqual(set(chart), {'labels', 'values', 'type', 'title'})
+        self.assertEqual(chart['values'], [0.0, 0.0, 2500.0])
+        self.assertEqual(len(chart['labels']), 3)
+
+    def test_week_and_jalali_month_buckets(self):
+        """روزها، هفته‌ها (از شنبه) و ماه‌های شمسی از جدول تجمیع گروه‌بندی می‌شوند"""
+        # 2024-03-20 = ۱۴۰۳/۰۱/۰۱ (چهارشنبه)
+        for day, amount in ((date(2024, 3, 19), 100), (date(2024, 3, 20), 200), (date(2024, 3, 23), 400)):
+            DailyOrderRollup.objects.create(
+                date=day, business=self.business, status='completed', order_count=1, total_sales=amount
+            )
+        source = charts.ChartSource(DailyOrderRollup.objects.all(), 'date', 'total_sales', False)
+        start, end = date(2024, 3, 19), date(2024, 3, 24)
+
+        daily = charts.build_chart(source, start, end, charts.DAY, 'bar', 'روزانه')
+        self.assertEqual(daily['values'], [100.0, 200.0, 0.0, 0.0, 400.0, 0.0])
+
+        weekly = charts.build_chart(source, start, end, charts.WEEK, 'line', 'هفتگی')
+        self.assertEqual(weekly['labels'], ['1402/12/26', '1403/01/04'])
+        self.assertEqual(weekly['values'], [300.0, 400.0])
+
+        monthly = charts.build_chart(source, start, end, charts.JALALI_MONTH, 'line', 'ماهانه')
+        self.assertEqual(monthly['labels'], ['1402/12', '1403/01'])
+        self.assertEqual(monthly['values'], [100.0, 600.0])
+
+
+class DashboardCacheTests(TestCase):
+    """تست‌های کش پاسخ داشبورد به تفکیک کاربر"""
+
+    def setUp(self):
+        django_cache.clear()
+        self.url = reverse('dashboard:dashboard_summary')
+        self.alice = User.objects.create_user(username='alice', password='test123')
+        self.bob = User.objects.create_user(username='bob', password='test123')
+        self.business = Business.objects.create(name='کسب‌وکار کش', owner=self.alice)
+
+    def _get(self, user, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_cache_is_per_user_and_invalidated_by_scope(self):
+        """پاسخ هر کاربر جدا کش می‌شود و تغییر سفارش فقط کش کاربران متأثر را باطل می‌کند"""
+        self.assertEqual(self._get(self.alice)['X-Cache'], 'MISS')
+        self.assertEqual(self._get(self.alice)['X-Cache'], 'HIT')
+        self.assertEqual(self._get(self.alice, days=7)['X-Cache'], 'MISS')
+        bob_response = self._get(self.bob)
+        self.assertEqual(bob_response['X-Cache'], 'MISS')
+        self.assertEqual(bob_response.data['summary']['order_count'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(customer=self.alice, business=self.business)
+
+        alice_response = self._get(self.alice)
+        self.assertEqual(alice_response['X-Cache'], 'MISS')
+        self.assertEqual(alice_response.data['summary']['order_count'], 1)
+        self.assertEqual(self._get(self.bob)['X-Cache'], 'HIT')
+
+    def test_combined_dashboard_with_nested_error_is_not_cached(self):
+        """پاسخ ۲۰۰ که بخشی از آن خطا دارد کش نمی‌شود"""
+        from unittest import mock
+        from apps.dashboard.views import CombinedDashboardView
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        url = reverse('dashboard:combined_dashboard')
+        with mock.patch.object(CombinedDashboardView, '_get_main_data', return_value={'error': 'boom'}):
+            self.assertEqual(client.get(url)['X-Cache'], 'MISS')
+            self.assertEqual(client.get(url)['X-Cache'], 'MISS')
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=self.alice, type='system', title='سلام', content='خوش آمدید')
+        response = client.get(url)
+        self.assertNotIn('error', response.data['main'])
+        self.assertEqual(response.data['main']['notifications'][0]['message'], 'خوش آمدید')
+        self.assertEqual(client.get(url)['X-Cache'], 'HIT')
+
+    def test_combined_dashboard_contains_charts(self):
+        """داشبورد یکپارچه برای کاربر عادی و ادمین نمودارها را برمی‌گرداند"""
+        admin = User.objects.create_user(username='combined_admin', password='test123', is_staff=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(customer=self.alice, business=self.business, total_price=5000)
+            Payment.objects.create(user=self.alice, order=order, amount=5000, status='successful')
+        for user in (self.alice, admin):
+            client = APIClient()
+            client.force_authenticate(user)
+            response = client.get(reverse('dashboard:combined_dashboard'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('error', response.data['dashboard'])
+            self.assertEqual(len(response.data['dashboard']['charts']), 2)
+
+    def test_broadcast_notification_invalidates_everyone(self):
+        """اعلان همگانی کش همه کاربران را باطل می‌کند"""
+        self._get(self.bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=self.alice, title='همگانی', content='متن', all_users=True)
+        self.assertEqual(self._get(self.bob)['X-Cache'], 'MISS')
+
+    def test_stats_endpoint_reports_hits_and_misses(self):
+        """شمارنده‌های hit/miss برای ادمین قابل مشاهده است"""
+        self._get(self.bob)
+        self._get(self.bob)
+        admin = User.objects.create_user(username='cache_admin', password='test123', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get(reverse('dashboard:cache_stats'))
+        self.assertEqual(response.data['dashboard_summary'], {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+        client.force_authenticate(self.bob)
+        self.assertEqual(client.get(reverse('dashboard:cache_stats')).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class DashboardStatsQueryTests(TestCase):
+    """تست بودجه کوئری آمار داشبورد"""
+
+    def setUp(self):
+        django_cache.clear()
+        self.user = User.objects.create_user(username='stats_user', password='test123')
+        other = User.objects.create_user(username='stats_other', password='test123')
+        self.business = Business.objects.create(name='کسب‌وکار آمار', owner=self.user)
+        Business.objects.create(name='کسب‌وکار دیگر', owner=other)
+        Order.objects.create(customer=self.user, business=self.business, status='completed')
+        Order.objects.create(customer=other, business=self.business, status='pending')
+
+    def _get(self, stat_type):
+        # فراخوانی مستقیم view تا کوئری‌های middleware در بودجه شمرده نشوند
+        request = APIRequestFactory().get(reverse('dashboard:dashboard_stats', kwargs={'stat_type': stat_type}))
+        force_authenticate(request, self.user)
+        return DashboardStatsView.as_view()(request, stat_type=stat_type)
+
+    def test_all_stats_use_one_query_per_model(self):
+        """همه آمار با یک کوئری برای هر مدل (به علاوه کوئری دامنه کش) محاسبه می‌شود"""
+        with self.assertNumQueries(4):
+            response = self._get('all')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['business_stats'], {
+            'total_businesses': 2, 'active_businesses': 1, 'user_businesses': 1
+        })
+        self.assertEqual(response.data['order_stats'], {
+            'total_orders': 2, 'completed_orders': 1, 'user_orders': 1, 'weekly_orders': 2
+        })
+        self.assertEqual(response.data['design_stats']['total_designs'], 0)
+
+    def test_single_section(self):
+        """درخواست یک بخش فقط همان بخش را محاسبه می‌کند"""
+        with self.assertNumQueries(2):
+            response = self._get('orders')
+        self.assertEqual(list(response.data), ['order_stats'])
+        response = self._get('unknown')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LeaderboardTests(TestCase):
+    """تست‌های جدول‌های رتبه‌بندی داشبورد"""
+
+    def setUp(self):
+        django_cache.clear()
+        self.alice = User.objects.create_user(username='alice_lb', password='test123')
+        self.bob = User.objects.create_user(username='bob_lb', password='test123')
+        self.shop = Business.objects.create(name='چاپخانه', owner=self.alice)
+        self.studio = Business.objects.create(name='استودیو', owner=self.bob)
+
+    def _order(self, customer, business, days_ago=0, price=1000):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(customer=customer, business=business)
+        Order.objects.filter(pk=order.pk).update(
+            total_price=price, created_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return order
+
+    def test_refresh_builds_windows_and_business_scopes(self):
+        """بازسازی برای هر بازه و هر کسب‌وکار N مورد برتر را می‌سازد"""
+        self._order(self.alice, self.shop)
+        self._order(self.alice, self.studio)
+        self._order(self.bob, self.studio, days_ago=20)
+
+        leaderboards.refresh()
+        self.assertEqual(
+            [(item['name'], item['count']) for item in leaderboards.top(leaderboards.USERS, 7)],
+            [('alice_lb', 2)]
+        )
+        self.assertEqual(
+            [(item['name'], item['count']) for item in leaderboards.top(leaderboards.BUSINESSES, 30)],
+            [('استودیو', 2), ('چاپخانه', 1)]
+        )
+        self.assertEqual(
+            [(item['name'], item['count']) for item in leaderboards.top(leaderboards.USERS, 30, business=self.studio)],
+            [('alice_lb', 1), ('bob_lb', 1)]
+        )
+
+    @override_settings(LEADERBOARD_SIZE=1)
+    def test_order_save_updates_leaderboard_incrementally(self):
+        """ثبت سفارش جدید رتبه‌ها را بدون بازسازی کامل به‌روز می‌کند"""
+        self._order(self.bob, self.studio)
+        leaderboards.refresh()
+        self._order(self.alice, self.shop)
+        self.assertEqual([item['name'] for item in leaderboards.top(leaderboards.USERS, 30)], ['bob_lb'])
+
+        self._order(self.alice, self.shop)
+        self.assertEqual(
+            [(item['name'], item['count']) for item in leaderboards.top(leaderboards.USERS, 30)],
+            [('alice_lb', 2)]
+        )
+        self.assertEqual(LeaderboardEntry.objects.filter(board=leaderboards.USERS, business=None).count(), 3)
+
+    def test_unstored_range_uses_live_ranking(self):
+        """برای بازه‌ای غیر از ۷، ۳۰ و ۹۰ روز رتبه‌بندی همان بازه با GROUP BY زنده ساخته می‌شود"""
+        self._order(self.alice, self.shop)
+        self._order(self.bob, self.studio, days_ago=20)
+        self._order(self.bob, self.studio, days_ago=200)
+        leaderboards.refresh()
+        self.assertEqual(
+            [(item['name'], item['count']) for item in leaderboards.top(leaderboards.USERS, 10)],
+            [('alice_lb', 1)]
+        )
+        self.assertEqual(
+            [(item['name'], item['count']) for item in leaderboards.top(leaderboards.USERS, 365)],
+            [('bob_lb', 2), ('alice_lb', 1)]
+        )
+        self.assertEqual(
+            [item['name'] for item in leaderboards.top(leaderboards.USERS, 365, business=self.shop)], ['alice_lb']
+        )
+
+    def test_combined_dashboard_top_businesses_from_leaderboard(self):
+        """کسب‌وکارهای برتر داشبورد ترکیبی هم از جدول رتبه‌بندی خوانده می‌شوند"""
+        self._order(self.alice, self.shop, price=5000)
+        self._order(self.bob, self.studio, days_ago=20)
+        leaderboards.refresh()
+        admin = User.objects.create_user(username='lb_admin', password='test123', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get(reverse('dashboard:combined_dashboard'), {'days': 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        top_businesses = response.data['dashboard']['topBusinesses']
+        self.assertEqual([item['name'] for item in top_businesses], ['چاپخانه'])
+        self.assertEqual(top_businesses[0]['total_sales'], 5000)
+
+    def test_business_detail_reads_leaderboard(self):
+        """کسب‌وکارهای برتر داشبورد از جدول رتبه‌بندی خوانده می‌شوند"""
+        self._order(self.alice, self.shop, price=5000)
+        leaderboards.refresh()
+        admin = User.objects.create_user(username='lb_admin', password='test123', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get(reverse('dashboard:business_detail'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['top_businesses'][0]['name'], 'چاپخانه')
+        self.assertEqual(response.data['top_businesses'][0]['total_sales'], 5000)
+        self.assertEqual(response.data['active_businesses'], 1)
+
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import DashboardSummaryView, DashboardStatsView, SalesDetailView, BusinessDetailView, CombinedDashboardView
+from .views import DashboardSummaryView, DashboardStatsView, SalesDetailView, BusinessDetailView, CombinedDashboardView, DashboardCacheStatsView
 
 app_name = 'dashboard'
 
@@ -10,4 +10,5 @@ urlpatterns = [
     path('sales/', SalesDetailView.as_view(), name='sales_detail'),
     path('business/', BusinessDetailView.as_view(), name='business_detail'),
     path('combined/', CombinedDashboardView.as_view(), name='combined_dashboard'),
+    path('cache-stats/', DashboardCacheStatsView.as_view(), name='cache_stats'),
 ] 
\ No newline at end of file
@@ -3,25 +3,21 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework import status
-from django.db.models import Count, Sum, Q, Avg, F
-from datetime import datetime, timedelta
-import pandas as pd
+from django.db.models import Count, Sum, Q, Avg, F, Exists, OuterRef
+from datetime import timedelta
 from drf_spectacular.utils import extend_schema
 from django.utils import timezone
 import logging
-import numpy as np
-import jdatetime
-from django.db.models.functions import TruncDate
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 
 from apps.orders.models import Order, OrderItem
 from apps.payment.models import Payment
 from apps.notification.models import Notification
 from apps.reports.models import Report
 from apps.core.utils import log_error, to_jalali
-from .serializers import DashboardResponseSerializer, DashboardSummarySerializer, ChartDataSerializer, BusinessStatsSerializer, OrderStatsSerializer, DesignStatsSerializer, DashboardStatsSerializer
-from apps.business.models import Business
+from . import charts, leaderboards, rollups
+from .cache import cached_response, get_stats
+from .serializers import DashboardResponseSerializer, DashboardSummarySerializer, ChartDataSerializer, BusinessStatsSerializer, OrderStatsSerializer, DesignStatsSerializer
+from apps.business.models import Business, BusinessActivity, BusinessUser, EmployeeRole
 from apps.main.serializers import MainPageSummarySerializer, PromotionSerializer, NavigationSerializer
 from apps.designs.models import Design
 
@@ -34,34 +30,47 @@ class DashboardSummaryView(APIView):
         description="دریافت خلاصه داده‌های سفارش‌ها، پرداخت‌ها، اعلان‌ها و گزارش‌ها به همراه نمودارهای مرتبط",
         responses={200: DashboardResponseSerializer}
     )
-    @method_decorator(cache_page(60 * 5))  # کش کردن برای 5 دقیقه
+    @cached_response('dashboard_summary')
     def get(self, request):
         try:
             # محدوده زمانی برای داده‌های اخیر
             days = int(request.query_params.get('days', 30))
-            end_date = datetime.now()
+            end_date = timezone.now()
             start_date = end_date - timedelta(days=days)
 
-            # خلاصه سفارش‌ها
-            orders = Order.objects.filter(created_at__range=[start_date, end_date])
-            if not request.user.is_staff:
-                orders = orders.filter(user=request.user)
-            order_count = orders.count()
-            total_sales = orders.aggregate(total=Sum('total_price'))['total'] or 0
+            start_day, end_day = rollups.local_day(start_date), rollups.local_day(end_date)
+            granularity = charts.parse_granularity(request.query_params.get('granularity'), charts.DAY)
 
-            # خلاصه پرداخت‌ها
-            payments = Payment.objects.filter(created_at__range=[start_date, end_date], status='successful')
-            if not request.user.is_staff:
-                payments = payments.filter(user=request.user)
-            payment_count = payments.count()
-            total_payments = payments.aggregate(total=Sum('amount'))['total'] or 0
+            if request.user.is_staff:
+                # خلاصه و نمودارها از جداول تجمیع روزانه خوانده می‌شوند
+                order_totals = rollups.order_summary(start_day, end_day)
+                order_count = order_totals['order_count']
+                total_sales = order_totals['total_sales']
+                payment_totals = rollups.payment_summary(start_day, end_day)
+                payment_count = payment_totals['payment_count']
+                total_payments = payment_totals['total_payments']
+                order_source = charts.ChartSource(rollups.order_rollups(start_day, end_day), 'date', 'total_sales', False)
+                payment_source = charts.ChartSource(rollups.payment_rollups(start_day, end_day), 'date', 'total_amount', False)
+            else:
+                # داده‌های یک کاربر محدود است و مستقیماً از جداول خام خوانده می‌شود
+                orders = Order.objects.filter(customer=request.user, created_at__range=[start_date, end_date])
+                order_count = orders.count()
+                total_sales = orders.aggregate(total=Sum('total_price'))['total'] or 0
+
+                payments = Payment.objects.filter(
+                    user=request.user, created_at__range=[start_date, end_date], status='successful'
+                )
+                payment_count = payments.count()
+                total_payments = payments.aggregate(total=Sum('amount'))['total'] or 0
+                order_source = charts.ChartSource(orders, 'created_at', 'total_price', True)
+                payment_source = charts.ChartSource(payments, 'created_at', 'amount', True)
 
             # خلاصه اعلانات
             notifications = Notification.objects.filter(
                 Q(user=request.user) | Q(all_users=True),
                 created_at__range=[start_date, end_date]
             )
-            unread_notifications = notifications.filter(read=False).count()
+            unread_notifications = notifications.filter(is_read=False).count()
 
             # خلاصه گزارش‌ها
             reports = Report.objects.filter(created_at__range=[start_date, end_date])
@@ -69,45 +78,23 @@ class DashboardSummaryView(APIView):
                 reports = reports.filter(Q(user=request.user) | Q(is_public=True))
             report_count = reports.count()
 
-            # نمودار سفارش‌های اخیر با استفاده از ORM
-            order_chart = orders.annotate(
-                date=TruncDate('created_at')
-            ).values('date').annotate(
-                total=Sum('total_price')
-            ).order_by('date')
-
-            order_chart_data = {
-                'labels': [to_jalali(item['date']).split(' ')[0] for item in order_chart],
-                'values': [float(item['total']) for item in order_chart],
-                'type': 'bar',
-                'title': 'فروش روزانه'
-            }
+            # نمودار سفارش‌های اخیر
+            order_chart_data = charts.build_chart(
+                order_source, start_day, end_day, granularity, 'bar', 'فروش روزانه'
+            )
 
-            # نمودار پرداخت‌های اخیر با استفاده از ORM
-            payment_chart = payments.annotate(
-                date=TruncDate('created_at')
-            ).values('date').annotate(
-                total=Sum('amount')
-            ).order_by('date')
-
-            payment_chart_data = {
-                'labels': [to_jalali(item['date']).split(' ')[0] for item in payment_chart],
-                'values': [float(item['total']) for item in payment_chart],
-                'type': 'line',
-                'title': 'پرداخت‌های روزانه'
-            }
+            # نمودار پرداخت‌های اخیر
+            payment_chart_data = charts.build_chart(
+                payment_source, start_day, end_day, granularity, 'line', 'پرداخت‌های روزانه'
+            )
 
             # داده‌های دیگر برای ادمین‌ها
             if request.user.is_staff:
-                # توزیع کاربران بر اساس سفارش‌ها
-                user_distribution = Order.objects.filter(
-                    created_at__range=[start_date, end_date]
-                ).values('user__username').annotate(
-                    count=Count('id')
-                ).order_by('-count')[:5]
+                # کاربران فعال از جدول رتبه‌بندی همان بازه days
+                user_distribution = leaderboards.top(leaderboards.USERS, days)
                 
                 user_chart_data = {
-                    'labels': [item['user__username'] for item in user_distribution],
+                    'labels': [item['name'] for item in user_distribution],
                     'values': [item['count'] for item in user_distribution],
                     'type': 'pie',
                     'title': 'کاربران فعال'
@@ -144,83 +131,78 @@ class DashboardStatsView(APIView):
     """نمایش آمار و اطلاعات داشبورد"""
     permission_classes = [IsAuthenticated]
 
+    # بخش‌های قابل درخواست با stat_type؛ all همه بخش‌ها را برمی‌گرداند
+    SECTIONS = {
+        'business': ('business_stats', 'get_business_stats', BusinessStatsSerializer),
+        'orders': ('order_stats', 'get_order_stats', OrderStatsSerializer),
+        'designs': ('design_stats', 'get_design_stats', DesignStatsSerializer),
+    }
+
     def get_business_stats(self, user):
-        """دریافت آمار کسب‌وکارها"""
+        """دریافت آمار کسب‌وکارها (یک کوئری)"""
         try:
-            total_businesses = Business.objects.count()
-            active_businesses = Business.objects.filter(status='active').count()
-            user_businesses = Business.objects.filter(Q(owner=user) | Q(users__user=user)).distinct().count()
-            
-            return {
-                'total_businesses': total_businesses,
-                'active_businesses': active_businesses,
-                'user_businesses': user_businesses
-            }
+            # کسب‌وکار فعال: کسب‌وکاری که در ۳۰ روز اخیر سفارش دریافت کرده است
+            month_ago = timezone.now() - timedelta(days=30)
+            recent_orders = Order.objects.filter(business=OuterRef('pk'), created_at__gte=month_ago)
+            memberships = BusinessUser.objects.filter(business=OuterRef('pk'), user=user)
+            employee_roles = EmployeeRole.objects.filter(business=OuterRef('pk'), user=user)
+
+            return Business.objects.aggregate(
+                total_businesses=Count('id'),
+                active_businesses=Count('id', filter=Q(Exists(recent_orders))),
+                user_businesses=Count('id', filter=Q(owner=user) | Q(Exists(memberships)) | Q(Exists(employee_roles)))
+            )
         except Exception as e:
             log_error("خطا در دریافت آمار کسب‌وکارها", e)
             return None
 
     def get_order_stats(self, user):
-        """دریافت آمار سفارش‌ها"""
+        """دریافت آمار سفارش‌ها (یک کوئری)"""
         try:
-            total_orders = Order.objects.count()
-            completed_orders = Order.objects.filter(status='completed').count()
-            user_orders = Order.objects.filter(customer=user).count()
-            
-            # آمار هفته اخیر
             week_ago = timezone.now() - timedelta(days=7)
-            weekly_orders = Order.objects.filter(created_at__gte=week_ago).count()
-            
-            return {
-                'total_orders': total_orders,
-                'completed_orders': completed_orders,
-                'user_orders': user_orders,
-                'weekly_orders': weekly_orders
-            }
+            return Order.objects.aggregate(
+                total_orders=Count('id'),
+                completed_orders=Count('id', filter=Q(status='completed')),
+                user_orders=Count('id', filter=Q(customer=user)),
+                weekly_orders=Count('id', filter=Q(created_at__gte=week_ago))
+            )
         except Exception as e:
             log_error("خطا در دریافت آمار سفارش‌ها", e)
             return None
 
     def get_design_stats(self, user):
-        """دریافت آمار طرح‌ها"""
+        """دریافت آمار طرح‌ها (یک کوئری)"""
         try:
-            total_designs = Design.objects.count()
-            public_designs = Design.objects.filter(is_public=True).count()
-            user_designs = Design.objects.filter(designer=user).count()
-            
-            # آمار بازدید و دانلود
-            total_views = Design.objects.aggregate(total=Sum('views_count'))['total'] or 0
-            total_downloads = Design.objects.aggregate(total=Sum('downloads_count'))['total'] or 0
-            
-            return {
-                'total_designs': total_designs,
-                'public_designs': public_designs,
-                'user_designs': user_designs,
-                'total_views': total_views,
-                'total_downloads': total_downloads
-            }
+            stats = Design.objects.aggregate(
+                total_designs=Count('id'),
+                public_designs=Count('id', filter=Q(is_public=True)),
+                user_designs=Count('id', filter=Q(designer=user)),
+                total_views=Sum('views_count'),
+                total_downloads=Sum('downloads_count')
+            )
+            stats['total_views'] = stats['total_views'] or 0
+            stats['total_downloads'] = stats['total_downloads'] or 0
+            return stats
         except Exception as e:
             log_error("خطا در دریافت آمار طرح‌ها", e)
             return None
 
-    def get(self, request):
-        """دریافت تمام آمار داشبورد"""
+    @cached_response('dashboard_stats', global_data=True)
+    def get(self, request, stat_type='all'):
+        """دریافت آمار داشبورد (همه بخش‌ها یا بخش stat_type)"""
+        if stat_type != 'all' and stat_type not in self.SECTIONS:
+            return Response({'error': 'نوع آمار نامعتبر است'}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            business_stats = self.get_business_stats(request.user)
-            order_stats = self.get_order_stats(request.user)
-            design_stats = self.get_design_stats(request.user)
-            
-            if not all([business_stats, order_stats, design_stats]):
-                return Response({'error': 'خطا در دریافت آمار'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-            data = {
-                'business_stats': business_stats,
-                'order_stats': order_stats,
-                'design_stats': design_stats
-            }
-            
-            serializer = DashboardStatsSerializer(data)
-            return Response(serializer.data)
+            sections = self.SECTIONS if stat_type == 'all' else {stat_type: self.SECTIONS[stat_type]}
+            data = {}
+            for key, method_name, serializer_class in sections.values():
+                stats = getattr(self, method_name)(request.user)
+                if stats is None:
+                    return Response({'error': 'خطا در دریافت آمار'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                data[key] = serializer_class(stats).data
+
+            return Response(data)
             
         except Exception as e:
             log_error("خطا در دریافت آمار داشبورد", e)
@@ -232,6 +214,7 @@ class SalesDetailView(APIView):
     """
     permission_classes = [IsAuthenticated]
     
+    @cached_response('sales_detail')
     def get(self, request):
         try:
             # محدوده زمانی برای داده‌ها
@@ -246,32 +229,48 @@ class SalesDetailView(APIView):
             if is_admin:
                 orders = Order.objects.filter(created_at__range=[start_date, end_date])
             else:
-                orders = Order.objects.filter(user=request.user, created_at__range=[start_date, end_date])
-            
-            # آمار کلی سفارش‌ها
-            total_orders = orders.count()
-            completed_orders = orders.filter(status='completed').count()
-            cancelled_orders = orders.filter(status='cancelled').count()
-            
-            # محاسبه متوسط ارزش سفارش
-            avg_order_value = orders.aggregate(avg=Avg('total_amount'))['avg'] or 0
+                orders = Order.objects.filter(customer=request.user, created_at__range=[start_date, end_date])
+
+            start_day, end_day = rollups.local_day(start_date), rollups.local_day(end_date)
+            if is_admin:
+                # آمار کلی و روند فروش از جداول تجمیع روزانه
+                order_totals = rollups.order_summary(start_day, end_day)
+                total_orders = order_totals['order_count']
+                completed_orders = order_totals['by_status'].get('completed', 0)
+                cancelled_orders = order_totals['by_status'].get('cancelled', 0)
+                avg_order_value = order_totals['total_sales'] / total_orders if total_orders else 0
+                sales_source = charts.ChartSource(rollups.order_rollups(start_day, end_day), 'date', 'total_sales', False)
+            else:
+                # آمار کلی سفارش‌ها
+                total_orders = orders.count()
+                completed_orders = orders.filter(status='completed').count()
+                cancelled_orders = orders.filter(status='cancelled').count()
+
+                # محاسبه متوسط ارزش سفارش
+                avg_order_value = orders.aggregate(avg=Avg('total_price'))['avg'] or 0
+                sales_source = charts.ChartSource(orders, 'created_at', 'total_price', True)
             
-            # محصولات پرفروش (در اینجا به عنوان مثال از طریق آیتم‌های سفارش)
+            # طرح‌های پرفروش؛ برای ادمین از جدول رتبه‌بندی و برای کاربر از سفارش‌های خودش
             top_products = []
             try:
-                # این قسمت بسته به ساختار مدل‌های شما ممکن است نیاز به تغییر داشته باشد
-                top_products_query = OrderItem.objects.filter(
-                    order__in=orders
-                ).values('product__name').annotate(
-                    count=Count('id')
-                ).order_by('-count')[:5]
-                
-                top_products = [
-                    {'name': item['product__name'], 'count': item['count']}
-                    for item in top_products_query
-                ]
-            except:
-                # در صورت عدم وجود مدل OrderItem یا ساختار متفاوت
+                if is_admin:
+                    top_products = [
+                        {'name': item['name'], 'count': item['count']}
+                        for item in leaderboards.top(leaderboards.PRODUCTS, days)
+                    ]
+                else:
+                    top_products_query = OrderItem.objects.filter(
+                        order__in=orders, design__isnull=False
+                    ).values('design__title').annotate(
+                        count=Sum('quantity')
+                    ).order_by('-count')[:5]
+
+                    top_products = [
+                        {'name': item['design__title'], 'count': item['count']}
+                        for item in top_products_query
+                    ]
+            except Exception as e:
+                log_error("خطا در دریافت طرح‌های پرفروش", e)
                 top_products = []
             
             # اگر top_products خالی است، داده‌های مثال برای نمایش
@@ -285,7 +284,8 @@ class SalesDetailView(APIView):
                 ]
             
             # نمودار روند فروش
-            sales_trend = self._generate_sales_trend(orders)
+            granularity = charts.parse_granularity(request.query_params.get('granularity'), charts.DAY)
+            sales_trend = self._generate_sales_trend(sales_source, start_day, end_day, granularity)
             
             # روش‌های پرداخت محبوب
             payment_methods = [
@@ -313,29 +313,22 @@ class SalesDetailView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def _generate_sales_trend(self, orders):
+    def _generate_sales_trend(self, sales_source, start_day, end_day, granularity):
         try:
-            if not orders.exists():
+            if not sales_source.queryset.exists():
                 # داده‌های مثال در صورت نبود سفارش
                 return {
                     'labels': [f'روز {i}' for i in range(1, 8)],
                     'values': [0, 0, 0, 0, 0, 0, 0],
                     'type': 'line'
                 }
-            
-            # استفاده از pandas برای تحلیل روند
-            df = pd.DataFrame(list(orders.values('created_at', 'total_amount')))
-            df['date'] = pd.to_datetime(df['created_at']).dt.date
-            daily_sales = df.groupby('date')['total_amount'].sum().reset_index()
-            
-            # تبدیل تاریخ‌ها به شمسی
-            labels = [to_jalali(date) for date in daily_sales['date']]
-            values = daily_sales['total_amount'].tolist()
-            
+
+            # گروه‌بندی در پایگاه داده و پرکردن روزهای بدون فروش با صفر
+            chart = charts.build_chart(sales_source, start_day, end_day, granularity, 'line', 'روند فروش')
             return {
-                'labels': labels,
-                'values': values,
-                'type': 'line'
+                'labels': chart['labels'],
+                'values': chart['values'],
+                'type': chart['type']
             }
         except Exception as e:
             log_error("خطا در تولید نمودار روند فروش", e)
@@ -351,6 +344,7 @@ class BusinessDetailView(APIView):
     """
     permission_classes = [IsAuthenticated]
     
+    @cached_response('business_detail')
     def get(self, request):
         try:
             # محدوده زمانی برای داده‌ها
@@ -361,15 +355,17 @@ class BusinessDetailView(APIView):
             # فیلتر براساس نقش کاربر
             is_admin = request.user.is_staff
             
-            # دریافت کسب‌وکارها
+            # دریافت کسب‌وکارها (کسب‌وکار فعال: دارای سفارش در ۳۰ روز اخیر)
             if is_admin:
                 businesses = Business.objects.all()
-                active_businesses = businesses.filter(status='active')
             else:
                 businesses = Business.objects.filter(
-                    Q(owner=request.user) | Q(users__user=request.user)
+                    Q(owner=request.user) | Q(business_users__user=request.user)
                 ).distinct()
-                active_businesses = businesses.filter(status='active')
+            month_ago = timezone.now() - timedelta(days=30)
+            active_businesses = businesses.filter(
+                Exists(Order.objects.filter(business=OuterRef('pk'), created_at__gte=month_ago))
+            )
             
             # آمار کلی کسب‌وکارها
             total_businesses = businesses.count()
@@ -392,20 +388,18 @@ class BusinessDetailView(APIView):
                 }
                 recent_activities_data.append(activity_data)
             
-            # کسب‌وکارهای برتر (بر اساس تعداد فعالیت)
+            # کسب‌وکارهای برتر (بر اساس تعداد سفارش) از جدول رتبه‌بندی
             top_businesses = []
             if is_admin:
-                top_businesses_query = Business.objects.annotate(
-                    activity_count=Count('activities', filter=Q(activities__created_at__range=[start_date, end_date]))
-                ).order_by('-activity_count')[:5]
-                
-                for business in top_businesses_query:
-                    top_businesses.append({
-                        'id': str(business.id),
-                        'name': business.name,
-                        'activity_count': business.activity_count,
-                        'status': business.status
-                    })
+                top_businesses = [
+                    {
+                        'id': item['id'],
+                        'name': item['name'],
+                        'order_count': item['count'],
+                        'total_sales': item['amount']
+                    }
+                    for item in leaderboards.top(leaderboards.BUSINESSES, days)
+                ]
             
             response_data = {
                 'total_businesses': total_businesses,
@@ -430,6 +424,7 @@ class CombinedDashboardView(APIView):
     """
     permission_classes = [IsAuthenticated]
     
+    @cached_response('combined_dashboard')
     def get(self, request):
         try:
             # دریافت پارامتر روزها از درخواست
@@ -443,7 +438,10 @@ class CombinedDashboardView(APIView):
             is_admin = request.user.is_staff or request.user.is_superuser
             
             # جمع‌آوری داده‌های داشبورد
-            dashboard_data = self._get_dashboard_data(request.user, is_admin, start_date, end_date, days)
+            granularity = charts.parse_granularity(
+                request.query_params.get('granularity'), charts.granularity_for_days(days)
+            )
+            dashboard_data = self._get_dashboard_data(request.user, is_admin, start_date, end_date, granularity, days)
             
             # جمع‌آوری داده‌های صفحه اصلی
             main_data = self._get_main_data(request.user, is_admin)
@@ -470,7 +468,7 @@ class CombinedDashboardView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def _get_dashboard_data(self, user, is_admin, start_date, end_date, days):
+    def _get_dashboard_data(self, user, is_admin, start_date, end_date, granularity, days):
         """دریافت داده‌های مربوط به داشبورد"""
         try:
             # استفاده از کد موجود در DashboardSummaryView برای دریافت خلاصه داده‌ها
@@ -482,20 +480,26 @@ class CombinedDashboardView(APIView):
             
             # فیلتر داده‌ها بر اساس دسترسی کاربر
             if is_admin:
-                orders = Order.objects.filter(created_at__range=[start_date, end_date])
-                payments = Payment.objects.filter(created_at__range=[start_date, end_date])
                 notifications = Notification.objects.filter(created_at__range=[start_date, end_date])
                 reports = Report.objects.all()
                 businesses = Business.objects.all()
+
+                # سفارش‌ها و پرداخت‌ها از جداول تجمیع روزانه خوانده می‌شوند
+                start_day, end_day = rollups.local_day(start_date), rollups.local_day(end_date)
+                order_totals = rollups.order_summary(start_day, end_day)
+                payment_totals = rollups.payment_summary(start_day, end_day)
+                order_source = charts.ChartSource(rollups.order_rollups(start_day, end_day), 'date', 'total_sales', False)
+                payment_source = charts.ChartSource(rollups.payment_rollups(start_day, end_day), 'date', 'total_amount', False)
             else:
                 # کاربران عادی فقط داده‌های مرتبط با خود را می‌بینند
                 orders = Order.objects.filter(
-                    Q(user=user) | Q(business__owner=user),
+                    Q(customer=user) | Q(business__owner=user),
                     created_at__range=[start_date, end_date]
                 )
                 payments = Payment.objects.filter(
                     Q(user=user) | Q(order__business__owner=user),
-                    created_at__range=[start_date, end_date]
+                    created_at__range=[start_date, end_date],
+                    status='successful'
                 )
                 notifications = Notification.objects.filter(
                     user=user,
@@ -503,53 +507,60 @@ class CombinedDashboardView(APIView):
                 )
                 reports = Report.objects.filter(user=user)
                 businesses = Business.objects.filter(owner=user)
+
+                order_totals = {
+                    'order_count': orders.count(),
+                    'total_sales': orders.aggregate(Sum('total_price'))['total_price__sum'] or 0,
+                }
+                payment_totals = {
+                    'payment_count': payments.count(),
+                    'total_payments': payments.aggregate(Sum('amount'))['amount__sum'] or 0,
+                }
+                order_source = charts.ChartSource(orders, 'created_at', 'total_price', True)
+                payment_source = charts.ChartSource(payments, 'created_at', 'amount', True)
             
             # محاسبه خلاصه‌ها
             summary_data = {
-                'order_count': orders.count(),
-                'total_sales': orders.aggregate(Sum('total_amount'))['total_amount__sum'] or 0,
-                'payment_count': payments.count(),
-                'total_payments': payments.aggregate(Sum('amount'))['amount__sum'] or 0,
+                'order_count': order_totals['order_count'],
+                'total_sales': order_totals['total_sales'],
+                'payment_count': payment_totals['payment_count'],
+                'total_payments': payment_totals['total_payments'],
                 'unread_notifications': notifications.filter(is_read=False).count(),
                 'report_count': reports.count(),
-                'active_businesses': businesses.filter(is_active=True).count(),
+                # کسب‌وکار فعال: کسب‌وکاری که در بازه سفارش دریافت کرده است (Business فیلد is_active ندارد)
+                'active_businesses': businesses.filter(Exists(Order.objects.filter(
+                    business=OuterRef('pk'), created_at__range=[start_date, end_date]
+                ))).count(),
                 'total_businesses': businesses.count()
             }
             
             # نمودارهای مورد نیاز
-            charts = []
+            chart_list = []
             
             # نمودار سفارش‌ها
-            order_chart = self._generate_order_chart(orders, days)
+            chart_start, chart_end = rollups.local_day(start_date), rollups.local_day(end_date)
+            order_chart = self._generate_order_chart(order_source, chart_start, chart_end, granularity)
             if order_chart:
-                charts.append(order_chart)
+                chart_list.append(order_chart)
             
             # نمودار پرداخت‌ها
-            payment_chart = self._generate_payment_chart(payments, days)
+            payment_chart = self._generate_payment_chart(payment_source, chart_start, chart_end, granularity)
             if payment_chart:
-                charts.append(payment_chart)
+                chart_list.append(payment_chart)
             
             # کسب و کارهای برتر
             top_businesses = []
             if is_admin:
-                # برای ادمین‌ها: کسب و کارهای با بیشترین سفارش
-                business_orders = Business.objects.annotate(
-                    order_count=Count('order', filter=Q(order__created_at__range=[start_date, end_date]))
-                ).order_by('-order_count')[:5]
-                
-                for business in business_orders:
-                    top_businesses.append({
-                        'id': business.id,
-                        'name': business.name,
-                        'category': business.category,
-                        'order_count': business.order_count,
-                        'is_active': business.is_active
-                    })
+                # برای ادمین‌ها: کسب و کارهای با بیشترین سفارش از جدول رتبه‌بندی (مانند جزئیات کسب‌وکار)
+                top_businesses = [
+                    {'id': item['id'], 'name': item['name'], 'order_count': item['count'], 'total_sales': item['amount']}
+                    for item in leaderboards.top(leaderboards.BUSINESSES, days)
+                ]
             
             # ترکیب داده‌ها در پاسخ داشبورد
             dashboard_data = {
                 'summary': summary_data,
-                'charts': charts,
+                'charts': chart_list,
                 'topBusinesses': top_businesses
             }
             
@@ -559,134 +570,28 @@ class CombinedDashboardView(APIView):
             logging.error(f"Error in _get_dashboard_data: {str(e)}")
             return {'error': str(e)}
     
-    def _generate_order_chart(self, orders, days):
+    def _generate_order_chart(self, order_source, start_day, end_day, granularity):
         """تولید داده‌های نمودار برای سفارش‌ها"""
         try:
-            if orders.count() == 0:
+            if not order_source.queryset.exists():
                 return None
-                
-            # تبدیل به DataFrame
-            orders_df = pd.DataFrame(list(orders.values('created_at', 'total_amount')))
-            
-            # گروه‌بندی بر اساس تاریخ
-            orders_df['date'] = orders_df['created_at'].dt.date
-            
-            # تعیین مقیاس زمانی مناسب بر اساس تعداد روزها
-            if days <= 7:
-                # روزانه
-                grouped = orders_df.groupby('date').agg({'total_amount': 'sum'}).reset_index()
-                date_format = '%Y-%m-%d'
-                title = 'آمار سفارش‌ها (روزانه)'
-            elif days <= 30:
-                # هفتگی
-                orders_df['week'] = orders_df['created_at'].dt.to_period('W').astype(str)
-                grouped = orders_df.groupby('week').agg({'total_amount': 'sum'}).reset_index()
-                grouped = grouped.rename(columns={'week': 'date'})
-                date_format = 'هفته %W'
-                title = 'آمار سفارش‌ها (هفتگی)'
-            else:
-                # ماهانه
-                orders_df['month'] = orders_df['created_at'].dt.to_period('M').astype(str)
-                grouped = orders_df.groupby('month').agg({'total_amount': 'sum'}).reset_index()
-                grouped = grouped.rename(columns={'month': 'date'})
-                date_format = '%Y-%m'
-                title = 'آمار سفارش‌ها (ماهانه)'
-            
-            # تبدیل تاریخ میلادی به شمسی
-            labels = []
-            for date_str in grouped['date']:
-                if isinstance(date_str, str) and '-' in date_str:
-                    try:
-                        parts = date_str.split('-')
-                        year = int(parts[0])
-                        month = int(parts[1]) if len(parts) > 1 else 1
-                        day = int(parts[2]) if len(parts) > 2 else 1
-                        gregorian_date = timezone.datetime(year, month, day).date()
-                        jalali_date = jdatetime.date.fromgregorian(date=gregorian_date)
-                        labels.append(jalali_date.strftime('%Y/%m/%d'))
-                    except:
-                        labels.append(date_str)
-                else:
-                    labels.append(str(date_str))
-            
-            values = grouped['total_amount'].tolist()
-            
-            # ساخت دیکشنری داده‌های نمودار
-            chart_data = {
-                'labels': labels,
-                'values': values,
-                'type': 'line',
-                'title': title
-            }
-            
-            return chart_data
-            
+
+            title = f'آمار سفارش‌ها ({charts.GRANULARITY_TITLES[granularity]})'
+            return charts.build_chart(order_source, start_day, end_day, granularity, 'line', title)
+
         except Exception as e:
             logging.error(f"Error generating order chart: {str(e)}")
             return None
     
-    def _generate_payment_chart(self, payments, days):
+    def _generate_payment_chart(self, payment_source, start_day, end_day, granularity):
         """تولید داده‌های نمودار برای پرداخت‌ها"""
         try:
-            if payments.count() == 0:
+            if not payment_source.queryset.exists():
                 return None
-                
-            # تبدیل به DataFrame
-            payments_df = pd.DataFrame(list(payments.values('created_at', 'amount')))
-            
-            # گروه‌بندی بر اساس تاریخ
-            payments_df['date'] = payments_df['created_at'].dt.date
-            
-            # تعیین مقیاس زمانی مناسب بر اساس تعداد روزها
-            if days <= 7:
-                # روزانه
-                grouped = payments_df.groupby('date').agg({'amount': 'sum'}).reset_index()
-                date_format = '%Y-%m-%d'
-                title = 'آمار پرداخت‌ها (روزانه)'
-            elif days <= 30:
-                # هفتگی
-                payments_df['week'] = payments_df['created_at'].dt.to_period('W').astype(str)
-                grouped = payments_df.groupby('week').agg({'amount': 'sum'}).reset_index()
-                grouped = grouped.rename(columns={'week': 'date'})
-                date_format = 'هفته %W'
-                title = 'آمار پرداخت‌ها (هفتگی)'
-            else:
-                # ماهانه
-                payments_df['month'] = payments_df['created_at'].dt.to_period('M').astype(str)
-                grouped = payments_df.groupby('month').agg({'amount': 'sum'}).reset_index()
-                grouped = grouped.rename(columns={'month': 'date'})
-                date_format = '%Y-%m'
-                title = 'آمار پرداخت‌ها (ماهانه)'
-            
-            # تبدیل تاریخ میلادی به شمسی
-            labels = []
-            for date_str in grouped['date']:
-                if isinstance(date_str, str) and '-' in date_str:
-                    try:
-                        parts = date_str.split('-')
-                        year = int(parts[0])
-                        month = int(parts[1]) if len(parts) > 1 else 1
-                        day = int(parts[2]) if len(parts) > 2 else 1
-                        gregorian_date = timezone.datetime(year, month, day).date()
-                        jalali_date = jdatetime.date.fromgregorian(date=gregorian_date)
-                        labels.append(jalali_date.strftime('%Y/%m/%d'))
-                    except:
-                        labels.append(date_str)
-                else:
-                    labels.append(str(date_str))
-            
-            values = grouped['amount'].tolist()
-            
-            # ساخت دیکشنری داده‌های نمودار
-            chart_data = {
-                'labels': labels,
-                'values': values,
-                'type': 'bar',
-                'title': title
-            }
-            
-            return chart_data
-            
+
+            title = f'آمار پرداخت‌ها ({charts.GRANULARITY_TITLES[granularity]})'
+            return charts.build_chart(payment_source, start_day, end_day, granularity, 'bar', title)
+
         except Exception as e:
             logging.error(f"Error generating payment chart: {str(e)}")
             return None
@@ -779,7 +684,7 @@ class CombinedDashboardView(APIView):
                 notifications.append({
                     'id': notification.id,
                     'title': notification.title,
-                    'message': notification.message,
+                    'message': notification.content,
                     'is_read': notification.is_read,
                     'created_at': notification.created_at.isoformat()
                 })
@@ -794,7 +699,7 @@ class CombinedDashboardView(APIView):
                     business_activities.append({
                         'business_id': order.business.id if order.business else None,
                         'business_name': order.business.name if order.business else 'نامشخص',
-                        'action': f'سفارش جدید به مبلغ {order.total_amount} تومان',
+                        'action': f'سفارش جدید به مبلغ {order.total_price} تومان',
                         'date': order.created_at.isoformat()
                     })
             else:
@@ -806,7 +711,7 @@ class CombinedDashboardView(APIView):
                         business_activities.append({
                             'business_id': order.business.id,
                             'business_name': order.business.name,
-                            'action': f'سفارش جدید به مبلغ {order.total_amount} تومان',
+                            'action': f'سفارش جدید به مبلغ {order.total_price} تومان',
                             'date': order.created_at.isoformat()
                         })
             
@@ -824,3 +729,12 @@ class CombinedDashboardView(APIView):
         except Exception as e:
             logging.error(f"Error in _get_main_data: {str(e)}")
             return {'error': str(e)}
+
+
+class DashboardCacheStatsView(APIView):
+    """API برای مشاهده شمارنده‌های hit/miss کش داشبورد (فقط ادمین)"""
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(summary="آمار کش داشبورد")
+    def get(self, request):
+        return Response(get_stats())
\ No newline at end of file
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import mark_safe
+from apps.core import counters
 from apps.core.models import BaseModel, ThumbnailMixin
 from django.contrib.auth import get_user_model
 from apps.core.utils import log_error, to_jalali
@@ -180,6 +181,11 @@ class Design(ThumbnailMixin):
         verbose_name_plural = _("طرح‌ها")
         ordering = ['-created_at']
 
+    def increment_view_count(self):
+        """افزایش شمارنده بازدید (نوشتن دسته‌ای با apps.core.counters)"""
+        counters.increment(self, 'views_count')
+        self.views_count += 1
+
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
         if self.product_image and not self.thumbnail:
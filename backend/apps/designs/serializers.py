@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import Tag, DesignCategory, Family, Design, FamilyDesignRequirement, DesignFamily, PrintLocation
-from apps.core.utils import to_jalali
+from apps.core.serializers import JalaliDateTimeField, JalaliListSerializer
 from django.utils.translation import gettext_lazy as _
 
 class TagSerializer(serializers.ModelSerializer):
@@ -10,33 +10,23 @@ class TagSerializer(serializers.ModelSerializer):
 
 class DesignCategorySerializer(serializers.ModelSerializer):
     full_path = serializers.ReadOnlyField()
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
 
     class Meta:
         model = DesignCategory
+        list_serializer_class = JalaliListSerializer
         fields = ['id', 'name', 'slug', 'parent', 'description', 'icon', 'designs_count', 'children_count', 'full_path', 'created_at', 'updated_at']
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
 class FamilySerializer(serializers.ModelSerializer):
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
 
     class Meta:
         model = Family
+        list_serializer_class = JalaliListSerializer
         fields = ['id', 'name', 'slug', 'description', 'tags', 'categories', 'designs_count', 'is_active', 'created_at', 'updated_at']
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
 class DesignSerializer(serializers.ModelSerializer):
     categories = DesignCategorySerializer(many=True, read_only=True)
     category_ids = serializers.PrimaryKeyRelatedField(queryset=DesignCategory.objects.all(), source='categories', many=True, write_only=True, required=False)
@@ -51,12 +41,13 @@ class DesignSerializer(serializers.ModelSerializer):
     svg_file = serializers.FileField(source='file', required=False)
     
     created_by = serializers.StringRelatedField()
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
     thumbnail_preview = serializers.ReadOnlyField()
 
     class Meta:
         model = Design
+        list_serializer_class = JalaliListSerializer
         fields = [
             'id', 'title', 'slug', 'description', 'size', 'type', 'svg_file', 'product_image', 'thumbnail',
             'categories', 'category_ids', 'tags', 'tag_ids', 'families', 'family_ids', 'similar_designs',
@@ -70,12 +61,6 @@ class DesignSerializer(serializers.ModelSerializer):
         families = [df.family for df in design_families]
         return FamilySerializer(families, many=True).data
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
     def create(self, validated_data):
         # استخراج family_ids
         family_ids = validated_data.pop('family_ids', [])
@@ -118,25 +103,21 @@ class DesignSerializer(serializers.ModelSerializer):
         return instance
 
 class FamilyDesignRequirementSerializer(serializers.ModelSerializer):
-    created_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
 
     class Meta:
         model = FamilyDesignRequirement
+        list_serializer_class = JalaliListSerializer
         fields = ['id', 'family', 'design_type', 'quantity', 'description', 'is_required', 'fulfilled_count', 'is_fulfilled', 'created_at']
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
 class DesignFamilySerializer(serializers.ModelSerializer):
-    created_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
 
     class Meta:
         model = DesignFamily
+        list_serializer_class = JalaliListSerializer
         fields = ['id', 'design', 'family', 'position', 'notes', 'created_at']
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
 class PrintLocationSerializer(serializers.ModelSerializer):
     """سریالایزر برای محل‌های چاپ"""
     location_type_display = serializers.CharField(source='get_location_type_display', read_only=True)
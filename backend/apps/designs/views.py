@@ -10,6 +10,8 @@ from .serializers import (
     PrintLocationSerializer
 )
 from drf_spectacular.utils import extend_schema
+from apps.core import counters
+from apps.core.ratelimit import RateLimitThrottle, TOKEN_BUCKET, UserRateThrottle
 from apps.core.utils import log_error, validate_file_size, validate_file_format
 from django.db.models import Q
 from rest_framework import viewsets
@@ -155,6 +157,7 @@ class DesignDetailView(APIView):
             design = Design.objects.get(id=design_id)
             if not design.is_public and design.created_by != request.user and not request.user.is_staff:
                 return Response({'error': 'دسترسی غیرمجاز'}, status=status.HTTP_403_FORBIDDEN)
+            counters.apply_pending(design)
             design.increment_view_count()
             serializer = DesignSerializer(design)
             return Response(serializer.data)
@@ -201,8 +204,16 @@ class DesignDetailView(APIView):
             log_error("Error deleting design", e)
             return Response({'error': 'خطا در حذف طرح'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class BatchUploadThrottle(RateLimitThrottle):
+    """سهمیه جداگانه بارگذاری دسته‌ای طرح‌ها"""
+    scope = 'designs.batch_upload'
+    algorithm = TOKEN_BUCKET
+    burst = 3
+
+
 class BatchUploadView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle, BatchUploadThrottle]
 
     @extend_schema(
         summary="Batch upload designs",
@@ -11,6 +11,7 @@ from apps.designs.models import Design
 from apps.business.models import Business, BusinessActivity
 from apps.communication.models import Chat, Message
 from apps.reports.models import Report
+from apps.core import jalali
 from apps.core.utils import log_error, to_jalali
 from django.db.models import Count, Sum, Q
 from datetime import datetime, timedelta
@@ -19,6 +20,7 @@ from django.utils import timezone
 from django.db import models
 from apps.core.models import SystemSetting
 from .models import Promotion, MainPageSetting
+from apps.dashboard.cache import cached_response
 import jdatetime
 from django.http import JsonResponse
 
@@ -31,6 +33,7 @@ class MainPageSummaryView(APIView):
         description="دریافت خلاصه داده‌های سفارش‌ها، پرداخت‌ها، اعلانات، چت‌ها و منوی ناوبری",
         responses={200: MainPageResponseSerializer}
     )
+    @cached_response('main_page_summary')
     def get(self, request):
         try:
             # محدوده زمانی برای داده‌های اخیر
@@ -110,21 +113,10 @@ class MainPageSummaryView(APIView):
                 'order_in_progress': orders_query.filter(status__in=['pending', 'processing']).count()
             }
 
-            # تبدیل تاریخ‌ها به شمسی
-            for item in recent_orders:
-                item['created_at'] = to_jalali(item['created_at'])
-            
-            for item in recent_payments:
-                item['created_at'] = to_jalali(item['created_at'])
-            
-            for item in recent_notifications:
-                item['created_at'] = to_jalali(item['created_at'])
-            
-            for item in recent_chats:
-                item['created_at'] = to_jalali(item['created_at'])
-            
-            for item in recent_designs:
-                item['created_at'] = to_jalali(item['created_at'])
+            # تبدیل تاریخ‌ها به شمسی (یک فراخوانی دسته‌ای برای همه لیست‌ها)
+            recent_items = recent_orders + recent_payments + recent_notifications + recent_chats + recent_designs
+            for item, created_at in zip(recent_items, jalali.to_jalali_many(item['created_at'] for item in recent_items)):
+                item['created_at'] = created_at
 
             return Response({
                 'summary': {
@@ -155,6 +147,7 @@ class MainSummaryView(APIView):
         description="دریافت خلاصه داده‌های کلی سیستم برای داشبورد اصلی",
         responses={200: MainPageResponseSerializer}
     )
+    @cached_response('main_summary', global_data=True)
     def get(self, request):
         try:
             # محدوده زمانی برای داده‌های اخیر
@@ -3,7 +3,7 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from .models import Notification
 from django.contrib.auth import get_user_model
-from apps.core.utils import to_jalali
+from apps.core.jalali import to_jalali_many
 
 User = get_user_model()
 
@@ -68,7 +68,8 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """دریافت اعلانات خوانده نشده کاربر"""
         try:
             user = User.objects.get(id=user_id)
-            notifications = Notification.objects.filter(user=user, is_read=False).order_by('-created_at')[:5]
+            notifications = list(Notification.objects.filter(user=user, is_read=False).order_by('-created_at')[:5])
+            created_at_jalali = to_jalali_many(notification.created_at for notification in notifications)
             
             return [
                 {
@@ -77,9 +78,9 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                     'content': notification.content,
                     'type': notification.type,
                     'link': notification.link,
-                    'created_at': to_jalali(notification.created_at)
+                    'created_at': created_at_jalali[index]
                 }
-                for notification in notifications
+                for index, notification in enumerate(notifications)
             ]
         except User.DoesNotExist:
             return []
@@ -219,3 +219,18 @@ class NotificationSignalTests(TestCase):
         self.assertTrue(
             Notification.objects.filter(user=self.user, type='order_status').exists()
         )
+
+
+@pytest.mark.django_db
+def test_category_list_serializer_converts_dates_in_batch():
+    """تاریخ‌های شمسی لیست دسته‌بندی‌ها یک‌جا تبدیل می‌شوند و با تبدیل تکی یکسان‌اند"""
+    from apps.core.serializers import JalaliListSerializer
+    from apps.core.utils import to_jalali
+    from .serializers import NotificationCategorySerializer
+
+    categories = [NotificationCategory.objects.create(name=f'دسته {index}') for index in range(3)]
+    serializer = NotificationCategorySerializer(NotificationCategory.objects.order_by('created_at'), many=True)
+
+    assert isinstance(serializer, JalaliListSerializer)
+    assert [item['created_at_jalali'] for item in serializer.data] == [to_jalali(c.created_at) for c in categories]
+    assert NotificationCategorySerializer(categories[0]).data['created_at_jalali'] == to_jalali(categories[0].created_at)
@@ -0,0 +1,175 @@
+"""
+موتور تخصیص کسب‌وکار چاپ به سفارش‌های جدید با توجه به ظرفیت
+
+LoadIndex شاخص بار کسب‌وکارهای چاپ با ظرفیت روزانه را در حافظه نگه می‌دارد: ظرفیت باقی‌مانده
+امروز، گزینه‌های چاپ و انواع پارچه قابل انجام و عمق صف (تعداد سفارش‌های باز). کسب‌وکارها بر
+اساس مجموعه قابلیت‌ها گروه‌بندی می‌شوند و هر گروه یک heap با کلید (نسبت صف به ظرفیت، ظرفیت
+باقی‌مانده) دارد؛ بنابراین انتخاب کم‌بارترین کسب‌وکار سازگار برای هر سفارش هزینه‌ای از مرتبه
+log n دارد و کل شاخص با یک کوئری ساخته می‌شود.
+
+assign سفارش‌های یک دسته را ابتدا در حافظه تقسیم می‌کند و سپس ظرفیت هر کسب‌وکار را با یک
+UPDATE شرطی (F) رزرو می‌کند. اگر ظرفیت کسب‌وکاری در این فاصله توسط درخواست دیگری مصرف شده
+باشد، رزرو انجام نمی‌شود و سفارش‌های آن به کسب‌وکار بعدی سپرده می‌شوند.
+
+ظرفیت مصرف‌شده برای روز capacity_date نگهداری می‌شود و در اولین رزرو روز بعد صفر می‌شود.
+"""
+import heapq
+
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.business.models import Business
+
+
+class Candidate:
+    """وضعیت یک کسب‌وکار در شاخص بار"""
+    __slots__ = ('business_id', 'owner_id', 'capacity', 'remaining', 'queue_depth', 'print_options', 'fabric_types')
+
+    def __init__(self, business_id, capacity, remaining, queue_depth=0, print_options=(), fabric_types=(),
+                 owner_id=None):
+        self.business_id = business_id
+        self.owner_id = owner_id
+        self.capacity = capacity
+        self.remaining = remaining
+        self.queue_depth = queue_depth
+        self.print_options = frozenset(print_options or ())
+        self.fabric_types = frozenset(fabric_types or ())
+
+    @property
+    def group(self):
+        return self.print_options, self.fabric_types
+
+    def entry(self):
+        """کلید heap؛ کم‌بارترین کسب‌وکار (نسبت صف به ظرفیت) و سپس بیشترین ظرفیت باقی‌مانده"""
+        return self.queue_depth / self.capacity, -self.remaining, self.business_id
+
+
+def _supports(options, value):
+    return not options or value in options
+
+
+class LoadIndex:
+    """شاخص بار کسب‌وکارها در حافظه با یک heap برای هر گروه قابلیت"""
+
+    def __init__(self, candidates):
+        self.candidates = {candidate.business_id: candidate for candidate in candidates}
+        self._heaps = {}
+        self._compatible = {}
+        for candidate in self.candidates.values():
+            self._heaps.setdefault(candidate.group, [])
+            self._push(candidate)
+
+    @classmethod
+    def build(cls, today=None):
+        """ساخت شاخص از کسب‌وکارهای چاپ دارای ظرفیت با یک کوئری"""
+        from .pricing import OPEN_STATUSES
+        from .models import Order
+
+        today = today or timezone.localdate()
+        queue = Order.objects.filter(business=OuterRef('pk'), status__in=OPEN_STATUSES).order_by().values(
+            'business'
+        ).annotate(depth=Count('pk')).values('depth')
+        rows = Business.objects.filter(business_type=Business.PRINT, daily_capacity__gt=0).annotate(
+            queue_depth=Coalesce(Subquery(queue), 0)
+        ).values_list(
+            'pk', 'owner_id', 'daily_capacity', 'used_capacity', 'capacity_date', 'queue_depth',
+            'print_options', 'fabric_types'
+        )
+        return cls(
+            Candidate(
+                business_id, capacity, capacity - (used if capacity_date == today else 0), queue_depth,
+                print_options, fabric_types, owner_id
+            )
+            for business_id, owner_id, capacity, used, capacity_date, queue_depth, print_options, fabric_types in rows
+        )
+
+    def _push(self, candidate):
+        if candidate.remaining > 0:
+            heapq.heappush(self._heaps[candidate.group], candidate.entry())
+
+    def _head(self, group):
+        """بهترین ورودی معتبر گروه؛ ورودی‌های قدیمی (پس از رزرو) به‌صورت تنبل حذف می‌شوند"""
+        heap = self._heaps[group]
+        while heap:
+            candidate = self.candidates[heap[0][2]]
+            if candidate.remaining > 0 and heap[0] == candidate.entry():
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _groups_for(self, print_option, fabric_type):
+        key = (print_option, fabric_type)
+        if key not in self._compatible:
+            self._compatible[key] = [
+                group for group in self._heaps
+                if _supports(group[0], print_option) and _supports(group[1], fabric_type)
+            ]
+        return self._compatible[key]
+
+    def pick(self, print_option, fabric_type):
+        """انتخاب و رزرو (در حافظه) کم‌بارترین کسب‌وکار سازگار؛ None در صورت نبود ظرفیت"""
+        best = None
+        for group in self._groups_for(print_option, fabric_type):
+            head = self._head(group)
+            if head is not None and (best is None or head < best):
+                best = head
+        if best is None:
+            return None
+        candidate = self.candidates[best[2]]
+        candidate.remaining -= 1
+        candidate.queue_depth += 1
+        self._push(candidate)
+        return candidate
+
+    def exhaust(self, business_id):
+        """حذف کسب‌وکاری که ظرفیتش خارج از این شاخص تمام شده است"""
+        self.candidates[business_id].remaining = 0
+
+
+def reserve(business_id, count, today=None):
+    """رزرو اتمی ظرفیت امروز یک کسب‌وکار با UPDATE شرطی؛ خروجی: موفق بودن رزرو"""
+    today = today or timezone.localdate()
+    same_day = Q(capacity_date=today, used_capacity__lte=F('daily_capacity') - count)
+    new_day = ~Q(capacity_date=today) & Q(daily_capacity__gte=count)
+    return Business.objects.filter(same_day | new_day, pk=business_id).update(
+        used_capacity=Case(When(capacity_date=today, then=F('used_capacity') + count), default=Value(count)),
+        capacity_date=today,
+    ) == 1
+
+
+def assign(orders, index=None, today=None):
+    """
+    تخصیص کسب‌وکار به سفارش‌های بدون کسب‌وکار (business_id خالی) و رزرو ظرفیت آن‌ها
+
+    سفارش‌ها ذخیره نمی‌شوند و فقط business_id آن‌ها مقداردهی می‌شود؛ فراخوان باید رزرو و ذخیره
+    سفارش‌ها را در یک تراکنش انجام دهد. خروجی: سفارش‌هایی که کسب‌وکاری با ظرفیت کافی برایشان
+    یافت نشد.
+    """
+    today = today or timezone.localdate()
+    pending = [order for order in orders if order.business_id is None]
+    if not pending:
+        return []
+    index = index if index is not None else LoadIndex.build(today)
+
+    unassigned = []
+    while pending:
+        plan = {}
+        for order in pending:
+            candidate = index.pick(order.print_option, order.fabric_type)
+            if candidate is None:
+                unassigned.append(order)
+            else:
+                plan.setdefault(candidate.business_id, []).append(order)
+
+        pending = []
+        for business_id, planned in plan.items():
+            if reserve(business_id, len(planned), today):
+                for order in planned:
+                    order.business_id = business_id
+                    order._auto_assigned = True
+            else:
+                # ظرفیت در این فاصله توسط درخواست دیگری مصرف شده است
+                index.exhaust(business_id)
+                pending.extend(planned)
+    return unassigned
@@ -0,0 +1,291 @@
+"""
+ورود دسته‌ای سفارش‌ها (JSON یا CSV) بدون ارسال سیگنال برای هر ردیف
+
+همه سفارش‌ها ابتدا با OrderImportSerializer اعتبارسنجی و شناسه‌های مشتری، کسب‌وکار، طرح و
+محل چاپ با یک کوئری برای هر نوع بررسی می‌شوند. سپس سفارش‌ها در دسته‌های
+ORDER_IMPORT_BATCH_SIZE تایی همراه با بخش‌ها، آیتم‌ها و ردیف‌های جانبی ایجاد سفارش
+(مرحله اولیه، تاریخچه وضعیت و اطلاعیه‌ها، همان ردیف‌های سیگنال‌های apps.orders.signals)
+با bulk_create نوشته می‌شوند. بدون partial همه دسته‌ها در یک تراکنش هستند و هر خطا کل
+ورود را برمی‌گرداند؛ با partial هر دسته تراکنش جداگانه دارد. هزینه بخش‌ها و قیمت کل سفارش
+هنگام ساخت ردیف‌ها محاسبه می‌شود. برای سفارش‌های بدون business_id کسب‌وکار با موتور
+تخصیص (apps.orders.assignment) و بر اساس ظرفیت روزانه در تراکنش دسته تعیین می‌شود.
+
+پس از نوشتن، سیگنال orders_imported برای به‌روزرسانی داده‌های وابسته (تجمیع‌ها و
+رتبه‌بندی‌های داشبورد و کش) ارسال می‌شود.
+
+قالب CSV: هر خط یک بخش و/یا یک آیتم سفارش است و خطوط با ستون ref به یک سفارش تبدیل
+می‌شوند (فیلدهای سفارش از اولین خط خوانده می‌شوند). ستون‌های section_* و item_* فیلدهای
+بخش و آیتم هستند، مثلاً section_design_id و item_unit_price.
+
+تنظیمات:
+    ORDER_IMPORT_BATCH_SIZE: تعداد سفارش‌های هر تراکنش (پیش‌فرض ۵۰۰)
+    ORDER_IMPORT_MAX_ROWS: حداکثر تعداد سفارش‌های یک فایل (پیش‌فرض ۱۰۰۰۰)
+"""
+import csv
+import io
+import json
+import uuid
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from apps.business.models import Business
+from apps.core.utils import log_error
+from apps.designs.models import Design, PrintLocation
+from .models import Order, OrderItem, OrderSection, OrderStage, OrderStatusHistory
+from .assignment import LoadIndex, assign
+from .pricing import section_cost
+from .serializers import OrderImportSerializer
+from .signals import build_assignment_stage, build_creation_notifications, build_initial_history, build_initial_stage
+
+# ارسال پس از ورود دسته‌ای؛ آرگومان‌ها: orders، user_ids (گیرندگان اطلاعیه) و design_ids (طرح‌های آیتم‌ها)
+orders_imported = Signal()
+
+SECTION_PREFIX = 'section_'
+ITEM_PREFIX = 'item_'
+
+
+class OrderImportError(ValueError):
+    """فایل ورودی قابل خواندن نیست یا از حد مجاز بزرگ‌تر است"""
+
+
+class _Rollback(Exception):
+    """برگرداندن تراکنش بیرونی ورود بدون partial پس از اولین دسته ناموفق"""
+
+
+def parse_json(content):
+    data = json.loads(content) if isinstance(content, (str, bytes)) else content
+    if isinstance(data, dict):
+        data = data.get('orders')
+    if not isinstance(data, list):
+        raise OrderImportError('ورودی JSON باید لیست سفارش‌ها یا {"orders": [...]} باشد')
+    return data
+
+
+def parse_csv(content):
+    """تبدیل خطوط CSV به سفارش‌ها با گروه‌بندی بر اساس ستون ref"""
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    orders = {}
+    for line_number, line in enumerate(csv.DictReader(io.StringIO(content)), start=2):
+        values = {key.strip(): value.strip() for key, value in line.items() if key and value not in (None, '')}
+        ref = values.get('ref') or f'line-{line_number}'
+        order = orders.get(ref)
+        if order is None:
+            order = orders[ref] = {'ref': ref, 'sections': [], 'items': []}
+            order.update({
+                key: value for key, value in values.items()
+                if not key.startswith((SECTION_PREFIX, ITEM_PREFIX))
+            })
+        for prefix, target in ((SECTION_PREFIX, order['sections']), (ITEM_PREFIX, order['items'])):
+            row = {key[len(prefix):]: value for key, value in values.items() if key.startswith(prefix)}
+            if row:
+                target.append(row)
+    return list(orders.values())
+
+
+def parse(content, file_format):
+    """خواندن محتوای فایل با قالب json یا csv"""
+    try:
+        rows = parse_csv(content) if file_format == 'csv' else parse_json(content)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        if isinstance(e, OrderImportError):
+            raise
+        raise OrderImportError(f'فایل ورودی قابل خواندن نیست: {e}')
+    max_rows = getattr(settings, 'ORDER_IMPORT_MAX_ROWS', 10000)
+    if len(rows) > max_rows:
+        raise OrderImportError(f'حداکثر {max_rows} سفارش در هر ورود مجاز است')
+    return rows
+
+
+class _References:
+    """شناسه‌های معتبر مراجع همه سفارش‌ها با یک کوئری برای هر مدل"""
+
+    def __init__(self, orders):
+        customer_ids, business_ids, design_ids, location_ids = set(), set(), set(), set()
+        for data in orders:
+            customer_ids.add(data['customer_id'])
+            if data['business_id'] is not None:
+                business_ids.add(data['business_id'])
+            for section in data['sections']:
+                design_ids.add(section['design_id'])
+                location_ids.add(section['location_id'])
+            design_ids.update(item['design_id'] for item in data['items'] if item.get('design_id'))
+
+        self.customers = set(
+            get_user_model().objects.filter(pk__in=customer_ids, is_active=True).values_list('pk', flat=True)
+        )
+        self.business_owners = dict(Business.objects.filter(pk__in=business_ids).values_list('pk', 'owner_id'))
+        self.design_prices = dict(Design.objects.filter(pk__in=design_ids).values_list('pk', 'price'))
+        self.location_modifiers = dict(
+            PrintLocation.objects.filter(pk__in=location_ids, is_active=True).values_list('pk', 'price_modifier')
+        )
+
+    def errors(self, data):
+        errors = {}
+        if data['customer_id'] not in self.customers:
+            errors['customer_id'] = ['مشتری یافت نشد']
+        if data['business_id'] is not None and data['business_id'] not in self.business_owners:
+            errors['business_id'] = ['کسب‌وکار یافت نشد']
+        for name, rows, checks in (
+            ('sections', data['sections'], (('design_id', self.design_prices), ('location_id', self.location_modifiers))),
+            ('items', data['items'], (('design_id', self.design_prices),)),
+        ):
+            row_errors = {}
+            for index, row in enumerate(rows):
+                missing = {
+                    field: ['یافت نشد'] for field, known in checks
+                    if row.get(field) is not None and row[field] not in known
+                }
+                if missing:
+                    row_errors[index] = missing
+            if row_errors:
+                errors[name] = row_errors
+        return errors
+
+
+def validate(rows):
+    """اعتبارسنجی همه سفارش‌ها؛ خروجی: (لیست (شماره، داده معتبر)، لیست خطاها، مراجع)"""
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        serializer = OrderImportSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((number, serializer.validated_data))
+        else:
+            errors.append({'row': number, 'ref': row.get('ref') if isinstance(row, dict) else None,
+                           'errors': serializer.errors})
+
+    references = _References([data for _, data in valid])
+    checked = []
+    for number, data in valid:
+        row_errors = references.errors(data)
+        if row_errors:
+            errors.append({'row': number, 'ref': data.get('ref'), 'errors': row_errors})
+        else:
+            checked.append((number, data))
+    errors.sort(key=lambda error: error['row'])
+    return checked, errors, references
+
+
+def _build(data, references, now):
+    """ساخت سفارش و ردیف‌های وابسته آن (ذخیره‌نشده)"""
+    order = Order(
+        id=uuid.uuid4(), created_at=now, updated_at=now,
+        **{key: value for key, value in data.items() if key not in ('ref', 'sections', 'items')}
+    )
+    sections = []
+    for section in data['sections']:
+        cost = section_cost(
+            references.design_prices[section['design_id']],
+            references.location_modifiers[section['location_id']],
+            section['quantity']
+        )
+        sections.append(OrderSection(id=uuid.uuid4(), order=order, created_at=now, updated_at=now, cost=cost, **section))
+
+    items = []
+    for item in data['items']:
+        item = dict(item)
+        unit_price = item.pop('unit_price', None) or references.design_prices.get(item.get('design_id')) or 0
+        items.append(OrderItem(
+            order=order, unit_price=unit_price, total_price=unit_price * item['quantity'],
+            created_at=now, updated_at=now, **item
+        ))
+
+    order.total_price = sum(section.cost for section in sections) + sum(item.total_price for item in items)
+    return order, sections, items
+
+
+def _write(batch, references, index=None):
+    """نوشتن یک دسته؛ خروجی: (سفارش‌ها، آیتم‌ها، اطلاعیه‌ها، شماره ردیف‌های بدون کسب‌وکار با ظرفیت)"""
+    now = timezone.now()
+    built = [(number, *_build(data, references, now)) for number, data in batch]
+    orders, sections, items, stages, histories, notifications, unassigned = [], [], [], [], [], [], []
+
+    from apps.notification.models import Notification
+
+    with transaction.atomic():
+        missing = {order.pk for order in assign([order for _, order, _, _ in built], index)}
+        for number, order, order_sections, order_items in built:
+            if order.pk in missing:
+                unassigned.append(number)
+                continue
+            if getattr(order, '_auto_assigned', False):
+                references.business_owners[order.business_id] = index.candidates[order.business_id].owner_id
+                stages.append(build_assignment_stage(order))
+            orders.append(order)
+            sections.extend(order_sections)
+            items.extend(order_items)
+            stages.append(build_initial_stage(order))
+            histories.append(build_initial_history(order))
+            notifications.extend(build_creation_notifications(order, references.business_owners[order.business_id]))
+
+        Order.objects.bulk_create(orders)
+        OrderSection.objects.bulk_create(sections)
+        OrderItem.objects.bulk_create(items)
+        OrderStage.objects.bulk_create(stages)
+        OrderStatusHistory.objects.bulk_create(histories)
+        Notification.objects.bulk_create(notifications)
+    return orders, items, notifications, unassigned
+
+
+def import_orders(rows, partial=False, batch_size=None):
+    """
+    اعتبارسنجی و ورود سفارش‌ها
+
+    بدون partial در صورت وجود هر خطا (اعتبارسنجی، نبود کسب‌وکار با ظرفیت یا خطای پایگاه
+    داده) هیچ سفارشی نوشته نمی‌شود؛ با partial سفارش‌های معتبر نوشته و خطاهای بقیه گزارش
+    می‌شوند و خطای پایگاه داده در یک دسته فقط همان دسته را رد می‌کند.
+    خروجی: {'created', 'failed', 'order_ids', 'errors'}
+    """
+    batch_size = batch_size or getattr(settings, 'ORDER_IMPORT_BATCH_SIZE', 500)
+    valid, errors, references = validate(rows)
+    if errors and not partial:
+        return {'created': 0, 'failed': len(errors), 'order_ids': [], 'errors': errors}
+
+    # شاخص بار برای سفارش‌های بدون کسب‌وکار یک بار ساخته و بین دسته‌ها مشترک است
+    index = LoadIndex.build() if any(data['business_id'] is None for _, data in valid) else None
+    created, user_ids, design_ids = [], set(), set()
+    try:
+        with nullcontext() if partial else transaction.atomic():
+            for start in range(0, len(valid), batch_size):
+                batch = valid[start:start + batch_size]
+                try:
+                    orders, items, notifications, unassigned = _write(batch, references, index)
+                except Exception as e:
+                    log_error(f"خطا در ورود دسته‌ای {len(batch)} سفارش", e)
+                    errors.extend(
+                        {'row': number, 'ref': data.get('ref'), 'errors': {'non_field_errors': ['خطا در ذخیره سفارش']}}
+                        for number, data in batch
+                    )
+                    if not partial:
+                        raise _Rollback
+                    # ظرفیت رزروشده دسته برگشت‌خورده در شاخص مانده است؛ شاخص از پایگاه داده بازسازی می‌شود
+                    if index is not None:
+                        index = LoadIndex.build()
+                    continue
+                refs = {number: data.get('ref') for number, data in batch}
+                errors.extend(
+                    {'row': number, 'ref': refs[number], 'errors': {'business_id': ['کسب‌وکاری با ظرفیت کافی یافت نشد']}}
+                    for number in unassigned
+                )
+                if unassigned and not partial:
+                    raise _Rollback
+                created.extend(orders)
+                user_ids.update(notification.user_id for notification in notifications)
+                design_ids.update(item.design_id for item in items if item.design_id)
+    except _Rollback:
+        created = []
+
+    if created:
+        orders_imported.send(sender=Order, orders=created, user_ids=user_ids, design_ids=design_ids)
+    errors.sort(key=lambda error: error['row'])
+    return {
+        'created': len(created),
+        'failed': len(errors),
+        'order_ids': [str(order.pk) for order in created],
+        'errors': errors,
+    }
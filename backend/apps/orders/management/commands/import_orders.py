@@ -0,0 +1,33 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.orders import bulk_import
+
+
+class Command(BaseCommand):
+    """ورود دسته‌ای سفارش‌ها از فایل JSON یا CSV"""
+    help = 'Import orders with their sections and items from a JSON or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='مسیر فایل (.json یا .csv)')
+        parser.add_argument('--format', choices=['json', 'csv'], help='قالب فایل (پیش‌فرض: از پسوند)')
+        parser.add_argument('--partial', action='store_true', help='ثبت سفارش‌های معتبر با وجود خطا در بقیه')
+        parser.add_argument('--batch-size', type=int, help='تعداد سفارش‌های هر تراکنش')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'فایل {path} یافت نشد')
+        file_format = options['format'] or ('csv' if path.suffix.lower() == '.csv' else 'json')
+        try:
+            rows = bulk_import.parse(path.read_bytes(), file_format)
+        except bulk_import.OrderImportError as e:
+            raise CommandError(str(e))
+
+        result = bulk_import.import_orders(rows, partial=options['partial'], batch_size=options['batch_size'])
+        for error in result['errors']:
+            self.stderr.write(json.dumps(error, ensure_ascii=False, default=str))
+        style = self.style.SUCCESS if result['created'] or not result['errors'] else self.style.ERROR
+        self.stdout.write(style(f"{result['created']} سفارش ثبت شد، {result['failed']} سفارش خطا داشت"))
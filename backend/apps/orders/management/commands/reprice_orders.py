@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.models import Order
+from apps.orders.pricing import OPEN_STATUSES, reprice
+
+
+class Command(BaseCommand):
+    """بازمحاسبه دسته‌ای هزینه بخش‌ها و قیمت کل سفارش‌های باز پس از تغییر قیمت طرح یا ضریب محل چاپ"""
+    help = 'Reprice order sections and totals of open orders affected by design price or print location changes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--design', action='append', default=[], help='شناسه طرح تغییرکرده (قابل تکرار)')
+        parser.add_argument('--location', action='append', default=[], help='شناسه محل چاپ تغییرکرده (قابل تکرار)')
+        parser.add_argument(
+            '--all-statuses', action='store_true',
+            help='شامل سفارش‌های بسته هم باشد (برای مقداردهی اولیه هزینه‌های ذخیره‌شده)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        statuses = [value for value, _ in Order.STATUS_CHOICES] if options['all_statuses'] else OPEN_STATUSES
+        changed = reprice(
+            design_ids=options['design'], location_ids=options['location'],
+            statuses=statuses, chunk_size=options['chunk_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{changed['sections']} بخش و {changed['orders']} سفارش بازقیمت‌گذاری شد"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 21:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_remove_orderitem_order_detail_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordersection',
+            name='cost',
+            field=models.DecimalField(decimal_places=0, default=0, editable=False, max_digits=12, verbose_name='هزینه محاسبه\u200cشده (ریال)'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-17 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('draft', 'پیش\u200cنویس'), ('pending', 'در انتظار تأیید'), ('confirmed', 'تأیید شده'), ('set_design', 'در حال ست\u200cبندی'), ('ready_for_print', 'آماده چاپ'), ('printing', 'در حال چاپ'), ('in_progress', 'در حال انجام'), ('completed', 'تکمیل شده'), ('cancelled', 'لغو شده'), ('returned', 'مرجوع شده')], default='draft', max_length=20, verbose_name='وضعیت'),
+        ),
+        migrations.AlterField(
+            model_name='orderstatushistory',
+            name='status',
+            field=models.CharField(choices=[('draft', 'پیش\u200cنویس'), ('pending', 'در انتظار تأیید'), ('confirmed', 'تأیید شده'), ('set_design', 'در حال ست\u200cبندی'), ('ready_for_print', 'آماده چاپ'), ('printing', 'در حال چاپ'), ('in_progress', 'در حال انجام'), ('completed', 'تکمیل شده'), ('cancelled', 'لغو شده'), ('returned', 'مرجوع شده')], max_length=20, verbose_name='وضعیت'),
+        ),
+    ]
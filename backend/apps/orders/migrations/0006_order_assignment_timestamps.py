@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-17 22:17
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_order_workflow_statuses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderassignment',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاریخ ایجاد'),
+        ),
+        migrations.AddField(
+            model_name='orderassignment',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاریخ بروزرسانی'),
+        ),
+    ]
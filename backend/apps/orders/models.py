@@ -1,14 +1,15 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from apps.core.models import BaseModel
+from apps.core.models import BaseModel, FieldTrackerMixin
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.conf import settings
-from apps.business.models import Business
+from apps.business.models import Business, BusinessUser
 from apps.designs.models import Design, Template
 from apps.templates_app.models import UserTemplate
 from apps.core.utils import log_error, to_jalali
 from django.db.models import SET_NULL
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from apps.clothing.models import ClothingSection, RakebOrientation
@@ -49,11 +50,8 @@ class OrderItem(models.Model):
         if self.design and not self.unit_price:
             self.unit_price = self.design.price if hasattr(self.design, 'price') else 0
             
-        # محاسبه قیمت کل بر اساس تعداد
-        if self.quantity and self.unit_price:
-            self.total_price = self.unit_price * self.quantity
-        elif self.order and self.unit_price:
-            self.total_price = self.unit_price * self.quantity
+        # محاسبه قیمت کل بر اساس تعداد (مبنای قیمت کل سفارش)
+        self.total_price = (self.unit_price or 0) * (self.quantity or 0)
             
         super().save(*args, **kwargs)
 
@@ -65,12 +63,56 @@ class OrderItem(models.Model):
         verbose_name_plural = _("آیتم‌های سفارش")
         ordering = ['-created_at']
 
-class Order(BaseModel):
+class OrderQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        سفارش‌های قابل مشاهده کاربر: مدیران همه سفارش‌ها، بقیه سفارش‌های خود به‌عنوان مشتری و
+        سفارش‌های کسب‌وکارهایی که مالک یا عضو آن هستند
+
+        دسترسی کسب‌وکار با زیرکوئری EXISTS بررسی می‌شود تا join چندبه‌چند و DISTINCT لازم نباشد.
+        """
+        if user.is_staff:
+            return self
+        owned = Business.objects.filter(pk=models.OuterRef('business_id'), owner=user)
+        member = BusinessUser.objects.filter(business_id=models.OuterRef('business_id'), user=user)
+        return self.filter(models.Q(customer=user) | models.Exists(owned) | models.Exists(member))
+
+    def with_summary(self):
+        """
+        افزودن خلاصه مراحل، بخش‌ها و آیتم‌ها به هر سفارش با زیرکوئری‌های همبسته
+
+        stages_total و stages_completed (تعداد مراحل)، sections_cost (مجموع هزینه بخش‌ها) و
+        items_total (تعداد آیتم‌ها)؛ زیرکوئری‌ها برخلاف Count روی چند join ردیف‌ها را ضرب نمی‌کنند.
+        """
+        def aggregate(model, function, output_field, **filters):
+            rows = model.objects.filter(order=models.OuterRef('pk'), **filters).order_by().values('order')
+            return Coalesce(
+                models.Subquery(rows.annotate(value=function).values('value')), 0, output_field=output_field
+            )
+
+        count = models.IntegerField()
+        return self.annotate(
+            stages_total=aggregate(OrderStage, models.Count('pk'), count),
+            stages_completed=aggregate(OrderStage, models.Count('pk'), count, status='completed'),
+            sections_cost=aggregate(OrderSection, models.Sum('cost'), models.DecimalField(max_digits=14, decimal_places=0)),
+            items_total=aggregate(OrderItem, models.Count('pk'), count),
+        )
+
+
+class Order(FieldTrackerMixin, BaseModel):
     """مدل برای مدیریت سفارش‌های کاربران"""
+    # فیلدهای تجمیع داشبورد (apps.dashboard.rollups.ORDER_TRACKED_FIELDS) نیز ردیابی می‌شوند
+    tracked_fields = ('status', 'created_at', 'business_id', 'total_price')
+
+    objects = OrderQuerySet.as_manager()
+
     STATUS_CHOICES = (
         ('draft', _('پیش‌نویس')),
         ('pending', _('در انتظار تأیید')),
         ('confirmed', _('تأیید شده')),
+        ('set_design', _('در حال ست‌بندی')),
+        ('ready_for_print', _('آماده چاپ')),
+        ('printing', _('در حال چاپ')),
         ('in_progress', _('در حال انجام')),
         ('completed', _('تکمیل شده')),
         ('cancelled', _('لغو شده')),
@@ -137,19 +179,9 @@ class Order(BaseModel):
     notes = models.TextField(blank=True, verbose_name=_("یادداشت‌های عمومی"))
 
     def calculate_total_price(self):
-        """محاسبه قیمت کل سفارش"""
-        total = 0
-        for section in self.sections.all():
-            section_cost = section.calculate_cost()
-            total += section_cost
-        
-        # اضافه کردن هزینه‌های اضافی
-        for item in self.items.all():
-            total += item.quantity * item.unit_price if item.unit_price else 0
-            
-        self.total_price = total
-        self.save(update_fields=['total_price'])
-        return total
+        """محاسبه قیمت کل سفارش از هزینه‌های ذخیره‌شده بخش‌ها و آیتم‌ها"""
+        from .pricing import update_order_total
+        return update_order_total(self)
         
     @property
     def jalali_created_at(self):
@@ -163,29 +195,39 @@ class Order(BaseModel):
         
     @property
     def items_count(self):
-        """تعداد آیتم‌های سفارش"""
+        """تعداد آیتم‌های سفارش (از خلاصه with_summary در صورت وجود)"""
+        if hasattr(self, 'items_total'):
+            return self.items_total
         return self.items.count()
 
     def __str__(self):
         return f"سفارش {self.id} - {self.customer.get_full_name() if self.customer else 'بدون مشتری'}"
 
     def save(self, *args, **kwargs):
-        # تعیین خودکار کسب‌وکار چاپ با توجه به نقش کاربری ایجادکننده (اگر خالی باشد)
-        if not self.business and hasattr(self, "_request_user"):
-            from business.models import BusinessUser
-            try:
-                self.business = BusinessUser.objects.get(user=self._request_user).business
-            except BusinessUser.DoesNotExist:
-                pass
+        # تعیین خودکار کسب‌وکار چاپ با موتور تخصیص و رزرو ظرفیت آن (اگر خالی باشد)
+        if self.business_id is None:
+            from django.db import transaction
+            from .assignment import assign
+            with transaction.atomic():
+                assign([self])
+                super().save(*args, **kwargs)
+            return
         super().save(*args, **kwargs)
 
     class Meta:
         verbose_name = _("سفارش")
         verbose_name_plural = _("سفارش‌ها")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+            models.Index(fields=['customer', 'created_at'], name='order_customer_created_idx'),
+            models.Index(fields=['business', 'created_at'], name='order_business_created_idx'),
+        ]
 
-class OrderSection(BaseModel):
+class OrderSection(FieldTrackerMixin, BaseModel):
     """مدل برای مدیریت بخش‌های انتخاب شده در سفارش"""
+    tracked_fields = ('design', 'location', 'quantity')
+
     order = models.ForeignKey(
         Order, on_delete=models.CASCADE,
         related_name='sections', verbose_name=_("سفارش")
@@ -209,12 +251,27 @@ class OrderSection(BaseModel):
         verbose_name=_("ارتفاع سفارشی (سانتی‌متر)")
     )
     special_instructions = models.TextField(blank=True, verbose_name=_("دستورات ویژه"))
+    cost = models.DecimalField(
+        max_digits=12, decimal_places=0, default=0, editable=False,
+        verbose_name=_("هزینه محاسبه‌شده (ریال)")
+    )
     
     def calculate_cost(self):
         """محاسبه هزینه این بخش"""
-        base_cost = self.design.price if hasattr(self.design, 'price') else 0
-        location_cost = self.location.calculate_print_cost(base_cost)
-        return location_cost * self.quantity
+        from .pricing import section_cost
+        return section_cost(self.design.price, self.location.price_modifier, self.quantity)
+
+    def save(self, *args, **kwargs):
+        # هزینه فقط برای بخش جدید یا تغییر طرح، محل چاپ یا تعداد دوباره محاسبه می‌شود
+        update_fields = kwargs.get('update_fields')
+        changed = self.changed_fields
+        if update_fields is not None:
+            changed &= set(update_fields)
+        if self._state.adding or changed:
+            self.cost = self.calculate_cost()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'cost'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.location.name} - {self.design.title} در سفارش {str(self.order.id)[:8]}"
@@ -360,8 +417,10 @@ class OrderDetail(models.Model):
         verbose_name = _("جزئیات سفارش")
         verbose_name_plural = _("جزئیات سفارش‌ها")
 
-class PrintProcess(models.Model):
+class PrintProcess(FieldTrackerMixin, models.Model):
     """مدل برای مدیریت مراحل چاپ سفارش"""
+    tracked_fields = ('status',)
+
     STAGE_CHOICES = [
         ('design', _('طراحی')),
         ('prepress', _('پیش‌چاپ')),
@@ -401,8 +460,10 @@ class PrintProcess(models.Model):
         stage_display = self.get_stage_display() if self.stage else 'بدون مرحله'
         return f"{stage_display} - {self.order if self.order else 'بدون سفارش'}"
 
-class OrderAssignment(models.Model):
+class OrderAssignment(FieldTrackerMixin, models.Model):
     """تکلیف سفارش به کسب‌وکارها"""
+    tracked_fields = ('status',)
+
     PROCESS_TYPE_CHOICES = (
         ('print', _('چاپ')),
         ('set', _('ست‌بندی')),
@@ -430,6 +491,14 @@ class OrderAssignment(models.Model):
     
     # یادداشت‌ها
     notes = models.TextField(blank=True, verbose_name=_("یادداشت‌ها"))
+    created_at = models.DateTimeField(default=timezone.now, verbose_name=_("تاریخ ایجاد"))
+    updated_at = models.DateTimeField(default=timezone.now, verbose_name=_("تاریخ بروزرسانی"))
+
+    def save(self, *args, **kwargs):
+        self.updated_at = timezone.now()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.get_process_type_display()} - {self.business.name}"
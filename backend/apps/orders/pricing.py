@@ -0,0 +1,122 @@
+"""
+قیمت‌گذاری تدریجی سفارش‌ها
+
+هزینه هر بخش سفارش (OrderSection.cost) هنگام ذخیره و فقط در صورت تغییر طرح، محل چاپ یا
+تعداد محاسبه و ذخیره می‌شود و هزینه هر آیتم در OrderItem.total_price نگهداری می‌شود.
+قیمت کل سفارش با یک کوئری تجمیعی روی این مقادیر ذخیره‌شده به دست می‌آید؛ بنابراین ذخیره
+سفارش دیگر بخش‌ها، طرح‌ها و محل‌های چاپ را یکی‌یکی بارگذاری نمی‌کند.
+
+با تغییر قیمت طرح یا ضریب قیمت محل چاپ، reprice (دستور reprice_orders) هزینه بخش‌های
+سفارش‌های باز مرتبط را به‌صورت دسته‌ای بازمحاسبه و قیمت کل همان سفارش‌ها را به‌روز می‌کند.
+چون این کار بدون save انجام می‌شود، سیگنال totals_repriced برای به‌روزرسانی داده‌های
+وابسته (مانند تجمیع‌های داشبورد) ارسال می‌شود.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+
+from .models import Order, OrderItem, OrderSection
+
+# وضعیت‌هایی که قیمت سفارش در آن‌ها هنوز قطعی نشده است
+OPEN_STATUSES = ('draft', 'pending', 'confirmed', 'set_design', 'ready_for_print', 'printing', 'in_progress')
+
+# ارسال پس از به‌روزرسانی دسته‌ای قیمت کل سفارش‌ها؛ آرگومان orders: سفارش‌های تغییرکرده
+totals_repriced = Signal()
+
+_ZERO = Value(Decimal(0), output_field=DecimalField(max_digits=14, decimal_places=0))
+
+
+def section_cost(design_price, price_modifier, quantity):
+    """هزینه یک بخش: قیمت طرح × ضریب محل چاپ × تعداد (گرد شده به ریال)"""
+    cost = Decimal(design_price or 0) * Decimal(price_modifier or 0) * (quantity or 0)
+    return cost.quantize(Decimal(1), rounding=ROUND_HALF_UP)
+
+
+def order_totals(order_ids):
+    """قیمت کل سفارش‌ها از هزینه‌های ذخیره‌شده بخش‌ها و آیتم‌ها با یک کوئری: {شناسه: مبلغ}"""
+    sections = OrderSection.objects.filter(order=OuterRef('pk')).order_by().values('order').annotate(
+        total=Sum('cost')
+    ).values('total')
+    items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order').annotate(
+        total=Sum('total_price')
+    ).values('total')
+    rows = Order.objects.filter(pk__in=order_ids).order_by().annotate(
+        priced_total=Coalesce(Subquery(sections), _ZERO) + Coalesce(Subquery(items), _ZERO)
+    ).values_list('pk', 'priced_total')
+    return {pk: Decimal(total or 0) for pk, total in rows}
+
+
+def update_order_total(order):
+    """
+    به‌روزرسانی قیمت کل یک سفارش (نمونه یا شناسه) در صورت تغییر
+
+    خروجی: قیمت کل یا None اگر سفارش وجود نداشته باشد
+    """
+    if not isinstance(order, Order):
+        order = Order.objects.filter(pk=order).first()
+        if order is None:
+            return None
+    total = order_totals([order.pk]).get(order.pk)
+    if total is None:
+        return None
+    if order.total_price != total:
+        order.total_price = total
+        order.save(update_fields=['total_price'])
+    return total
+
+
+def _chunks(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def update_totals(order_ids, chunk_size=500):
+    """به‌روزرسانی دسته‌ای قیمت کل سفارش‌ها؛ خروجی: تعداد سفارش‌های تغییرکرده"""
+    changed = []
+    for chunk in _chunks(order_ids, chunk_size):
+        totals = order_totals(chunk)
+        orders = [order for order in Order.objects.filter(pk__in=totals) if order.total_price != totals[order.pk]]
+        for order in orders:
+            order.total_price = totals[order.pk]
+        Order.objects.bulk_update(orders, ['total_price'], batch_size=chunk_size)
+        changed.extend(orders)
+    if changed:
+        totals_repriced.send(sender=Order, orders=changed)
+    return len(changed)
+
+
+def reprice(design_ids=None, location_ids=None, statuses=OPEN_STATUSES, chunk_size=500):
+    """
+    بازمحاسبه هزینه بخش‌های سفارش‌های باز مرتبط با طرح‌ها یا محل‌های چاپ داده‌شده
+
+    بدون design_ids و location_ids همه بخش‌های سفارش‌های باز بازمحاسبه می‌شوند.
+    خروجی: تعداد بخش‌ها و سفارش‌های تغییرکرده
+    """
+    sections = OrderSection.objects.filter(order__status__in=statuses)
+    if design_ids or location_ids:
+        sections = sections.filter(Q(design_id__in=design_ids or []) | Q(location_id__in=location_ids or []))
+    sections = sections.select_related('design', 'location').only(
+        'pk', 'order', 'design', 'location', 'quantity', 'cost', 'design__price', 'location__price_modifier'
+    ).order_by()
+
+    with transaction.atomic():
+        changed_sections, order_ids, batch = 0, set(), []
+        for section in sections.iterator(chunk_size=chunk_size):
+            cost = section_cost(section.design.price, section.location.price_modifier, section.quantity)
+            if cost != section.cost:
+                section.cost = cost
+                batch.append(section)
+                order_ids.add(section.order_id)
+            if len(batch) >= chunk_size:
+                OrderSection.objects.bulk_update(batch, ['cost'])
+                changed_sections += len(batch)
+                batch = []
+        if batch:
+            OrderSection.objects.bulk_update(batch, ['cost'])
+            changed_sections += len(batch)
+        changed_orders = update_totals(order_ids, chunk_size)
+    return {'sections': changed_sections, 'orders': changed_orders}
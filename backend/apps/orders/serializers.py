@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import Order, OrderItem, OrderSection, GarmentDetails, OrderStage
-from apps.core.utils import to_jalali
+from apps.core.serializers import JalaliDateTimeField, JalaliListSerializer
 from apps.designs.models import Design
 from apps.templates_app.models import UserTemplate
 from apps.designs.serializers import DesignSerializer, PrintLocationSerializer
@@ -8,6 +8,7 @@ from apps.templates_app.serializers import UserTemplateSerializer
 from apps.business.serializers import BusinessSerializer
 from django.utils.translation import gettext_lazy as _
 from django.db import transaction
+from django.conf import settings
 from apps.clothing.models import ClothingSection
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -16,21 +17,16 @@ class OrderItemSerializer(serializers.ModelSerializer):
     design_id = serializers.PrimaryKeyRelatedField(source='design', queryset=Design.objects.all(), required=False, allow_null=True, write_only=True)
     user_template = UserTemplateSerializer(read_only=True)
     user_template_id = serializers.PrimaryKeyRelatedField(source='user_template', queryset=UserTemplate.objects.all(), required=False, allow_null=True, write_only=True)
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
     section = serializers.PrimaryKeyRelatedField(queryset=ClothingSection.objects.all())
 
     class Meta:
         model = OrderItem
+        list_serializer_class = JalaliListSerializer
         fields = ['id', 'order', 'design', 'design_id', 'user_template', 'user_template_id', 'quantity', 'price', 'created_at', 'updated_at', 'section', 'rakeb_orientation']
         read_only_fields = ['price']
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
 class GarmentDetailsSerializer(serializers.ModelSerializer):
     """سریالایزر برای جزئیات لباس"""
     
@@ -61,7 +57,7 @@ class OrderSectionSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """اضافه کردن هزینه محاسبه شده"""
         data = super().to_representation(instance)
-        data['calculated_cost'] = instance.calculate_cost()
+        data['calculated_cost'] = instance.cost
         return data
 
     def validate(self, attrs):
@@ -113,12 +109,13 @@ class OrderSerializer(serializers.ModelSerializer):
     # Display fields
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     garment_size_display = serializers.CharField(source='get_garment_size_display', read_only=True)
-    print_type_display = serializers.CharField(source='get_print_type_display', read_only=True)
+    print_option_display = serializers.CharField(source='get_print_option_display', read_only=True)
     fabric_type_display = serializers.CharField(source='get_fabric_type_display', read_only=True)
     
     # Calculated fields
     total_sections_cost = serializers.SerializerMethodField()
     completion_percentage = serializers.SerializerMethodField()
+    items_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Order
@@ -126,13 +123,13 @@ class OrderSerializer(serializers.ModelSerializer):
             'id', 'customer', 'customer_name', 'business', 'business_name',
             # 'workshop', 'workshop_name', 
             'status', 'status_display',
-            'garment_size', 'garment_size_display', 'print_type', 'print_type_display',
+            'garment_size', 'garment_size_display', 'print_option', 'print_option_display',
             'custom_size_details', 'fabric_type', 'fabric_type_display',
             'fabric_color', 'fabric_material', 'fabric_weight', 'fabric_details',
             'total_price', 'deposit_amount', 'is_paid', 'delivery_date',
             'completed_at', 'customer_notes', 'internal_notes', 'notes',
             'items', 'sections', 'garment_details', 'stages',
-            'total_sections_cost', 'completion_percentage',
+            'total_sections_cost', 'completion_percentage', 'items_count',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
@@ -141,27 +138,28 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
 
     def get_total_sections_cost(self, obj):
-        """محاسبه مجموع هزینه بخش‌ها"""
-        return sum(section.calculate_cost() for section in obj.sections.all())
+        """مجموع هزینه بخش‌ها (از خلاصه with_summary یا بخش‌های prefetch شده)"""
+        if hasattr(obj, 'sections_cost'):
+            return obj.sections_cost
+        return sum(section.cost for section in obj.sections.all())
 
     def get_completion_percentage(self, obj):
-        """محاسبه درصد تکمیل سفارش"""
-        stages = obj.stages.all()
-        if not stages.exists():
+        """درصد تکمیل سفارش (از خلاصه with_summary یا مراحل prefetch شده)"""
+        if hasattr(obj, 'stages_total'):
+            total_stages, completed_stages = obj.stages_total, obj.stages_completed
+        else:
+            stages = obj.stages.all()
+            total_stages = len(stages)
+            completed_stages = sum(1 for stage in stages if stage.status == 'completed')
+        if not total_stages:
             return 0
-        
-        completed_stages = stages.filter(status='completed').count()
-        total_stages = stages.count()
         return round((completed_stages / total_stages) * 100, 2)
 
     @transaction.atomic
     def create(self, validated_data):
         """ایجاد سفارش با بخش‌ها و جزئیات"""
         items_data = validated_data.pop("items", [])
-        request = self.context.get("request")
         order = Order(**validated_data)
-        if request:
-            order._request_user = request.user
         order.save()
         for item in items_data:
             OrderItem.objects.create(order=order, **item)
@@ -238,4 +236,84 @@ class OrderSerializer(serializers.ModelSerializer):
             if attrs['delivery_date'] <= timezone.now().date():
                 raise serializers.ValidationError(_("تاریخ تحویل باید در آینده باشد"))
         
-        return attrs 
\ No newline at end of file
+        return attrs 
+
+class OrderImportSectionSerializer(serializers.Serializer):
+    """اعتبارسنجی بخش سفارش در ورود دسته‌ای (شناسه‌ها به‌صورت دسته‌ای بررسی می‌شوند)"""
+    design_id = serializers.IntegerField()
+    location_id = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+    is_inner_print = serializers.BooleanField(default=False)
+    custom_width_cm = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0, required=False, allow_null=True)
+    custom_height_cm = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0, required=False, allow_null=True)
+    special_instructions = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class OrderImportItemSerializer(serializers.Serializer):
+    """اعتبارسنجی آیتم سفارش در ورود دسته‌ای"""
+    design_id = serializers.IntegerField(required=False, allow_null=True)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+    unit_price = serializers.DecimalField(max_digits=12, decimal_places=0, min_value=0, required=False, allow_null=True)
+    color_count = serializers.IntegerField(min_value=1, default=1)
+    print_dimensions = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class OrderImportSerializer(serializers.Serializer):
+    """اعتبارسنجی یک سفارش در ورود دسته‌ای"""
+    ref = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    customer_id = serializers.IntegerField()
+    # خالی: تخصیص خودکار با موتور تخصیص (apps.orders.assignment)
+    business_id = serializers.IntegerField(required=False, allow_null=True, default=None)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, default='pending')
+    garment_size = serializers.ChoiceField(choices=Order.GARMENT_SIZE_CHOICES, required=False, allow_null=True)
+    fabric_type = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+    fabric_color = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+    fabric_material = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+    print_option = serializers.ChoiceField(choices=Order.PRINT_TYPE_CHOICES, default='manual')
+    deposit_amount = serializers.DecimalField(max_digits=12, decimal_places=0, min_value=0, default=0)
+    is_paid = serializers.BooleanField(default=False)
+    delivery_date = serializers.DateField(required=False, allow_null=True)
+    customer_notes = serializers.CharField(required=False, allow_blank=True, default='')
+    internal_notes = serializers.CharField(required=False, allow_blank=True, default='')
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    sections = OrderImportSectionSerializer(many=True, required=False, default=list)
+    items = OrderImportItemSerializer(many=True, required=False, default=list)
+
+    def validate_sections(self, value):
+        """هر ترکیب طرح و محل چاپ فقط یک بار در سفارش مجاز است"""
+        pairs = [(section['design_id'], section['location_id']) for section in value]
+        if len(pairs) != len(set(pairs)):
+            raise serializers.ValidationError(_("ترکیب طرح و محل چاپ تکراری است"))
+        return value
+
+
+class OrderTransitionSerializer(serializers.Serializer):
+    """یک انتقال در درخواست انتقال دسته‌ای"""
+    order = serializers.UUIDField()
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
+
+class OrderBulkTransitionSerializer(serializers.Serializer):
+    """
+    درخواست انتقال دسته‌ای وضعیت سفارش‌ها
+
+    یا transitions (لیست {"order", "status"}) یا orders همراه با status برای انتقال همه به یک وضعیت
+    """
+    transitions = OrderTransitionSerializer(many=True, required=False)
+    orders = serializers.ListField(child=serializers.UUIDField(), required=False)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+
+    def validate(self, attrs):
+        transitions = [(item['order'], item['status']) for item in attrs.get('transitions', [])]
+        if attrs.get('orders'):
+            if not attrs.get('status'):
+                raise serializers.ValidationError({'status': _("وضعیت مقصد سفارش‌ها الزامی است")})
+            transitions.extend((order_id, attrs['status']) for order_id in attrs['orders'])
+        if not transitions:
+            raise serializers.ValidationError(_("حداقل یک سفارش برای انتقال لازم است"))
+        max_orders = getattr(settings, 'ORDER_BULK_TRANSITION_MAX', 1000)
+        if len(transitions) > max_orders:
+            raise serializers.ValidationError(_("حداکثر %(count)s سفارش در هر درخواست مجاز است") % {'count': max_orders})
+        attrs['pairs'] = transitions
+        return attrs
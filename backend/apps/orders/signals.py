@@ -1,77 +1,119 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Order, OrderStage, OrderSection, OrderStatusHistory, OrderAssignment, PrintProcess
+from .models import Order, OrderItem, OrderStage, OrderSection, OrderStatusHistory, OrderAssignment, PrintProcess
+from . import pricing
+from .state_machine import STATUS_STAGES
 from apps.set_design.models import SetDesign
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+
+# ردیف‌های جانبی ایجاد سفارش و تغییر وضعیت؛ ورود دسته‌ای (bulk_import) و انتقال دسته‌ای
+# وضعیت (state_machine) همین ردیف‌ها را با bulk_create می‌سازند
+
+def build_initial_stage(order):
+    """مرحله اولیه سفارش جدید (ذخیره‌نشده)"""
+    return OrderStage(
+        order=order,
+        stage_type='order_received',
+        status='completed',
+        started_at=order.created_at,
+        finished_at=order.created_at,
+        notes="سفارش دریافت و ثبت شد"
+    )
+
+
+def build_assignment_stage(order):
+    """مرحله تخصیص سفارشی که کسب‌وکارش خودکار تعیین شده است (ذخیره‌نشده)"""
+    return OrderStage(
+        order=order,
+        stage_type='design_approval',
+        status='pending',
+        started_at=timezone.now(),
+        notes="سفارش به کسب‌وکار تخصیص داده شد"
+    )
+
+
+def build_initial_history(order):
+    """ردیف اول تاریخچه وضعیت سفارش جدید (ذخیره‌نشده)"""
+    return OrderStatusHistory(order=order, status=order.status, notes="ایجاد سفارش جدید")
+
+
+def status_stage_defaults(status, now):
+    """مقادیر مرحله‌ای که با رسیدن سفارش به وضعیت status ایجاد می‌شود"""
+    return {
+        'status': 'in_progress' if status != 'completed' else 'completed',
+        'started_at': now
+    }
+
+
+def build_status_history(order, previous_status):
+    """ردیف تاریخچه تغییر وضعیت سفارش از previous_status به وضعیت فعلی (ذخیره‌نشده)"""
+    previous_display = dict(Order.STATUS_CHOICES).get(previous_status, previous_status)
+    return OrderStatusHistory(
+        order=order,
+        status=order.status,
+        notes=f"تغییر وضعیت از {previous_display} به {order.get_status_display()}"
+    )
+
+
+def build_creation_notifications(order, business_owner_id=None):
+    """اطلاعیه‌های ثبت سفارش برای مشتری و مالک کسب‌وکار (ذخیره‌نشده)"""
+    from apps.notification.models import Notification
+
+    notifications = [Notification(
+        user_id=order.customer_id,
+        type='order',
+        title="ثبت سفارش جدید",
+        content=f"سفارش شما با شماره {str(order.id)[:8]} ثبت شد."
+    )]
+    if business_owner_id:
+        notifications.append(Notification(
+            user_id=business_owner_id,
+            type='order',
+            title="سفارش جدید",
+            content=f"سفارش جدید با شماره {str(order.id)[:8]} دریافت شد."
+        ))
+    return notifications
+
+
 @receiver(post_save, sender=Order)
 def create_initial_order_stage(sender, instance, created, **kwargs):
     """ایجاد مرحله اولیه پس از ایجاد سفارش"""
     if created:
-        OrderStage.objects.create(
-            order=instance,
-            stage_type='order_received',
-            status='completed',
-            started_at=instance.created_at,
-            finished_at=instance.created_at,
-            notes="سفارش دریافت و ثبت شد"
-        )
+        build_initial_stage(instance).save()
 
 @receiver(post_save, sender=Order)
 def auto_assign_business(sender, instance, created, **kwargs):
-    """تخصیص خودکار کسب‌وکار در صورت عدم تخصیص دستی"""
-    if created and not instance.business:
-        assigned = instance.auto_assign_business()
-        if assigned:
-            # ایجاد مرحله تخصیص
-            OrderStage.objects.create(
-                order=instance,
-                stage_type='design_approval',
-                status='pending',
-                started_at=timezone.now(),
-                notes="سفارش به کسب‌وکار تخصیص داده شد"
-            )
+    """ایجاد مرحله تخصیص برای سفارشی که کسب‌وکارش با موتور تخصیص (apps.orders.assignment) تعیین شده است"""
+    if created and getattr(instance, '_auto_assigned', False):
+        build_assignment_stage(instance).save()
 
 @receiver(post_save, sender=Order)
-def handle_status_change(sender, instance, **kwargs):
+def handle_status_change(sender, instance, created, **kwargs):
     """مدیریت تغییرات وضعیت سفارش"""
-    if instance.pk:
-        try:
-            old_instance = Order.objects.get(pk=instance.pk)
-            if old_instance.status != instance.status:
-                # ایجاد یا به‌روزرسانی مرحله مربوطه
-                stage_mapping = {
-                    'confirmed': 'design_approval',
-                    'set_design': 'set_design',
-                    'printing': 'printing',
-                    'completed': 'delivered',
-                }
-                
-                stage_type = stage_mapping.get(instance.status)
-                if stage_type:
-                    stage, created = OrderStage.objects.get_or_create(
-                        order=instance,
-                        stage_type=stage_type,
-                        defaults={
-                            'status': 'in_progress' if instance.status != 'completed' else 'completed',
-                            'started_at': timezone.now()
-                        }
-                    )
-                    
-                    if not created and instance.status == 'completed':
-                        stage.status = 'completed'
-                        stage.finished_at = timezone.now()
-                        stage.save(update_fields=['status', 'finished_at'])
-                        
-                        # تنظیم زمان تکمیل سفارش
-                        instance.completed_at = timezone.now()
-                        instance.save(update_fields=['completed_at'])
-        
-        except Order.DoesNotExist:
-            pass
+    if created or not instance.has_changed('status'):
+        return
+
+    # ایجاد یا به‌روزرسانی مرحله مربوطه
+    stage_type = STATUS_STAGES.get(instance.status)
+    if stage_type:
+        stage, created = OrderStage.objects.get_or_create(
+            order=instance,
+            stage_type=stage_type,
+            defaults=status_stage_defaults(instance.status, timezone.now())
+        )
+
+        if not created and instance.status == 'completed':
+            stage.status = 'completed'
+            stage.finished_at = timezone.now()
+            stage.save(update_fields=['status', 'finished_at', 'updated_at'])
+
+            # تنظیم زمان تکمیل سفارش
+            instance.completed_at = timezone.now()
+            instance.save(update_fields=['completed_at'])
 
 @receiver(post_save, sender=OrderSection)
 def create_set_design_for_section(sender, instance, created, **kwargs):
@@ -88,7 +130,7 @@ def create_set_design_for_section(sender, instance, created, **kwargs):
                 design=instance.design,
                 defaults={
                     'quantity': instance.quantity,
-                    'unit_price': instance.calculate_cost()
+                    'unit_price': instance.cost
                 }
             )
             
@@ -114,7 +156,7 @@ def handle_set_design_completion(sender, instance, **kwargs):
         if all_set_designs.filter(status='completed').count() == all_set_designs.count():
             # تمام ست‌بندی‌ها تکمیل شده‌اند
             if order.status == 'set_design':
-                order.status = 'printing_prep'
+                order.status = 'ready_for_print'
                 order.save(update_fields=['status'])
                 
                 # ایجاد مرحله آماده‌سازی چاپ
@@ -127,47 +169,40 @@ def handle_set_design_completion(sender, instance, **kwargs):
                 )
 
 @receiver(pre_save, sender=Order)
-def calculate_total_price_on_save(sender, instance, **kwargs):
-    """محاسبه قیمت کل سفارش"""
-    if instance.pk:
-        # محاسبه قیمت کل از بخش‌ها
-        sections_total = sum(
-            section.calculate_cost() 
-            for section in instance.sections.all()
-        )
-        
-        # محاسبه قیمت کل از آیتم‌ها
-        items_total = sum(
-            item.quantity * (item.unit_price or 0)
-            for item in instance.items.all()
-        )
-        
-        instance.total_price = sections_total + items_total
+def calculate_total_price_on_save(sender, instance, update_fields=None, **kwargs):
+    """محاسبه قیمت کل سفارش از هزینه‌های ذخیره‌شده بخش‌ها و آیتم‌ها با یک کوئری"""
+    if instance._state.adding:
+        # سفارش جدید هنوز بخش یا آیتمی ندارد
+        if instance.total_price is None:
+            instance.total_price = 0
+    elif update_fields is None:
+        instance.total_price = pricing.order_totals([instance.pk]).get(instance.pk, instance.total_price)
+
+@receiver(post_save, sender=OrderSection)
+@receiver(post_delete, sender=OrderSection)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def update_order_total_price(sender, instance, origin=None, **kwargs):
+    """به‌روزرسانی قیمت کل سفارش پس از تغییر هزینه یک بخش یا آیتم"""
+    if instance.order_id is None or isinstance(origin, Order):
+        # حذف آبشاری همراه خود سفارش
+        return
+    if isinstance(instance, OrderSection) and not kwargs.get('created', True) and not instance.changed_fields:
+        # طرح، محل چاپ و تعداد بخش تغییر نکرده است
+        return
+    order = instance.order if sender.order.is_cached(instance) else instance.order_id
+    pricing.update_order_total(order)
 
 # سیگنال برای اطلاع‌رسانی تغییرات مهم
 @receiver(post_save, sender=Order)
 def send_order_notifications(sender, instance, created, **kwargs):
     """ارسال اطلاعیه‌های مربوط به سفارش"""
     try:
-        from apps.notification.models import Notification
-        
         if created:
-            # اطلاعیه ایجاد سفارش به مشتری
-            Notification.objects.create(
-                user=instance.customer,
-                type='order',
-                title="ثبت سفارش جدید",
-                content=f"سفارش شما با شماره {str(instance.id)[:8]} ثبت شد."
-            )
-            
-            # اطلاعیه به مالک کسب‌وکار (در صورت وجود)
-            if instance.business:
-                Notification.objects.create(
-                    user=instance.business.owner,
-                    type='order',
-                    title="سفارش جدید",
-                    content=f"سفارش جدید با شماره {str(instance.id)[:8]} دریافت شد."
-                )
+            # اطلاعیه ایجاد سفارش به مشتری و مالک کسب‌وکار (در صورت وجود)
+            owner_id = instance.business.owner_id if instance.business else None
+            for notification in build_creation_notifications(instance, owner_id):
+                notification.save()
     
     except ImportError:
         # مدل Notification وجود ندارد
@@ -177,56 +212,34 @@ def send_order_notifications(sender, instance, created, **kwargs):
 def create_order_status_history(sender, instance, created, **kwargs):
     """ثبت تاریخچه تغییرات وضعیت سفارش"""
     if created:
-        OrderStatusHistory.objects.create(
-            order=instance,
-            status=instance.status,
-            notes="ایجاد سفارش جدید"
-        )
-    else:
-        # بررسی تغییر وضعیت
-        old_instance = Order.objects.get(pk=instance.pk)
-        if old_instance.status != instance.status:
-            OrderStatusHistory.objects.create(
-                order=instance,
-                status=instance.status,
-                notes=f"تغییر وضعیت از {old_instance.get_status_display()} به {instance.get_status_display()}"
-            )
+        build_initial_history(instance).save()
+    elif instance.has_changed('status'):
+        build_status_history(instance, instance.previous('status')).save()
 
 @receiver(post_save, sender=OrderAssignment)
 def handle_order_assignment_status(sender, instance, created, **kwargs):
     """مدیریت تغییرات وضعیت تکلیف سفارش"""
-    if not created:
-        old_instance = OrderAssignment.objects.get(pk=instance.pk)
-        if old_instance.status != instance.status:
-            # بررسی تکمیل همه تکلیف‌ها
-            if instance.status == 'completed':
-                all_assignments = OrderAssignment.objects.filter(order=instance.order)
-                all_completed = all_assignments.exclude(status='completed').exists()
-                
-                if not all_completed:
-                    # به‌روزرسانی وضعیت سفارش
-                    instance.order.status = 'completed'
-                    instance.order.actual_delivery_date = timezone.now().date()
-                    instance.order.save()
+    if not created and instance.has_changed('status') and instance.status == 'completed':
+        # بررسی تکمیل همه تکلیف‌ها
+        has_pending = OrderAssignment.objects.filter(order_id=instance.order_id).exclude(status='completed').exists()
+
+        if not has_pending:
+            # به‌روزرسانی وضعیت سفارش
+            instance.order.status = 'completed'
+            instance.order.actual_delivery_date = timezone.now().date()
+            instance.order.save()
 
 @receiver(post_save, sender=PrintProcess)
 def handle_print_process_status(sender, instance, created, **kwargs):
     """مدیریت تغییرات وضعیت فرآیند چاپ"""
-    if not created:
-        old_instance = PrintProcess.objects.get(pk=instance.pk)
-        if old_instance.status != instance.status:
-            if instance.status == 'completed':
-                instance.completed_at = timezone.now()
-                instance.save()
-                
-                # بررسی تکمیل همه فرآیندهای چاپ
-                all_processes = PrintProcess.objects.filter(order_item=instance.order_item)
-                all_completed = all_processes.exclude(status='completed').exists()
-                
-                if not all_completed:
-                    # به‌روزرسانی وضعیت آیتم سفارش
-                    instance.order_item.order_detail.order.status = 'in_progress'
-                    instance.order_item.order_detail.order.save()
+    if not created and instance.has_changed('status') and instance.status == 'completed' and instance.order_id:
+        # بررسی تکمیل همه فرآیندهای چاپ سفارش
+        has_pending = PrintProcess.objects.filter(order_id=instance.order_id).exclude(status='completed').exists()
+
+        if not has_pending:
+            # به‌روزرسانی وضعیت سفارش
+            instance.order.status = 'in_progress'
+            instance.order.save()
 
 @receiver(post_save, sender=OrderAssignment)
 def notify_assigned_user(sender, instance, created, **kwargs):
@@ -0,0 +1,158 @@
+"""
+ماشین حالت وضعیت سفارش
+
+انتقال‌های مجاز وضعیت سفارش فقط در TRANSITIONS تعریف می‌شوند و اکشن‌های تکی (confirm،
+start_set_design) و انتقال دسته‌ای هر دو از همین جدول استفاده می‌کنند.
+
+transition_orders چند سفارش را بدون save تکی جابه‌جا می‌کند: وضعیت فعلی سفارش‌ها با یک
+کوئری خوانده می‌شود، انتقال‌های نامعتبر رد و گزارش می‌شوند و برای هر وضعیت مقصد یک UPDATE
+اجرا می‌شود. ردیف‌های جانبی تغییر وضعیت (تاریخچه، مرحله و اطلاعیه مشتری، همان ردیف‌های
+سیگنال‌های apps.orders.signals و apps.notification.signals) با bulk_create نوشته می‌شوند و
+سپس سیگنال orders_transitioned برای به‌روزرسانی داده‌های وابسته (تجمیع‌های داشبورد و کش)
+ارسال می‌شود.
+
+تنظیمات:
+    ORDER_BULK_TRANSITION_MAX: حداکثر تعداد سفارش‌های یک درخواست انتقال دسته‌ای (پیش‌فرض ۱۰۰۰)
+"""
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Order, OrderStage, OrderStatusHistory
+
+# وضعیت‌های مقصد مجاز از هر وضعیت
+TRANSITIONS = {
+    'draft': ('pending', 'confirmed', 'cancelled'),
+    'pending': ('confirmed', 'cancelled'),
+    'confirmed': ('set_design', 'ready_for_print', 'in_progress', 'cancelled'),
+    'set_design': ('ready_for_print', 'cancelled'),
+    'ready_for_print': ('printing', 'cancelled'),
+    'printing': ('in_progress', 'completed'),
+    'in_progress': ('printing', 'completed', 'cancelled'),
+    'completed': ('returned',),
+    'cancelled': (),
+    'returned': (),
+}
+
+# مرحله‌ای که با رسیدن سفارش به هر وضعیت ایجاد (یا در وضعیت completed تکمیل) می‌شود
+STATUS_STAGES = {
+    'confirmed': 'design_approval',
+    'set_design': 'set_design',
+    'printing': 'printing',
+    'completed': 'delivered',
+}
+
+# ارسال پس از انتقال دسته‌ای؛ آرگومان‌ها: orders (سفارش‌های جابه‌جاشده) و user_ids (گیرندگان اطلاعیه)
+orders_transitioned = Signal()
+
+
+class TransitionError(ValueError):
+    """انتقال وضعیت سفارش مجاز نیست"""
+
+
+def status_display(status):
+    return dict(Order.STATUS_CHOICES).get(status, status)
+
+
+def can_transition(source, target):
+    return target in TRANSITIONS.get(source, ())
+
+
+def sources_for(target):
+    """وضعیت‌هایی که انتقال از آن‌ها به target مجاز است"""
+    return tuple(source for source, targets in TRANSITIONS.items() if target in targets)
+
+
+def check_transition(source, target):
+    if target not in TRANSITIONS:
+        raise TransitionError(f'وضعیت {target} نامعتبر است')
+    if not can_transition(source, target):
+        raise TransitionError(f'انتقال از {status_display(source)} به {status_display(target)} مجاز نیست')
+
+
+def transition(order, target):
+    """انتقال یک سفارش با save (سیگنال‌های تغییر وضعیت اجرا می‌شوند)"""
+    check_transition(order.status, target)
+    order.status = target
+    order.save(update_fields=['status'])
+    return order
+
+
+def transition_orders(transitions, queryset=None):
+    """
+    انتقال دسته‌ای وضعیت سفارش‌ها
+
+    transitions: لیست (شناسه سفارش، وضعیت مقصد)؛ queryset: سفارش‌های قابل دسترسی (پیش‌فرض همه)
+    خروجی: {'updated': تعداد، 'order_ids': شناسه‌های جابه‌جاشده، 'rejected': [{'order', 'status', 'error'}]}
+    """
+    from apps.notification.models import Notification
+    from apps.notification.signals import build_order_status_notification
+    from .signals import build_status_history, status_stage_defaults
+
+    queryset = Order.objects.all() if queryset is None else queryset
+    targets, rejected = {}, []
+    for order_id, target in transitions:
+        if order_id in targets:
+            rejected.append({'order': str(order_id), 'status': target, 'error': 'سفارش تکراری است'})
+        else:
+            targets[order_id] = target
+
+    now = timezone.now()
+    with transaction.atomic():
+        orders = {order.pk: order for order in queryset.filter(pk__in=targets).select_for_update()}
+        by_target = {}
+        for order_id, target in targets.items():
+            order = orders.get(order_id)
+            try:
+                if order is None:
+                    raise TransitionError('سفارش یافت نشد')
+                check_transition(order.status, target)
+            except TransitionError as e:
+                rejected.append({'order': str(order_id), 'status': target, 'error': str(e)})
+                continue
+            by_target.setdefault(target, []).append(order)
+
+        moved, histories, notifications, new_stages = [], [], [], []
+        for target, target_orders in by_target.items():
+            fields = {'status': target, 'updated_at': now}
+            if target == 'completed':
+                fields['completed_at'] = now
+            order_ids = [order.pk for order in target_orders]
+            Order.objects.filter(pk__in=order_ids, status__in=sources_for(target)).update(**fields)
+
+            stage_type = STATUS_STAGES.get(target)
+            existing = set()
+            if stage_type:
+                existing = set(OrderStage.objects.filter(
+                    order_id__in=order_ids, stage_type=stage_type
+                ).values_list('order_id', flat=True))
+                if target == 'completed' and existing:
+                    OrderStage.objects.filter(order_id__in=existing, stage_type=stage_type).update(
+                        status='completed', finished_at=now, updated_at=now
+                    )
+
+            for order in target_orders:
+                previous = order.status
+                for field, value in fields.items():
+                    setattr(order, field, value)
+                histories.append(build_status_history(order, previous))
+                notifications.append(build_order_status_notification(order))
+                if stage_type and order.pk not in existing:
+                    new_stages.append(OrderStage(
+                        order=order, stage_type=stage_type, **status_stage_defaults(target, now)
+                    ))
+                moved.append(order)
+
+        OrderStatusHistory.objects.bulk_create(histories)
+        OrderStage.objects.bulk_create(new_stages)
+        Notification.objects.bulk_create(notifications)
+
+    if moved:
+        orders_transitioned.send(
+            sender=Order, orders=moved, user_ids={order.customer_id for order in moved}
+        )
+    return {
+        'updated': len(moved),
+        'order_ids': [str(order.pk) for order in moved],
+        'rejected': rejected,
+    }
@@ -1,12 +1,17 @@
 from django.test import TestCase
 from django.urls import reverse
-from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 from rest_framework import status
 from .models import Order, OrderItem
+from .views import OrderViewSet
 from apps.designs.models import Design
 from apps.templates_app.models import UserTemplate
 import uuid
 
+User = get_user_model()
+
 class OrderModelTest(TestCase):
     """تست‌های مدل سفارش"""
     
@@ -187,3 +192,598 @@ class OrderAPITest(TestCase):
         self.order.refresh_from_db()
         new_price = 2000 + (3 * 1000)  # قیمت آیتم قبلی + (تعداد * قیمت طرح)
         self.assertEqual(self.order.total_price, new_price)
+
+
+class OrderReportingTest(TestCase):
+    """تست‌های خروجی فایل و آمار سفارش‌ها"""
+
+    def setUp(self):
+        from apps.business.models import Business
+        self.user = User.objects.create_user(username='export_user', password='testpassword123')
+        other = User.objects.create_user(username='other_user', password='testpassword123')
+        self.business = Business.objects.create(name='کسب‌وکار خروجی', owner=self.user)
+        pending = Order.objects.create(customer=self.user, business=self.business, status='pending')
+        Order.objects.filter(pk=pending.pk).update(total_price=1000)
+        Order.objects.create(customer=self.user, business=self.business, status='completed')
+        other_business = Business.objects.create(name='کسب‌وکار دیگر', owner=other)
+        Order.objects.create(customer=other, business=other_business, status='pending')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_export_uses_list_filters(self):
+        """خروجی فقط سفارش‌های قابل مشاهده و فیلترشده کاربر را شامل می‌شود"""
+        response = self.client.get('/api/orders/orders/export/', {'status': 'pending'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('export_user', lines[1])
+        self.assertIn('1000', lines[1])
+
+    def test_export_rejects_unknown_format(self):
+        """قالب خروجی نامعتبر خطای ۴۰۰ برمی‌گرداند"""
+        response = self.client.get('/api/orders/orders/export/', {'file_format': 'pdf'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_dashboard_stats_single_query(self):
+        """آمار داشبورد سفارش‌ها با یک کوئری تجمیعی محاسبه می‌شود"""
+        cache.clear()
+        Order.objects.filter(status='completed').update(is_paid=True, total_price=2000)
+        request = APIRequestFactory().get('/api/orders/orders/dashboard_stats/')
+        force_authenticate(request, self.user)
+        # کوئری دامنه کش + کوئری تجمیع (بدون کوئری‌های middleware)
+        with self.assertNumQueries(2):
+            response = OrderViewSet.as_view({'get': 'dashboard_stats'})(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_orders'], 2)
+        self.assertEqual(response.data['pending_orders'], 1)
+        self.assertEqual(response.data['completed_orders'], 1)
+        self.assertEqual(response.data['total_revenue'], 2000)
+        self.assertEqual(response.data['orders_by_status'], {'pending': 1, 'completed': 1})
+
+
+
+class OrderStatusTrackingTest(TestCase):
+    """تست‌های ردیابی تغییر وضعیت بدون خواندن دوباره سفارش"""
+
+    def setUp(self):
+        from apps.business.models import Business
+        self.user = User.objects.create_user(username='tracking_user', email='tracking@example.com', password='testpassword123')
+        self.business = Business.objects.create(name='کسب‌وکار ردیابی', owner=self.user)
+        self.order = Order.objects.create(customer=self.user, business=self.business, status='pending')
+
+    def test_status_change_without_refetch(self):
+        """تغییر وضعیت سفارش تاریخچه و اطلاعیه می‌سازد و ردیف سفارش دوباره خوانده نمی‌شود"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.notification.models import Notification
+        from .models import OrderStatusHistory
+
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = 'confirmed'
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+        order_selects = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and '"orders_order"."status"' in query['sql']
+        ]
+        self.assertEqual(order_selects, [])
+
+        history = OrderStatusHistory.objects.filter(order=order).order_by('-created_at', '-id')
+        self.assertEqual(history.count(), 2)
+        self.assertIn('در انتظار تأیید', history.first().notes)
+        self.assertTrue(Notification.objects.filter(user=self.user, type='order_status').exists())
+        self.assertFalse(order.has_changed('status'))
+        self.assertEqual(order.previous('status'), 'confirmed')
+
+    def test_unchanged_and_nested_saves(self):
+        """ذخیره بدون تغییر وضعیت و save تودرتو در سیگنال‌ها تاریخچه تکراری نمی‌سازد"""
+        from .models import OrderStage, OrderStatusHistory
+
+        order = Order.objects.get(pk=self.order.pk)
+        order.notes = 'بدون تغییر وضعیت'
+        order.save()
+        self.assertEqual(OrderStatusHistory.objects.filter(order=order).count(), 1)
+
+        OrderStage.objects.create(order=order, stage_type='delivered', status='in_progress')
+        order.status = 'completed'
+        self.assertTrue(order.has_changed('status'))
+        order.save()
+        self.assertEqual(OrderStatusHistory.objects.filter(order=order).count(), 2)
+        self.assertIsNotNone(Order.objects.get(pk=order.pk).completed_at)
+        self.assertEqual(OrderStage.objects.get(order=order, stage_type='delivered').status, 'completed')
+
+    def test_pre_save_assigned_field_is_tracked(self):
+        """قیمت کل محاسبه‌شده در pre_save در post_save تغییر دیده می‌شود و مبنای بعدی است"""
+        from django.db.models.signals import post_save
+
+        order = Order.objects.get(pk=self.order.pk)
+        OrderItem.objects.bulk_create([OrderItem(order=order, quantity=1, unit_price=1000, total_price=1000)])
+        seen = []
+
+        def record(sender, instance, **kwargs):
+            seen.append((instance.has_changed('total_price'), instance.previous('total_price')))
+
+        post_save.connect(record, sender=Order)
+        try:
+            order.save()
+        finally:
+            post_save.disconnect(record, sender=Order)
+        self.assertEqual(order.total_price, 1000)
+        self.assertEqual(seen[0], (True, 0))
+        self.assertFalse(order.has_changed('total_price'))
+
+
+class OrderPricingTest(TestCase):
+    """تست‌های قیمت‌گذاری تدریجی سفارش"""
+
+    def setUp(self):
+        from apps.business.models import Business
+        from apps.designs.models import PrintLocation
+        self.user = User.objects.create_user(username='pricing_user', email='pricing@example.com', password='testpassword123')
+        self.business = Business.objects.create(name='کسب‌وکار قیمت', owner=self.user)
+        self.design = Design.objects.create(title='طرح قیمت', designer=self.user, price=1000)
+        self.front = PrintLocation.objects.create(code='front-p', name='جلو', location_type='front', price_modifier='1.50')
+        self.back = PrintLocation.objects.create(code='back-p', name='پشت', location_type='back', price_modifier='2.00')
+        self.order = Order.objects.create(customer=self.user, business=self.business, status='pending')
+
+    def test_section_and_item_costs_update_total(self):
+        """هزینه بخش‌ها و آیتم‌ها ذخیره و قیمت کل بدون بارگذاری تک‌تک بخش‌ها محاسبه می‌شود"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import OrderSection
+
+        section = OrderSection.objects.create(order=self.order, design=self.design, location=self.front, quantity=2)
+        OrderSection.objects.create(order=self.order, design=self.design, location=self.back, quantity=1)
+        OrderItem.objects.create(order=self.order, quantity=3, unit_price=100)
+        self.assertEqual(section.cost, 3000)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).total_price, 3000 + 2000 + 300)
+
+        section.quantity = 1
+        section.save()
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual(order.total_price, 1500 + 2000 + 300)
+
+        # ذخیره سفارش فقط یک کوئری تجمیعی برای قیمت کل اجرا می‌کند
+        order.notes = 'بدون تغییر قیمت'
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+        section_reads = [query['sql'] for query in queries if 'FROM "designs_' in query['sql']]
+        self.assertEqual(section_reads, [])
+        self.assertEqual(order.total_price, 3800)
+
+    def test_reprice_command_updates_open_orders(self):
+        """تغییر قیمت طرح با دستور reprice_orders فقط روی سفارش‌های باز اعمال می‌شود"""
+        from django.core.management import call_command
+        from io import StringIO
+        from .models import OrderSection
+
+        OrderSection.objects.create(order=self.order, design=self.design, location=self.front, quantity=1)
+        closed = Order.objects.create(customer=self.user, business=self.business, status='completed')
+        OrderSection.objects.create(order=closed, design=self.design, location=self.front, quantity=1)
+
+        type(self.design).objects.filter(pk=self.design.pk).update(price=2000)
+        out = StringIO()
+        call_command('reprice_orders', '--design', str(self.design.pk), stdout=out)
+
+        self.assertIn('1 بخش و 1 سفارش', out.getvalue())
+        self.assertEqual(Order.objects.get(pk=self.order.pk).total_price, 3000)
+        self.assertEqual(Order.objects.get(pk=closed.pk).total_price, 1500)
+
+
+class OrderBulkImportTest(TestCase):
+    """تست‌های ورود دسته‌ای سفارش‌ها"""
+
+    def setUp(self):
+        from apps.business.models import Business
+        from apps.designs.models import PrintLocation
+        self.admin = User.objects.create_superuser(username='import_admin', email='import@example.com', password='testpassword123')
+        self.customer = User.objects.create_user(username='import_customer', email='customer@example.com', password='testpassword123')
+        self.business = Business.objects.create(name='کسب‌وکار ورود', owner=self.admin)
+        self.design = Design.objects.create(title='طرح ورود', designer=self.admin, price=1000)
+        self.location = PrintLocation.objects.create(code='front-i', name='جلو', location_type='front', price_modifier='1.50')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _order(self, **overrides):
+        data = {
+            'customer_id': self.customer.pk, 'business_id': self.business.pk, 'status': 'pending',
+            'sections': [{'design_id': self.design.pk, 'location_id': str(self.location.pk), 'quantity': 2}],
+            'items': [{'design_id': self.design.pk, 'quantity': 3}],
+        }
+        data.update(overrides)
+        return data
+
+    def test_import_creates_orders_and_side_effects_in_batches(self):
+        """سفارش‌ها، بخش‌ها، آیتم‌ها، مراحل، تاریخچه و اطلاعیه‌ها با تعداد ثابت کوئری ایجاد می‌شوند"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.notification.models import Notification
+        from .bulk_import import import_orders
+        from .models import OrderSection, OrderStage, OrderStatusHistory
+
+        with CaptureQueriesContext(connection) as small:
+            import_orders([self._order()])
+        with CaptureQueriesContext(connection) as large:
+            result = import_orders([self._order() for _ in range(20)], batch_size=50)
+        self.assertEqual(result['created'], 20)
+        self.assertEqual(len(large), len(small))
+
+        order = Order.objects.get(pk=result['order_ids'][0])
+        self.assertEqual(order.total_price, 3000 + 3000)
+        self.assertEqual(OrderSection.objects.get(order=order).cost, 3000)
+        self.assertEqual(OrderItem.objects.get(order=order).unit_price, 1000)
+        self.assertTrue(OrderStage.objects.filter(order=order, stage_type='order_received').exists())
+        self.assertEqual(OrderStatusHistory.objects.filter(order=order).count(), 1)
+        self.assertEqual(Notification.objects.filter(type='order').count(), 21 * 2)
+
+    def test_import_endpoint_reports_row_errors(self):
+        """خطای هر سفارش گزارش می‌شود و بدون partial هیچ سفارشی ثبت نمی‌شود"""
+        payload = {'orders': [self._order(), self._order(customer_id=999999), self._order(status='unknown')]}
+        response = self.client.post('/api/orders/orders/import/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3])
+        self.assertIn('customer_id', response.data['errors'][0]['errors'])
+        self.assertEqual(Order.objects.count(), 0)
+
+        payload['partial'] = True
+        response = self.client.post('/api/orders/orders/import/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+
+    def test_import_csv_groups_lines_by_ref(self):
+        """خطوط CSV با ref یکسان یک سفارش با چند بخش و آیتم می‌سازند"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from apps.designs.models import PrintLocation
+        back = PrintLocation.objects.create(code='back-i', name='پشت', location_type='back', price_modifier='1.00')
+        content = (
+            'ref,customer_id,business_id,section_design_id,section_location_id,item_quantity,item_unit_price\n'
+            f'A,{self.customer.pk},{self.business.pk},{self.design.pk},{self.location.pk},2,500\n'
+            f'A,,,{self.design.pk},{back.pk},,\n'
+        )
+        upload = SimpleUploadedFile('orders.csv', content.encode('utf-8'), content_type='text/csv')
+        response = self.client.post('/api/orders/orders/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        order = Order.objects.get(pk=response.data['order_ids'][0])
+        self.assertEqual(order.sections.count(), 2)
+        self.assertEqual(order.total_price, 1500 + 1000 + 1000)
+
+
+class OrderListingTest(TestCase):
+    """تست‌های صفحه‌بندی keyset و فیلتر دسترسی لیست سفارش‌ها"""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.business.models import Business, BusinessUser
+        self.owner = User.objects.create_user(username='list_owner', email='owner@example.com', password='testpassword123')
+        self.customer = User.objects.create_user(username='list_customer', email='customer@example.com', password='testpassword123')
+        self.member = User.objects.create_user(username='list_member', email='member@example.com', password='testpassword123')
+        self.outsider = User.objects.create_user(username='list_outsider', email='outsider@example.com', password='testpassword123')
+        self.business = Business.objects.create(name='کسب‌وکار لیست', owner=self.owner)
+        other_business = Business.objects.create(name='کسب‌وکار دیگر', owner=self.outsider)
+        BusinessUser.objects.create(business=self.business, user=self.member)
+        BusinessUser.objects.create(business=other_business, user=self.member, role='manager')
+
+        orders = [Order.objects.create(customer=self.customer, business=self.business) for _ in range(7)]
+        Order.objects.create(customer=self.outsider, business=other_business)
+        # چند سفارش با زمان ایجاد یکسان برای بررسی ترتیب بر اساس id
+        base = timezone.now() - timedelta(days=1)
+        for index, order in enumerate(orders):
+            Order.objects.filter(pk=order.pk).update(created_at=base + timedelta(minutes=index // 3))
+        self.client = APIClient()
+
+    def _walk(self, user, page_size=3):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.client.force_authenticate(user=user)
+        url, ids, query_counts = f'/api/orders/orders/?page_size={page_size}', [], []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row['id'] for row in response.data['results'])
+            query_counts.append(len(queries))
+            url = response.data['next']
+        return ids, query_counts
+
+    def test_cursor_walks_all_orders_with_constant_queries(self):
+        """همه سفارش‌ها بدون تکرار و به ترتیب (created_at, id) نزولی و با تعداد کوئری ثابت خوانده می‌شوند"""
+        ids, query_counts = self._walk(self.customer)
+        expected = [str(pk) for pk in Order.objects.filter(customer=self.customer).order_by('-created_at', '-pk').values_list('pk', flat=True)]
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(query_counts), 3)
+        # صفحه آخر ناقص است و تعداد کوئری‌های prefetch به تعداد ردیف‌ها وابسته نیست
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_business_member_sees_business_orders_once(self):
+        """عضو چند کسب‌وکار سفارش‌ها را یک بار و کاربر بی‌ارتباط سفارش‌های خود را می‌بیند"""
+        ids, _ = self._walk(self.member)
+        self.assertEqual(len(ids), 8)
+        self.assertEqual(len(set(ids)), 8)
+
+        self.client.force_authenticate(user=self.owner)
+        self.assertEqual(len(self.client.get('/api/orders/orders/?page_size=100').data['results']), 7)
+        self.client.force_authenticate(user=self.outsider)
+        self.assertEqual(len(self.client.get('/api/orders/orders/?page_size=100').data['results']), 1)
+
+    def test_invalid_cursor_returns_not_found(self):
+        self.client.force_authenticate(user=self.customer)
+        response = self.client.get('/api/orders/orders/?cursor=invalid')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class OrderSerializerSummaryTest(TestCase):
+    """تست‌های خلاصه سفارش در لیست بدون کوئری به ازای هر سفارش"""
+
+    def setUp(self):
+        from apps.business.models import Business
+        from .models import OrderStage
+        self.admin = User.objects.create_superuser(username='summary_admin', email='summary@example.com', password='testpassword123')
+        self.business = Business.objects.create(name='کسب‌وکار خلاصه', owner=self.admin)
+        self.order = self._create_order()
+        OrderStage.objects.filter(order=self.order).update(status='completed')
+        OrderStage.objects.create(order=self.order, stage_type='printing')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _create_order(self):
+        order = Order.objects.create(customer=self.admin, business=self.business)
+        OrderItem.objects.create(order=order, quantity=3, unit_price=500)
+        return order
+
+    def test_with_summary_annotations(self):
+        """خلاصه مراحل، هزینه بخش‌ها و آیتم‌ها با یک کوئری محاسبه می‌شود"""
+        from apps.designs.models import PrintLocation
+        from .models import OrderSection
+        design = Design.objects.create(title='طرح خلاصه', designer=self.admin, price=1000)
+        location = PrintLocation.objects.create(code='front-s', name='جلو', location_type='front', price_modifier='1.00')
+        OrderSection.objects.create(order=self.order, design=design, location=location, quantity=2)
+        with self.assertNumQueries(1):
+            order = Order.objects.with_summary().get(pk=self.order.pk)
+            self.assertEqual((order.stages_total, order.stages_completed), (2, 1))
+            self.assertEqual(order.sections_cost, 2000)
+            self.assertEqual(order.items_count, 1)
+
+    def test_list_reads_annotated_summary(self):
+        """درصد تکمیل، هزینه بخش‌ها و تعداد آیتم‌ها از خلاصه کوئری خوانده می‌شوند"""
+        response = self.client.get('/api/orders/orders/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['results'][0]
+        self.assertEqual(data['completion_percentage'], 50.0)
+        self.assertEqual(data['total_sections_cost'], 0)
+        self.assertEqual(data['items_count'], 1)
+
+    def test_list_query_count_is_constant(self):
+        """تعداد کوئری‌های یک صفحه ۱۰۰ سفارشی با صفحه تک‌سفارشی برابر است"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as single:
+            self.client.get('/api/orders/orders/?page_size=100')
+        for _ in range(99):
+            self._create_order()
+        with CaptureQueriesContext(connection) as page:
+            response = self.client.get('/api/orders/orders/?page_size=100')
+        self.assertEqual(len(response.data['results']), 100)
+        self.assertEqual(len(page), len(single))
+
+
+class OrderBulkTransitionTest(TestCase):
+    """تست‌های ماشین حالت و انتقال دسته‌ای وضعیت سفارش‌ها"""
+
+    def setUp(self):
+        from apps.business.models import Business
+        self.admin = User.objects.create_superuser(username='transition_admin', email='transition@example.com', password='testpassword123')
+        self.customer = User.objects.create_user(username='transition_customer', email='customer@example.com', password='testpassword123')
+        self.business = Business.objects.create(name='کسب‌وکار انتقال', owner=self.admin)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _orders(self, count, status='draft'):
+        return [Order.objects.create(customer=self.customer, business=self.business, status=status) for _ in range(count)]
+
+    def test_bulk_transition_writes_side_rows_and_reports_rejections(self):
+        """سفارش‌های معتبر جابه‌جا و ردیف‌های جانبی ایجاد می‌شوند؛ انتقال‌های نامعتبر گزارش می‌شوند"""
+        from apps.notification.models import Notification
+        from .models import OrderStage, OrderStatusHistory
+        first, second, third = self._orders(3)
+        missing = uuid.uuid4()
+        payload = {'transitions': [
+            {'order': str(first.pk), 'status': 'confirmed'},
+            {'order': str(second.pk), 'status': 'confirmed'},
+            {'order': str(third.pk), 'status': 'completed'},
+            {'order': str(missing), 'status': 'confirmed'},
+        ]}
+        response = self.client.post('/api/orders/orders/transition/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual({row['order'] for row in response.data['rejected']}, {str(third.pk), str(missing)})
+
+        self.assertEqual(set(Order.objects.values_list('status', flat=True)), {'confirmed', 'draft'})
+        third.refresh_from_db()
+        self.assertEqual(third.status, 'draft')
+        for order in (first, second):
+            self.assertTrue(OrderStatusHistory.objects.filter(order=order, status='confirmed').exists())
+            self.assertTrue(OrderStage.objects.filter(order=order, stage_type='design_approval').exists())
+        self.assertEqual(Notification.objects.filter(user=self.customer, type='order_status').count(), 2)
+
+    def test_bulk_transition_query_count_is_constant(self):
+        """تعداد کوئری‌ها به تعداد سفارش‌ها وابسته نیست"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .state_machine import transition_orders
+        small, large = self._orders(2), self._orders(20)
+        with CaptureQueriesContext(connection) as few:
+            transition_orders([(order.pk, 'confirmed') for order in small])
+        with CaptureQueriesContext(connection) as many:
+            result = transition_orders([(order.pk, 'confirmed') for order in large])
+        self.assertEqual(result['updated'], 20)
+        self.assertEqual(len(many), len(few))
+
+    def test_single_actions_use_declared_transitions(self):
+        """اکشن‌های تکی همان جدول انتقال‌ها را بررسی می‌کنند"""
+        order, = self._orders(1, status='completed')
+        response = self.client.post(f'/api/orders/orders/{order.pk}/confirm/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        order, = self._orders(1, status='confirmed')
+        response = self.client.post(f'/api/orders/orders/{order.pk}/start_set_design/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'set_design')
+
+
+class OrderTimelineTest(TestCase):
+    """تست‌های خط زمانی یکپارچه سفارش"""
+
+    def setUp(self):
+        from apps.business.models import Business
+        from apps.set_design.models import SetDesign
+        from .models import OrderAssignment, PrintProcess
+        self.admin = User.objects.create_superuser(username='timeline_admin', email='timeline@example.com', password='testpassword123')
+        self.business = Business.objects.create(name='کسب‌وکار خط زمانی', owner=self.admin)
+        self.order = Order.objects.create(customer=self.admin, business=self.business)
+        self.order.status = 'confirmed'
+        self.order.save()
+        item = OrderItem.objects.create(order=self.order, quantity=1)
+        SetDesign.objects.create(order_item=item, file='sets/timeline.svg')
+        PrintProcess.objects.create(order=self.order, stage='printing', business_responsible=self.business)
+        OrderAssignment.objects.bulk_create([OrderAssignment(order=self.order, business=self.business, process_type='print')])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.url = f'/api/orders/orders/{self.order.pk}/timeline/'
+
+    def test_timeline_merges_events_in_order(self):
+        """رویدادهای همه منبع‌ها به ترتیب زمانی و با مدت مراحل برگردانده می‌شوند"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        events = response.data['events']
+        self.assertEqual({event['type'] for event in events}, {'stage', 'status', 'assignment', 'print_process', 'set_design'})
+        timestamps = [event['timestamp'] for event in events]
+        self.assertEqual(timestamps, sorted(timestamps))
+        received = next(event for event in events if event.get('stage_type') == 'order_received')
+        self.assertEqual(received['duration_seconds'], 0)
+
+    def test_timeline_query_count_is_constant(self):
+        """تعداد کوئری‌ها به تعداد رویدادها وابسته نیست"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import PrintProcess
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        PrintProcess.objects.bulk_create([PrintProcess(order=self.order, business_responsible=self.business) for _ in range(10)])
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['events']), 17)
+        self.assertEqual(len(many), len(few))
+
+    def test_timeline_etag(self):
+        """درخواست با ETag فعلی ۳۰۴ می‌گیرد و رویداد جدید ETag را تغییر می‌دهد"""
+        from .models import OrderStatusHistory
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        OrderStatusHistory.objects.create(order=self.order, status='confirmed', notes='یادداشت')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class OrderAssignmentEngineTest(TestCase):
+    """تست‌های موتور تخصیص کسب‌وکار بر اساس ظرفیت"""
+
+    def setUp(self):
+        from apps.business.models import Business
+        self.owner = User.objects.create_user(username='assign_owner', email='assign@example.com', password='testpassword123')
+        self.small = Business.objects.create(name='کوچک', owner=self.owner, daily_capacity=2)
+        self.large = Business.objects.create(name='بزرگ', owner=self.owner, daily_capacity=10, fabric_types=['cotton'])
+        self.idle = Business.objects.create(name='بدون ظرفیت', owner=self.owner)
+
+    def test_pick_prefers_least_loaded_compatible_business(self):
+        """کم‌بارترین کسب‌وکار سازگار انتخاب و کسب‌وکار ناسازگار یا بدون ظرفیت کنار گذاشته می‌شود"""
+        from .assignment import Candidate, LoadIndex
+        index = LoadIndex([
+            Candidate(1, capacity=10, remaining=10, queue_depth=5),
+            Candidate(2, capacity=10, remaining=1, queue_depth=1, fabric_types=['silk']),
+            Candidate(3, capacity=4, remaining=4, queue_depth=0, print_options=['manual']),
+        ])
+        self.assertEqual(index.pick('dtf', 'silk').business_id, 2)
+        self.assertEqual(index.pick('dtf', 'silk').business_id, 1)
+        self.assertEqual(index.pick('manual', 'cotton').business_id, 3)
+        index.exhaust(1)
+        self.assertIsNone(index.pick('dtf', 'silk'))
+
+    def test_assign_reserves_capacity(self):
+        """ظرفیت روزانه رزرو می‌شود و سفارش‌های مازاد بدون تخصیص می‌مانند"""
+        from .assignment import assign
+        orders = [Order(customer=self.owner, fabric_type='silk') for _ in range(3)]
+        unassigned = assign(orders)
+        self.assertEqual(len(unassigned), 1)
+        self.assertEqual({order.business_id for order in orders if order not in unassigned}, {self.small.pk})
+        self.small.refresh_from_db()
+        self.assertEqual(self.small.used_capacity, 2)
+
+    def test_assign_falls_back_when_reservation_fails(self):
+        """اگر ظرفیت کسب‌وکار پس از ساخت شاخص مصرف شده باشد، سفارش به کسب‌وکار بعدی می‌رود"""
+        from django.utils import timezone
+        from .assignment import LoadIndex, assign
+        index = LoadIndex.build()
+        type(self.small).objects.filter(pk=self.small.pk).update(used_capacity=2, capacity_date=timezone.localdate())
+        order = Order(customer=self.owner, fabric_type='cotton')
+        self.assertEqual(assign([order], index), [])
+        self.assertEqual(order.business_id, self.large.pk)
+
+    def test_create_without_business_assigns_and_records_stage(self):
+        """ایجاد سفارش بدون کسب‌وکار، کسب‌وکار را تعیین و مرحله تخصیص را ثبت می‌کند"""
+        from .models import OrderStage
+        order = Order.objects.create(customer=self.owner, fabric_type='cotton')
+        self.assertIsNotNone(order.business_id)
+        self.assertEqual(OrderStage.objects.filter(order=order, stage_type='design_approval').count(), 1)
+
+    def test_import_without_business_id(self):
+        """ورود دسته‌ای سفارش‌های بدون business_id کسب‌وکار را با ظرفیت تعیین می‌کند"""
+        from .bulk_import import import_orders
+        rows = [{'customer_id': self.owner.pk, 'fabric_type': 'silk', 'sections': [], 'items': []} for _ in range(3)]
+        result = import_orders(rows, partial=True)
+        self.assertEqual((result['created'], result['failed']), (2, 1))
+        self.assertIn('business_id', result['errors'][0]['errors'])
+        self.assertEqual(Order.objects.filter(business=self.small).count(), 2)
+
+    def test_import_without_partial_rolls_back_all_batches(self):
+        """بدون partial نبود ظرفیت در یک دسته همه دسته‌های قبلی و رزرو ظرفیت را برمی‌گرداند"""
+        from .bulk_import import import_orders
+        rows = [{'customer_id': self.owner.pk, 'fabric_type': 'silk', 'sections': [], 'items': []} for _ in range(3)]
+        result = import_orders(rows, batch_size=1)
+        self.assertEqual((result['created'], result['failed']), (0, 1))
+        self.assertEqual(result['errors'][0]['row'], 3)
+        self.assertFalse(Order.objects.exists())
+        self.small.refresh_from_db()
+        self.assertEqual(self.small.used_capacity, 0)
+
+    def test_partial_import_rebuilds_index_after_failed_batch(self):
+        """ظرفیت رزروشده دسته ناموفق دوباره برای دسته‌های بعدی در دسترس است"""
+        from unittest import mock
+        from . import bulk_import
+        rows = [{'customer_id': self.owner.pk, 'fabric_type': 'silk', 'sections': [], 'items': []} for _ in range(3)]
+        history, calls = bulk_import.build_initial_history, []
+
+        def fail_first_batch(order):
+            calls.append(order)
+            if len(calls) == 1:
+                raise RuntimeError('boom')
+            return history(order)
+
+        with mock.patch.object(bulk_import, 'build_initial_history', side_effect=fail_first_batch):
+            result = bulk_import.import_orders(rows, partial=True, batch_size=1)
+        self.assertEqual((result['created'], result['failed']), (2, 1))
+        self.assertIn('non_field_errors', result['errors'][0]['errors'])
+        self.assertEqual(Order.objects.filter(business=self.small).count(), 2)
+
+    def test_simulation_command(self):
+        """شبیه‌سازی تخصیص گزارش می‌دهد و داده‌ای باقی نمی‌گذارد"""
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('simulate_order_assignment', businesses=5, orders=50, batch_size=20, stdout=out)
+        self.assertIn('orders/s', out.getvalue())
+        self.assertEqual(Order.objects.count(), 0)
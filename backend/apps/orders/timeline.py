@@ -0,0 +1,143 @@
+"""
+خط زمانی یکپارچه سفارش
+
+رویدادهای مراحل (OrderStage)، تاریخچه وضعیت (OrderStatusHistory)، تکلیف‌ها (OrderAssignment)،
+فرآیندهای چاپ (PrintProcess) و نسخه‌های ست‌بندی (SetDesign) هر کدام با یک کوئری مرتب بر
+اساس زمان خوانده و در حافظه با ادغام k-تایی (heapq.merge) به یک جریان زمانی تبدیل می‌شوند؛
+بنابراین تعداد کوئری‌ها به تعداد رویدادها وابسته نیست. مدت هر مرحله در همان کوئری محاسبه
+می‌شود.
+
+نسخه خط زمانی (برای ETag) از آخرین زمان تغییر و تعداد ردیف‌های هر منبع با یک کوئری روی
+سفارش به دست می‌آید (version_annotations) تا درخواست‌های تکراری بدون خواندن رویدادها با
+۳۰۴ پاسخ داده شوند.
+"""
+import heapq
+
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.set_design.models import SetDesign
+from .models import OrderAssignment, OrderStage, OrderStatusHistory, PrintProcess
+
+# منبع‌های خط زمانی: (نوع رویداد، مدل، مسیر سفارش، فیلد آخرین تغییر)
+SOURCES = (
+    ('stage', OrderStage, 'order', 'updated_at'),
+    ('status', OrderStatusHistory, 'order', 'created_at'),
+    ('assignment', OrderAssignment, 'order', 'updated_at'),
+    ('print_process', PrintProcess, 'order', 'updated_at'),
+    ('set_design', SetDesign, 'order_item__order', 'updated_at'),
+)
+
+
+def version_annotations():
+    """آخرین زمان تغییر و تعداد ردیف‌های هر منبع به‌صورت زیرکوئری روی Order"""
+    annotations = {}
+    for event_type, model, order_path, changed_field in SOURCES:
+        rows = model.objects.filter(**{order_path: OuterRef('pk')}).order_by().values(order_path)
+        annotations[f'{event_type}_changed'] = Subquery(rows.annotate(value=Max(changed_field)).values('value'))
+        annotations[f'{event_type}_count'] = Subquery(rows.annotate(value=Count('pk')).values('value'))
+    return annotations
+
+
+def version(order):
+    """مقادیر تعیین‌کننده نسخه خط زمانی سفارشی که با version_annotations بارگذاری شده است"""
+    parts = [order.pk, order.updated_at]
+    for event_type, *_ in SOURCES:
+        parts.extend((getattr(order, f'{event_type}_changed'), getattr(order, f'{event_type}_count') or 0))
+    return parts
+
+
+def _choices(model, field):
+    return dict(model._meta.get_field(field).choices)
+
+
+def _stage_events(order_id):
+    stage_types, statuses = _choices(OrderStage, 'stage_type'), _choices(OrderStage, 'status')
+    rows = OrderStage.objects.filter(order_id=order_id).annotate(
+        timestamp=Coalesce('started_at', 'created_at'),
+        duration=ExpressionWrapper(F('finished_at') - F('started_at'), output_field=DurationField()),
+    ).order_by('timestamp', 'pk').values(
+        'pk', 'timestamp', 'stage_type', 'status', 'started_at', 'finished_at', 'duration', 'assigned_to_id', 'notes'
+    )
+    for row in rows:
+        duration = row['duration']
+        yield {
+            'type': 'stage', 'id': str(row['pk']), 'timestamp': row['timestamp'],
+            'title': stage_types.get(row['stage_type'], row['stage_type']),
+            'stage_type': row['stage_type'], 'status': row['status'],
+            'status_display': statuses.get(row['status'], row['status']),
+            'started_at': row['started_at'], 'finished_at': row['finished_at'],
+            'duration_seconds': duration.total_seconds() if duration is not None else None,
+            'assigned_to': row['assigned_to_id'], 'notes': row['notes'],
+        }
+
+
+def _status_events(order_id):
+    statuses = _choices(OrderStatusHistory, 'status')
+    rows = OrderStatusHistory.objects.filter(order_id=order_id).order_by('created_at', 'pk').values(
+        'pk', 'created_at', 'status', 'changed_by_id', 'notes'
+    )
+    for row in rows:
+        yield {
+            'type': 'status', 'id': str(row['pk']), 'timestamp': row['created_at'],
+            'title': statuses.get(row['status'], row['status']), 'status': row['status'],
+            'status_display': statuses.get(row['status'], row['status']),
+            'changed_by': row['changed_by_id'], 'notes': row['notes'],
+        }
+
+
+def _assignment_events(order_id):
+    process_types, statuses = _choices(OrderAssignment, 'process_type'), _choices(OrderAssignment, 'status')
+    rows = OrderAssignment.objects.filter(order_id=order_id).order_by('created_at', 'pk').values(
+        'pk', 'created_at', 'process_type', 'status', 'business_id', 'business__name', 'deadline', 'completed_at', 'notes'
+    )
+    for row in rows:
+        yield {
+            'type': 'assignment', 'id': str(row['pk']), 'timestamp': row['created_at'],
+            'title': process_types.get(row['process_type'], row['process_type']),
+            'process_type': row['process_type'], 'status': row['status'],
+            'status_display': statuses.get(row['status'], row['status']),
+            'business': row['business_id'], 'business_name': row['business__name'],
+            'deadline': row['deadline'], 'completed_at': row['completed_at'], 'notes': row['notes'],
+        }
+
+
+def _print_process_events(order_id):
+    stages, statuses = _choices(PrintProcess, 'stage'), _choices(PrintProcess, 'status')
+    rows = PrintProcess.objects.filter(order_id=order_id).order_by('created_at', 'pk').values(
+        'pk', 'created_at', 'updated_at', 'stage', 'status', 'business_responsible_id',
+        'business_responsible__name', 'notes'
+    )
+    for row in rows:
+        yield {
+            'type': 'print_process', 'id': str(row['pk']), 'timestamp': row['created_at'],
+            'title': stages.get(row['stage'], row['stage']), 'stage': row['stage'], 'status': row['status'],
+            'status_display': statuses.get(row['status'], row['status']), 'updated_at': row['updated_at'],
+            'business': row['business_responsible_id'], 'business_name': row['business_responsible__name'],
+            'notes': row['notes'],
+        }
+
+
+def _set_design_events(order_id):
+    statuses = _choices(SetDesign, 'status')
+    rows = SetDesign.objects.filter(order_item__order_id=order_id).order_by('created_at', 'pk').values(
+        'pk', 'created_at', 'order_item_id', 'version', 'status', 'designer_id', 'actual_completion', 'revision_notes'
+    )
+    for row in rows:
+        yield {
+            'type': 'set_design', 'id': str(row['pk']), 'timestamp': row['created_at'],
+            'title': f"ست‌بندی نسخه {row['version']}", 'order_item': row['order_item_id'],
+            'version': row['version'], 'status': row['status'],
+            'status_display': statuses.get(row['status'], row['status']), 'designer': row['designer_id'],
+            'completed_at': row['actual_completion'], 'notes': row['revision_notes'],
+        }
+
+
+def events(order_id):
+    """رویدادهای سفارش به ترتیب زمانی (یک کوئری برای هر منبع)"""
+    streams = [
+        list(source(order_id)) for source in (
+            _stage_events, _status_events, _assignment_events, _print_process_events, _set_design_events
+        )
+    ]
+    return list(heapq.merge(*streams, key=lambda event: event['timestamp']))
@@ -1,8 +1,10 @@
 from django.shortcuts import render
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.parsers import JSONParser, MultiPartParser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from django.db.models import Q, Count, Sum
@@ -11,105 +13,190 @@ from django.utils import timezone
 from .models import Order, OrderItem, OrderSection, OrderStage, GarmentDetails
 from .serializers import (
     OrderSerializer, OrderItemSerializer, OrderSectionSerializer,
-    OrderStageSerializer, GarmentDetailsSerializer
+    OrderStageSerializer, GarmentDetailsSerializer, OrderBulkTransitionSerializer
 )
+from apps.core import exports
+from . import bulk_import, state_machine, timeline
+from apps.core.pagination import KeysetPagination
 from apps.core.permissions import IsOwnerOrAdmin
+from apps.core.utils import etag_matches, make_etag
+from apps.dashboard.cache import cached_response
 
 class OrderViewSet(viewsets.ModelViewSet):
     """ViewSet برای مدیریت سفارش‌ها"""
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['status', 'print_type', 'fabric_type', 'business']
+    filterset_fields = ['status', 'print_option', 'fabric_type', 'business']
     search_fields = ['customer__username', 'customer__first_name', 'customer__last_name', 'notes']
-    ordering_fields = ['created_at', 'total_price', 'delivery_date']
+    # KeysetPagination فقط بر اساس created_at صفحه‌بندی می‌کند
+    ordering_fields = ['created_at']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        """فیلتر سفارش‌ها بر اساس نقش کاربر"""
-        user = self.request.user
-        
-        if user.is_staff:
-            # مدیران سیستم دسترسی به همه سفارش‌ها
-            return Order.objects.all().select_related(
-                'customer', 'business'
-            ).prefetch_related(
-                'items', 'sections', 'stages'
-            )
-        
-        # فیلتر بر اساس نقش
-        queryset = Order.objects.none()
-        
-        # مشتریان فقط سفارش‌های خودشان
-        queryset |= Order.objects.filter(customer=user)
-        
-        # صاحبان کسب‌وکار سفارش‌های تخصیص یافته
-        if hasattr(user, 'business_users'):
-            business_ids = user.business_users.values_list('business_id', flat=True)
-            queryset |= Order.objects.filter(business_id__in=business_ids)
-        
-        return queryset.distinct().select_related(
+        """سفارش‌های قابل مشاهده کاربر؛ prefetch فقط برای ردیف‌های صفحه جاری اجرا می‌شود"""
+        queryset = Order.objects.visible_to(self.request.user).select_related(
             'customer', 'business'
         ).prefetch_related(
             'items', 'sections', 'stages'
         )
+        if self.action in ('list', 'retrieve'):
+            # خلاصه مراحل، هزینه بخش‌ها و تعداد آیتم‌ها و جزئیات لباس برای سریالایزر در همان کوئری اصلی
+            queryset = queryset.select_related('garment_details').with_summary()
+        return queryset
 
     def perform_create(self, serializer):
         """تنظیم مشتری هنگام ایجاد سفارش"""
         serializer.save(customer=self.request.user)
 
+    def _transition(self, target, message):
+        order = self.get_object()
+        try:
+            state_machine.transition(order, target)
+        except state_machine.TransitionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': message})
+
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
         """تأیید سفارش"""
-        order = self.get_object()
-        
-        if order.status != 'draft':
-            return Response(
-                {'error': 'فقط سفارش‌های پیش‌نویس قابل تأیید هستند'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        order.status = 'confirmed'
-        order.save(update_fields=['status'])
-        
-        return Response({'message': 'سفارش تأیید شد'})
+        return self._transition('confirmed', 'سفارش تأیید شد')
 
     @action(detail=True, methods=['post'])
     def start_set_design(self, request, pk=None):
         """شروع فرآیند ست‌بندی"""
-        order = self.get_object()
-        
-        if order.status != 'confirmed':
-            return Response(
-                {'error': 'فقط سفارش‌های تأیید شده قابل ست‌بندی هستند'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        order.status = 'set_design'
-        order.save(update_fields=['status'])
-        
-        return Response({'message': 'فرآیند ست‌بندی آغاز شد'})
+        return self._transition('set_design', 'فرآیند ست‌بندی آغاز شد')
+
+    @action(detail=False, methods=['post'], url_path='transition')
+    def bulk_transition(self, request):
+        """
+        انتقال دسته‌ای وضعیت سفارش‌ها با یک UPDATE برای هر وضعیت مقصد
+
+        سفارش‌های یافت‌نشده یا با انتقال نامعتبر در rejected گزارش می‌شوند و بقیه جابه‌جا می‌شوند.
+        """
+        serializer = OrderBulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = state_machine.transition_orders(
+            serializer.validated_data['pairs'], queryset=Order.objects.visible_to(request.user)
+        )
+        return Response(result)
+
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """
+        خط زمانی یکپارچه مراحل، تغییرات وضعیت، تکلیف‌ها، فرآیندهای چاپ و ست‌بندی‌های سفارش
+
+        ETag بر اساس آخرین زمان تغییر رویدادها است و با If-None-Match برابر پاسخ ۳۰۴ برمی‌گردد.
+        """
+        order = get_object_or_404(
+            Order.objects.visible_to(request.user).annotate(**timeline.version_annotations()), pk=pk
+        )
+        etag = make_etag(*timeline.version(order))
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                'order': str(order.pk),
+                'status': order.status,
+                'status_display': order.get_status_display(),
+                'events': timeline.events(order.pk),
+            })
+        response['ETag'] = etag
+        return response
 
     @action(detail=False, methods=['get'])
+    @cached_response('orders_dashboard_stats')
     def dashboard_stats(self, request):
         """آمار سفارش‌ها برای داشبورد"""
-        queryset = self.get_queryset()
-        
+        # یک کوئری گروه‌بندی بر اساس وضعیت؛ سایر آمار از همین ردیف‌ها محاسبه می‌شود
+        rows = self.get_queryset().order_by().values('status').annotate(
+            count=Count('id'),
+            revenue=Sum('total_price', filter=Q(is_paid=True))
+        )
+        orders_by_status = {}
+        total_revenue = 0
+        for row in rows:
+            orders_by_status[row['status']] = row['count']
+            total_revenue += row['revenue'] or 0
+
         stats = {
-            'total_orders': queryset.count(),
-            'pending_orders': queryset.filter(status='pending').count(),
-            'in_progress_orders': queryset.filter(status__in=['confirmed', 'set_design', 'printing']).count(),
-            'completed_orders': queryset.filter(status='completed').count(),
-            'total_revenue': queryset.filter(is_paid=True).aggregate(
-                total=Sum('total_price')
-            )['total'] or 0,
-            'orders_by_status': dict(
-                queryset.values_list('status').annotate(count=Count('id'))
-            )
+            'total_orders': sum(orders_by_status.values()),
+            'pending_orders': orders_by_status.get('pending', 0),
+            'in_progress_orders': sum(
+                orders_by_status.get(status_name, 0) for status_name in ['confirmed', 'set_design', 'ready_for_print', 'printing']
+            ),
+            'completed_orders': orders_by_status.get('completed', 0),
+            'total_revenue': total_revenue,
+            'orders_by_status': orders_by_status
         }
         
         return Response(stats)
 
+    EXPORT_HEADER = [
+        'شناسه', 'تاریخ ایجاد', 'مشتری', 'کسب‌وکار', 'وضعیت', 'گزینه چاپ', 'نوع پارچه',
+        'قیمت کل', 'پرداخت شده', 'تاریخ تحویل', 'تعداد آیتم‌ها', 'تعداد کل', 'بخش‌ها'
+    ]
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """خروجی جریانی CSV/XLSX سفارش‌ها با همان فیلترهای لیست"""
+        file_format, use_jalali = exports.export_options(request)
+        if file_format is None:
+            return Response(
+                {'error': 'قالب خروجی باید csv یا xlsx باشد'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(
+            'sections__location', 'sections__design'
+        )
+        return exports.streaming_export(
+            'orders', self.EXPORT_HEADER, exports.queryset_rows(queryset, self._export_row),
+            file_format, use_jalali
+        )
+
+    @staticmethod
+    def _export_row(order):
+        items = list(order.items.all())
+        sections = ' | '.join(
+            f"{section.location.name}: {section.design.title} ×{section.quantity}"
+            for section in order.sections.all()
+        )
+        return [
+            str(order.id), order.created_at, order.customer.username,
+            order.business.name if order.business else '', order.get_status_display(),
+            order.get_print_option_display(), order.fabric_type, order.total_price, order.is_paid,
+            order.delivery_date, len(items), sum(item.quantity for item in items), sections
+        ]
+
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAdminUser],
+            parser_classes=[JSONParser, MultiPartParser])
+    def import_orders(self, request):
+        """
+        ورود دسته‌ای سفارش‌ها از فایل JSON/CSV (فیلد file) یا بدنه JSON ({"orders": [...]})
+
+        با partial=true سفارش‌های معتبر حتی در صورت وجود خطا در بقیه ثبت می‌شوند.
+        """
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                file_format = 'csv' if upload.name.lower().endswith('.csv') else 'json'
+                rows = bulk_import.parse(upload.read(), file_format)
+            else:
+                rows = bulk_import.parse(request.data, 'json')
+        except bulk_import.OrderImportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = request.data if hasattr(request.data, 'get') else {}
+        partial = str(data.get('partial', request.query_params.get('partial', ''))).lower() in ('1', 'true')
+        result = bulk_import.import_orders(rows, partial=partial)
+        if result['created']:
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST if result['errors'] else status.HTTP_200_OK
+        return Response(result, status=response_status)
+
 class OrderSectionViewSet(viewsets.ModelViewSet):
     """ViewSet برای مدیریت بخش‌های سفارش"""
     serializer_class = OrderSectionSerializer
@@ -124,13 +211,7 @@ class OrderSectionViewSet(viewsets.ModelViewSet):
         if user.is_staff:
             return OrderSection.objects.all()
         
-        # دسترسی بر اساس مالکیت سفارش
-        accessible_orders = Order.objects.filter(
-            Q(customer=user) |
-            Q(business__users__user=user)
-        ).values_list('id', flat=True)
-        
-        return OrderSection.objects.filter(order_id__in=accessible_orders)
+        return OrderSection.objects.filter(order__in=Order.objects.visible_to(user).values('pk'))
 
 class OrderStageViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet برای مشاهده مراحل سفارش (فقط خواندنی)"""
@@ -147,13 +228,7 @@ class OrderStageViewSet(viewsets.ReadOnlyModelViewSet):
         if user.is_staff:
             return OrderStage.objects.all()
         
-        # دسترسی بر اساس مالکیت سفارش
-        accessible_orders = Order.objects.filter(
-            Q(customer=user) |
-            Q(business__users__user=user)
-        ).values_list('id', flat=True)
-        
-        return OrderStage.objects.filter(order_id__in=accessible_orders)
+        return OrderStage.objects.filter(order__in=Order.objects.visible_to(user).values('pk'))
 
     @action(detail=True, methods=['post'])
     def mark_completed(self, request, pk=None):
@@ -175,7 +250,7 @@ class OrderStageViewSet(viewsets.ReadOnlyModelViewSet):
         
         stage.status = 'completed'
         stage.finished_at = timezone.now()
-        stage.save(update_fields=['status', 'finished_at'])
+        stage.save(update_fields=['status', 'finished_at', 'updated_at'])
         
         return Response({'message': 'مرحله با موفقیت تکمیل شد'})
 
@@ -193,10 +268,4 @@ class OrderItemViewSet(viewsets.ModelViewSet):
         if user.is_staff:
             return OrderItem.objects.all()
         
-        # فقط آیتم‌های سفارش‌هایی که کاربر به آنها دسترسی دارد
-        accessible_orders = Order.objects.filter(
-            Q(customer=user) |
-            Q(business__users__user=user)
-        ).values_list('id', flat=True)
-        
-        return OrderItem.objects.filter(order_id__in=accessible_orders) 
\ No newline at end of file
+        return OrderItem.objects.filter(order__in=Order.objects.visible_to(user).values('pk'))
\ No newline at end of file
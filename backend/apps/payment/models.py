@@ -1,7 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
-from apps.core.models import BaseModel
+from apps.core.models import BaseModel, FieldTrackerMixin
 from django.conf import settings
 from apps.orders.models import Order
 import uuid
@@ -9,8 +9,10 @@ import jdatetime
 
 User = get_user_model()
 
-class Payment(BaseModel):
+class Payment(FieldTrackerMixin, BaseModel):
     """مدل پرداخت برای ذخیره اطلاعات پرداخت‌های کاربران"""
+    # فیلدهای مؤثر در تجمیع روزانه داشبورد (apps.dashboard.rollups.PAYMENT_TRACKED_FIELDS)
+    tracked_fields = ('created_at', 'order_id', 'status', 'amount')
     
     STATUS_CHOICES = (
         ('pending', _('در انتظار')),
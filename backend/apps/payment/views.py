@@ -16,11 +16,25 @@ from .serializers import (
     PaymentVerifySerializer
 )
 from .services import get_payment_service
+from apps.core import exports
 from apps.core.permissions import IsAdminUserOrReadOnly, IsOwnerOrAdmin
 
 logger = logging.getLogger(__name__)
 
 
+def _export_response(request, queryset, filename, header, row_builder):
+    """خروجی جریانی CSV/XLSX یک کوئری پرداخت یا تراکنش"""
+    file_format, use_jalali = exports.export_options(request)
+    if file_format is None:
+        return Response(
+            {"error": "قالب خروجی باید csv یا xlsx باشد"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return exports.streaming_export(
+        filename, header, exports.queryset_rows(queryset, row_builder), file_format, use_jalali
+    )
+
+
 class PaymentViewSet(viewsets.ModelViewSet):
     """مدیریت پرداخت‌ها"""
     queryset = Payment.objects.all().order_by('-created_at')
@@ -61,6 +75,20 @@ class PaymentViewSet(viewsets.ModelViewSet):
         serializer = TransactionSerializer(transactions, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """خروجی CSV/XLSX پرداخت‌ها با همان فیلترهای لیست"""
+        queryset = self.filter_queryset(self.get_queryset()).select_related('user', 'order')
+        return _export_response(
+            request, queryset, 'payments',
+            ['شناسه', 'تاریخ ایجاد', 'کاربر', 'سفارش', 'مبلغ', 'وضعیت', 'درگاه', 'شناسه تراکنش', 'توضیحات'],
+            lambda payment: [
+                str(payment.id), payment.created_at, payment.user.username,
+                str(payment.order_id) if payment.order_id else '', payment.amount,
+                payment.get_status_display(), payment.gateway, str(payment.transaction_id), payment.description
+            ]
+        )
+
 
 class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
     """مدیریت تراکنش‌ها (فقط خواندنی)"""
@@ -79,6 +107,19 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """خروجی CSV/XLSX تراکنش‌ها با همان فیلترهای لیست"""
+        queryset = self.filter_queryset(self.get_queryset())
+        return _export_response(
+            request, queryset, 'transactions',
+            ['شناسه', 'تاریخ ایجاد', 'پرداخت', 'مبلغ', 'وضعیت', 'کد پیگیری درگاه', 'کد مرجع'],
+            lambda transaction: [
+                str(transaction.id), transaction.created_at, str(transaction.payment_id), transaction.amount,
+                transaction.get_status_display(), transaction.authority, transaction.ref_id
+            ]
+        )
+
 
 class PaymentRequestAPIView(APIView):
     """API درخواست پرداخت جدید"""
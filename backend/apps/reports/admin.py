@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ReportCategory, Report
+from .models import ReportCategory, Report, ReportJob
 from django.utils.translation import gettext_lazy as _
 
 @admin.register(ReportCategory)
@@ -32,3 +32,15 @@ class ReportAdmin(admin.ModelAdmin):
     )
     readonly_fields = ('generated_at', 'created_at', 'updated_at')
     list_per_page = 20
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    """پنل ادمین برای پیگیری کارهای تولید گزارش"""
+    list_display = ('type', 'user', 'business', 'status', 'progress', 'created_at', 'finished_at')
+    search_fields = ('user__username', 'business__name', 'dedupe_key')
+    list_filter = ('type', 'status', 'created_at')
+    readonly_fields = (
+        'user', 'business', 'category', 'type', 'params', 'dedupe_key', 'status', 'progress',
+        'report', 'error', 'started_at', 'finished_at', 'created_at', 'updated_at'
+    )
+    list_per_page = 20
@@ -0,0 +1,246 @@
+"""
+اجرای پس‌زمینه تولید گزارش
+
+GenerateReportView به‌جای تولید گزارش در درخواست HTTP یک ReportJob ثبت می‌کند و
+پس از commit تراکنش آن را به یک ThreadPoolExecutor می‌سپارد. درخواست‌های یکسانی که
+تا پایان کار فعال برسند همان کار را دریافت می‌کنند (محدودیت یکتایی روی dedupe_key
+برای کارهای فعال). پس از پایان کار اعلان و پیام send_notification گروه کاربر ارسال
+می‌شود.
+
+تنظیمات:
+    REPORT_JOB_WORKERS: تعداد thread‌های اجرای کار (پیش‌فرض ۲)
+    REPORT_JOB_TIMEOUT_SECONDS: کار فعال قدیمی‌تر از این مقدار ناموفق در نظر گرفته می‌شود
+    REPORT_JOBS_EAGER: اجرای همزمان کار پس از commit (برای تست و محیط توسعه)
+"""
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from apps.core.utils import log_error, to_jalali
+from apps.notification.models import Notification
+from . import refresh
+from .models import Report, ReportJob
+from .utils import (
+    generate_sales_report,
+    generate_profit_report,
+    generate_user_activity_report,
+    generate_business_performance_report
+)
+
+DATE_FORMAT = '%Y-%m-%d'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """ThreadPoolExecutor مشترک کارهای گزارش (ایجاد در اولین استفاده)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'REPORT_JOB_WORKERS', 2),
+                thread_name_prefix='report-job'
+            )
+    return _executor
+
+
+def build_dedupe_key(user, report_type, business, category, start_date, end_date, is_public):
+    """کلید یکتایی یک درخواست گزارش بر اساس همه پارامترهای مؤثر در خروجی"""
+    payload = json.dumps([
+        str(user.pk), report_type,
+        str(business.pk) if business else None,
+        str(category.pk) if category else None,
+        start_date.strftime(DATE_FORMAT) if start_date else None,
+        end_date.strftime(DATE_FORMAT) if end_date else None,
+        bool(is_public),
+    ])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _expire_stale_jobs(dedupe_key):
+    """کارهای فعالی که بیش از حد مجاز طول کشیده‌اند (مثلاً با توقف سرور) ناموفق می‌شوند"""
+    timeout = getattr(settings, 'REPORT_JOB_TIMEOUT_SECONDS', 30 * 60)
+    ReportJob.objects.filter(
+        dedupe_key=dedupe_key,
+        status__in=ReportJob.ACTIVE_STATUSES,
+        updated_at__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(status=ReportJob.STATUS_FAILED, error='timeout', finished_at=timezone.now(), updated_at=timezone.now())
+
+
+def submit_report_job(user, report_type, business=None, category=None, start_date=None, end_date=None, is_public=False):
+    """
+    ثبت کار تولید گزارش یا بازگرداندن کار فعال یکسان
+
+    خروجی: (job, created)
+    """
+    dedupe_key = build_dedupe_key(user, report_type, business, category, start_date, end_date, is_public)
+    _expire_stale_jobs(dedupe_key)
+
+    active = ReportJob.objects.filter(dedupe_key=dedupe_key, status__in=ReportJob.ACTIVE_STATUSES).first()
+    if active:
+        return active, False
+
+    try:
+        with transaction.atomic():
+            job = ReportJob.objects.create(
+                user=user,
+                business=business,
+                category=category,
+                type=report_type,
+                dedupe_key=dedupe_key,
+                params={
+                    'start_date': start_date.strftime(DATE_FORMAT) if start_date else None,
+                    'end_date': end_date.strftime(DATE_FORMAT) if end_date else None,
+                    'is_public': bool(is_public),
+                }
+            )
+    except IntegrityError:
+        # درخواست یکسان دیگری همزمان ثبت شده است
+        return ReportJob.objects.get(dedupe_key=dedupe_key, status__in=ReportJob.ACTIVE_STATUSES), False
+
+    transaction.on_commit(lambda: dispatch_report_job(job.pk))
+    return job, True
+
+
+def dispatch_report_job(job_id):
+    """سپردن کار به pool یا اجرای همزمان در حالت REPORT_JOBS_EAGER"""
+    if getattr(settings, 'REPORT_JOBS_EAGER', False):
+        run_report_job(job_id)
+    else:
+        get_executor().submit(_run_in_worker, job_id)
+
+
+def _run_in_worker(job_id):
+    close_old_connections()
+    try:
+        run_report_job(job_id)
+    finally:
+        # هر thread اتصال پایگاه داده مخصوص خود را دارد
+        connection.close()
+
+
+def _set_progress(job, progress, **fields):
+    job.progress = progress
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.updated_at = timezone.now()
+    job.save(update_fields=['progress', 'updated_at', *fields])
+
+
+def _parse_date(value):
+    return timezone.make_aware(datetime.strptime(value, DATE_FORMAT)) if value else None
+
+
+def generate_report_data(report_type, business, start_date, end_date):
+    """تولید داده‌های گزارش بر اساس نوع"""
+    if report_type == 'sales':
+        return generate_sales_report(business, start_date, end_date)
+    if report_type == 'profit':
+        return generate_profit_report(business, start_date, end_date)
+    if report_type == 'user_activity':
+        return generate_user_activity_report(start_date, end_date)
+    if report_type == 'business_performance':
+        return generate_business_performance_report(business, start_date, end_date)
+    raise ValueError(f"Unknown report type: {report_type}")
+
+
+def report_title(report_type, start_date, end_date):
+    """عنوان گزارش به همراه بازه شمسی"""
+    date_range = ""
+    if start_date and end_date:
+        jalali_start = to_jalali(start_date).split()[0]
+        jalali_end = to_jalali(end_date).split()[0]
+        date_range = f" از {jalali_start} تا {jalali_end}"
+    return f"گزارش {dict(Report.TYPE_CHOICES).get(report_type, report_type)}{date_range}"
+
+
+def run_report_job(job_id):
+    """اجرای یک کار تولید گزارش و ثبت نتیجه"""
+    now = timezone.now()
+    # انتقال اتمیک از صف به اجرا تا هر کار فقط یک بار اجرا شود
+    claimed = ReportJob.objects.filter(pk=job_id, status=ReportJob.STATUS_PENDING).update(
+        status=ReportJob.STATUS_RUNNING, progress=10, started_at=now, updated_at=now
+    )
+    if not claimed:
+        return
+    job = ReportJob.objects.select_related('user', 'business', 'category').get(pk=job_id)
+
+    try:
+        start_date = _parse_date(job.params.get('start_date'))
+        end_date = _parse_date(job.params.get('end_date'))
+
+        report = Report(
+            user=job.user,
+            business=job.business,
+            category=job.category,
+            type=job.type,
+            title=report_title(job.type, start_date, end_date),
+            data={},
+            is_public=job.params.get('is_public', False)
+        )
+        if refresh.supports_incremental(job.type):
+            # گزارش‌های فروش و سود با وضعیت تجمیع ذخیره می‌شوند تا بعداً تدریجی بازخوانی شوند؛
+            # گزارش فقط پس از ساخت کامل داده‌ها ذخیره می‌شود و پیشرفت تجمیع بین ۱۰ و ۹۰ درصد است
+            refresh.initialize_report(
+                report, start_date, end_date,
+                progress=lambda done: _set_progress(job, 10 + int(done * 80))
+            )
+        else:
+            report.data = generate_report_data(job.type, job.business, start_date, end_date)
+            _set_progress(job, 90)
+            report.save()
+        _set_progress(job, 100, status=ReportJob.STATUS_COMPLETED, report=report, finished_at=timezone.now())
+    except Exception as e:
+        log_error(f"خطا در اجرای کار تولید گزارش {job_id}", e)
+        _set_progress(job, job.progress, status=ReportJob.STATUS_FAILED, error=str(e), finished_at=timezone.now())
+        return
+
+    try:
+        notify_report_ready(report)
+    except Exception as e:
+        log_error(f"خطا در ارسال اعلان گزارش {report.id}", e)
+
+
+def notify_report_ready(report):
+    """ثبت اعلان گزارش جدید و ارسال آنی آن با WebSocket"""
+    notification = Notification.objects.create(
+        user=report.user,
+        business=report.business,
+        type='system',
+        title=f'گزارش جدید: {report.title}',
+        content=f'گزارش {report.title} با موفقیت تولید شد.',
+        link=f'/reports/{report.id}',
+        is_read=False,
+        is_archived=False,
+        priority=2
+    )
+
+    try:
+        channel_layer = get_channel_layer()
+        async_to_sync(channel_layer.group_send)(
+            f'notifications_{report.user_id}',
+            {
+                'type': 'send_notification',
+                'notification': {
+                    'id': str(notification.id),
+                    'title': notification.title,
+                    'content': notification.content,
+                    'type': notification.type,
+                    'is_read': notification.is_read,
+                    'link': notification.link,
+                    'created_at': to_jalali(notification.created_at)
+                }
+            }
+        )
+    except Exception as ws_error:
+        log_error("خطا در ارسال اعلان آنی", ws_error)
+    return notification
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.utils import log_error
+from apps.reports.models import Report
+from apps.reports.refresh import INCREMENTAL_TYPES, refresh_report
+
+
+class Command(BaseCommand):
+    """بازخوانی تدریجی گزارش‌های فروش و سود (مناسب اجرای دوره‌ای با cron)"""
+    help = 'Incrementally refresh sales and profit reports from their watermarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='بازسازی کامل به‌جای بازخوانی تدریجی')
+        parser.add_argument('--type', choices=sorted(INCREMENTAL_TYPES), help='فقط گزارش‌های این نوع')
+        parser.add_argument('--report', help='فقط گزارش با این شناسه')
+
+    def handle(self, *args, **options):
+        reports = Report.objects.filter(type__in=INCREMENTAL_TYPES).exclude(aggregation_state={})
+        if options['type']:
+            reports = reports.filter(type=options['type'])
+        if options['report']:
+            reports = reports.filter(id=options['report'])
+
+        refreshed = failed = rows = 0
+        for report in reports.only('id', 'type').iterator():
+            try:
+                rows += refresh_report(report, full=options['full'])
+                refreshed += 1
+            except Exception as e:
+                failed += 1
+                log_error(f"خطا در بازخوانی گزارش {report.id}", e)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"refreshed={refreshed} failed={failed} processed_rows={rows}"
+        ))
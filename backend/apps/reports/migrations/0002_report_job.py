@@ -0,0 +1,48 @@
+# Generated by Django 4.2 on 2026-10-17 21:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0002_remove_business_type_business_business_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='شناسه')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاریخ ایجاد')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='آخرین بروزرسانی')),
+                ('type', models.CharField(choices=[('sales', 'فروش'), ('profit', 'سود'), ('user_activity', 'فعالیت کاربر'), ('business_performance', 'عملکرد کسب\u200cوکار')], max_length=20, verbose_name='نوع گزارش')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='پارامترها')),
+                ('dedupe_key', models.CharField(db_index=True, max_length=64, verbose_name='کلید یکتایی درخواست')),
+                ('status', models.CharField(choices=[('pending', 'در صف'), ('running', 'در حال اجرا'), ('completed', 'تکمیل\u200cشده'), ('failed', 'ناموفق')], default='pending', max_length=20, verbose_name='وضعیت')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='پیشرفت (درصد)')),
+                ('error', models.TextField(blank=True, verbose_name='خطا')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='زمان شروع')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='زمان پایان')),
+                ('business', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_jobs', to='business.business', verbose_name='کسب\u200cوکار')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_jobs', to='reports.reportcategory', verbose_name='دسته\u200cبندی')),
+                ('report', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='reports.report', verbose_name='گزارش')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_jobs', to=settings.AUTH_USER_MODEL, verbose_name='کاربر')),
+            ],
+            options={
+                'verbose_name': 'کار تولید گزارش',
+                'verbose_name_plural': 'کارهای تولید گزارش',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('pending', 'running'))), fields=('dedupe_key',), name='unique_active_report_job'),
+        ),
+    ]
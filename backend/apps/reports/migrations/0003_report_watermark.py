@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-17 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_report_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='aggregation_state',
+            field=models.JSONField(blank=True, default=dict, verbose_name='وضعیت تجمیع'),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='watermark',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='آخرین زمان پردازش\u200cشده'),
+        ),
+    ]
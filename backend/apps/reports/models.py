@@ -37,6 +37,9 @@ class Report(BaseModel):
     data = models.JSONField(verbose_name=_("داده‌های گزارش"))
     generated_at = models.DateTimeField(auto_now_add=True, verbose_name=_("تاریخ تولید"))
     is_public = models.BooleanField(default=False, verbose_name=_("عمومی"))
+    # وضعیت بازخوانی تدریجی (apps.reports.refresh): آخرین created_at پردازش‌شده و جمع‌های میانی
+    watermark = models.DateTimeField(null=True, blank=True, verbose_name=_("آخرین زمان پردازش‌شده"))
+    aggregation_state = models.JSONField(default=dict, blank=True, verbose_name=_("وضعیت تجمیع"))
 
     def save(self, *args, **kwargs):
         try:
@@ -52,3 +55,48 @@ class Report(BaseModel):
         verbose_name = _("گزارش")
         verbose_name_plural = _("گزارش‌ها")
         ordering = ['-generated_at']
+
+
+class ReportJob(BaseModel):
+    """کار پس‌زمینه تولید گزارش؛ وضعیت و پیشرفت آن از طریق API قابل پیگیری است"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('در صف')),
+        (STATUS_RUNNING, _('در حال اجرا')),
+        (STATUS_COMPLETED, _('تکمیل‌شده')),
+        (STATUS_FAILED, _('ناموفق')),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='report_jobs', verbose_name=_("کاربر"))
+    business = models.ForeignKey(Business, on_delete=models.SET_NULL, null=True, blank=True, related_name='report_jobs', verbose_name=_("کسب‌وکار"))
+    category = models.ForeignKey(ReportCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='report_jobs', verbose_name=_("دسته‌بندی"))
+    type = models.CharField(max_length=20, choices=Report.TYPE_CHOICES, verbose_name=_("نوع گزارش"))
+    params = models.JSONField(default=dict, blank=True, verbose_name=_("پارامترها"))
+    dedupe_key = models.CharField(max_length=64, db_index=True, verbose_name=_("کلید یکتایی درخواست"))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name=_("وضعیت"))
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name=_("پیشرفت (درصد)"))
+    report = models.ForeignKey(Report, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs', verbose_name=_("گزارش"))
+    error = models.TextField(blank=True, verbose_name=_("خطا"))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_("زمان شروع"))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_("زمان پایان"))
+
+    def __str__(self):
+        return f"کار گزارش {self.get_type_display()} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = _("کار تولید گزارش")
+        verbose_name_plural = _("کارهای تولید گزارش")
+        ordering = ['-created_at']
+        constraints = [
+            # در هر لحظه فقط یک کار فعال برای هر درخواست یکسان
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status__in=('pending', 'running')),
+                name='unique_active_report_job',
+            ),
+        ]
@@ -0,0 +1,187 @@
+"""
+بازخوانی تدریجی گزارش‌های فروش و سود
+
+برای این گزارش‌ها علاوه بر data، وضعیت تجمیع (جمع هر روز شمسی) و یک high-water mark
+ذخیره می‌شود: created_at و شناسه آخرین ردیف پردازش‌شده. بازخوانی فقط ردیف‌های جدیدتر
+از این نقطه را می‌خواند و با جمع‌های قبلی ادغام می‌کند. بازسازی کامل (full) همه ردیف‌های
+بازه را دوباره پردازش می‌کند و تغییرات ردیف‌های قدیمی (مثلاً اصلاح مبلغ یا موفق شدن
+یک پرداخت قدیمی) را هم در بر می‌گیرد.
+
+ردیف‌ها فقط تا REPORT_REFRESH_LAG_SECONDS قبل پردازش می‌شوند تا ردیف‌هایی که در
+تراکنش‌های باز با created_at قدیمی‌تر ثبت می‌شوند پشت watermark جا نمانند.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core import jalali
+from apps.orders.models import Order
+from apps.payment.models import Payment
+from .models import Report
+
+STATE_VERSION = 1
+
+# نوع گزارش: (عنوان نمودار، نوع نمودار)
+INCREMENTAL_TYPES = {
+    'sales': ('گزارش فروش', 'bar'),
+    'profit': ('گزارش سود', 'line'),
+}
+
+
+def supports_incremental(report_type):
+    return report_type in INCREMENTAL_TYPES
+
+
+def _source(report_type, business):
+    """کوئری ردیف‌های خام و فیلد مبلغ هر نوع گزارش"""
+    if report_type == 'sales':
+        rows = Order.objects.all()
+        if business:
+            rows = rows.filter(business=business)
+        return rows, 'total_price'
+    rows = Payment.objects.filter(status='successful')
+    if business:
+        rows = rows.filter(order__business=business)
+    return rows, 'amount'
+
+
+def _dump(value):
+    return value.isoformat() if value else None
+
+
+def _load(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _upper_bound(state):
+    lag = getattr(settings, 'REPORT_REFRESH_LAG_SECONDS', 0)
+    upper = timezone.now() - timedelta(seconds=lag)
+    end = _load(state.get('end'))
+    return min(upper, end) if end else upper
+
+
+def _chunks(iterator, size):
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _build_data(report_type, state, totals):
+    title, chart_type = INCREMENTAL_TYPES[report_type]
+    if not totals:
+        # مانند تولید کامل گزارش، بازه خالی با دو نقطه صفر نمایش داده می‌شود
+        return {
+            'labels': [jalali.to_jalali(_load(state['start']), jalali.DATE_FORMAT),
+                       jalali.to_jalali(_load(state['end']) or timezone.now(), jalali.DATE_FORMAT)],
+            'values': [0, 0],
+            'title': title,
+            'type': chart_type
+        }
+    labels = sorted(totals)
+    return {
+        'labels': labels,
+        'values': [float(totals[label]) for label in labels],
+        'title': title,
+        'type': chart_type
+    }
+
+
+def _aggregate(report_type, business, state, watermark, last_id, totals, chunk_size, progress=None):
+    """
+    ادغام ردیف‌های بعد از (watermark, last_id) در جمع‌های روزانه
+
+    progress در صورت وجود پس از هر دسته با نسبت ردیف‌های پردازش‌شده (۰ تا ۱) فراخوانی می‌شود.
+    خروجی: (جمع‌ها، watermark، last_id، تعداد ردیف‌های پردازش‌شده)
+    """
+    rows, amount_field = _source(report_type, business)
+    rows = rows.filter(created_at__gte=_load(state['start']), created_at__lte=_upper_bound(state))
+    if watermark:
+        rows = rows.filter(Q(created_at__gt=watermark) | Q(created_at=watermark, id__gt=last_id))
+    total = rows.count() if progress else 0
+    rows = rows.order_by('created_at', 'id').values_list('id', 'created_at', amount_field)
+
+    processed = 0
+    for chunk in _chunks(rows.iterator(chunk_size=chunk_size), chunk_size):
+        labels = jalali.to_jalali_many((created_at for _, created_at, _ in chunk), jalali.DATE_FORMAT)
+        for (_, _, amount), label in zip(chunk, labels):
+            totals[label] = totals.get(label, Decimal(0)) + (amount or 0)
+        last_id, watermark, _ = chunk[-1]
+        processed += len(chunk)
+        if progress and total:
+            progress(min(processed / total, 1))
+    return totals, watermark, last_id, processed
+
+
+def _apply(report, state, totals, watermark, last_id):
+    """نوشتن وضعیت تجمیع، watermark و داده‌های نمودار روی نمونه گزارش (بدون ذخیره)"""
+    state['totals'] = {label: str(value) for label, value in totals.items()}
+    state['last_id'] = str(last_id) if last_id else None
+    report.aggregation_state = state
+    report.watermark = watermark
+    report.data = _build_data(report.type, state, totals)
+
+
+def initialize_report(report, start_date=None, end_date=None, chunk_size=2000, progress=None):
+    """
+    ثبت بازه گزارش و تولید کامل اولیه آن
+
+    داده‌ها پیش از ذخیره ساخته می‌شوند و گزارش (جدید یا موجود) با یک save همراه با وضعیت
+    تجمیع نوشته می‌شود؛ بنابراین خطا در تجمیع گزارش ناقصی باقی نمی‌گذارد. end_date خالی
+    یعنی گزارش با هر بازخوانی تا زمان حال ادامه پیدا می‌کند. progress مانند _aggregate است.
+    خروجی: تعداد ردیف‌های پردازش‌شده
+    """
+    if not supports_incremental(report.type):
+        raise ValueError(f"Report type {report.type} does not support incremental refresh")
+
+    state = {
+        'version': STATE_VERSION,
+        'start': _dump(start_date or timezone.now() - timedelta(days=30)),
+        'end': _dump(end_date),
+    }
+    totals, watermark, last_id, processed = _aggregate(
+        report.type, report.business, state, None, None, {}, chunk_size, progress
+    )
+    _apply(report, state, totals, watermark, last_id)
+    if report._state.adding:
+        report.save()
+    else:
+        report.updated_at = timezone.now()
+        report.save(update_fields=['aggregation_state', 'watermark', 'data', 'updated_at'])
+    return processed
+
+
+def refresh_report(report, full=False, chunk_size=2000):
+    """
+    ادغام ردیف‌های جدیدتر از watermark در گزارش (یا بازسازی کامل با full=True)
+
+    خروجی: تعداد ردیف‌های پردازش‌شده
+    """
+    if not supports_incremental(report.type):
+        raise ValueError(f"Report type {report.type} does not support incremental refresh")
+
+    with transaction.atomic():
+        locked = Report.objects.select_for_update().select_related('business').get(pk=report.pk)
+        state = dict(locked.aggregation_state or {})
+        if state.get('version') != STATE_VERSION:
+            raise ValueError(f"Report {report.pk} has no aggregation state; regenerate it first")
+
+        watermark, last_id = locked.watermark, state.get('last_id')
+        if full:
+            state['totals'], watermark, last_id = {}, None, None
+        totals = {label: Decimal(value) for label, value in state['totals'].items()}
+        totals, watermark, last_id, processed = _aggregate(
+            locked.type, locked.business, state, watermark, last_id, totals, chunk_size
+        )
+        _apply(locked, state, totals, watermark, last_id)
+        locked.updated_at = timezone.now()
+        locked.save(update_fields=['aggregation_state', 'watermark', 'data', 'updated_at'])
+
+    report.aggregation_state, report.watermark, report.data = locked.aggregation_state, locked.watermark, locked.data
+    return processed
@@ -1,6 +1,6 @@
 from rest_framework import serializers
-from .models import Report, ReportCategory
-from apps.core.utils import to_jalali
+from .models import Report, ReportCategory, ReportJob
+from apps.core.serializers import JalaliDateTimeField, JalaliListSerializer
 from apps.authentication.serializers import UserSerializer
 from apps.business.serializers import BusinessSerializer
 from django.contrib.auth import get_user_model
@@ -10,20 +10,15 @@ User = get_user_model()
 
 class ReportCategorySerializer(serializers.ModelSerializer):
     """سریالایزر برای مدل ReportCategory"""
-    created_at_jalali = serializers.SerializerMethodField()
-    updated_at_jalali = serializers.SerializerMethodField()
+    created_at_jalali = JalaliDateTimeField(source='created_at')
+    updated_at_jalali = JalaliDateTimeField(source='updated_at')
 
     class Meta:
         model = ReportCategory
+        list_serializer_class = JalaliListSerializer
         fields = ['id', 'name', 'description', 'created_at', 'updated_at', 'created_at_jalali', 'updated_at_jalali']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-    def get_created_at_jalali(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at_jalali(self, obj):
-        return to_jalali(obj.updated_at)
-
 class ReportSerializer(serializers.ModelSerializer):
     """سریالایزر برای مدل Report"""
     user = UserSerializer(read_only=True)
@@ -32,12 +27,13 @@ class ReportSerializer(serializers.ModelSerializer):
     business_id = serializers.PrimaryKeyRelatedField(queryset=Business.objects.all(), source='business', required=False, allow_null=True, write_only=True)
     category = ReportCategorySerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(queryset=ReportCategory.objects.all(), source='category', required=False, allow_null=True, write_only=True)
-    generated_at_jalali = serializers.SerializerMethodField()
-    created_at_jalali = serializers.SerializerMethodField()
-    updated_at_jalali = serializers.SerializerMethodField()
+    generated_at_jalali = JalaliDateTimeField(source='generated_at')
+    created_at_jalali = JalaliDateTimeField(source='created_at')
+    updated_at_jalali = JalaliDateTimeField(source='updated_at')
 
     class Meta:
         model = Report
+        list_serializer_class = JalaliListSerializer
         fields = [
             'id', 'user', 'user_id', 'business', 'business_id', 'category', 'category_id',
             'type', 'title', 'data', 'is_public', 'generated_at', 'generated_at_jalali',
@@ -45,11 +41,17 @@ class ReportSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'generated_at', 'created_at', 'updated_at']
 
-    def get_generated_at_jalali(self, obj):
-        return to_jalali(obj.generated_at)
-
-    def get_created_at_jalali(self, obj):
-        return to_jalali(obj.created_at)
+class ReportJobSerializer(serializers.ModelSerializer):
+    """سریالایزر وضعیت کار تولید گزارش"""
+    report_id = serializers.PrimaryKeyRelatedField(source='report', read_only=True)
+    created_at_jalali = JalaliDateTimeField(source='created_at')
+    finished_at_jalali = JalaliDateTimeField(source='finished_at')
 
-    def get_updated_at_jalali(self, obj):
-        return to_jalali(obj.updated_at) 
\ No newline at end of file
+    class Meta:
+        model = ReportJob
+        list_serializer_class = JalaliListSerializer
+        fields = [
+            'id', 'type', 'status', 'progress', 'params', 'report_id', 'error',
+            'created_at', 'started_at', 'finished_at', 'created_at_jalali', 'finished_at_jalali'
+        ]
+        read_only_fields = fields
\ No newline at end of file
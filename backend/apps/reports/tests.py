@@ -1,3 +1,131 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APIClient
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from datetime import timedelta
+from django.utils import timezone
+from apps.business.models import Business
+from apps.notification.models import Notification
+from apps.orders.models import Order
+from . import refresh
+from .models import Report, ReportJob
+
+User = get_user_model()
+
+
+@override_settings(REPORT_JOBS_EAGER=True)
+class ReportJobTests(TestCase):
+    """تست‌های تولید پس‌زمینه گزارش"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='report_user', password='test123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('reports:generate-report')
+        self.payload = {'type': 'sales', 'start_date': '2024-03-01', 'end_date': '2024-03-31'}
+
+    def test_generate_returns_job_and_completes(self):
+        """درخواست تولید گزارش ۲۰۲ برمی‌گرداند و پس از اجرای کار، گزارش و اعلان ثبت می‌شوند"""
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f'notifications_{self.user.id}', channel_name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], ReportJob.STATUS_PENDING)
+        self.assertFalse(response.data['deduplicated'])
+
+        poll = self.client.get(response['Location'])
+        self.assertEqual(poll.data['status'], ReportJob.STATUS_COMPLETED)
+        self.assertEqual(poll.data['progress'], 100)
+        report = Report.objects.get(id=poll.data['report_id'])
+        self.assertEqual(report.type, 'sales')
+        self.assertTrue(Notification.objects.filter(user=self.user, link=f'/reports/{report.id}').exists())
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(message['type'], 'send_notification')
+        self.assertEqual(message['notification']['link'], f'/reports/{report.id}')
+
+    def test_failed_job_leaves_no_report(self):
+        """خطا در تجمیع داده‌ها کار را ناموفق می‌کند و گزارش خالی ذخیره نمی‌شود"""
+        with mock.patch('apps.reports.refresh._build_data', side_effect=ValueError('boom')):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url, self.payload, format='json')
+
+        poll = self.client.get(response['Location'])
+        self.assertEqual(poll.data['status'], ReportJob.STATUS_FAILED)
+        self.assertIsNone(poll.data['report_id'])
+        self.assertFalse(Report.objects.exists())
+
+    def test_identical_requests_are_deduplicated(self):
+        """درخواست یکسان در زمان فعال بودن کار قبلی همان کار را برمی‌گرداند"""
+        first = self.client.post(self.url, self.payload, format='json')
+        second = self.client.post(self.url, self.payload, format='json')
+        other = self.client.post(self.url, {**self.payload, 'end_date': '2024-04-30'}, format='json')
+
+        self.assertEqual(second.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assertTrue(second.data['deduplicated'])
+        self.assertNotEqual(first.data['id'], other.data['id'])
+        self.assertEqual(ReportJob.objects.count(), 2)
+
+    def test_job_status_is_private(self):
+        """وضعیت کار فقط برای صاحب آن قابل مشاهده است"""
+        response = self.client.post(self.url, self.payload, format='json')
+        stranger = User.objects.create_user(username='stranger', password='test123')
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.client.get(response['Location']).status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(REPORT_REFRESH_LAG_SECONDS=0)
+class ReportRefreshTests(TestCase):
+    """تست‌های بازخوانی تدریجی گزارش‌ها"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='refresh_user', password='test123')
+        self.business = Business.objects.create(name='کسب‌وکار گزارش', owner=self.user)
+        self.start = timezone.now() - timedelta(days=10)
+        self.report = Report.objects.create(user=self.user, type='sales', title='گزارش فروش', data={})
+
+    def _order(self, days_ago, price):
+        order = Order.objects.create(customer=self.user, business=self.business)
+        Order.objects.filter(pk=order.pk).update(
+            total_price=price, created_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return order
+
+    def test_refresh_processes_only_new_rows(self):
+        """بازخوانی فقط سفارش‌های بعد از watermark را پردازش و با جمع‌های قبلی ادغام می‌کند"""
+        self._order(3, 1000)
+        self._order(3, 500)
+        self.assertEqual(refresh.initialize_report(self.report, self.start), 2)
+        self.assertEqual(self.report.data['values'], [1500.0])
+
+        self._order(0, 200)
+        self.assertEqual(refresh.refresh_report(self.report), 1)
+        self.assertEqual(self.report.data['values'], [1500.0, 200.0])
+        self.assertEqual(refresh.refresh_report(self.report), 0)
+
+    def test_full_rebuild_picks_up_changed_rows(self):
+        """بازسازی کامل تغییرات ردیف‌های قدیمی را هم اعمال می‌کند"""
+        order = self._order(2, 1000)
+        refresh.initialize_report(self.report, self.start)
+        Order.objects.filter(pk=order.pk).update(total_price=4000)
+
+        refresh.refresh_report(self.report)
+        self.assertEqual(self.report.data['values'], [1000.0])
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(reverse('reports:report-refresh', kwargs={'report_id': self.report.id}), {'full': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['processed_rows'], 1)
+        self.assertEqual(response.data['data']['values'], [4000.0])
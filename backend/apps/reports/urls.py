@@ -10,7 +10,10 @@ urlpatterns = [
     # مسیرهای مربوط به گزارش‌ها
     path('', views.ReportListCreateView.as_view(), name='report-list-create'),
     path('<uuid:report_id>/', views.ReportDetailView.as_view(), name='report-detail'),
+    path('<uuid:report_id>/refresh/', views.ReportRefreshView.as_view(), name='report-refresh'),
+    path('<uuid:report_id>/export/', views.ReportExportView.as_view(), name='report-export'),
     
     # مسیر تولید گزارش‌های پویا
     path('generate/', views.GenerateReportView.as_view(), name='generate-report'),
+    path('jobs/<uuid:job_id>/', views.ReportJobDetailView.as_view(), name='report-job-detail'),
 ] 
\ No newline at end of file
@@ -4,7 +4,7 @@ from apps.payment.models import Payment
 from django.utils import timezone
 from datetime import timedelta, datetime
 import pandas as pd
-from apps.core.utils import to_jalali
+from apps.core import jalali
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -30,7 +30,7 @@ def generate_sales_report(business=None, start_date=None, end_date=None):
     # اگر سفارشی وجود نداشت، داده‌های پیش‌فرض برگردان
     if not orders.exists():
         return {
-            'labels': [to_jalali(start_date).split(' ')[0], to_jalali(end_date).split(' ')[0]],
+            'labels': [jalali.to_jalali(start_date, jalali.DATE_FORMAT), jalali.to_jalali(end_date, jalali.DATE_FORMAT)],
             'values': [0, 0],
             'title': 'گزارش فروش',
             'type': 'bar'
@@ -38,7 +38,7 @@ def generate_sales_report(business=None, start_date=None, end_date=None):
 
     # استفاده از pandas برای تحلیل داده‌ها
     df = pd.DataFrame(list(orders.values('created_at', 'total_price')))
-    df['date'] = df['created_at'].apply(lambda x: to_jalali(x).split(' ')[0])
+    df['date'] = jalali.to_jalali_many(df['created_at'], jalali.DATE_FORMAT)
     
     # گروه‌بندی بر اساس تاریخ و محاسبه جمع فروش روزانه
     result = df.groupby('date').agg({'total_price': 'sum'}).reset_index()
@@ -71,7 +71,7 @@ def generate_profit_report(business=None, start_date=None, end_date=None):
     # اگر پرداختی وجود نداشت، داده‌های پیش‌فرض برگردان
     if not payments.exists():
         return {
-            'labels': [to_jalali(start_date).split(' ')[0], to_jalali(end_date).split(' ')[0]],
+            'labels': [jalali.to_jalali(start_date, jalali.DATE_FORMAT), jalali.to_jalali(end_date, jalali.DATE_FORMAT)],
             'values': [0, 0],
             'title': 'گزارش سود',
             'type': 'line'
@@ -79,7 +79,7 @@ def generate_profit_report(business=None, start_date=None, end_date=None):
 
     # استفاده از pandas برای تحلیل داده‌ها
     df = pd.DataFrame(list(payments.values('created_at', 'amount')))
-    df['date'] = df['created_at'].apply(lambda x: to_jalali(x).split(' ')[0])
+    df['date'] = jalali.to_jalali_many(df['created_at'], jalali.DATE_FORMAT)
     
     # گروه‌بندی بر اساس تاریخ و محاسبه جمع پرداخت‌های روزانه
     result = df.groupby('date').agg({'amount': 'sum'}).reset_index()
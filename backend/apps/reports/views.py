@@ -3,23 +3,19 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework import status
-from .models import Report, ReportCategory
-from .serializers import ReportSerializer, ReportCategorySerializer
-from .utils import (
-    generate_sales_report, 
-    generate_profit_report, 
-    generate_user_activity_report, 
-    generate_business_performance_report
-)
+from django.urls import reverse
+from .models import Report, ReportCategory, ReportJob
+from .serializers import ReportSerializer, ReportCategorySerializer, ReportJobSerializer
+from .jobs import notify_report_ready, submit_report_job
+from .refresh import refresh_report, supports_incremental
 from drf_spectacular.utils import extend_schema
-from apps.core.utils import log_error, to_jalali
+from apps.core import exports
+from apps.core.ratelimit import RateLimitThrottle, TOKEN_BUCKET, UserRateThrottle
+from apps.core.utils import log_error
 from django.db.models import Q
 from datetime import datetime
 from django.utils import timezone
-from apps.notification.models import Notification
 from apps.business.models import Business
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 
 class ReportCategoryListCreateView(APIView):
     """API برای دریافت لیست و ایجاد دسته‌بندی گزارش‌ها"""
@@ -95,39 +91,8 @@ class ReportListCreateView(APIView):
             if serializer.is_valid():
                 report = serializer.save(user=request.user)
                 
-                # ارسال اعلان برای ایجاد گزارش جدید
-                notification = Notification.objects.create(
-                    user=request.user,
-                    business=report.business,
-                    type='system',
-                    title=f'گزارش جدید: {report.title}',
-                    content=f'گزارش {report.title} با موفقیت تولید شد.',
-                    link=f'/reports/{report.id}',
-                    is_read=False,
-                    is_archived=False,
-                    priority=2
-                )
-                
-                # ارسال اعلان آنی با WebSocket (اگر تنظیم شده باشد)
-                try:
-                    channel_layer = get_channel_layer()
-                    async_to_sync(channel_layer.group_send)(
-                        f'notifications_{request.user.id}',
-                        {
-                            'type': 'send_notification',
-                            'notification': {
-                                'id': str(notification.id),
-                                'title': notification.title,
-                                'content': notification.content,
-                                'type': notification.type,
-                                'is_read': notification.is_read,
-                                'link': notification.link,
-                                'created_at': to_jalali(notification.created_at)
-                            }
-                        }
-                    )
-                except Exception as ws_error:
-                    log_error("خطا در ارسال اعلان آنی", ws_error)
+                # ارسال اعلان برای ایجاد گزارش جدید (ذخیره و ارسال آنی با WebSocket)
+                notify_report_ready(report)
                 
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -206,13 +171,21 @@ class ReportDetailView(APIView):
             log_error(f"خطا در حذف گزارش با شناسه {report_id}", e)
             return Response({'error': 'خطا در حذف گزارش'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class GenerateReportThrottle(RateLimitThrottle):
+    """سهمیه جداگانه تولید گزارش (چند درخواست پشت‌سرهم و سپس نرخ ثابت)"""
+    scope = 'reports.generate'
+    algorithm = TOKEN_BUCKET
+    burst = 5
+
+
 class GenerateReportView(APIView):
     """API برای تولید گزارش‌های پویا"""
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle, GenerateReportThrottle]
 
-    @extend_schema(summary="تولید گزارش پویا", responses={201: ReportSerializer})
+    @extend_schema(summary="تولید گزارش پویا", responses={202: ReportJobSerializer})
     def post(self, request):
-        """تولید گزارش پویا"""
+        """ثبت کار تولید گزارش پویا؛ وضعیت کار از مسیر jobs/<job_id>/ قابل پیگیری است"""
         try:
             # دریافت پارامترهای ورودی
             report_type = request.data.get('type')
@@ -245,24 +218,15 @@ class GenerateReportView(APIView):
                 except Business.DoesNotExist:
                     return Response({'error': 'کسب‌وکار یافت نشد'}, status=status.HTTP_404_NOT_FOUND)
             
-            # تولید داده‌های گزارش بر اساس نوع
-            data = None
-            if report_type == 'sales':
-                data = generate_sales_report(business, start_date, end_date)
-            elif report_type == 'profit':
-                data = generate_profit_report(business, start_date, end_date)
-            elif report_type == 'user_activity':
-                if not request.user.is_staff:
-                    return Response({'error': 'فقط ادمین می‌تواند گزارش فعالیت کاربران را تولید کند'}, 
-                                  status=status.HTTP_403_FORBIDDEN)
-                data = generate_user_activity_report(start_date, end_date)
-            elif report_type == 'business_performance':
-                if not business:
-                    return Response({'error': 'برای گزارش عملکرد کسب‌وکار، انتخاب کسب‌وکار الزامی است'}, 
-                                  status=status.HTTP_400_BAD_REQUEST)
-                data = generate_business_performance_report(business, start_date, end_date)
-            else:
+            # بررسی نوع گزارش و دسترسی‌ها
+            if report_type not in dict(Report.TYPE_CHOICES):
                 return Response({'error': 'نوع گزارش نامعتبر است'}, status=status.HTTP_400_BAD_REQUEST)
+            if report_type == 'user_activity' and not request.user.is_staff:
+                return Response({'error': 'فقط ادمین می‌تواند گزارش فعالیت کاربران را تولید کند'}, 
+                              status=status.HTTP_403_FORBIDDEN)
+            if report_type == 'business_performance' and not business:
+                return Response({'error': 'برای گزارش عملکرد کسب‌وکار، انتخاب کسب‌وکار الزامی است'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
             
             # دریافت دسته‌بندی
             category = None
@@ -272,60 +236,86 @@ class GenerateReportView(APIView):
                 except ReportCategory.DoesNotExist:
                     return Response({'error': 'دسته‌بندی یافت نشد'}, status=status.HTTP_404_NOT_FOUND)
             
-            # ایجاد گزارش
-            date_range = ""
-            if start_date and end_date:
-                jalali_start = to_jalali(start_date).split()[0]
-                jalali_end = to_jalali(end_date).split()[0]
-                date_range = f" از {jalali_start} تا {jalali_end}"
-            
-            report = Report.objects.create(
-                user=request.user,
-                business=business,
-                category=category,
-                type=report_type,
-                title=f"گزارش {dict(Report.TYPE_CHOICES).get(report_type, report_type)}{date_range}",
-                data=data,
-                is_public=is_public
+            # ثبت کار تولید گزارش؛ درخواست یکسان در حال اجرا همان کار را برمی‌گرداند
+            job, created = submit_report_job(
+                request.user, report_type, business, category, start_date, end_date, is_public
             )
             
-            # ارسال اعلان
-            notification = Notification.objects.create(
-                user=request.user,
-                business=report.business,
-                type='system',
-                title=f'گزارش جدید: {report.title}',
-                content=f'گزارش {report.title} با موفقیت تولید شد.',
-                link=f'/reports/{report.id}',
-                is_read=False,
-                is_archived=False,
-                priority=2
-            )
-            
-            # ارسال اعلان آنی با WebSocket
-            try:
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f'notifications_{request.user.id}',
-                    {
-                        'type': 'send_notification',
-                        'notification': {
-                            'id': str(notification.id),
-                            'title': notification.title,
-                            'content': notification.content,
-                            'type': notification.type,
-                            'is_read': notification.is_read,
-                            'link': notification.link,
-                            'created_at': to_jalali(notification.created_at)
-                        }
-                    }
-                )
-            except Exception as ws_error:
-                log_error("خطا در ارسال اعلان آنی", ws_error)
-            
-            serializer = ReportSerializer(report)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            data = ReportJobSerializer(job).data
+            data['deduplicated'] = not created
+            response = Response(data, status=status.HTTP_202_ACCEPTED)
+            response['Location'] = reverse('reports:report-job-detail', kwargs={'job_id': job.id})
+            return response
             
         except Exception as e:
             log_error("خطا در تولید گزارش", e)
             return Response({'error': 'خطا در تولید گزارش'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ReportJobDetailView(APIView):
+    """API برای پیگیری وضعیت و پیشرفت کار تولید گزارش"""
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(summary="دریافت وضعیت کار تولید گزارش", responses={200: ReportJobSerializer})
+    def get(self, request, job_id):
+        """دریافت وضعیت کار تولید گزارش"""
+        try:
+            job = ReportJob.objects.get(id=job_id)
+        except ReportJob.DoesNotExist:
+            return Response({'error': 'کار تولید گزارش یافت نشد'}, status=status.HTTP_404_NOT_FOUND)
+
+        if job.user != request.user and not request.user.is_staff:
+            return Response({'error': 'دسترسی غیرمجاز'}, status=status.HTTP_403_FORBIDDEN)
+
+        return Response(ReportJobSerializer(job).data)
+
+class ReportRefreshView(APIView):
+    """API برای بازخوانی تدریجی یا بازسازی کامل گزارش‌های فروش و سود"""
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(summary="بازخوانی گزارش", responses={200: ReportSerializer})
+    def post(self, request, report_id):
+        """ادغام ردیف‌های جدید در گزارش؛ با full=true کل بازه دوباره محاسبه می‌شود"""
+        try:
+            report = Report.objects.get(id=report_id)
+        except Report.DoesNotExist:
+            return Response({'error': 'گزارش یافت نشد'}, status=status.HTTP_404_NOT_FOUND)
+
+        if report.user != request.user and not request.user.is_staff:
+            return Response({'error': 'شما مجاز به بازخوانی این گزارش نیستید'}, status=status.HTTP_403_FORBIDDEN)
+
+        if not supports_incremental(report.type) or not report.aggregation_state:
+            return Response({'error': 'این گزارش از بازخوانی پشتیبانی نمی‌کند'}, status=status.HTTP_400_BAD_REQUEST)
+
+        full = str(request.data.get('full', '')).lower() in ('1', 'true')
+        try:
+            processed = refresh_report(report, full=full)
+        except Exception as e:
+            log_error(f"خطا در بازخوانی گزارش با شناسه {report_id}", e)
+            return Response({'error': 'خطا در بازخوانی گزارش'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        data = ReportSerializer(report).data
+        data['processed_rows'] = processed
+        return Response(data)
+
+
+class ReportExportView(APIView):
+    """API برای دریافت سری داده‌های گزارش به‌صورت فایل CSV/XLSX"""
+    permission_classes = [IsAuthenticated]
+    get_report = ReportDetailView.get_report
+
+    @extend_schema(summary="خروجی فایل گزارش")
+    def get(self, request, report_id):
+        """خروجی جریانی برچسب‌ها و مقادیر گزارش"""
+        report, error = self.get_report(report_id, request.user)
+        if error:
+            return error
+
+        file_format, use_jalali = exports.export_options(request)
+        if file_format is None:
+            return Response({'error': 'قالب خروجی باید csv یا xlsx باشد'}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = report.data or {}
+        rows = ([label, value] for label, value in zip(data.get('labels', []), data.get('values', [])))
+        return exports.streaming_export(
+            f'report-{report.id}', ['برچسب', data.get('title') or report.title], rows, file_format, use_jalali
+        )
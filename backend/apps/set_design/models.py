@@ -89,8 +89,8 @@ class SetDesign(BaseModel):
     def save(self, *args, **kwargs):
         # ارسال اطلاعیه خودکار پس از تغییر وضعیت
         old_status = None
-        if self.pk:
-            old_status = SetDesign.objects.get(pk=self.pk).status
+        if not self._state.adding:
+            old_status = SetDesign.objects.filter(pk=self.pk).values_list('status', flat=True).first()
         
         super().save(*args, **kwargs)
         
@@ -157,7 +157,7 @@ class SetDesign(BaseModel):
         # به‌روزرسانی وضعیت سفارش
         order = self.order_item.order
         if order.status == 'set_design':
-            order.status = 'printing_prep'
+            order.status = 'ready_for_print'
             order.save(update_fields=['status'])
 
     # نسخه بعدی را بسازد
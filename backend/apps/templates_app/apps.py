@@ -8,6 +8,5 @@ class TemplatesAppConfig(AppConfig):
     verbose_name = _('قالب‌ها و پروژه‌ها')
 
     def ready(self):
-        """اجرای کدهای لازم هنگام بارگذاری اپلیکیشن"""
-        # در صورت نیاز به سیگنال‌ها یا تنظیمات اولیه
-        pass
+        """اتصال سیگنال‌های ابطال جدول‌های قیمت"""
+        from . import signals  # noqa
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import mark_safe
+from apps.core import counters
 from apps.core.models import BaseModel, ThumbnailMixin
 from django.contrib.auth import get_user_model
 from apps.designs.models import Tag, DesignCategory, Design
@@ -86,14 +87,14 @@ class Template(BaseModel, ThumbnailMixin):
         return "بدون تصویر"
 
     def increment_view_count(self):
-        """افزایش شمارنده بازدید"""
+        """افزایش شمارنده بازدید (نوشتن دسته‌ای با apps.core.counters)"""
+        counters.increment(self, 'view_count')
         self.view_count += 1
-        self.save(update_fields=['view_count'])
 
     def increment_usage_count(self):
-        """افزایش شمارنده استفاده"""
+        """افزایش شمارنده استفاده (نوشتن دسته‌ای با apps.core.counters)"""
+        counters.increment(self, 'usage_count')
         self.usage_count += 1
-        self.save(update_fields=['usage_count'])
 
     def is_discounted(self):
         """بررسی وجود تخفیف"""
@@ -216,14 +217,9 @@ class UserTemplate(BaseModel):
     unique_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name=_("شناسه یکتا"))
 
     def calculate_final_price(self):
-        """محاسبه قیمت نهایی بر اساس قیمت قالب و مقادیر انتخاب شده در شرایط"""
-        base_price = self.template.final_price()
-        extra_price = 0
-        for user_section in self.user_sections.all():
-            for user_condition in user_section.user_conditions.all():
-                if user_condition.condition.affects_pricing and user_condition.value:
-                    extra_price += float(user_condition.condition.price_factor)
-        self.final_price = base_price + extra_price
+        """محاسبه قیمت نهایی بر اساس جدول قیمت قالب (apps.templates_app.pricing) و شرایط دارای مقدار"""
+        from .pricing import user_template_price
+        self.final_price = user_template_price(self)
         self.save(update_fields=['final_price'])
         return self.final_price
 
@@ -0,0 +1,209 @@
+"""
+قیمت‌گذاری دسته‌ای پیکربندی‌های قالب (quote) با جدول‌های قیمت کامپایل‌شده
+
+برای هر قالب یک جدول قیمت شامل قیمت نهایی قالب (با تخفیف)، ضریب قیمت شرط‌های مؤثر بر
+قیمت (Condition.price_factor) و اطلاعات دسترسی قالب (is_featured و creator_id) ساخته و در
+کش نگهداری می‌شود. ضریب محل‌های چاپ فعال
+(PrintLocation.price_modifier) و بخش‌های لباس (ClothingSection.default_price_modifier) در
+یک جدول مشترک کش می‌شوند. جدول‌های غایب در کش برای همه قالب‌های یک درخواست با یک کوئری
+برای هر مدل ساخته می‌شوند؛ بنابراین قیمت‌گذاری صدها پیکربندی به تعداد آن‌ها وابسته نیست.
+
+قیمت یک پیکربندی:
+    واحد = قیمت نهایی قالب + Σ ضریب شرط‌های انتخاب‌شده + Σ هزینه چاپ هر محل
+    هزینه چاپ محل = section_cost(قیمت طرح، ضریب محل چاپ + ضریب بخش لباس، تعداد چاپ محل)
+    کل = واحد × تعداد
+هزینه چاپ محل با همان تابع هزینه بخش سفارش (apps.orders.pricing.section_cost) و گرد
+کردن به ریال محاسبه می‌شود تا قیمت پیشنهادی با هزینه ذخیره‌شده بخش‌های سفارش یکی باشد.
+ضریب بخش لباس به ضریب محل چاپ اضافه می‌شود؛ برای محل بدون بخش لباس (مانند بخش‌های
+سفارش) این ضریب صفر است و فرمول دقیقاً همان فرمول سفارش است. بقیه مبالغ با Decimal و
+گرد کردن ROUND_HALF_UP به دو رقم اعشار محاسبه می‌شوند.
+
+جدول‌ها با سیگنال‌های ذخیره و حذف مدل‌های مرتبط (apps.templates_app.signals) باطل
+می‌شوند؛ تغییرات با queryset.update سیگنالی ارسال نمی‌کنند و تا پایان timeout دیده
+نمی‌شوند.
+
+تنظیمات:
+    TEMPLATE_PRICE_TABLE_TIMEOUT: مدت اعتبار جدول‌ها در کش به ثانیه (پیش‌فرض ۳۶۰۰)
+    TEMPLATE_QUOTE_MAX_CONFIGURATIONS: حداکثر پیکربندی‌های هر درخواست (پیش‌فرض ۵۰۰)
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.orders.pricing import section_cost
+
+KEY_PREFIX = 'quote'
+MODIFIERS_KEY = f'{KEY_PREFIX}:modifiers'
+_CENT = Decimal('0.01')
+
+
+def money(value):
+    """گرد کردن مبلغ به دو رقم اعشار"""
+    return Decimal(value or 0).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def _table_key(template_id):
+    return f'{KEY_PREFIX}:template:{template_id}'
+
+
+def _timeout():
+    return getattr(settings, 'TEMPLATE_PRICE_TABLE_TIMEOUT', 3600)
+
+
+def _compile_templates(template_ids):
+    """ساخت جدول قیمت قالب‌ها: {شناسه: {'base', 'conditions': {شناسه شرط: ضریب}, 'is_featured', 'creator_id'}}"""
+    from .models import Condition, Template
+
+    tables = {}
+    templates = Template.objects.filter(pk__in=template_ids).only(
+        'pk', 'price', 'discount_price', 'is_featured', 'creator_id'
+    )
+    for template in templates:
+        tables[str(template.pk)] = {
+            'base': money(template.final_price()), 'conditions': {},
+            'is_featured': template.is_featured, 'creator_id': template.creator_id,
+        }
+    rows = Condition.objects.filter(
+        section__template__in=template_ids, affects_pricing=True
+    ).values_list('section__template', 'pk', 'price_factor')
+    for template_id, condition_id, factor in rows:
+        tables[str(template_id)]['conditions'][str(condition_id)] = Decimal(factor)
+    return tables
+
+
+def template_tables(template_ids):
+    """جدول قیمت قالب‌ها از کش (ساخت جدول‌های غایب در کش)؛ قالب‌های ناموجود در خروجی نیستند"""
+    template_ids = {str(template_id) for template_id in template_ids}
+    keys = {_table_key(template_id): template_id for template_id in template_ids}
+    found = cache.get_many(keys)
+    tables = {keys[key]: table for key, table in found.items()}
+    missing = template_ids - tables.keys()
+    if missing:
+        compiled = _compile_templates(missing)
+        cache.set_many({_table_key(template_id): table for template_id, table in compiled.items()}, _timeout())
+        tables.update(compiled)
+    return tables
+
+
+def modifier_tables():
+    """ضریب محل‌های چاپ فعال و بخش‌های لباس: {'locations': {...}, 'clothing_sections': {...}}"""
+    tables = cache.get(MODIFIERS_KEY)
+    if tables is None:
+        from apps.clothing.models import ClothingSection
+        from apps.designs.models import PrintLocation
+
+        tables = {
+            'locations': {
+                str(pk): Decimal(modifier) for pk, modifier in
+                PrintLocation.objects.filter(is_active=True).values_list('pk', 'price_modifier')
+            },
+            'clothing_sections': {
+                str(pk): Decimal(modifier) for pk, modifier in
+                ClothingSection.objects.values_list('pk', 'default_price_modifier')
+            },
+        }
+        cache.set(MODIFIERS_KEY, tables, _timeout())
+    return tables
+
+
+def invalidate_templates(template_ids):
+    """ابطال جدول قیمت قالب‌ها"""
+    cache.delete_many([_table_key(template_id) for template_id in template_ids if template_id is not None])
+
+
+def invalidate_modifiers():
+    """ابطال جدول ضریب محل‌های چاپ و بخش‌های لباس"""
+    cache.delete(MODIFIERS_KEY)
+
+
+def can_access(table, user):
+    """دسترسی کاربر به قالب جدول: قالب عمومی، ایجاد شده توسط کاربر یا کاربر ادمین"""
+    return table['is_featured'] or table['creator_id'] == user.pk or user.is_staff
+
+
+def _price(configuration, table, modifiers):
+    """قیمت یک پیکربندی؛ خروجی: (نتیجه، خطاها)"""
+    errors = {}
+    conditions = Decimal(0)
+    unknown = []
+    for condition_id in configuration.get('conditions', []):
+        factor = table['conditions'].get(str(condition_id))
+        if factor is None:
+            unknown.append(str(condition_id))
+        else:
+            conditions += factor
+    if unknown:
+        errors['conditions'] = [f'شرط مؤثر بر قیمت در این قالب یافت نشد: {condition_id}' for condition_id in unknown]
+
+    placements, placement_errors = Decimal(0), {}
+    for index, placement in enumerate(configuration.get('placements', [])):
+        location = modifiers['locations'].get(str(placement['location_id']))
+        clothing_section_id = placement.get('clothing_section_id')
+        clothing = modifiers['clothing_sections'].get(str(clothing_section_id)) if clothing_section_id else Decimal(0)
+        missing = {}
+        if location is None:
+            missing['location_id'] = ['محل چاپ یافت نشد']
+        if clothing is None:
+            missing['clothing_section_id'] = ['بخش لباس یافت نشد']
+        if missing:
+            placement_errors[index] = missing
+            continue
+        placements += section_cost(placement.get('design_price'), location + clothing, placement.get('quantity', 1))
+    if placement_errors:
+        errors['placements'] = placement_errors
+    if errors:
+        return None, errors
+
+    unit_price = money(table['base'] + conditions + placements)
+    return {
+        'base_price': table['base'],
+        'conditions_price': money(conditions),
+        'placements_price': money(placements),
+        'unit_price': unit_price,
+        'quantity': configuration['quantity'],
+        'total_price': money(unit_price * configuration['quantity']),
+    }, None
+
+
+def quote(configurations, user):
+    """
+    قیمت‌گذاری دسته‌ای پیکربندی‌های اعتبارسنجی‌شده (QuoteConfigurationSerializer)
+
+    فقط قالب‌های قابل دسترسی کاربر قیمت‌گذاری می‌شوند (can_access).
+    خروجی: لیست نتایج به ترتیب ورودی؛ هر نتیجه {'index', 'template_id', ...قیمت‌ها} یا
+    {'index', 'template_id', 'errors'} است.
+    """
+    tables = template_tables(configuration['template_id'] for configuration in configurations)
+    modifiers = modifier_tables()
+    results = []
+    for index, configuration in enumerate(configurations):
+        template_id = str(configuration['template_id'])
+        result = {'index': index, 'template_id': template_id}
+        table = tables.get(template_id)
+        if table is None:
+            result['errors'] = {'template_id': ['قالب یافت نشد']}
+        elif not can_access(table, user):
+            result['errors'] = {'template_id': ['دسترسی غیرمجاز']}
+        else:
+            prices, errors = _price(configuration, table, modifiers)
+            if errors:
+                result['errors'] = errors
+            else:
+                result.update(prices)
+        results.append(result)
+    return results
+
+
+def user_template_price(user_template):
+    """قیمت نهایی قالب کاربر از جدول قیمت قالب و شرط‌های دارای مقدار (یک کوئری)"""
+    from .models import UserCondition
+
+    table = template_tables([user_template.template_id]).get(str(user_template.template_id))
+    if table is None:
+        return None
+    selected = UserCondition.objects.filter(user_section__user_template=user_template).exclude(
+        value=''
+    ).values_list('condition_id', flat=True)
+    extra = sum((table['conditions'].get(str(condition_id), Decimal(0)) for condition_id in selected), Decimal(0))
+    return money(table['base'] + extra)
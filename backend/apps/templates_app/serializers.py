@@ -1,6 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Template, Section, DesignInput, Condition, UserTemplate, UserSection, UserDesignInput, UserCondition, SetDimensions
-from apps.core.utils import to_jalali
+from apps.core.serializers import JalaliDateTimeField, JalaliListSerializer
 from apps.designs.models import Tag, DesignCategory, Design
 from apps.designs.serializers import TagSerializer, DesignCategorySerializer, DesignSerializer
 
@@ -10,12 +11,13 @@ class TemplateSerializer(serializers.ModelSerializer):
     categories = DesignCategorySerializer(many=True, read_only=True)
     category_ids = serializers.PrimaryKeyRelatedField(queryset=DesignCategory.objects.all(), source='categories', many=True, write_only=True, required=False)
     created_by = serializers.StringRelatedField(source='creator')
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
     thumbnail_preview = serializers.ReadOnlyField()
 
     class Meta:
         model = Template
+        list_serializer_class = JalaliListSerializer
         fields = [
             'id', 'name', 'slug', 'title', 'description', 'price', 'discount_price', 'discount_percent',
             'status', 'is_premium', 'is_featured', 'view_count', 'usage_count', 'preview_image', 'thumbnail',
@@ -23,29 +25,18 @@ class TemplateSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'thumbnail_preview'
         ]
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
 class SectionSerializer(serializers.ModelSerializer):
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
 
     class Meta:
         model = Section
+        list_serializer_class = JalaliListSerializer
         fields = [
             'id', 'template', 'name', 'slug', 'description', 'order', 'is_required',
             'unlimited_design_inputs', 'max_design_inputs', 'preview_image', 'created_at', 'updated_at'
         ]
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
 class DesignInputSerializer(serializers.ModelSerializer):
     default_design = DesignSerializer(read_only=True)
     default_design_id = serializers.PrimaryKeyRelatedField(queryset=Design.objects.all(), source='default_design', write_only=True, required=False)
@@ -55,11 +46,12 @@ class DesignInputSerializer(serializers.ModelSerializer):
     allowed_category_ids = serializers.PrimaryKeyRelatedField(queryset=DesignCategory.objects.all(), source='allowed_categories', many=True, write_only=True, required=False)
     allowed_tags = TagSerializer(many=True, read_only=True)
     allowed_tag_ids = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all(), source='allowed_tags', many=True, write_only=True, required=False)
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
 
     class Meta:
         model = DesignInput
+        list_serializer_class = JalaliListSerializer
         fields = [
             'id', 'section', 'name', 'description', 'order', 'is_required', 'default_design', 'default_design_id',
             'allowed_designs', 'allowed_design_ids', 'allowed_categories', 'allowed_category_ids', 
@@ -67,19 +59,14 @@ class DesignInputSerializer(serializers.ModelSerializer):
             'max_width', 'max_height', 'created_at', 'updated_at'
         ]
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
 class ConditionSerializer(serializers.ModelSerializer):
     options_list = serializers.SerializerMethodField()
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
 
     class Meta:
         model = Condition
+        list_serializer_class = JalaliListSerializer
         fields = [
             'id', 'section', 'name', 'description', 'condition_type', 'options', 'options_list', 'default_value',
             'is_required', 'order', 'affects_pricing', 'price_factor', 'created_at', 'updated_at'
@@ -88,29 +75,18 @@ class ConditionSerializer(serializers.ModelSerializer):
     def get_options_list(self, obj):
         return obj.get_options_list()
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
 class UserTemplateSerializer(serializers.ModelSerializer):
     template = TemplateSerializer(read_only=True)
     template_id = serializers.PrimaryKeyRelatedField(queryset=Template.objects.all(), source='template', write_only=True)
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
 
     class Meta:
         model = UserTemplate
+        list_serializer_class = JalaliListSerializer
         fields = ['id', 'user', 'template', 'template_id', 'name', 'description', 'is_completed', 'final_price', 'unique_id', 'created_at', 'updated_at']
         read_only_fields = ['user', 'final_price', 'unique_id']
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
     def create(self, validated_data):
         user = self.context['request'].user
         validated_data['user'] = user
@@ -145,20 +121,15 @@ class UserTemplateSerializer(serializers.ModelSerializer):
 
 class UserSectionSerializer(serializers.ModelSerializer):
     section = SectionSerializer(read_only=True)
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
     user_design_inputs = serializers.SerializerMethodField()
     user_conditions = serializers.SerializerMethodField()
 
     class Meta:
         model = UserSection
+        list_serializer_class = JalaliListSerializer
         fields = ['id', 'user_template', 'section', 'is_completed', 'user_design_inputs', 'user_conditions', 'created_at', 'updated_at']
-
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
         
     def get_user_design_inputs(self, obj):
         return UserDesignInputSerializer(obj.user_design_inputs.all(), many=True).data
@@ -170,46 +141,56 @@ class UserDesignInputSerializer(serializers.ModelSerializer):
     design = DesignSerializer(read_only=True)
     design_id = serializers.PrimaryKeyRelatedField(queryset=Design.objects.all(), source='design', write_only=True, required=False, allow_null=True)
     design_input = DesignInputSerializer(read_only=True)
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
 
     class Meta:
         model = UserDesignInput
+        list_serializer_class = JalaliListSerializer
         fields = ['id', 'user_section', 'design_input', 'design', 'design_id', 'order', 'created_at', 'updated_at']
         read_only_fields = ['user_section', 'design_input', 'order']
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
 class UserConditionSerializer(serializers.ModelSerializer):
     condition = ConditionSerializer(read_only=True)
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
 
     class Meta:
         model = UserCondition
+        list_serializer_class = JalaliListSerializer
         fields = ['id', 'user_section', 'condition', 'value', 'created_at', 'updated_at']
         read_only_fields = ['user_section', 'condition']
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
 class SetDimensionsSerializer(serializers.ModelSerializer):
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
 
     class Meta:
         model = SetDimensions
+        list_serializer_class = JalaliListSerializer
         fields = ['id', 'name', 'width', 'height', 'created_at', 'updated_at']
-
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at) 
\ No newline at end of file
+class QuotePlacementSerializer(serializers.Serializer):
+    """محل چاپ یک پیکربندی: قیمت طرح × (ضریب محل چاپ + ضریب بخش لباس) × تعداد، گرد شده به ریال"""
+    location_id = serializers.UUIDField()
+    clothing_section_id = serializers.IntegerField(required=False, allow_null=True)
+    design_price = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0, default=0)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+class QuoteConfigurationSerializer(serializers.Serializer):
+    """یک پیکربندی قالب برای قیمت‌گذاری"""
+    template_id = serializers.UUIDField()
+    conditions = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+    placements = QuotePlacementSerializer(many=True, required=False, default=list)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+class QuoteRequestSerializer(serializers.Serializer):
+    """درخواست قیمت‌گذاری دسته‌ای پیکربندی‌ها"""
+    configurations = QuoteConfigurationSerializer(many=True)
+
+    def validate_configurations(self, value):
+        if not value:
+            raise serializers.ValidationError("حداقل یک پیکربندی لازم است")
+        max_configurations = getattr(settings, 'TEMPLATE_QUOTE_MAX_CONFIGURATIONS', 500)
+        if len(value) > max_configurations:
+            raise serializers.ValidationError(f"حداکثر {max_configurations} پیکربندی در هر درخواست مجاز است")
+        return value
@@ -0,0 +1,73 @@
+"""
+ابطال داده‌های کش‌شده قالب‌ها با تغییر مدل‌های مرتبط
+
+    جدول‌های قیمت کامپایل‌شده (apps.templates_app.pricing)
+    نسخه درخت قالب (apps.templates_app.tree)
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.clothing.models import ClothingSection
+from apps.designs.models import PrintLocation
+from . import pricing, tree
+from .models import Condition, DesignInput, Section, SectionRule, Template
+
+
+def _template_of(section_id):
+    return Section.objects.filter(pk=section_id).values_list('template_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Template)
+def invalidate_template(sender, instance, **kwargs):
+    pricing.invalidate_templates([instance.pk])
+    tree.bump(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Section)
+def invalidate_section(sender, instance, **kwargs):
+    pricing.invalidate_templates([instance.template_id])
+    tree.bump(instance.template_id)
+
+
+@receiver([post_save, post_delete], sender=Condition)
+def invalidate_condition(sender, instance, **kwargs):
+    template_id = _template_of(instance.section_id)
+    pricing.invalidate_templates([template_id])
+    tree.bump(template_id)
+
+
+@receiver([post_save, post_delete], sender=DesignInput)
+@receiver([post_save, post_delete], sender=SectionRule)
+def invalidate_section_child(sender, instance, **kwargs):
+    tree.bump(_template_of(instance.section_id))
+
+
+@receiver(m2m_changed, sender=Template.tags.through)
+@receiver(m2m_changed, sender=Template.categories.through)
+def invalidate_template_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # تغییر از سمت برچسب یا دسته‌بندی؛ pk_set شناسه قالب‌ها است (در post_clear خالی)
+        tree.bump(*(pk_set or ()))
+    else:
+        tree.bump(instance.pk)
+
+
+@receiver(m2m_changed, sender=DesignInput.allowed_designs.through)
+@receiver(m2m_changed, sender=DesignInput.allowed_categories.through)
+@receiver(m2m_changed, sender=DesignInput.allowed_tags.through)
+def invalidate_design_input_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        template_ids = DesignInput.objects.filter(pk__in=pk_set or ()).values_list('section__template_id', flat=True)
+        tree.bump(*template_ids)
+    else:
+        tree.bump(_template_of(instance.section_id))
+
+
+@receiver([post_save, post_delete], sender=PrintLocation)
+@receiver([post_save, post_delete], sender=ClothingSection)
+def invalidate_modifier_prices(sender, instance, **kwargs):
+    pricing.invalidate_modifiers()
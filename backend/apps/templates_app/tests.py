@@ -1,5 +1,5 @@
 import json
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
@@ -416,3 +416,185 @@ class UserTemplateAPITests(TestCase):
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(UserTemplate.objects.count(), 0)
+
+class TemplateQuoteTests(TestCase):
+    """تست‌های قیمت‌گذاری دسته‌ای با جدول‌های قیمت کامپایل‌شده"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.clothing.models import ClothingSection
+        from apps.designs.models import PrintLocation
+        cache.clear()
+        self.user = User.objects.create_user(username='quote_user', email='quote@example.com', password='testpassword')
+        self.template = Template.objects.create(
+            name='قالب قیمت', title='قالب قیمت', price='1000.00', discount_price='900.00', creator=self.user
+        )
+        section = Section.objects.create(template=self.template, name='بخش قیمت')
+        self.condition = Condition.objects.create(
+            section=section, name='آستین بلند', condition_type='checkbox', affects_pricing=True, price_factor='150.50'
+        )
+        self.free_condition = Condition.objects.create(section=section, name='رنگ', condition_type='color')
+        self.location = PrintLocation.objects.create(code='front-q', name='جلو', location_type='front', price_modifier='1.50')
+        self.clothing_section = ClothingSection.objects.create(name='جیب', code='pocket-q', default_price_modifier='0.25')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('template_quote')
+
+    def _configuration(self, **overrides):
+        data = {
+            'template_id': str(self.template.pk),
+            'conditions': [str(self.condition.pk)],
+            'placements': [{
+                'location_id': str(self.location.pk), 'clothing_section_id': self.clothing_section.pk,
+                'design_price': '200.00',
+            }],
+            'quantity': 3,
+        }
+        data.update(overrides)
+        return data
+
+    def test_quote_prices_configurations(self):
+        """قیمت با تخفیف قالب، ضریب شرط و ضریب محل چاپ و بخش لباس محاسبه می‌شود"""
+        response = self.client.post(self.url, {'configurations': [self._configuration()]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.data['results'][0]
+        self.assertEqual(str(result['unit_price']), '1400.50')
+        self.assertEqual(str(result['total_price']), '4201.50')
+
+    def test_quote_placement_cost_matches_order_section_cost(self):
+        """هزینه چاپ محل با فرمول و گرد کردن هزینه بخش سفارش محاسبه می‌شود"""
+        from apps.orders.pricing import section_cost
+        from . import pricing
+        placement = {'location_id': str(self.location.pk), 'design_price': '100.30', 'quantity': 2}
+        result = pricing.quote([self._configuration(conditions=[], placements=[placement])], self.user)[0]
+        self.assertEqual(result['placements_price'], section_cost('100.30', self.location.price_modifier, 2))
+        self.assertEqual(str(result['placements_price']), '301.00')
+
+    def test_quote_reports_errors_per_configuration(self):
+        """خطای هر پیکربندی جداگانه گزارش می‌شود"""
+        import uuid
+        configurations = [
+            self._configuration(),
+            self._configuration(template_id=str(uuid.uuid4())),
+            self._configuration(conditions=[str(self.free_condition.pk)]),
+        ]
+        response = self.client.post(self.url, {'configurations': configurations}, format='json')
+        results = response.data['results']
+        self.assertNotIn('errors', results[0])
+        self.assertIn('template_id', results[1]['errors'])
+        self.assertIn('conditions', results[2]['errors'])
+
+    def test_quote_checks_template_access(self):
+        """قالب خصوصی کاربر دیگر فقط برای سازنده، قالب عمومی یا ادمین قیمت‌گذاری می‌شود"""
+        stranger = User.objects.create_user(username='quote_stranger', email='stranger@example.com', password='testpassword')
+        self.client.force_authenticate(user=stranger)
+        response = self.client.post(self.url, {'configurations': [self._configuration()]}, format='json')
+        self.assertEqual(response.data['results'][0]['errors'], {'template_id': ['دسترسی غیرمجاز']})
+
+        stranger.is_staff = True
+        stranger.save()
+        response = self.client.post(self.url, {'configurations': [self._configuration()]}, format='json')
+        self.assertNotIn('errors', response.data['results'][0])
+
+        stranger.is_staff = False
+        stranger.save()
+        self.template.is_featured = True
+        self.template.save()
+        response = self.client.post(self.url, {'configurations': [self._configuration()]}, format='json')
+        self.assertNotIn('errors', response.data['results'][0])
+
+    def test_quote_query_count_is_constant_and_tables_are_invalidated(self):
+        """جدول‌ها کش می‌شوند و با تغییر ضریب شرط یا محل چاپ باطل می‌شوند"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from . import pricing
+        with CaptureQueriesContext(connection) as first:
+            pricing.quote([self._configuration()], self.user)
+        with CaptureQueriesContext(connection) as cached:
+            pricing.quote([self._configuration() for _ in range(200)], self.user)
+        self.assertGreater(len(first), 0)
+        self.assertEqual(len(cached), 0)
+
+        self.condition.price_factor = '100.50'
+        self.condition.save()
+        self.location.price_modifier = '2.00'
+        self.location.save()
+        result = pricing.quote([self._configuration()], self.user)[0]
+        self.assertEqual(str(result['unit_price']), '1450.50')
+
+    def test_user_template_final_price(self):
+        """قیمت نهایی قالب کاربر از جدول قیمت و شرط‌های دارای مقدار محاسبه می‌شود"""
+        user_template = UserTemplate.objects.create(user=self.user, template=self.template)
+        user_section = UserSection.objects.create(user_template=user_template, section=self.condition.section)
+        UserCondition.objects.create(user_section=user_section, condition=self.condition, value='1')
+        UserCondition.objects.create(user_section=user_section, condition=self.free_condition, value='red')
+        self.assertEqual(str(user_template.calculate_final_price()), '1050.50')
+
+class TemplateTreeTests(TestCase):
+    """تست‌های درخت کامل قالب با کش و ETag"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from .models import SectionRule
+        cache.clear()
+        self.user = User.objects.create_user(username='tree_user', email='tree@example.com', password='testpassword')
+        self.other = User.objects.create_user(username='tree_other', email='tree_other@example.com', password='testpassword')
+        self.template = Template.objects.create(name='قالب درخت', title='قالب درخت', price='1000.00', creator=self.user)
+        for order in range(2):
+            section = Section.objects.create(template=self.template, name=f'بخش {order}', order=order)
+            DesignInput.objects.create(section=section, name='ورودی', order=0)
+            Condition.objects.create(section=section, name='رنگ', condition_type='select', options='قرمز, آبی')
+            SectionRule.objects.create(section=section, name='حداقل DPI', min_dpi=300)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('template_tree', args=[self.template.pk])
+
+    def test_tree_contains_full_graph(self):
+        """بخش‌ها با ورودی‌ها، شرط‌ها و قوانینشان برگردانده می‌شوند"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sections = response.data['sections']
+        self.assertEqual([section['name'] for section in sections], ['بخش 0', 'بخش 1'])
+        self.assertEqual(len(sections[0]['design_inputs']), 1)
+        self.assertEqual(sections[0]['conditions'][0]['options_list'], ['قرمز', 'آبی'])
+        self.assertEqual(sections[1]['rules'][0]['min_dpi'], 300)
+
+    @override_settings(API_LOG_ENABLED=False)
+    def test_tree_query_count_is_fixed_and_cached(self):
+        """تعداد کوئری‌ها به اندازه درخت وابسته نیست و پاسخ تکراری بدون کوئری است"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from . import tree
+        with CaptureQueriesContext(connection) as small:
+            tree.build(self.template.pk)
+        section = Section.objects.create(template=self.template, name='بخش 2', order=2)
+        DesignInput.objects.bulk_create([DesignInput(section=section, order=i) for i in range(10)])
+        with CaptureQueriesContext(connection) as large:
+            tree.build(self.template.pk)
+        self.assertEqual(len(large), len(small))
+
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as cached:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(cached), 0)
+
+    def test_tree_etag_changes_with_template(self):
+        """درخواست با ETag فعلی ۳۰۴ می‌گیرد و تغییر شرط ETag را تغییر می‌دهد"""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        condition = Condition.objects.filter(section__template=self.template).first()
+        condition.price_factor = '50.00'
+        condition.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_tree_access(self):
+        """قالب غیرعمومی کاربر دیگر قابل دریافت نیست"""
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        missing = reverse('template_tree', args=['not-a-uuid'])
+        self.assertEqual(self.client.get(missing).status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,165 @@
+"""
+درخت کامل قالب برای ویرایشگر: قالب ← بخش‌ها ← ورودی‌های طرح، شرط‌ها و قوانین
+
+درخت با تعداد ثابت کوئری (یکی برای هر مدل و هر رابطه چند‌به‌چند، مستقل از تعداد بخش‌ها
+و ورودی‌ها) با values ساخته می‌شود و به‌صورت یک blob برای هر نسخه قالب در کش نگهداری
+می‌شود. نسخه هر قالب در کش است و سیگنال‌های ذخیره، حذف و تغییر روابط چند‌به‌چند
+مدل‌های درخت (apps.templates_app.signals) آن را افزایش می‌دهند؛ blobهای قدیمی دیگر
+خوانده نمی‌شوند و با پایان timeout حذف می‌شوند. مقدار اولیه نسخه از زمان گرفته می‌شود
+تا حذف کلید نسخه از کش باعث برگشت به نسخه قدیمی نشود.
+
+ETag از شناسه و نسخه قالب ساخته می‌شود؛ برای درخواست تکراری با blob موجود در کش هیچ
+کوئری‌ای اجرا نمی‌شود (اطلاعات دسترسی هم در blob است).
+
+تنظیمات:
+    TEMPLATE_TREE_CACHE_TIMEOUT: مدت اعتبار blobها به ثانیه (پیش‌فرض ۳۶۰۰)
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.utils import make_etag
+from .models import Condition, DesignInput, Section, SectionRule, Template
+
+KEY_PREFIX = 'template-tree'
+
+
+def _version_key(template_id):
+    return f'{KEY_PREFIX}:version:{template_id}'
+
+
+def _blob_key(template_id, version):
+    return f'{KEY_PREFIX}:blob:{template_id}:{version}'
+
+
+def get_version(template_id):
+    """نسخه فعلی درخت قالب (ایجاد نسخه اولیه در صورت نبود)"""
+    key = _version_key(template_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump(*template_ids):
+    """افزایش نسخه درخت قالب‌ها"""
+    for template_id in set(template_ids):
+        if template_id is None:
+            continue
+        key = _version_key(template_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def etag(template_id, version):
+    return make_etag(KEY_PREFIX, template_id, version)
+
+
+def _url(model, field, name):
+    return model._meta.get_field(field).storage.url(name) if name else None
+
+
+def _grouped(rows, key):
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.pop(key), []).append(row)
+    return groups
+
+
+def _related_ids(manager, source, target, **filters):
+    """شناسه‌های یک رابطه چند‌به‌چند با یک کوئری روی جدول واسط: {شناسه مبدأ: [شناسه‌ها]}"""
+    ids = {}
+    for source_id, target_id in manager.through.objects.filter(**filters).values_list(source, target):
+        ids.setdefault(source_id, []).append(target_id)
+    return ids
+
+
+def build(template_id):
+    """
+    ساخت درخت قالب؛ خروجی: {'tree', 'is_featured', 'creator_id'} یا None برای قالب ناموجود
+    """
+    template = Template.objects.filter(pk=template_id).values(
+        'id', 'name', 'slug', 'title', 'description', 'price', 'discount_price', 'discount_percent', 'status',
+        'is_premium', 'is_featured', 'preview_image', 'thumbnail', 'creator_id', 'updated_at'
+    ).first()
+    if template is None:
+        return None
+    template_id = template['id']
+    access = {'is_featured': template['is_featured'], 'creator_id': template['creator_id']}
+    template['preview_image'] = _url(Template, 'preview_image', template['preview_image'])
+    template['thumbnail'] = _url(Template, 'thumbnail', template['thumbnail'])
+    template['tag_ids'] = _related_ids(Template.tags, 'template_id', 'tag_id', template_id=template_id).get(template_id, [])
+    template['category_ids'] = _related_ids(
+        Template.categories, 'template_id', 'designcategory_id', template_id=template_id
+    ).get(template_id, [])
+
+    sections = list(Section.objects.filter(template_id=template_id).order_by('order', 'pk').values(
+        'id', 'name', 'slug', 'description', 'order', 'is_required', 'unlimited_design_inputs',
+        'max_design_inputs', 'preview_image'
+    ))
+
+    in_template = {'section__template_id': template_id}
+    inputs = list(DesignInput.objects.filter(**in_template).order_by('order', 'pk').values(
+        'id', 'section_id', 'name', 'description', 'order', 'is_required', 'default_design_id',
+        'min_width', 'min_height', 'max_width', 'max_height'
+    ))
+    through = {'designinput__section__template_id': template_id}
+    allowed = {
+        'allowed_design_ids': _related_ids(DesignInput.allowed_designs, 'designinput_id', 'design_id', **through),
+        'allowed_category_ids': _related_ids(
+            DesignInput.allowed_categories, 'designinput_id', 'designcategory_id', **through
+        ),
+        'allowed_tag_ids': _related_ids(DesignInput.allowed_tags, 'designinput_id', 'tag_id', **through),
+    }
+    for design_input in inputs:
+        for name, ids in allowed.items():
+            design_input[name] = ids.get(design_input['id'], [])
+    inputs = _grouped(inputs, 'section_id')
+
+    conditions = list(Condition.objects.filter(**in_template).order_by('order', 'pk').values(
+        'id', 'section_id', 'name', 'description', 'condition_type', 'options', 'default_value',
+        'is_required', 'order', 'affects_pricing', 'price_factor'
+    ))
+    for condition in conditions:
+        condition['options_list'] = [option.strip() for option in condition['options'].split(',')] if condition['options'] else []
+    conditions = _grouped(conditions, 'section_id')
+
+    rules = _grouped(list(SectionRule.objects.filter(**in_template, is_active=True).order_by('name', 'pk').values(
+        'id', 'section_id', 'name', 'description', 'min_width', 'max_width', 'min_height', 'max_height',
+        'min_dpi', 'allowed_design_types', 'allowed_file_types', 'max_file_size'
+    )), 'section_id')
+
+    for section in sections:
+        section['preview_image'] = _url(Section, 'preview_image', section['preview_image'])
+        section['design_inputs'] = inputs.get(section['id'], [])
+        section['conditions'] = conditions.get(section['id'], [])
+        section['rules'] = rules.get(section['id'], [])
+    del template['creator_id']
+    template['sections'] = sections
+    return {'tree': template, **access}
+
+
+def get(template_id):
+    """
+    درخت قالب از کش (ساخت و ذخیره در صورت نبود)
+
+    خروجی: (blob، ETag) یا (None، None) برای قالب ناموجود
+    """
+    try:
+        template_id = str(uuid.UUID(str(template_id)))
+    except ValueError:
+        return None, None
+    version = get_version(template_id)
+    key = _blob_key(template_id, version)
+    blob = cache.get(key)
+    if blob is None:
+        blob = build(template_id)
+        if blob is None:
+            return None, None
+        cache.set(key, blob, getattr(settings, 'TEMPLATE_TREE_CACHE_TIMEOUT', 3600))
+    return blob, etag(template_id, version)
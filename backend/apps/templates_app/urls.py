@@ -5,13 +5,18 @@ from .views import (
     UserTemplateListCreateView, UserTemplateDetailView,
     UserSectionListView, UserSectionDetailView,
     UserDesignInputDetailView, UserConditionDetailView,
-    SetDimensionsListCreateView, SetDimensionsDetailView
+    SetDimensionsListCreateView, SetDimensionsDetailView,
+    TemplateTreeView, QuoteView
 )
 
 urlpatterns = [
     # مسیرهای مربوط به قالب‌ها
     path('templates/', TemplateListCreateView.as_view(), name='template_list_create'),
     path('templates/<str:template_id>/', TemplateDetailView.as_view(), name='template_detail'),
+    path('templates/<str:template_id>/tree/', TemplateTreeView.as_view(), name='template_tree'),
+    
+    # قیمت‌گذاری دسته‌ای پیکربندی‌های قالب
+    path('quotes/', QuoteView.as_view(), name='template_quote'),
     
     # مسیرهای مربوط به بخش‌ها
     path('templates/<str:template_id>/sections/', SectionListCreateView.as_view(), name='section_list_create'),
@@ -9,9 +9,12 @@ from drf_spectacular.utils import extend_schema
 from .models import Template, Section, DesignInput, Condition, UserTemplate, UserSection, UserDesignInput, UserCondition, SetDimensions
 from .serializers import (
     TemplateSerializer, SectionSerializer, DesignInputSerializer, ConditionSerializer,
-    UserTemplateSerializer, UserSectionSerializer, UserDesignInputSerializer, UserConditionSerializer, SetDimensionsSerializer
+    UserTemplateSerializer, UserSectionSerializer, UserDesignInputSerializer, UserConditionSerializer, SetDimensionsSerializer,
+    QuoteRequestSerializer
 )
-from apps.core.utils import log_error, validate_file_size, validate_file_format
+from . import pricing, tree
+from apps.core import counters
+from apps.core.utils import etag_matches, log_error, validate_file_size, validate_file_format
 
 # نمایش‌ها برای قالب‌ها
 
@@ -80,7 +83,8 @@ class TemplateDetailView(APIView):
             if not template.is_featured and template.creator != request.user and not request.user.is_staff:
                 return Response({'error': 'دسترسی غیرمجاز'}, status=status.HTTP_403_FORBIDDEN)
             
-            # افزایش تعداد بازدید
+            # افزایش تعداد بازدید (همراه با بازدیدهای ثبت‌نشده در پایگاه داده)
+            counters.apply_pending(template)
             template.increment_view_count()
             
             serializer = TemplateSerializer(template)
@@ -135,6 +139,49 @@ class TemplateDetailView(APIView):
             log_error("Error deleting template", e)
             return Response({'error': 'خطا در حذف قالب'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class TemplateTreeView(APIView):
+    """API درخت کامل قالب (بخش‌ها، ورودی‌های طرح، شرط‌ها و قوانین) برای ویرایشگر"""
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(summary="دریافت درخت کامل قالب")
+    def get(self, request, template_id):
+        """درخت قالب از کش با ETag؛ با If-None-Match برابر پاسخ ۳۰۴ برمی‌گردد"""
+        try:
+            blob, etag = tree.get(template_id)
+            if blob is None:
+                return Response({'error': 'قالب یافت نشد'}, status=status.HTTP_404_NOT_FOUND)
+
+            # بررسی دسترسی: قالب عمومی یا ایجاد شده توسط کاربر
+            if not blob['is_featured'] and blob['creator_id'] != request.user.pk and not request.user.is_staff:
+                return Response({'error': 'دسترسی غیرمجاز'}, status=status.HTTP_403_FORBIDDEN)
+
+            if etag_matches(request, etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = Response(blob['tree'])
+            response['ETag'] = etag
+            return response
+        except Exception as e:
+            log_error("Error retrieving template tree", e)
+            return Response({'error': 'خطا در دریافت درخت قالب'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class QuoteView(APIView):
+    """API قیمت‌گذاری دسته‌ای پیکربندی‌های قالب با جدول‌های قیمت کامپایل‌شده"""
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(summary="قیمت‌گذاری دسته‌ای پیکربندی‌های قالب", request=QuoteRequestSerializer)
+    def post(self, request):
+        """قیمت هر پیکربندی یا خطاهای آن به ترتیب ورودی"""
+        serializer = QuoteRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            results = pricing.quote(serializer.validated_data['configurations'], request.user)
+            return Response({'results': results})
+        except Exception as e:
+            log_error("Error quoting template configurations", e)
+            return Response({'error': 'خطا در محاسبه قیمت'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 # نمایش‌ها برای بخش‌ها
 
 class SectionListCreateView(APIView):
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import Tender, TenderBid
-from apps.core.utils import to_jalali
+from apps.core.serializers import JalaliDateTimeField, JalaliListSerializer
 from apps.business.serializers import BusinessSerializer
 from apps.designs.serializers import DesignSerializer
 from apps.business.models import Business
@@ -13,11 +13,12 @@ class TenderBidSerializer(serializers.ModelSerializer):
     proposed_design_ids = serializers.PrimaryKeyRelatedField(
         write_only=True, source='proposed_designs', queryset=Design.objects.all(), many=True, required=False
     )
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
 
     class Meta:
         model = TenderBid
+        list_serializer_class = JalaliListSerializer
         fields = [
             'id', 'tender', 'business', 'business_id', 'proposed_price', 'description',
             'delivery_time', 'status', 'proposed_designs', 'proposed_design_ids',
@@ -25,12 +26,6 @@ class TenderBidSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['tender', 'status']
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
 class TenderSerializer(serializers.ModelSerializer):
     created_by = serializers.StringRelatedField()
     winner = BusinessSerializer(read_only=True)
@@ -38,12 +33,13 @@ class TenderSerializer(serializers.ModelSerializer):
     winning_bid = TenderBidSerializer(read_only=True)
     winning_bid_id = serializers.PrimaryKeyRelatedField(write_only=True, source='winning_bid', queryset=TenderBid.objects.all(), required=False)
     bids = TenderBidSerializer(many=True, read_only=True)
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
-    deadline_jalali = serializers.SerializerMethodField()
+    created_at = JalaliDateTimeField()
+    updated_at = JalaliDateTimeField()
+    deadline_jalali = JalaliDateTimeField(source='deadline')
 
     class Meta:
         model = Tender
+        list_serializer_class = JalaliListSerializer
         fields = [
             'id', 'title', 'description', 'tender_type', 'created_by', 'status',
             'deadline', 'deadline_jalali', 'budget_min', 'budget_max',
@@ -53,15 +49,6 @@ class TenderSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_by']
 
-    def get_created_at(self, obj):
-        return to_jalali(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return to_jalali(obj.updated_at)
-
-    def get_deadline_jalali(self, obj):
-        return to_jalali(obj.deadline)
-
     def validate(self, data):
         """اعتبارسنجی داده‌های مناقصه"""
         if 'budget_min' in data and 'budget_max' in data:
@@ -80,4 +67,4 @@ class TenderSerializer(serializers.ModelSerializer):
                     'required_design_count': 'برای مناقصه چاپ نمی‌توان تعداد طرح تعیین کرد'
                 })
         
-        return data 
\ No newline at end of file
+        return data
\ No newline at end of file
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 from datetime import timedelta
 
@@ -26,6 +27,9 @@ SECRET_KEY = 'django-insecure-4t_rmxc30_tvo*=_#p$q3ed1&78h7tamx^p61gtbjj%wl23p$x
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# اجرای تست‌ها با manage.py test یا pytest
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
 ALLOWED_HOSTS = ['*']  # برای توسعه - در پروداکشن باید محدود شود
 
 # تنظیم اسلش پایانی
@@ -74,6 +78,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -172,6 +177,16 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'apps.core.ratelimit.UserRateThrottle',
+    ],
+}
+
+# نرخ‌های محدودسازی درخواست (apps.core.ratelimit) به تفکیک scope
+RATE_LIMITS = {
+    'user': '5000/hour',
+    'reports.generate': '30/hour',
+    'designs.batch_upload': '20/hour',
 }
 
 # تنظیمات کش
@@ -205,6 +220,56 @@ CHANNEL_LAYERS = {
     }
 }
 
+# تنظیمات اجرای پس‌زمینه گزارش‌ها
+REPORT_JOB_WORKERS = 2
+REPORT_JOB_TIMEOUT_SECONDS = 30 * 60
+# فاصله ایمنی بازخوانی تدریجی گزارش‌ها از زمان حال (برای تراکنش‌های در حال commit)
+REPORT_REFRESH_LAG_SECONDS = 60
+
+# مدت اعتبار کش پاسخ‌های داشبورد به ثانیه (ابطال با سیگنال‌ها انجام می‌شود)
+DASHBOARD_CACHE_TIMEOUT = 5 * 60
+# تعداد ردیف‌های هر جدول رتبه‌بندی داشبورد
+LEADERBOARD_SIZE = 10
+
+# ثبت دسته‌ای لاگ‌های API در thread پس‌زمینه
+API_LOG_SAMPLE_RATE = 1.0
+API_LOG_QUEUE_SIZE = 10000
+API_LOG_BATCH_SIZE = 500
+API_LOG_FLUSH_INTERVAL = 1.0
+API_LOG_MAX_BODY_CHARS = 4096
+API_LOG_SKIP_BODY_BYTES = 64 * 1024
+# در تست‌ها لاگ در همان درخواست و تراکنش تست نوشته می‌شود (بدون thread پس‌زمینه)
+API_LOG_EAGER = TESTING
+# تجمیع و دوره نگهداری لاگ‌های API (دستور rollup_api_logs)
+API_LOG_ROLLUP_LAG_SECONDS = 120
+API_LOG_RETENTION_DAYS = 30
+API_LOG_MINUTE_ROLLUP_RETENTION_DAYS = 7
+API_LOG_HOUR_ROLLUP_RETENTION_DAYS = 365
+API_LOG_PURGE_CHUNK_SIZE = 5000
+# کش درون‌فرایندی کلیدهای API (ابطال با سیگنال‌ها انجام می‌شود)
+API_KEY_CACHE_TTL = 60
+API_KEY_CACHE_SIZE = 10000
+API_KEY_LAST_USED_INTERVAL = 60
+# نوشتن دسته‌ای شمارنده‌های بازدید و استفاده (apps.core.counters)
+COUNTER_FLUSH_INTERVAL = 5
+COUNTER_MAX_PENDING = 10000
+COUNTERS_EAGER = TESTING
+# ورود دسته‌ای سفارش‌ها (apps.orders.bulk_import)
+ORDER_IMPORT_BATCH_SIZE = 500
+ORDER_IMPORT_MAX_ROWS = 10000
+# انتقال دسته‌ای وضعیت سفارش‌ها (apps.orders.state_machine)
+ORDER_BULK_TRANSITION_MAX = 1000
+# جدول‌های قیمت کامپایل‌شده و قیمت‌گذاری دسته‌ای قالب‌ها (apps.templates_app.pricing)
+TEMPLATE_PRICE_TABLE_TIMEOUT = 3600
+TEMPLATE_QUOTE_MAX_CONFIGURATIONS = 500
+# کش درخت قالب برای ویرایشگر (apps.templates_app.tree)
+TEMPLATE_TREE_CACHE_TIMEOUT = 3600
+# اندازه‌گیری کارایی درخواست‌ها و هدر Server-Timing (apps.core.instrumentation)
+PERFORMANCE_INSTRUMENTATION = True
+SERVER_TIMING_HEADER = True
+PERFORMANCE_LOG_REQUESTS = False
+PERFORMANCE_SLOW_REQUEST_MS = 500
+
 # تنظیمات فایل‌های استاتیک
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'